@@ -0,0 +1 @@
+"""Benchmarks for the KeshFlip SDK"""
@@ -0,0 +1,131 @@
+"""
+Throughput, latency and HTTP exchanges with and without micro-batching
+
+Runs ``--concurrency`` callers making ``crypto.deposits.create`` calls, then
+``crypto.balances.get`` reads spread over ``--assets`` distinct balances,
+against the mock server with ``--latency`` seconds of service time per HTTP
+request. Each workload runs without batching and with every combination of
+``--windows`` and ``--max-batch``, sending batches to the mock's batch
+endpoint; reads also run with ``batch_path=None``, which only collapses
+duplicate reads. Reports calls/s, p50/p99 latency and
+HTTP requests the server received per call.
+
+Usage:
+    python -m benchmarks.bench_batching
+    python -m benchmarks.bench_batching --windows 0.001,0.005 --max-batch 20,100
+    python -m benchmarks.bench_batching --inproc --concurrency 500
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Dict, List, Optional
+
+from src.batching import MicroBatchPolicy
+
+from .harness import MockEnvironment, run_benchmark
+
+# Batch endpoint emulated by the mock server
+BATCH_PATH = "/api/v1/batch"
+
+ASSETS = ["USDC", "USDT", "ETH", "DAI", "WBTC", "MATIC", "LINK", "UNI"]
+
+
+async def measure(
+    workload: str, label: str, policy: Optional[MicroBatchPolicy], args
+) -> Dict:
+    options = {"micro_batching": policy} if policy is not None else {}
+    async with MockEnvironment(
+        inproc=args.inproc, max_connections=args.concurrency, **options
+    ) as env:
+        assets = ASSETS[: args.assets]
+        for asset in assets:
+            env.server.set_balance(env.client.partner_id, "1", asset, "1000000")
+        env.server.inject(latency=args.latency)
+        client = env.client
+
+        if workload == "create":
+
+            def call(i: int):
+                return client.crypto.deposits.create(
+                    asset="USDC", chain_id="1", amount="1.00", idempotency_key=f"b{i}"
+                )
+
+        else:
+
+            def call(i: int):
+                return client.crypto.balances.get("1", assets[i % len(assets)])
+
+        before = env.server.requests
+        result = await run_benchmark(
+            label,
+            call,
+            concurrency=args.concurrency,
+            calls=args.calls,
+            warmup=0,
+            allocations=False,
+        )
+        http_requests = env.server.requests - before
+        return {
+            **result._asdict(),
+            "workload": workload,
+            "http_per_call": http_requests / args.calls,
+        }
+
+
+def policies(args, workload: str) -> List:
+    runs = [("no batching", None)]
+    for window in [float(w) for w in args.windows.split(",")]:
+        for max_batch in [int(n) for n in args.max_batch.split(",")]:
+            runs.append(
+                (
+                    f"{window * 1000:g}ms / {max_batch}",
+                    MicroBatchPolicy(
+                        window=window, max_batch=max_batch, batch_path=BATCH_PATH
+                    ),
+                )
+            )
+    if workload == "read":
+        window = float(args.windows.split(",")[0])
+        runs.append(
+            (
+                f"collapse only {window * 1000:g}ms",
+                MicroBatchPolicy(window=window, batch_path=None),
+            )
+        )
+    return runs
+
+
+async def main(args):
+    results = []
+    for workload in ("create", "read"):
+        for label, policy in policies(args, workload):
+            results.append(await measure(workload, label, policy, args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    header = (
+        f"{'workload':<8} {'window / max batch':<22} {'calls/s':>9} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'err':>5} {'http/call':>10}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in results:
+        print(
+            f"{r['workload']:<8} {r['name']:<22} {r['calls_per_second']:>9.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>5} "
+            f"{r['http_per_call']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=3000, help="calls per run")
+    parser.add_argument("--concurrency", type=int, default=100, help="callers")
+    parser.add_argument("--assets", type=int, default=4, help="distinct balances")
+    parser.add_argument("--latency", type=float, default=0.002, help="service time")
+    parser.add_argument("--windows", default="0.0005,0.002,0.005", help="seconds")
+    parser.add_argument("--max-batch", default="10,50", help="comma-separated")
+    parser.add_argument("--inproc", action="store_true", help="skip TCP sockets")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
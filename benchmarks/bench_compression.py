@@ -0,0 +1,184 @@
+"""
+CPU cost versus bytes saved for each available content encoding
+
+Part one compresses and decompresses synthetic deposit listings of several
+sizes with every installed codec and level. Part two lists deposits from the
+mock server with each encoding negotiated and reports throughput and bytes on
+the wire per request.
+
+Usage:
+    python -m benchmarks.bench_compression
+    python -m benchmarks.bench_compression --rows 10,100,1000 --calls 300
+    python -m benchmarks.bench_compression --codecs-only
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from src.compression import (
+    BROTLI,
+    GZIP,
+    ZSTD,
+    CompressionPolicy,
+    available_encodings,
+    compress,
+    decompress,
+)
+
+from .harness import MockEnvironment, run_benchmark
+
+LEVELS = {GZIP: [1, 6, 9], BROTLI: [1, 5, 11], ZSTD: [1, 3, 19]}
+
+
+def listing_payload(rows: int) -> bytes:
+    """JSON body of a deposit listing with ``rows`` records"""
+    data = [
+        {
+            "id": f"{i:024x}",
+            "depositId": f"{i:024x}",
+            "partnerId": "bench_partner",
+            "asset": "USDC",
+            "chainId": "1",
+            "amount": f"{10 + i % 997}.{i % 100:02d}",
+            "currency": "USD",
+            "reference": f"order_{i}",
+            "address": "0x" + f"{i * 2654435761 % 2**160:040x}",
+            "status": "PENDING",
+            "createdAt": "2024-01-01T00:00:00.000Z",
+            "expiresAt": "2024-01-01T01:00:00.000Z",
+        }
+        for i in range(rows)
+    ]
+    return json.dumps({"success": True, "data": data, "total": rows}).encode()
+
+
+def time_codec(payload: bytes, encoding: str, level: int, rounds: int) -> Dict:
+    """Average compress/decompress time and ratio of one codec setting"""
+    start = time.perf_counter()
+    for _ in range(rounds):
+        compressed = compress(payload, encoding, level)
+    compress_ms = (time.perf_counter() - start) / rounds * 1000
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decompress(compressed, encoding)
+    decompress_ms = (time.perf_counter() - start) / rounds * 1000
+
+    return {
+        "encoding": encoding,
+        "level": level,
+        "raw_bytes": len(payload),
+        "wire_bytes": len(compressed),
+        "ratio": len(payload) / len(compressed),
+        "compress_ms": compress_ms,
+        "decompress_ms": decompress_ms,
+    }
+
+
+def codec_table(rows_levels: List[int], rounds: int) -> List[Dict]:
+    results = []
+    for rows in rows_levels:
+        payload = listing_payload(rows)
+        for encoding in available_encodings():
+            for level in LEVELS[encoding]:
+                results.append(time_codec(payload, encoding, level, rounds))
+    return results
+
+
+def format_codecs(results: List[Dict]) -> str:
+    header = (
+        f"{'encoding':<8} {'level':>5} {'raw B':>10} {'wire B':>10} "
+        f"{'ratio':>7} {'comp ms':>9} {'decomp ms':>10}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['encoding']:<8} {r['level']:>5} {r['raw_bytes']:>10} "
+            f"{r['wire_bytes']:>10} {r['ratio']:>7.2f} {r['compress_ms']:>9.3f} "
+            f"{r['decompress_ms']:>10.3f}"
+        )
+    return "\n".join(lines)
+
+
+async def end_to_end(rows: int, calls: int, concurrency: int) -> List[Dict]:
+    results = []
+    for encoding in ["identity"] + available_encodings():
+        policy = CompressionPolicy(accept=[encoding])
+        async with MockEnvironment(compression=policy) as env:
+            client = env.client
+            for i in range(rows):
+                await client.crypto.deposits.create(
+                    asset="USDC",
+                    chain_id="1",
+                    amount="10.00",
+                    idempotency_key=f"dep_{i}",
+                    reference=f"order_{i}",
+                )
+            before = policy.stats()
+            result = await run_benchmark(
+                f"list {rows} rows ({encoding})",
+                lambda i: client.crypto.deposits.list(limit=rows),
+                concurrency=concurrency,
+                calls=calls,
+                allocations=False,
+            )
+            after = policy.stats()
+            received, decoded = (
+                after[key] - before[key]
+                for key in ("response_bytes_received", "response_bytes_decoded")
+            )
+            requests = result.calls + 20  # warmup calls are counted too
+            results.append(
+                {
+                    **result._asdict(),
+                    "encoding": encoding,
+                    "wire_bytes_per_call": received / requests,
+                    "response_savings": 1.0 - received / decoded if decoded else 0.0,
+                }
+            )
+    return results
+
+
+def format_end_to_end(results: List[Dict]) -> str:
+    header = (
+        f"{'benchmark':<28} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'wire B/call':>12} {'saved':>7}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['name']:<28} {r['calls_per_second']:>9.1f} {r['p50_ms']:>8.2f} "
+            f"{r['p99_ms']:>8.2f} {r['wire_bytes_per_call']:>12.0f} "
+            f"{r['response_savings']:>6.0%}"
+        )
+    return "\n".join(lines)
+
+
+async def main(args):
+    rows_levels = [int(rows) for rows in args.rows.split(",")]
+    codecs = codec_table(rows_levels, args.rounds)
+    served = []
+    if not args.codecs_only:
+        for rows in rows_levels:
+            served.extend(await end_to_end(rows, args.calls, args.concurrency))
+
+    if args.json:
+        print(json.dumps({"codecs": codecs, "end_to_end": served}, indent=2))
+        return
+    print(format_codecs(codecs))
+    if served:
+        print("\n" + format_end_to_end(served))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", default="10,100,500", help="comma-separated sizes")
+    parser.add_argument("--rounds", type=int, default=50, help="codec repetitions")
+    parser.add_argument("--calls", type=int, default=300, help="calls per encoding")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--codecs-only", action="store_true", help="skip the server")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""
+Latency and overload behaviour with and without adaptive concurrency limiting
+
+Runs many concurrent workers against a mock server that serves a fixed
+number of requests at once (``--capacity``) with ``--latency`` seconds of
+service time, so extra concurrency only adds queueing delay. Each run is
+repeated without a limiter and with the AIMD and gradient algorithms, and
+reports client latency, the server's peak in-flight requests and the limit
+the limiter settled on. ``--error-rate`` additionally fails a share of
+requests with 429 to show the multiplicative backoff.
+
+Usage:
+    python -m benchmarks.bench_concurrency
+    python -m benchmarks.bench_concurrency --workers 200 --capacity 20
+    python -m benchmarks.bench_concurrency --error-rate 0.05
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Dict, List
+
+from src.resilience import AdaptiveConcurrencyLimiter, AIMDLimit, GradientLimit
+
+from .harness import MockEnvironment, run_benchmark
+
+ALGORITHMS = {
+    "none": None,
+    "aimd": AIMDLimit,
+    "gradient": GradientLimit,
+}
+
+
+async def measure(name: str, args) -> Dict:
+    algorithm = ALGORITHMS[name]
+    limiter = None
+    options = {}
+    if algorithm is not None:
+        limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=args.initial_limit,
+            max_limit=args.workers,
+            algorithm=algorithm(),
+        )
+        options["concurrency_limiter"] = limiter
+
+    async with MockEnvironment(
+        inproc=True, max_connections=args.workers, **options
+    ) as env:
+        env.server.capacity = args.capacity
+        env.server.inject(latency=args.latency)
+        if args.error_rate:
+            env.server.inject(error_rate=args.error_rate, error_status=429)
+        client = env.client
+        result = await run_benchmark(
+            f"{name} (capacity {args.capacity})",
+            lambda i: client.crypto.balances.get("1", "USDC"),
+            concurrency=args.workers,
+            calls=args.calls,
+            warmup=0,
+            allocations=False,
+        )
+        stats = limiter.stats() if limiter is not None else {}
+        return {
+            **result._asdict(),
+            "server_peak_in_flight": env.server.peak_in_flight,
+            "final_limit": stats.get("limit"),
+            "decreases": stats.get("decreases"),
+        }
+
+
+def format_results(results: List[Dict]) -> str:
+    header = (
+        f"{'benchmark':<24} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'err':>5} {'srv peak':>9} {'limit':>6}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        limit = r["final_limit"] if r["final_limit"] is not None else "-"
+        lines.append(
+            f"{r['name']:<24} {r['calls_per_second']:>8.1f} {r['p50_ms']:>8.1f} "
+            f"{r['p99_ms']:>8.1f} {r['errors']:>5} "
+            f"{r['server_peak_in_flight']:>9} {limit:>6}"
+        )
+    return "\n".join(lines)
+
+
+async def main(args):
+    names = list(ALGORITHMS) if args.algorithm == "all" else [args.algorithm]
+    results = [await measure(name, args) for name in names]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=100, help="caller tasks")
+    parser.add_argument("--calls", type=int, default=2000, help="total calls")
+    parser.add_argument("--capacity", type=int, default=10, help="server slots")
+    parser.add_argument("--latency", type=float, default=0.02, help="service time")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 share")
+    parser.add_argument("--initial-limit", type=int, default=20)
+    parser.add_argument(
+        "--algorithm", choices=["all"] + list(ALGORITHMS), default="all"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,214 @@
+"""
+Per-call overhead of encoding create requests, model path versus encoders
+
+Part one times body encoding alone for each create endpoint. It compares
+the previous path (build the pydantic model, ``model_dump`` it, then
+``json.dumps``) with the precompiled encoder, with and without validation.
+Part two times full ``create`` calls through a transport that answers
+instantly, so signing, httpx and response parsing are included but no
+network or server time is.
+
+Usage:
+    python -m benchmarks.bench_encoding
+    python -m benchmarks.bench_encoding --calls 20000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List
+
+import httpx
+
+from src import KeshFlipClient
+from src.models import (
+    CRYPTO_DEPOSIT_ENCODER,
+    CRYPTO_WITHDRAWAL_ENCODER,
+    FIAT_DEPOSIT_ENCODER,
+    CryptoDepositRequest,
+    CryptoWithdrawalRequest,
+    CryptoWithdrawalResponse,
+    FiatDepositRequest,
+)
+
+from .harness import API_KEY, API_SECRET, PARTNER_ID
+
+ADDRESS = "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0"
+
+CASES = {
+    "crypto deposit": (
+        CryptoDepositRequest,
+        CRYPTO_DEPOSIT_ENCODER,
+        {
+            "partner_id": PARTNER_ID,
+            "asset": "USDC",
+            "chain_id": "1",
+            "amount": "100.00",
+            "idempotency_key": "deposit_001",
+            "currency": "USD",
+            "reference": "order_001",
+        },
+    ),
+    "crypto withdrawal": (
+        CryptoWithdrawalRequest,
+        CRYPTO_WITHDRAWAL_ENCODER,
+        {
+            "partner_id": PARTNER_ID,
+            "asset": "USDC",
+            "chain_id": "1",
+            "amount": "50.00",
+            "to_address": ADDRESS,
+            "idempotency_key": "withdrawal_001",
+            "reference": None,
+        },
+    ),
+    "fiat deposit": (
+        FiatDepositRequest,
+        FIAT_DEPOSIT_ENCODER,
+        {
+            "partner_id": PARTNER_ID,
+            "provider": "EVC",
+            "customer_number": "+252612345678",
+            "amount": "25.00",
+            "idempotency_key": "fiat_001",
+            "currency": "USD",
+            "reference": None,
+        },
+    ),
+}
+
+RESPONSE = json.dumps(
+    {
+        "success": True,
+        "depositId": "dep_1",
+        "withdrawalId": "wd_1",
+        "status": "PENDING",
+        "address": ADDRESS,
+        "asset": "USDC",
+        "chainId": "1",
+        "amount": "100.00",
+        "expiresAt": "2024-01-01T01:00:00.000Z",
+        "provider": "EVC",
+        "customerNumber": "+252612345678",
+        "currency": "USD",
+    }
+).encode()
+
+
+def time_us(call: Callable[[], object], calls: int) -> float:
+    """Average microseconds per call"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        call()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def encoding_table(calls: int) -> List[Dict]:
+    results = []
+    for name, (model, encoder, values) in CASES.items():
+        legacy = time_us(
+            lambda: json.dumps(
+                model(**values).model_dump(by_alias=True, exclude_none=True)
+            ).encode(),
+            calls,
+        )
+        fast = time_us(lambda: encoder.encode(values), calls)
+        trusted = time_us(lambda: encoder.encode(values, validate=False), calls)
+        results.append(
+            {
+                "request": name,
+                "model_us": legacy,
+                "encoder_us": fast,
+                "no_validation_us": trusted,
+                "speedup": legacy / fast,
+            }
+        )
+    return results
+
+
+def make_client(**options) -> KeshFlipClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=RESPONSE)
+
+    base_url = "http://bench.keshpay.local"
+    http_client = httpx.AsyncClient(
+        base_url=base_url, transport=httpx.MockTransport(handler)
+    )
+    return KeshFlipClient(
+        API_KEY,
+        API_SECRET,
+        base_url=base_url,
+        partner_id=PARTNER_ID,
+        http_client=http_client,
+        **options,
+    )
+
+
+async def call_table(calls: int) -> List[Dict]:
+    client = make_client()
+    trusted_client = make_client(validate_requests=False)
+    model, _, values = CASES["crypto withdrawal"]
+    path = "/api/v1/crypto/withdrawals"
+    kwargs = {k: v for k, v in values.items() if k != "partner_id"}
+
+    async def legacy():
+        request = model(**values)
+        response = await client.request(
+            "POST",
+            path,
+            json_data=request.model_dump(by_alias=True, exclude_none=True),
+        )
+        return CryptoWithdrawalResponse(**response)
+
+    variants = [
+        ("model + json_data", legacy),
+        ("encoder", lambda: client.crypto.withdrawals.create(**kwargs)),
+        (
+            "encoder, no validation",
+            lambda: trusted_client.crypto.withdrawals.create(**kwargs),
+        ),
+    ]
+    results = []
+    for name, call in variants:
+        for _ in range(100):
+            await call()
+        start = time.perf_counter()
+        for _ in range(calls):
+            await call()
+        results.append(
+            {"path": name, "us_per_call": (time.perf_counter() - start) / calls * 1e6}
+        )
+    await client._http_client.aclose()
+    await trusted_client._http_client.aclose()
+    return results
+
+
+async def main(args):
+    encoding = encoding_table(args.calls)
+    end_to_end = await call_table(max(1, args.calls // 10))
+    if args.json:
+        print(json.dumps({"encoding": encoding, "calls": end_to_end}, indent=2))
+        return
+
+    header = (
+        f"{'request':<18} {'model us':>9} {'encoder us':>11} "
+        f"{'no-valid us':>12} {'speedup':>8}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in encoding:
+        print(
+            f"{r['request']:<18} {r['model_us']:>9.2f} {r['encoder_us']:>11.2f} "
+            f"{r['no_validation_us']:>12.2f} {r['speedup']:>7.1f}x"
+        )
+    header = f"{'withdrawal create path':<24} {'us/call':>9}"
+    print("\n" + header + "\n" + "-" * len(header))
+    for r in end_to_end:
+        print(f"{r['path']:<24} {r['us_per_call']:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50000, help="encodings timed")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
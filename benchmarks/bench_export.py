@@ -0,0 +1,146 @@
+"""
+Columnar export throughput and memory
+
+Exports ``--rows`` synthetic crypto deposits to CSV, Arrow and Parquet and
+reports rows/s and peak traced memory per format. With ``--source api`` the
+deposits are seeded into the mock server and exported through the streamed
+listing endpoint (``export_listing``); with ``--source records`` (default)
+they are read from memory, isolating the writer. Peak memory should stay
+flat as ``--rows`` grows and scale with ``--batch-size`` instead.
+
+Usage:
+    python -m benchmarks.bench_export
+    python -m benchmarks.bench_export --rows 1000000 --formats parquet
+    python -m benchmarks.bench_export --source api --rows 100000 --inproc
+"""
+
+import argparse
+import asyncio
+import gc
+import itertools
+import json
+import os
+import random
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List
+
+from src.export import CRYPTO_DEPOSITS, export_listing, export_records
+
+from .harness import PARTNER_ID, MockEnvironment
+
+STATUSES = ["PENDING", "CONFIRMED", "EXPIRED", "FAILED"]
+ASSETS = ["USDC", "USDT", "ETH"]
+CHAINS = ["1", "137", "8453"]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+POOL = 10000
+
+
+def synthetic_deposits(count: int, seed: int = 1) -> Iterator[dict]:
+    rng = random.Random(seed)
+    for i in range(count):
+        created = EPOCH + timedelta(seconds=i * 30)
+        deposit_id = f"c{i:023x}"
+        yield {
+            "id": deposit_id,
+            "depositId": deposit_id,
+            "partnerId": PARTNER_ID,
+            "asset": rng.choice(ASSETS),
+            "chainId": rng.choice(CHAINS),
+            "amount": f"{rng.uniform(1, 1000):.6f}",
+            "currency": "USD",
+            "reference": f"order-{i}",
+            "address": "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0",
+            "status": rng.choices(STATUSES, weights=[2, 6, 1, 1])[0],
+            "createdAt": created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "expiresAt": (created + timedelta(hours=1)).strftime(
+                "%Y-%m-%dT%H:%M:%S.000Z"
+            ),
+        }
+
+
+async def export(args, path: str, env, pool: List[dict]):
+    if env is not None:
+        return await export_listing(
+            env.client,
+            CRYPTO_DEPOSITS,
+            path,
+            limit=args.rows,
+            batch_size=args.batch_size,
+        )
+    # Repeating a small pool keeps record generation out of the measurement
+    records = itertools.islice(itertools.cycle(pool), args.rows)
+    return await export_records(
+        records, CRYPTO_DEPOSITS, path, batch_size=args.batch_size
+    )
+
+
+async def export_once(args, fmt: str, directory: str, env, pool: List[dict]) -> Dict:
+    path = os.path.join(directory, f"deposits.{fmt}")
+    # Throughput is timed without tracemalloc, which slows allocation down
+    stats = await export(args, path, env, pool)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await export(args, path, env, pool)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "format": fmt,
+        "source": args.source,
+        "rows": stats.rows,
+        "batches": stats.batches,
+        "seconds": stats.seconds,
+        "rows_per_second": stats.rows_per_second,
+        "peak_mib": peak / 2**20,
+        "file_mib": os.path.getsize(path) / 2**20,
+    }
+
+
+async def main(args) -> List[Dict]:
+    formats = args.formats.split(",")
+    pool = list(synthetic_deposits(min(POOL, args.rows)))
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        if args.source == "api":
+            async with MockEnvironment(inproc=args.inproc) as env:
+                for record in synthetic_deposits(args.rows):
+                    env.server.crypto_deposits[record["id"]] = record
+                for fmt in formats:
+                    results.append(await export_once(args, fmt, directory, env, pool))
+        else:
+            for fmt in formats:
+                results.append(await export_once(args, fmt, directory, None, pool))
+    return results
+
+
+def report(results: List[Dict], as_json: bool):
+    if as_json:
+        print(json.dumps(results, indent=2))
+        return
+    header = (
+        f"{'format':<8} {'source':<8} {'rows':>9} {'batches':>8} "
+        f"{'rows/s':>11} {'peak MiB':>9} {'file MiB':>9}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in results:
+        print(
+            f"{r['format']:<8} {r['source']:<8} {r['rows']:>9} {r['batches']:>8} "
+            f"{r['rows_per_second']:>11.0f} {r['peak_mib']:>9.1f} {r['file_mib']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument(
+        "--formats", default="csv,arrow,parquet", help="comma-separated"
+    )
+    parser.add_argument("--source", choices=["records", "api"], default="records")
+    parser.add_argument("--inproc", action="store_true", help="in-process transport")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    args = parser.parse_args()
+    report(asyncio.run(main(args)), args.json)
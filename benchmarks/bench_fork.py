@@ -0,0 +1,171 @@
+"""
+Clients in forked children and per-worker warm clients in a process pool
+
+Part one creates a client in the parent, uses it, then forks ``--processes``
+children that keep using the inherited client (as under gunicorn
+``--preload``). Each child reports errors, the latency of its first call,
+which replaces the parent's connections, and the median of the following
+calls.
+
+Part two runs ``--tasks`` tasks of ``--calls`` calls each in a process pool,
+once building a client per task and once with ClientProcessPool's warm
+client per worker, and reports tasks/s and task latency.
+
+The mock server runs on a thread of the parent process.
+
+Usage:
+    python -m benchmarks.bench_fork
+    python -m benchmarks.bench_fork --processes 8 --tasks 400 --calls 5
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import multiprocessing
+import threading
+import time
+from typing import Dict, List
+
+from src import KeshFlipClient
+from src.process_pool import ClientProcessPool
+from src.testing import MockKeshPayServer
+
+from .harness import API_KEY, API_SECRET, PARTNER_ID, percentile
+
+
+def make_client(url: str) -> KeshFlipClient:
+    return KeshFlipClient(API_KEY, API_SECRET, base_url=url, partner_id=PARTNER_ID)
+
+
+async def calls(client: KeshFlipClient, count: int) -> List[float]:
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.crypto.balances.list()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def warm_task(client: KeshFlipClient, count: int) -> float:
+    start = time.perf_counter()
+    await calls(client, count)
+    return time.perf_counter() - start
+
+
+async def cold_task(client: KeshFlipClient, url: str, count: int) -> float:
+    # What callers do without a pool: a new client (and connection) per task
+    start = time.perf_counter()
+    async with make_client(url) as own:
+        await calls(own, count)
+    return time.perf_counter() - start
+
+
+def start_server() -> MockKeshPayServer:
+    server = MockKeshPayServer()
+    server.add_partner(PARTNER_ID, API_KEY, API_SECRET)
+    server.set_balance(PARTNER_ID, "1", "USDC", "1000000000")
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+    return server
+
+
+def forked_child(client: KeshFlipClient, count: int, results):
+    async def run():
+        errors = 0
+        latencies = []
+        for _ in range(count):
+            try:
+                latencies += await calls(client, 1)
+            except Exception:
+                errors += 1
+        return errors, latencies
+
+    errors, latencies = asyncio.run(run())
+    results.put((errors, latencies))
+
+
+def fork_run(args, url: str) -> Dict:
+    # Created and used before the fork, like a module-level client
+    client = make_client(url)
+    parent = asyncio.new_event_loop()
+    parent.run_until_complete(calls(client, 5))
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    children = [
+        context.Process(target=forked_child, args=(client, args.calls * 10, results))
+        for _ in range(args.processes)
+    ]
+    for child in children:
+        child.start()
+    outcomes = [results.get() for _ in children]
+    for child in children:
+        child.join()
+    parent.run_until_complete(client.close())
+    parent.close()
+
+    first = sorted(latencies[0] for _, latencies in outcomes if latencies)
+    rest = sorted(x for _, latencies in outcomes for x in latencies[1:])
+    return {
+        "processes": args.processes,
+        "errors": sum(errors for errors, _ in outcomes),
+        "first_call_p50_ms": percentile(first, 0.5) * 1000,
+        "later_calls_p50_ms": percentile(rest, 0.5) * 1000,
+    }
+
+
+def pool_run(args, url: str, warm: bool) -> Dict:
+    factory = functools.partial(make_client, url)
+    with ClientProcessPool(
+        factory, processes=args.processes, warmup_connections=1 if warm else 0
+    ) as pool:
+        pool.warmup_timings()  # start every worker before timing
+        start = time.perf_counter()
+        if warm:
+            futures = [pool.submit(warm_task, args.calls) for _ in range(args.tasks)]
+        else:
+            futures = [
+                pool.submit(cold_task, url, args.calls) for _ in range(args.tasks)
+            ]
+        durations = sorted(future.result() for future in futures)
+        elapsed = time.perf_counter() - start
+    return {
+        "client": "warm per worker" if warm else "new per task",
+        "tasks": args.tasks,
+        "tasks_per_second": args.tasks / elapsed,
+        "p50_ms": percentile(durations, 0.5) * 1000,
+        "p99_ms": percentile(durations, 0.99) * 1000,
+    }
+
+
+def main(args):
+    server = start_server()
+    fork = fork_run(args, server.url)
+    pools = [pool_run(args, server.url, warm) for warm in (False, True)]
+    if args.json:
+        print(json.dumps({"fork": fork, "pool": pools}, indent=2))
+        return
+
+    print(
+        f"Forked children: {fork['processes']}, errors {fork['errors']}, "
+        f"first call p50 {fork['first_call_p50_ms']:.2f} ms, "
+        f"later calls p50 {fork['later_calls_p50_ms']:.2f} ms\n"
+    )
+    header = f"{'client':<16} {'tasks':>6} {'tasks/s':>9} {'p50 ms':>8} {'p99 ms':>8}"
+    print(header + "\n" + "-" * len(header))
+    for r in pools:
+        print(
+            f"{r['client']:<16} {r['tasks']:>6} {r['tasks_per_second']:>9.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4, help="workers")
+    parser.add_argument("--tasks", type=int, default=200, help="pool tasks")
+    parser.add_argument("--calls", type=int, default=3, help="calls per task")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    main(parser.parse_args())
@@ -0,0 +1,180 @@
+"""
+Payout runs with and without a local balance reservation ledger
+
+Part one runs ``--workers`` concurrent payout workers creating
+``--payouts`` withdrawals against a balance that covers ``--coverage`` of
+them, once without a ledger (the server rejects the overdrafts) and once
+with a memory and a SQLite ledger (overdrafts are refused locally). It
+reports API requests, server rejections, local refusals and time.
+
+Part two has ``--processes`` processes reserve and settle against one
+SQLite ledger file and reports operations/s and lock contention.
+
+Usage:
+    python -m benchmarks.bench_ledger
+    python -m benchmarks.bench_ledger --workers 64 --coverage 0.5 --processes 8
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from src import InsufficientBalanceError, ValidationError
+from src.ledger import (
+    BalanceLedger,
+    BalanceStore,
+    MemoryBalanceStore,
+    SQLiteBalanceStore,
+    balance_key,
+)
+
+from .harness import PARTNER_ID, MockEnvironment
+
+ADDRESS = "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0"
+AMOUNT = "10.00"
+
+
+async def payout_run(args, name: str, store: Optional[BalanceStore]) -> Dict:
+    balance = Decimal(AMOUNT) * int(args.payouts * args.coverage)
+    async with MockEnvironment(inproc=args.inproc) as env:
+        env.server.set_balance(PARTNER_ID, "1", "USDC", str(balance))
+        client = env.client
+        ledger = None
+        if store is not None:
+            ledger = BalanceLedger(client, store)
+            await ledger.refresh()
+        queue = iter(range(args.payouts))
+        counts = {"created": 0, "server_rejected": 0, "refused": 0}
+
+        async def worker():
+            for i in queue:
+                try:
+                    await client.crypto.withdrawals.create(
+                        asset="USDC",
+                        chain_id="1",
+                        amount=AMOUNT,
+                        to_address=ADDRESS,
+                        idempotency_key=f"{name}-{i}",
+                    )
+                    counts["created"] += 1
+                except InsufficientBalanceError:
+                    counts["refused"] += 1
+                except ValidationError:
+                    counts["server_rejected"] += 1
+
+        requests = env.server.requests
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.workers)))
+        elapsed = time.perf_counter() - start
+        result = {
+            "ledger": name,
+            "payouts": args.payouts,
+            **counts,
+            "api_requests": env.server.requests - requests,
+            "seconds": elapsed,
+        }
+        if ledger is not None:
+            result["lock"] = ledger.stats()["lock"]
+            store.close()
+        return result
+
+
+def reserve_loop(path: str, seconds: float, results):
+    store = SQLiteBalanceStore(path)
+    key = balance_key(PARTNER_ID, "1", "USDC")
+    amount = Decimal("0.01")
+    operations = 0
+    stop_at = time.perf_counter() + seconds
+    while time.perf_counter() < stop_at:
+        token = uuid.uuid4().hex
+        reserved, _ = store.reserve(key, token, amount, time.time())
+        if reserved:
+            store.settle(token, True, time.time())
+        operations += 1
+    results.put((operations, store.lock_stats.as_dict()))
+    store.close()
+
+
+def contention_run(args) -> Dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "ledger.db")
+        store = SQLiteBalanceStore(path)
+        store.seed(
+            balance_key(PARTNER_ID, "1", "USDC"), Decimal(10**9), 0, time.time(), 300
+        )
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        processes = [
+            context.Process(target=reserve_loop, args=(path, args.duration, results))
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        store.close()
+    operations = sum(ops for ops, _ in outcomes)
+    acquisitions = sum(lock["acquisitions"] for _, lock in outcomes)
+    contended = sum(lock["contended"] for _, lock in outcomes)
+    return {
+        "processes": args.processes,
+        "reservations_per_second": operations / args.duration,
+        "contention_rate": contended / acquisitions if acquisitions else 0.0,
+        "max_wait_ms": max(lock["max_wait_seconds"] for _, lock in outcomes) * 1000,
+    }
+
+
+async def payouts(args) -> List[Dict]:
+    with tempfile.TemporaryDirectory() as directory:
+        return [
+            await payout_run(args, "none", None),
+            await payout_run(args, "memory", MemoryBalanceStore()),
+            await payout_run(
+                args, "sqlite", SQLiteBalanceStore(os.path.join(directory, "l.db"))
+            ),
+        ]
+
+
+def main(args):
+    runs = asyncio.run(payouts(args))
+    contention = contention_run(args)
+    if args.json:
+        print(json.dumps({"payouts": runs, "contention": contention}, indent=2))
+        return
+
+    header = (
+        f"{'ledger':<8} {'created':>8} {'server 400':>11} {'refused':>8} "
+        f"{'requests':>9} {'seconds':>8}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in runs:
+        print(
+            f"{r['ledger']:<8} {r['created']:>8} {r['server_rejected']:>11} "
+            f"{r['refused']:>8} {r['api_requests']:>9} {r['seconds']:>8.3f}"
+        )
+    print(
+        f"\nSQLite ledger, {contention['processes']} processes: "
+        f"{contention['reservations_per_second']:.0f} reservations/s, "
+        f"{contention['contention_rate']:.1%} contended, "
+        f"max wait {contention['max_wait_ms']:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--payouts", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=32, help="concurrent tasks")
+    parser.add_argument("--coverage", type=float, default=0.7, help="funded share")
+    parser.add_argument("--processes", type=int, default=4, help="contention run")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds")
+    parser.add_argument("--inproc", action="store_true", help="in-process transport")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    main(parser.parse_args())
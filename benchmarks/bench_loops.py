@@ -0,0 +1,174 @@
+"""
+Request and webhook throughput on the stdlib asyncio loop versus uvloop
+
+Runs every workload once per installed event loop implementation (uvloop
+needs ``pip install 'src[uvloop]'``), each on a fresh loop created by
+``src.eventloop.run``:
+
+- ``switch``: bare ``await asyncio.sleep(0)`` round trips, the loop's own
+  scheduling cost (the p50 column shows the mean)
+- ``requests``: ``crypto.balances.get`` against the mock server over local
+  TCP at each ``--concurrency`` level
+- ``webhooks``: signed deposit webhooks POSTed to a WebhookServer over
+  ``--connections`` keep-alive connections
+
+The mock server and the load share the measured loop, as an application
+and its dependencies would.
+
+Usage:
+    python -m benchmarks.bench_loops
+    python -m benchmarks.bench_loops --calls 5000 --concurrency 1,64
+    python -m benchmarks.bench_loops --loops asyncio
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+from typing import Dict, List
+
+from src.eventloop import available_loops, loop_name, run
+from src.webhooks import WebhookHandler, WebhookServer
+
+from .harness import API_SECRET, MockEnvironment, percentile, run_benchmark
+
+
+async def switches(args) -> Dict:
+    start = time.perf_counter()
+    for _ in range(args.switches):
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    return {
+        "workload": "switch",
+        "concurrency": 1,
+        "per_second": args.switches / elapsed,
+        "p50_ms": elapsed / args.switches * 1000,
+        "p99_ms": None,
+    }
+
+
+async def requests(args, concurrency: int) -> Dict:
+    async with MockEnvironment(max_connections=concurrency) as env:
+        result = await run_benchmark(
+            "requests",
+            lambda i: env.client.crypto.balances.get("1", "USDC"),
+            concurrency=concurrency,
+            calls=args.calls,
+            allocations=False,
+        )
+    return {
+        "workload": "requests",
+        "concurrency": concurrency,
+        "per_second": result.calls_per_second,
+        "p50_ms": result.p50_ms,
+        "p99_ms": result.p99_ms,
+    }
+
+
+async def post_webhooks(port: int, body: bytes, signature: bytes, count: int):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = (
+        b"POST /webhooks HTTP/1.1\r\nHost: bench\r\nX-Signature: "
+        + signature
+        + b"\r\nContent-Length: "
+        + str(len(body)).encode()
+        + b"\r\n\r\n"
+        + body
+    )
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        writer.write(request)
+        await reader.readline()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+    return latencies
+
+
+async def webhooks(args) -> Dict:
+    handler = WebhookHandler(API_SECRET)
+    handler.register_handler("crypto.deposit.updated", lambda event: None)
+    body = json.dumps(
+        {
+            "event": "crypto.deposit.updated",
+            "timestamp": "2025-10-04T12:00:00.000Z",
+            "data": {"depositId": "dep_1", "status": "CONFIRMED", "amount": "100.00"},
+        }
+    ).encode()
+    signature = hmac.new(API_SECRET.encode(), body, hashlib.sha256).hexdigest()
+    per_connection = args.calls // args.connections
+    async with WebhookServer(handler, key=None) as server:
+        await server.start(port=0)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                post_webhooks(server.port, body, signature.encode(), per_connection)
+                for _ in range(args.connections)
+            )
+        )
+        elapsed = time.perf_counter() - start
+    latencies = sorted(latency for result in results for latency in result)
+    return {
+        "workload": "webhooks",
+        "concurrency": args.connections,
+        "per_second": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+async def measure(args) -> List[Dict]:
+    results = [await switches(args)]
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        results.append(await requests(args, concurrency))
+    results.append(await webhooks(args))
+    name = loop_name()
+    return [{"loop": name, **result} for result in results]
+
+
+def main(args):
+    loops = args.loops.split(",") if args.loops else available_loops()
+    results = [row for loop in loops for row in run(measure(args), loop=loop)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    header = (
+        f"{'workload':<9} {'concurrency':>11} {'loop':<8} {'per second':>11} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'vs asyncio':>10}"
+    )
+    print(header + "\n" + "-" * len(header))
+    baseline = {
+        (r["workload"], r["concurrency"]): r["per_second"]
+        for r in results
+        if r["loop"] == "asyncio"
+    }
+    for r in sorted(results, key=lambda r: (r["workload"], r["concurrency"])):
+        base = baseline.get((r["workload"], r["concurrency"]))
+        ratio = f"{r['per_second'] / base:>9.2f}x" if base else f"{'-':>10}"
+        p99 = f"{r['p99_ms']:>8.3f}" if r["p99_ms"] is not None else f"{'-':>8}"
+        print(
+            f"{r['workload']:<9} {r['concurrency']:>11} {r['loop']:<8} "
+            f"{r['per_second']:>11.1f} {r['p50_ms']:>8.3f} {p99} {ratio}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--loops", default="", help="comma-separated loops")
+    parser.add_argument("--calls", type=int, default=3000, help="calls per run")
+    parser.add_argument("--concurrency", default="1,32", help="comma-separated")
+    parser.add_argument("--connections", type=int, default=16, help="webhook conns")
+    parser.add_argument("--switches", type=int, default=200000, help="sleep(0)s")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    main(parser.parse_args())
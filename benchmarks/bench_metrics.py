@@ -0,0 +1,144 @@
+"""
+Recording overhead of the metrics registry
+
+Part one times single recording operations (counter increments and
+histogram observations, with and without labels) and checks each against a
+budget of 1µs per record. Part two times full GET calls through a
+transport that answers instantly, with and without a registry attached, to
+show the instrumentation cost of a whole request.
+
+Usage:
+    python -m benchmarks.bench_metrics
+    python -m benchmarks.bench_metrics --records 2000000 --json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List
+
+import httpx
+
+from src import KeshFlipClient, MetricsRegistry
+from src.metrics import SDKMetrics
+
+from .harness import API_KEY, API_SECRET, PARTNER_ID
+
+BUDGET_NS = 1000.0
+TEMPLATE = "/api/v1/crypto/balances/{partner_id}/{chain_id}/{asset}"
+
+
+def time_ns(call: Callable[[], object], records: int) -> float:
+    """Average nanoseconds per call, minus the cost of an empty call"""
+
+    def empty():
+        pass
+
+    def loop(fn):
+        start = time.perf_counter()
+        for _ in range(records):
+            fn()
+        return time.perf_counter() - start
+
+    return max(0.0, (loop(call) - loop(empty)) / records * 1e9)
+
+
+def record_table(records: int) -> List[Dict]:
+    registry = MetricsRegistry()
+    metrics = SDKMetrics(registry)
+    plain = registry.counter("bench_plain", "Unlabelled counter")
+    child = metrics.requests.labels(TEMPLATE, "GET", "200")
+    cases = [
+        ("counter.inc()", lambda: plain.inc()),
+        ("child.inc()", lambda: child.inc()),
+        (
+            "counter.labels(...).inc()",
+            lambda: metrics.requests.labels(TEMPLATE, "GET", "200").inc(),
+        ),
+        (
+            "histogram.labels(...).observe()",
+            lambda: metrics.request_duration.labels(TEMPLATE).observe(0.012),
+        ),
+    ]
+    results = []
+    for name, call in cases:
+        ns = time_ns(call, records)
+        results.append({"operation": name, "ns": ns, "within_budget": ns < BUDGET_NS})
+    return results
+
+
+def make_client(**options) -> KeshFlipClient:
+    body = json.dumps({"balance": "100.00", "asset": "USDC", "chainId": "1"}).encode()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body)
+
+    base_url = "http://bench.keshpay.local"
+    http_client = httpx.AsyncClient(
+        base_url=base_url, transport=httpx.MockTransport(handler)
+    )
+    return KeshFlipClient(
+        API_KEY,
+        API_SECRET,
+        base_url=base_url,
+        partner_id=PARTNER_ID,
+        http_client=http_client,
+        **options,
+    )
+
+
+async def call_table(calls: int, rounds: int) -> List[Dict]:
+    path = f"/api/v1/crypto/balances/{PARTNER_ID}/1/USDC"
+    variants = [("no metrics", {}), ("metrics", {"metrics": MetricsRegistry()})]
+    clients = [(name, make_client(**options)) for name, options in variants]
+    best = {name: float("inf") for name, _ in variants}
+    for client in (client for _, client in clients):
+        for _ in range(100):
+            await client.request("GET", path)
+    # Interleave the variants and keep the best round of each to damp noise
+    for _ in range(rounds):
+        for name, client in clients:
+            start = time.perf_counter()
+            for _ in range(calls):
+                await client.request("GET", path)
+            best[name] = min(best[name], (time.perf_counter() - start) / calls)
+    for _, client in clients:
+        await client._http_client.aclose()
+    results = [
+        {"client": name, "us_per_call": best[name] * 1e6} for name, _ in variants
+    ]
+    results[1]["overhead_us"] = results[1]["us_per_call"] - results[0]["us_per_call"]
+    return results
+
+
+async def main(args):
+    records = record_table(args.records)
+    calls = await call_table(args.calls, args.rounds)
+    if args.json:
+        print(json.dumps({"records": records, "calls": calls}, indent=2))
+        return
+
+    header = f"{'operation':<34} {'ns/record':>10} {'< 1us':>6}"
+    print(header + "\n" + "-" * len(header))
+    for r in records:
+        ok = "yes" if r["within_budget"] else "NO"
+        print(f"{r['operation']:<34} {r['ns']:>10.1f} {ok:>6}")
+    header = f"{'GET through client':<20} {'us/call':>9}"
+    print("\n" + header + "\n" + "-" * len(header))
+    for r in calls:
+        print(f"{r['client']:<20} {r['us_per_call']:>9.1f}")
+    print(f"\ninstrumentation overhead: {calls[1]['overhead_us']:.2f}us per request")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--records", type=int, default=1000000, help="records timed per operation"
+    )
+    parser.add_argument(
+        "--calls", type=int, default=2000, help="client calls per round"
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per variant")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,128 @@
+"""
+Local query latency of the deposit mirror stores
+
+Fills the in-memory and SQLite mirror stores with synthetic crypto and fiat
+deposits and times typical back-office queries against each.
+
+Usage:
+    python -m benchmarks.bench_mirror
+    python -m benchmarks.bench_mirror --records 500000 --store sqlite
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from src.mirror import MemoryMirrorStore, MirrorStore, SQLiteMirrorStore
+
+STATUSES = ["PENDING", "CONFIRMED", "EXPIRED", "FAILED"]
+ASSETS = ["USDC", "USDT", "ETH"]
+CHAINS = ["1", "137", "8453"]
+PROVIDERS = ["EVC", "SALAAM_BANK"]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def synthetic_records(count: int, fiat: bool, seed: int = 1) -> List[dict]:
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        created = EPOCH + timedelta(seconds=i * 30)
+        record = {
+            "id": f"{'f' if fiat else 'c'}{i:023x}",
+            "status": rng.choices(STATUSES, weights=[2, 6, 1, 1])[0],
+            "amount": f"{rng.uniform(1, 1000):.2f}",
+            "currency": "USD",
+            "createdAt": created.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        }
+        if fiat:
+            record["provider"] = rng.choice(PROVIDERS)
+            record["customerNumber"] = "+252612345678"
+        else:
+            record["asset"] = rng.choice(ASSETS)
+            record["chainId"] = rng.choice(CHAINS)
+        records.append(record)
+    return records
+
+
+def queries(records: int) -> Dict[str, Callable[[MirrorStore], object]]:
+    middle = EPOCH + timedelta(seconds=records * 15)
+    return {
+        "count pending EVC > $100": lambda s: s.count(
+            "fiat.deposits", status="PENDING", provider="EVC", min_amount=100
+        ),
+        "latest 50 USDC on Base": lambda s: s.query(
+            "crypto.deposits", asset="USDC", chain_id="8453", limit=50
+        ),
+        "pending crypto, last hour": lambda s: s.query(
+            "crypto.deposits",
+            status="PENDING",
+            created_after=middle,
+            created_before=middle + timedelta(hours=1),
+        ),
+        "count failed (all chains)": lambda s: s.count(
+            "crypto.deposits", status="FAILED"
+        ),
+        "get by id": lambda s: s.get("crypto.deposits", f"c{records // 2:023x}"),
+    }
+
+
+def run(store_name: str, records: int, rounds: int) -> List[Dict]:
+    store = MemoryMirrorStore() if store_name == "memory" else SQLiteMirrorStore()
+    crypto = synthetic_records(records, fiat=False)
+    fiat = synthetic_records(records, fiat=True)
+    start = time.perf_counter()
+    store.upsert("crypto.deposits", crypto)
+    store.upsert("fiat.deposits", fiat)
+    load_seconds = time.perf_counter() - start
+
+    results = [
+        {
+            "store": store_name,
+            "query": "load",
+            "records": 2 * records,
+            "ms": load_seconds * 1000,
+        }
+    ]
+    for name, query in queries(records).items():
+        query(store)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            query(store)
+        elapsed = (time.perf_counter() - start) / rounds
+        results.append(
+            {
+                "store": store_name,
+                "query": name,
+                "records": 2 * records,
+                "ms": elapsed * 1000,
+            }
+        )
+    store.close()
+    return results
+
+
+def main(args):
+    stores = ["memory", "sqlite"] if args.store == "both" else [args.store]
+    results = []
+    for store in stores:
+        results.extend(run(store, args.records, args.rounds))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    header = f"{'store':<8} {'query':<28} {'records':>9} {'ms':>10}"
+    print(header + "\n" + "-" * len(header))
+    for r in results:
+        print(f"{r['store']:<8} {r['query']:<28} {r['records']:>9} {r['ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000, help="per kind")
+    parser.add_argument("--rounds", type=int, default=20, help="runs per query")
+    parser.add_argument("--store", choices=["both", "memory", "sqlite"], default="both")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    main(parser.parse_args())
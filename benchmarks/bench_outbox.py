@@ -0,0 +1,149 @@
+"""
+Caller latency and flush throughput of the outbox versus direct create calls
+
+Part one compares what a request handler waits for: a direct
+``crypto.withdrawals.create`` round trip against ``Outbox.enqueue``, which
+only commits the intent to SQLite (WAL) with ``synchronous`` NORMAL and
+FULL. Part two enqueues ``--intents`` withdrawals and times the background
+flusher draining them at each ``--concurrency`` level, next to direct calls
+made with the same concurrency. The mock server adds ``--latency`` seconds
+of service time per request.
+
+Usage:
+    python -m benchmarks.bench_outbox
+    python -m benchmarks.bench_outbox --intents 5000 --concurrency 1,16,64
+    python -m benchmarks.bench_outbox --inproc --error-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Dict, List
+
+from src.outbox import Outbox, SQLiteOutboxStore
+
+from .harness import MockEnvironment, percentile, run_benchmark
+
+ADDRESS = "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0"
+
+WITHDRAWAL = {"asset": "USDC", "chain_id": "1", "amount": "1.00", "to_address": ADDRESS}
+
+
+def latency_row(name: str, latencies: List[float]) -> Dict:
+    latencies.sort()
+    return {
+        "path": name,
+        "calls": len(latencies),
+        "p50_us": percentile(latencies, 0.5) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+    }
+
+
+async def caller_latency(args, directory: str) -> List[Dict]:
+    results = []
+    async with MockEnvironment(inproc=args.inproc) as env:
+        env.server.inject(latency=args.latency)
+        latencies = []
+        for i in range(args.calls):
+            start = time.perf_counter()
+            await env.client.crypto.withdrawals.create(
+                idempotency_key=f"direct_{i}", **WITHDRAWAL
+            )
+            latencies.append(time.perf_counter() - start)
+        results.append(latency_row("direct create", latencies))
+
+        for synchronous in ("NORMAL", "FULL"):
+            path = os.path.join(directory, f"latency_{synchronous}.db")
+            outbox = Outbox(env.client, SQLiteOutboxStore(path, synchronous))
+            latencies = []
+            for _ in range(args.calls):
+                start = time.perf_counter()
+                outbox.enqueue("crypto.withdrawals", **WITHDRAWAL)
+                latencies.append(time.perf_counter() - start)
+            outbox.store.close()
+            results.append(latency_row(f"enqueue ({synchronous})", latencies))
+    return results
+
+
+async def flush_throughput(args, directory: str, concurrency: int) -> Dict:
+    async with MockEnvironment(inproc=args.inproc, max_connections=concurrency) as env:
+        env.server.inject(latency=args.latency)
+        if args.error_rate:
+            env.server.inject(error_rate=args.error_rate, error_status=503)
+
+        direct = await run_benchmark(
+            "direct",
+            lambda i: env.client.crypto.withdrawals.create(
+                idempotency_key=f"direct_{concurrency}_{i}", **WITHDRAWAL
+            ),
+            concurrency=concurrency,
+            calls=args.intents,
+            warmup=0,
+            allocations=False,
+        )
+
+        store = SQLiteOutboxStore(os.path.join(directory, f"flush_{concurrency}.db"))
+        outbox = Outbox(env.client, store, concurrency=concurrency, backoff=0.05)
+        start = time.perf_counter()
+        outbox.enqueue_many("crypto.withdrawals", [WITHDRAWAL] * args.intents)
+        enqueued = time.perf_counter() - start
+        await outbox.start()
+        await outbox.drain()
+        elapsed = time.perf_counter() - start
+        await outbox.stop()
+        stats = outbox.stats()
+        store.close()
+        return {
+            "concurrency": concurrency,
+            "direct_calls_per_second": direct.calls_per_second,
+            "direct_errors": direct.errors,
+            "enqueue_ms": enqueued * 1000,
+            "outbox_calls_per_second": args.intents / elapsed,
+            "delivered": stats["delivered"],
+            "retries": stats["retries"],
+            "failed": stats["failed"],
+        }
+
+
+async def main(args):
+    levels = [int(level) for level in args.concurrency.split(",")]
+    with tempfile.TemporaryDirectory() as directory:
+        latency = await caller_latency(args, directory)
+        throughput = [
+            await flush_throughput(args, directory, level) for level in levels
+        ]
+    if args.json:
+        print(json.dumps({"latency": latency, "throughput": throughput}, indent=2))
+        return
+
+    header = f"{'caller waits for':<18} {'p50 us':>10} {'p99 us':>10}"
+    print(header + "\n" + "-" * len(header))
+    for r in latency:
+        print(f"{r['path']:<18} {r['p50_us']:>10.1f} {r['p99_us']:>10.1f}")
+
+    header = (
+        f"{'concurrency':>11} {'direct/s':>9} {'err':>5} {'outbox/s':>9} "
+        f"{'enqueue ms':>11} {'retries':>8} {'failed':>7}"
+    )
+    print("\n" + header + "\n" + "-" * len(header))
+    for r in throughput:
+        print(
+            f"{r['concurrency']:>11} {r['direct_calls_per_second']:>9.1f} "
+            f"{r['direct_errors']:>5} {r['outbox_calls_per_second']:>9.1f} "
+            f"{r['enqueue_ms']:>11.1f} {r['retries']:>8} {r['failed']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200, help="latency samples")
+    parser.add_argument("--intents", type=int, default=2000, help="intents flushed")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma-separated")
+    parser.add_argument("--latency", type=float, default=0.005, help="service time")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 share")
+    parser.add_argument("--inproc", action="store_true", help="skip TCP sockets")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
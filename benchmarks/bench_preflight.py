@@ -0,0 +1,133 @@
+"""
+Cost of rejecting invalid withdrawals locally versus at the server
+
+Times the pre-flight rules on their own (valid and invalid addresses and
+customer numbers, with cold and cached EIP-55 checksums), then a payout run
+of ``--items`` withdrawals with ``--invalid`` of them malformed, once with
+pre-flight validation and once letting the mock server reject them with a
+400 after a signed round trip.
+
+Usage:
+    python -m benchmarks.bench_preflight
+    python -m benchmarks.bench_preflight --items 2000 --invalid 0.2 --inproc
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import secrets
+import time
+from typing import Callable, Dict, List
+
+from src import ValidationError
+from src.models import DEFAULT_VALIDATOR, to_checksum_address
+
+from .harness import MockEnvironment
+
+ADDRESS = "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0"
+
+
+def time_us(call: Callable[[], object], calls: int) -> float:
+    """Average microseconds per call, exceptions included"""
+    start = time.perf_counter()
+    for _ in range(calls):
+        try:
+            call()
+        except ValidationError:
+            pass
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def rule_table(calls: int) -> List[Dict]:
+    withdrawal = DEFAULT_VALIDATOR.check_withdrawal
+    fiat = DEFAULT_VALIDATOR.check_fiat_deposit
+    # Mixed-case addresses that have not been hashed yet
+    cold = iter(
+        "0x" + secrets.token_hex(20).upper().replace("A", "a", 3) for _ in range(calls)
+    )
+    bad_checksum = "0x" + ADDRESS[2:].swapcase()
+    cases = [
+        ("address, cached checksum", withdrawal, lambda: ADDRESS, "1"),
+        ("address, cold checksum", withdrawal, lambda: next(cold), "1"),
+        ("address, bad checksum", withdrawal, lambda: bad_checksum, "1"),
+        ("address, malformed", withdrawal, lambda: ADDRESS[:-1], "137"),
+        ("EVC number", fiat, lambda: "+252612345678", "EVC"),
+        ("EVC number, malformed", fiat, lambda: "0612345678", "EVC"),
+    ]
+    to_checksum_address(ADDRESS)
+    results = []
+    for name, check, value, scope in cases:
+        if check is withdrawal:
+            scope_field, value_field = "chain_id", "to_address"
+        else:
+            scope_field, value_field = "provider", "customer_number"
+
+        def call():
+            return check({scope_field: scope, value_field: value()})
+
+        results.append({"check": name, "us": time_us(call, calls)})
+    return results
+
+
+async def payout_run(env, items: int, invalid: float, validate: bool) -> Dict:
+    rng = random.Random(1)
+    client = env.client
+    client.validate_requests = validate
+    rejected = 0
+    start = time.perf_counter()
+    for i in range(items):
+        address = ADDRESS[:-1] if rng.random() < invalid else ADDRESS
+        try:
+            await client.crypto.withdrawals.create(
+                asset="USDC",
+                chain_id="1",
+                amount="1.00",
+                to_address=address,
+                idempotency_key=f"payout-{validate}-{i}",
+            )
+        except ValidationError:
+            rejected += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "path": "pre-flight" if validate else "server 400",
+        "items": items,
+        "rejected": rejected,
+        "seconds": elapsed,
+        "us_per_item": elapsed / items * 1e6,
+    }
+
+
+async def main(args):
+    rules = rule_table(args.calls)
+    async with MockEnvironment(inproc=args.inproc) as env:
+        runs = [
+            await payout_run(env, args.items, args.invalid, validate)
+            for validate in (False, True)
+        ]
+    if args.json:
+        print(json.dumps({"rules": rules, "payouts": runs}, indent=2))
+        return
+
+    header = f"{'check':<28} {'us':>8}"
+    print(header + "\n" + "-" * len(header))
+    for r in rules:
+        print(f"{r['check']:<28} {r['us']:>8.2f}")
+    print()
+    header = f"{'path':<12} {'items':>7} {'rejected':>9} {'seconds':>9} {'us/item':>9}"
+    print(header + "\n" + "-" * len(header))
+    for r in runs:
+        print(
+            f"{r['path']:<12} {r['items']:>7} {r['rejected']:>9} "
+            f"{r['seconds']:>9.3f} {r['us_per_item']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000, help="per rule check")
+    parser.add_argument("--items", type=int, default=1000, help="withdrawals")
+    parser.add_argument("--invalid", type=float, default=0.1, help="bad share")
+    parser.add_argument("--inproc", action="store_true", help="in-process transport")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
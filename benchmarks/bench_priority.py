@@ -0,0 +1,134 @@
+"""
+Critical-call latency under a background read flood, FIFO versus priority
+
+A flood of background balance reads saturates the connection pool while
+critical withdrawals arrive at a steady rate. The run is repeated with plain
+first-come-first-served admission and with a PriorityScheduler sized to the
+pool, and reports per-class latency, queue wait and shed requests.
+
+Usage:
+    python -m benchmarks.bench_priority
+    python -m benchmarks.bench_priority --background 2000 --critical 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from src import LoadShedError, PriorityScheduler
+
+from .harness import MockEnvironment, percentile
+
+ADDRESS = "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0"
+
+
+async def measure(scheduled: bool, args) -> Dict:
+    options = {}
+    scheduler = None
+    if scheduled:
+        scheduler = PriorityScheduler(
+            max_concurrency=args.pool, starvation_after=args.starvation_after
+        )
+        options["scheduler"] = scheduler
+
+    async with MockEnvironment(
+        inproc=True, max_connections=args.pool, **options
+    ) as env:
+        env.server.capacity = args.pool
+        env.server.inject(latency=args.latency)
+        client = env.client
+        latencies: Dict[str, List[float]] = {"critical": [], "background": []}
+        shed = 0
+
+        async def timed(kind: str, call):
+            nonlocal shed
+            start = time.perf_counter()
+            try:
+                await call
+            except LoadShedError:
+                shed += 1
+                return
+            latencies[kind].append(time.perf_counter() - start)
+
+        async def background():
+            with client.priority("background"):
+                await asyncio.gather(
+                    *(
+                        timed("background", client.crypto.balances.get("1", "USDC"))
+                        for _ in range(args.background)
+                    )
+                )
+
+        async def critical():
+            calls = []
+            for i in range(args.critical):
+                await asyncio.sleep(args.interval)
+                calls.append(
+                    asyncio.ensure_future(
+                        timed(
+                            "critical",
+                            client.crypto.withdrawals.create(
+                                asset="USDC",
+                                chain_id="1",
+                                amount="1.00",
+                                to_address=ADDRESS,
+                                idempotency_key=f"bench_{i}",
+                            ),
+                        )
+                    )
+                )
+            await asyncio.gather(*calls)
+
+        start = time.perf_counter()
+        await asyncio.gather(background(), critical())
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "mode": "priority" if scheduled else "fifo",
+        "seconds": elapsed,
+        "shed": shed,
+    }
+    for kind, values in latencies.items():
+        values.sort()
+        result[f"{kind}_p50_ms"] = percentile(values, 0.5) * 1000
+        result[f"{kind}_p99_ms"] = percentile(values, 0.99) * 1000
+    if scheduler is not None:
+        result["scheduler"] = scheduler.stats()
+    return result
+
+
+def format_results(results: List[Dict]) -> str:
+    header = (
+        f"{'mode':<9} {'crit p50':>9} {'crit p99':>9} {'bg p50':>9} "
+        f"{'bg p99':>9} {'shed':>5} {'seconds':>8}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['mode']:<9} {r['critical_p50_ms']:>9.1f} {r['critical_p99_ms']:>9.1f} "
+            f"{r['background_p50_ms']:>9.1f} {r['background_p99_ms']:>9.1f} "
+            f"{r['shed']:>5} {r['seconds']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+async def main(args):
+    results = [await measure(False, args), await measure(True, args)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pool", type=int, default=10, help="connection slots")
+    parser.add_argument("--background", type=int, default=800, help="bulk reads")
+    parser.add_argument("--critical", type=int, default=50, help="withdrawals")
+    parser.add_argument("--interval", type=float, default=0.02, help="seconds")
+    parser.add_argument("--latency", type=float, default=0.01, help="service time")
+    parser.add_argument("--starvation-after", type=float, default=1.0)
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""
+Throughput, latency and allocation benchmark for every resource method
+
+Runs each SDK resource method against the local mock server at several
+concurrency levels and reports req/s, p50/p99 latency and KiB allocated per
+call.
+
+Usage:
+    python -m benchmarks.bench_resources
+    python -m benchmarks.bench_resources --concurrency 1,16,64 --calls 2000
+    python -m benchmarks.bench_resources --inproc --only crypto.deposits
+"""
+
+import argparse
+import asyncio
+from typing import Callable, Dict
+
+from .harness import MockEnvironment, format_table, run_benchmark, to_json
+
+
+def build_calls(env: MockEnvironment) -> Dict[str, Callable]:
+    """Map benchmark names to async callables receiving a unique call number"""
+    client = env.client
+    seeded = {}
+
+    async def seed():
+        deposit = await client.crypto.deposits.create(
+            asset="USDC", chain_id="1", amount="10.00", idempotency_key="seed_dep"
+        )
+        withdrawal = await client.crypto.withdrawals.create(
+            asset="USDC",
+            chain_id="1",
+            amount="1.00",
+            to_address="0x742D35CC6634c0532925A3b844BC9E7595F0BEb0",
+            idempotency_key="seed_wd",
+        )
+        fiat = await client.fiat.deposits.create(
+            provider="EVC",
+            customer_number="+252612345678",
+            amount="5.00",
+            idempotency_key="seed_fiat",
+        )
+        seeded.update(
+            deposit=deposit.deposit_id,
+            withdrawal=withdrawal.withdrawal_id,
+            fiat=fiat.deposit_id,
+        )
+
+    calls = {
+        "crypto.deposits.create": lambda i: client.crypto.deposits.create(
+            asset="USDC", chain_id="1", amount="10.00", idempotency_key=f"dep_{i}"
+        ),
+        "crypto.deposits.get": lambda i: client.crypto.deposits.get(seeded["deposit"]),
+        "crypto.deposits.list": lambda i: client.crypto.deposits.list(limit=20),
+        "crypto.withdrawals.create": lambda i: client.crypto.withdrawals.create(
+            asset="USDC",
+            chain_id="1",
+            amount="0.01",
+            to_address="0x742D35CC6634c0532925A3b844BC9E7595F0BEb0",
+            idempotency_key=f"wd_{i}",
+        ),
+        "crypto.withdrawals.get": lambda i: client.crypto.withdrawals.get(
+            seeded["withdrawal"]
+        ),
+        "crypto.balances.get": lambda i: client.crypto.balances.get("1", "USDC"),
+        "crypto.balances.list": lambda i: client.crypto.balances.list(),
+        "fiat.deposits.create": lambda i: client.fiat.deposits.create(
+            provider="EVC",
+            customer_number="+252612345678",
+            amount="5.00",
+            idempotency_key=f"fiat_{i}",
+        ),
+        "fiat.deposits.get": lambda i: client.fiat.deposits.get(seeded["fiat"]),
+        "fiat.deposits.list": lambda i: client.fiat.deposits.list(limit=20),
+    }
+    return seed, calls
+
+
+async def main(args):
+    levels = [int(level) for level in args.concurrency.split(",")]
+    results = []
+    async with MockEnvironment(inproc=args.inproc, max_connections=max(levels)) as env:
+        seed, calls = build_calls(env)
+        await seed()
+        for name, call in calls.items():
+            if args.only and not name.startswith(args.only):
+                continue
+            for level in levels:
+                result = await run_benchmark(
+                    name,
+                    call,
+                    concurrency=level,
+                    calls=args.calls,
+                    allocations=not args.no_alloc,
+                )
+                results.append(result)
+                if not args.json:
+                    print(format_table([result]).splitlines()[-1], flush=True)
+
+    print(to_json(results) if args.json else "\n" + format_table(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--concurrency", default="1,8,32", help="comma-separated levels"
+    )
+    parser.add_argument("--calls", type=int, default=500, help="calls per level")
+    parser.add_argument("--inproc", action="store_true", help="skip TCP sockets")
+    parser.add_argument("--only", help="only run benchmarks with this prefix")
+    parser.add_argument("--no-alloc", action="store_true", help="skip tracemalloc pass")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,138 @@
+"""
+Per-call cost of the slow-request sampler, and the breakdown it keeps
+
+Part one times GET calls through a transport that answers instantly,
+without a sampler and with samplers that keep no calls, the p99 and every
+call, to show the cost of recording a timeline per call. Part two sends
+deposit creates to the mock server over TCP with ``--latency`` seconds of
+injected server delay, while a task blocks the event loop for
+``--block`` seconds, and prints the phases of the slowest kept call.
+
+Usage:
+    python -m benchmarks.bench_sampler
+    python -m benchmarks.bench_sampler --calls 5000 --latency 0.2 --json
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import httpx
+
+from src import KeshFlipClient, SlowRequestSampler
+
+from .harness import API_KEY, API_SECRET, PARTNER_ID, MockEnvironment
+
+
+def make_client(**options) -> KeshFlipClient:
+    body = json.dumps(
+        {
+            "success": True,
+            "partnerId": PARTNER_ID,
+            "chainId": "1",
+            "asset": "USDC",
+            "balance": "100.00",
+            "totalDeposits": "100.00",
+            "totalWithdrawals": "0",
+            "lastUpdatedAt": "2024-01-01T00:00:00Z",
+        }
+    ).encode()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body)
+
+    base_url = "http://bench.keshpay.local"
+    http_client = httpx.AsyncClient(
+        base_url=base_url, transport=httpx.MockTransport(handler)
+    )
+    return KeshFlipClient(
+        API_KEY,
+        API_SECRET,
+        base_url=base_url,
+        partner_id=PARTNER_ID,
+        http_client=http_client,
+        **options,
+    )
+
+
+async def call_table(calls: int, rounds: int) -> List[Dict]:
+    variants = [
+        ("no sampler", None),
+        ("sampler, none kept", SlowRequestSampler(threshold=60.0)),
+        ("sampler, p99 kept", SlowRequestSampler(threshold=None, percentile=0.99)),
+        ("sampler, all kept", SlowRequestSampler(threshold=0.0)),
+    ]
+    clients = [(name, make_client(sampler=sampler)) for name, sampler in variants]
+    best = {name: float("inf") for name, _ in variants}
+    for _, client in clients:
+        for _ in range(100):
+            await client.crypto.balances.get("1", "USDC")
+    # Interleave the variants and keep the best round of each to damp noise
+    for _ in range(rounds):
+        for name, client in clients:
+            start = time.perf_counter()
+            for _ in range(calls):
+                await client.crypto.balances.get("1", "USDC")
+            best[name] = min(best[name], (time.perf_counter() - start) / calls)
+    for _, client in clients:
+        await client._http_client.aclose()
+    base = best["no sampler"]
+    return [
+        {
+            "client": name,
+            "us_per_call": best[name] * 1e6,
+            "overhead_us": (best[name] - base) * 1e6,
+        }
+        for name, _ in variants
+    ]
+
+
+async def slow_calls(args) -> Dict:
+    sampler = SlowRequestSampler(threshold=args.latency / 2)
+    async with MockEnvironment(sampler=sampler) as env:
+        env.server.inject(latency=args.latency, target="crypto.deposits")
+
+        async def create(i: int):
+            await env.client.crypto.deposits.create(
+                asset="USDC", chain_id="1", amount="1.00", idempotency_key=f"s-{i}"
+            )
+
+        async def block():
+            await asyncio.sleep(args.latency / 2)
+            time.sleep(args.block)  # CPU work holding the event loop
+
+        await asyncio.gather(block(), *(create(i) for i in range(10)))
+    samples = sampler.samples()
+    return max(samples, key=lambda s: s["total_ms"]) if samples else {}
+
+
+async def main(args):
+    calls = await call_table(args.calls, args.rounds)
+    slowest = await slow_calls(args)
+    if args.json:
+        print(json.dumps({"calls": calls, "slowest": slowest}, indent=2))
+        return
+
+    header = f"{'GET through client':<20} {'us/call':>9} {'overhead':>9}"
+    print(header + "\n" + "-" * len(header))
+    for r in calls:
+        print(f"{r['client']:<20} {r['us_per_call']:>9.1f} {r['overhead_us']:>9.1f}")
+    if slowest:
+        print(
+            f"\nSlowest kept call: {slowest['method']} {slowest['endpoint']} "
+            f"{slowest['total_ms']:.1f} ms, loop lag {slowest['loop_lag_ms']:.1f} ms"
+        )
+        for phase, ms in slowest["phases_ms"].items():
+            print(f"  {phase:<10} {ms:>9.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000, help="calls per round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per variant")
+    parser.add_argument("--latency", type=float, default=0.1, help="server delay")
+    parser.add_argument("--block", type=float, default=0.05, help="loop block")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
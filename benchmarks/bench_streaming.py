@@ -0,0 +1,150 @@
+"""
+Peak memory of buffered versus streamed list responses
+
+Serves a synthetic deposit listing of ``--size-mb`` megabytes through an
+in-process transport that generates the body lazily, then reads it once with
+``client.request`` (whole body buffered and decoded) and once with
+``client.stream`` (items parsed as chunks arrive). Peak traced memory and
+wall time are reported for both.
+
+Usage:
+    python -m benchmarks.bench_streaming
+    python -m benchmarks.bench_streaming --size-mb 20 --mode stream
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from typing import AsyncIterator, Dict
+
+import httpx
+
+from src import KeshFlipClient
+
+from .harness import API_KEY, API_SECRET, PARTNER_ID
+
+ITEM_TEMPLATE = {
+    "id": "",
+    "depositId": "",
+    "partnerId": PARTNER_ID,
+    "asset": "USDC",
+    "chainId": "1",
+    "amount": "100.00",
+    "currency": "USD",
+    "reference": "order",
+    "address": "0x742d35cc6634c0532925a3b844bc9e7595f0beb0",
+    "status": "PENDING",
+    "createdAt": "2024-01-01T00:00:00.000Z",
+    "expiresAt": "2024-01-01T01:00:00.000Z",
+}
+
+
+class SyntheticListing(httpx.AsyncByteStream):
+    """Deposit listing body of about ``size`` bytes, generated chunk by chunk"""
+
+    def __init__(self, size: int, chunk_size: int = 64 * 1024):
+        self.size = size
+        self.chunk_size = chunk_size
+        self.items = 0
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield b'{"success": true, "data": ['
+        sent = 0
+        chunk = []
+        chunk_bytes = 0
+        while sent < self.size:
+            record = dict(ITEM_TEMPLATE, id=f"{self.items:024x}")
+            record["depositId"] = record["id"]
+            encoded = (b"," if self.items else b"") + json.dumps(record).encode()
+            self.items += 1
+            sent += len(encoded)
+            chunk.append(encoded)
+            chunk_bytes += len(encoded)
+            if chunk_bytes >= self.chunk_size:
+                yield b"".join(chunk)
+                chunk, chunk_bytes = [], 0
+        yield b"".join(chunk) + f'], "total": {self.items}}}'.encode()
+
+
+def make_client(size: int) -> KeshFlipClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200,
+            headers={"Content-Type": "application/json"},
+            stream=SyntheticListing(size),
+        )
+
+    base_url = "http://mock.keshpay.local"
+    http_client = httpx.AsyncClient(
+        base_url=base_url, transport=httpx.MockTransport(handler)
+    )
+    return KeshFlipClient(
+        API_KEY,
+        API_SECRET,
+        base_url=base_url,
+        partner_id=PARTNER_ID,
+        http_client=http_client,
+    )
+
+
+async def measure(mode: str, size: int) -> Dict[str, float]:
+    client = make_client(size)
+    path = f"/api/v1/crypto/deposits/partner/{PARTNER_ID}"
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        if mode == "buffered":
+            response = await client.request("GET", path, params={"limit": 10**9})
+            items = len(response["data"])
+            del response
+        else:
+            items = 0
+            async for _ in client.stream(path, params={"limit": 10**9}):
+                items += 1
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        await client._http_client.aclose()
+    return {
+        "mode": mode,
+        "payload_mb": size / 1e6,
+        "items": items,
+        "seconds": elapsed,
+        "items_per_second": items / elapsed if elapsed else 0.0,
+        "peak_mb": peak / 1e6,
+    }
+
+
+async def main(args):
+    size = int(args.size_mb * 1e6)
+    modes = ["stream", "buffered"] if args.mode == "both" else [args.mode]
+    results = [await measure(mode, size) for mode in modes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    header = (
+        f"{'mode':<10} {'payload MB':>11} {'items':>10} {'seconds':>9} "
+        f"{'items/s':>11} {'peak MB':>9}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['payload_mb']:>11.1f} {r['items']:>10} "
+            f"{r['seconds']:>9.2f} {r['items_per_second']:>11.0f} {r['peak_mb']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=100.0, help="payload size")
+    parser.add_argument(
+        "--mode", choices=["both", "stream", "buffered"], default="both"
+    )
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
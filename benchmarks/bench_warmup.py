@@ -0,0 +1,111 @@
+"""
+First-request latency of a cold client versus one prepared with warmup()
+
+Starts the mock server on a local socket and, for each round, creates a new
+client and sends a burst of concurrent ``crypto.deposits.create`` calls,
+either straight away or after ``client.warmup()``. Reports the warm-up stage
+timings and the latency of the burst. On localhost the gap is mostly
+connection setup; over TLS to a remote API it is larger. The server shares
+the benchmark's event loop, so large bursts measure the server instead.
+
+Usage:
+    python -m benchmarks.bench_warmup
+    python -m benchmarks.bench_warmup --burst 8 --rounds 50
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from src import KeshFlipClient
+from src.testing import MockKeshPayServer
+
+from .harness import API_KEY, API_SECRET, PARTNER_ID, percentile
+
+
+async def burst(client: KeshFlipClient, size: int, round_no: int) -> List[float]:
+    async def create(i: int) -> float:
+        start = time.perf_counter()
+        await client.crypto.deposits.create(
+            asset="USDC",
+            chain_id="1",
+            amount="10.00",
+            idempotency_key=f"warmup_{round_no}_{i}",
+        )
+        return time.perf_counter() - start
+
+    return list(await asyncio.gather(*(create(i) for i in range(size))))
+
+
+async def measure(warm: bool, args, server: MockKeshPayServer) -> Dict:
+    latencies: List[float] = []
+    stages: List[Dict[str, float]] = []
+    for round_no in range(args.rounds):
+        client = KeshFlipClient(
+            API_KEY, API_SECRET, base_url=server.url, partner_id=PARTNER_ID
+        )
+        try:
+            if warm:
+                stages.append(await client.warmup(connections=args.burst))
+            latencies.extend(await burst(client, args.burst, round_no * 2 + int(warm)))
+        finally:
+            await client.close()
+
+    latencies.sort()
+    result = {
+        "mode": "warm" if warm else "cold",
+        "calls": len(latencies),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000,
+    }
+    for key in ("models_seconds", "verify_seconds", "connections_seconds"):
+        values = [stage[key] for stage in stages]
+        result[key.replace("_seconds", "_ms")] = (
+            sum(values) / len(values) * 1000 if values else None
+        )
+    return result
+
+
+async def main(args):
+    server = MockKeshPayServer()
+    server.add_partner(PARTNER_ID, API_KEY, API_SECRET)
+    server.inject(latency=args.latency)
+    async with server:
+        results = [
+            await measure(False, args, server),
+            await measure(True, args, server),
+        ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    header = (
+        f"{'mode':<5} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+        f"{'models ms':>10} {'verify ms':>10} {'conns ms':>9}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in results:
+        stages = " ".join(
+            f"{r[key]:>{width}.2f}" if r[key] is not None else f"{'-':>{width}}"
+            for key, width in (
+                ("models_ms", 10),
+                ("verify_ms", 10),
+                ("connections_ms", 9),
+            )
+        )
+        print(
+            f"{r['mode']:<5} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['max_ms']:>8.2f} {stages}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--burst", type=int, default=4, help="concurrent creates")
+    parser.add_argument("--rounds", type=int, default=20, help="fresh clients")
+    parser.add_argument("--latency", type=float, default=0.0, help="server delay")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,193 @@
+"""
+Webhook receiver throughput at 1, 2, 4 and 8 worker processes
+
+Starts a WebhookWorkerPool with each ``--workers`` count and drives it from
+``--senders`` load processes, each keeping ``--connections`` keep-alive
+connections busy for ``--duration`` seconds with signed deposit webhooks
+spread over ``--entities`` deposits. Every event is verified, parsed and
+passed to a handler that spins for ``--work-us`` microseconds of
+application CPU time. Reports webhooks/s, latency and the speedup over one
+worker; scaling is bounded by the CPU count printed with the results, which
+the load processes share.
+
+Usage:
+    python -m benchmarks.bench_webhook_workers
+    python -m benchmarks.bench_webhook_workers --workers 1,2,4 --work-us 500
+    python -m benchmarks.bench_webhook_workers --no-keyed --share-socket
+"""
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import time
+from typing import Dict, List, Tuple
+
+from src.webhooks import WebhookHandler, WebhookWorkerPool, entity_key
+
+from .harness import API_SECRET, percentile
+
+
+def spin(work_us: float, event):
+    """Handler standing in for application work"""
+    end = time.perf_counter() + work_us / 1e6
+    while time.perf_counter() < end:
+        pass
+
+
+def register(work_us: float, handler: WebhookHandler):
+    handler.register_handler("crypto.deposit.updated", functools.partial(spin, work_us))
+
+
+def payloads(sender: int, args) -> List[Tuple[bytes, bytes]]:
+    signed = []
+    for entity in range(sender, args.entities, args.senders):
+        body = json.dumps(
+            {
+                "event": "crypto.deposit.updated",
+                "timestamp": "2025-10-04T12:00:00.000Z",
+                "data": {
+                    "depositId": f"dep_{entity:06d}",
+                    "partnerId": "partner_bench",
+                    "status": "CONFIRMED",
+                    "amount": "100.00",
+                    "asset": "USDC",
+                    "chainId": "1",
+                    "address": "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0",
+                    "hash": "0x" + "ab" * 32,
+                    "confirmations": 12,
+                    "createdAt": "2025-10-04T11:58:00.000Z",
+                    "updatedAt": "2025-10-04T12:00:00.000Z",
+                },
+            }
+        ).encode()
+        signature = hmac.new(API_SECRET.encode(), body, hashlib.sha256).hexdigest()
+        signed.append((body, signature.encode()))
+    return signed
+
+
+async def send(port: int, signed: List[Tuple[bytes, bytes]], stop_at: float):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    latencies, errors, i = [], 0, 0
+    while time.perf_counter() < stop_at:
+        body, signature = signed[i % len(signed)]
+        i += 1
+        start = time.perf_counter()
+        writer.write(
+            b"POST /webhooks HTTP/1.1\r\nHost: bench\r\n"
+            b"Content-Type: application/json\r\nX-Signature: "
+            + signature
+            + b"\r\nContent-Length: "
+            + str(len(body)).encode()
+            + b"\r\n\r\n"
+            + body
+        )
+        status = int((await reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            if line.lower().startswith(b"content-length:"):
+                length = int(line.split(b":")[1])
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+        errors += status != 200
+    writer.close()
+    return latencies, errors
+
+
+def sender_main(index: int, port: int, args, results):
+    async def run():
+        signed = payloads(index, args)
+        stop_at = time.perf_counter() + args.duration
+        # Each connection sends its own deposits' events
+        return await asyncio.gather(
+            *(
+                send(port, signed[c :: args.connections], stop_at)
+                for c in range(args.connections)
+            )
+        )
+
+    latencies, errors = [], 0
+    for connection_latencies, connection_errors in asyncio.run(run()):
+        latencies.extend(connection_latencies)
+        errors += connection_errors
+    results.put((latencies, errors))
+
+
+def measure(workers: int, args) -> Dict:
+    pool = WebhookWorkerPool(
+        API_SECRET,
+        setup=functools.partial(register, args.work_us),
+        workers=workers,
+        port=0,
+        key=None if args.no_keyed else entity_key,
+        reuse_port=False if args.share_socket else None,
+    )
+    with pool:
+        context = multiprocessing.get_context("spawn")
+        results = context.Queue()
+        senders = [
+            context.Process(target=sender_main, args=(i, pool.port, args, results))
+            for i in range(args.senders)
+        ]
+        for process in senders:
+            process.start()
+        latencies, errors = [], 0
+        for _ in senders:
+            sender_latencies, sender_errors = results.get()
+            latencies.extend(sender_latencies)
+            errors += sender_errors
+        for process in senders:
+            process.join()
+    latencies.sort()
+    return {
+        "workers": workers,
+        "webhooks": len(latencies),
+        "errors": errors,
+        "webhooks_per_second": len(latencies) / args.duration,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main(args):
+    results = [measure(int(n), args) for n in args.workers.split(",")]
+    base = results[0]["webhooks_per_second"] or 1.0
+    for r in results:
+        r["speedup"] = r["webhooks_per_second"] / base
+    if args.json:
+        print(json.dumps({"cpus": os.cpu_count(), "results": results}, indent=2))
+        return
+
+    print(f"{os.cpu_count()} CPUs, {args.senders} sender processes\n")
+    header = (
+        f"{'workers':>7} {'webhooks/s':>11} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'err':>5} {'speedup':>8}"
+    )
+    print(header + "\n" + "-" * len(header))
+    for r in results:
+        print(
+            f"{r['workers']:>7} {r['webhooks_per_second']:>11.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>5} "
+            f"{r['speedup']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4,8", help="comma-separated")
+    parser.add_argument("--senders", type=int, default=2, help="load processes")
+    parser.add_argument("--connections", type=int, default=32, help="per sender")
+    parser.add_argument("--entities", type=int, default=1000, help="deposits")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per run")
+    parser.add_argument("--work-us", type=float, default=100, help="handler CPU")
+    parser.add_argument("--no-keyed", action="store_true", help="skip key routing")
+    parser.add_argument("--share-socket", action="store_true", help="no REUSEPORT")
+    parser.add_argument("--json", action="store_true", help="print JSON results")
+    main(parser.parse_args())
@@ -0,0 +1,217 @@
+"""Benchmark harness for async SDK calls"""
+import asyncio
+import gc
+import json
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Iterable, List, NamedTuple, Optional
+
+AsyncCall = Callable[[int], Awaitable[object]]
+
+
+class BenchmarkResult(NamedTuple):
+    """Throughput, latency and allocation figures for one benchmark run"""
+
+    name: str
+    concurrency: int
+    calls: int
+    errors: int
+    seconds: float
+    calls_per_second: float
+    p50_ms: float
+    p99_ms: float
+    alloc_kib_per_call: Optional[float]
+
+
+def percentile(sorted_values: List[float], quantile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(quantile * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def measure_allocations(call: AsyncCall, iterations: int = 50) -> float:
+    """
+    Measure memory allocated per call
+
+    Runs ``call`` sequentially under tracemalloc and reports the average peak
+    of traced memory above the starting level, in KiB. This covers request
+    building, signing, response parsing and model validation, and excludes
+    memory already held before the call.
+
+    Args:
+        call: Async callable receiving the iteration number
+        iterations: Number of sequential calls
+
+    Returns:
+        Average KiB allocated at peak per call
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        total = 0
+        for i in range(iterations):
+            base = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            await call(i)
+            total += tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return total / iterations / 1024
+
+
+async def run_benchmark(
+    name: str,
+    call: AsyncCall,
+    concurrency: int,
+    calls: int,
+    warmup: int = 20,
+    allocations: bool = True,
+) -> BenchmarkResult:
+    """
+    Run ``calls`` invocations of ``call`` with ``concurrency`` workers
+
+    Args:
+        name: Benchmark name
+        call: Async callable receiving a unique call number
+        concurrency: Number of concurrent workers
+        calls: Total number of calls
+        warmup: Sequential calls made before measuring
+        allocations: Also measure allocations per call (sequentially)
+
+    Returns:
+        BenchmarkResult for the run
+    """
+    counter = iter(range(10**12))
+    for _ in range(warmup):
+        await call(next(counter))
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = calls
+
+    async def worker():
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                await call(next(counter))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    alloc = None
+    if allocations:
+        alloc = await measure_allocations(lambda i: call(next(counter)))
+
+    latencies.sort()
+    return BenchmarkResult(
+        name=name,
+        concurrency=concurrency,
+        calls=len(latencies),
+        errors=errors,
+        seconds=elapsed,
+        calls_per_second=len(latencies) / elapsed if elapsed else 0.0,
+        p50_ms=percentile(latencies, 0.5) * 1000,
+        p99_ms=percentile(latencies, 0.99) * 1000,
+        alloc_kib_per_call=alloc,
+    )
+
+
+def format_table(results: Iterable[BenchmarkResult]) -> str:
+    """Format results as a fixed-width text table"""
+    header = (
+        f"{'benchmark':<32} {'conc':>5} {'calls':>7} {'err':>5} "
+        f"{'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'KiB/call':>9}"
+    )
+    lines = [header, "-" * len(header)]
+    for r in results:
+        alloc = (
+            f"{r.alloc_kib_per_call:9.1f}"
+            if r.alloc_kib_per_call is not None
+            else f"{'-':>9}"
+        )
+        lines.append(
+            f"{r.name:<32} {r.concurrency:>5} {r.calls:>7} {r.errors:>5} "
+            f"{r.calls_per_second:>10.1f} {r.p50_ms:>9.2f} {r.p99_ms:>9.2f} {alloc}"
+        )
+    return "\n".join(lines)
+
+
+def to_json(results: Iterable[BenchmarkResult]) -> str:
+    """Serialize results as a JSON array"""
+    return json.dumps([r._asdict() for r in results], indent=2)
+
+
+PARTNER_ID = "bench_partner"
+API_KEY = "bench_key"
+API_SECRET = "bench_secret"
+
+
+class MockEnvironment:
+    """Mock KeshPay server plus a client wired to it"""
+
+    def __init__(
+        self, inproc: bool = False, max_connections: int = 100, **client_options
+    ):
+        """
+        Initialize benchmark environment
+
+        Args:
+            inproc: Route requests through an in-process transport instead of
+                local TCP sockets
+            max_connections: Connection pool size of the client
+            **client_options: Extra KeshFlipClient keyword arguments
+        """
+        from src import KeshFlipClient
+        from src.testing import MockKeshPayServer
+
+        self.inproc = inproc
+        self.server = MockKeshPayServer()
+        self.server.add_partner(PARTNER_ID, API_KEY, API_SECRET)
+        self.server.set_balance(PARTNER_ID, "1", "USDC", "1000000000")
+        self._max_connections = max_connections
+        self._client_options = client_options
+        self._client_cls = KeshFlipClient
+        self.client = None
+
+    async def __aenter__(self):
+        import httpx
+
+        if self.inproc:
+            base_url = "http://mock.keshpay.local"
+            transport = self.server.transport()
+        else:
+            await self.server.start()
+            base_url = self.server.url
+            transport = None
+        http_client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=self._max_connections,
+                max_keepalive_connections=self._max_connections,
+            ),
+        )
+        self.client = self._client_cls(
+            API_KEY,
+            API_SECRET,
+            base_url=base_url,
+            partner_id=PARTNER_ID,
+            http_client=http_client,
+            **self._client_options,
+        )
+        self._http_client = http_client
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._http_client.aclose()
+        await self.server.stop()
@@ -65,7 +65,7 @@ async def main():
     #     asset="USDC",
     #     chain_id="1",
     #     amount="10.00",
-    #     to_address="0x742d35Cc6634C0532925a3b844Bc9e7595f0bEb",
+    #     to_address="0x742D35CC6634c0532925A3b844BC9E7595F0BEb0",
     #     idempotency_key="example_withdrawal_001"
     # )
     # print(f"✅ Withdrawal created!")
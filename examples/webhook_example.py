@@ -5,7 +5,7 @@ from fastapi import FastAPI, Request, Header, HTTPException
 from src import KeshFlipClient
 from src.exceptions import WebhookValidationError
 
-# Initialize client
+# Initialize client (safe to fork after import, e.g. gunicorn --preload)
 client = KeshFlipClient(
     api_key="your_api_key",
     api_secret="your_api_secret",
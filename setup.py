@@ -38,5 +38,15 @@ setup(
             "mypy>=1.0.0",
             "ruff>=0.0.250",
         ],
+        "compression": [
+            "brotli>=1.0.0",
+            "zstandard>=0.18.0",
+        ],
+        "uvloop": [
+            "uvloop>=0.17.0; sys_platform != 'win32'",
+        ],
+        "export": [
+            "pyarrow>=10.0.0",
+        ],
     },
 )
@@ -1,11 +1,30 @@
 """KeshFlip Python SDK for KeshPay API"""
+from .cache import ResponseCache
 from .client import KeshFlipClient
+from .compression import CompressionPolicy
+from .metrics import MetricsRegistry, serve_metrics
+from .sampling import SlowRequestSampler
 from .exceptions import (
     KeshFlipError,
     AuthenticationError,
     ValidationError,
+    PreflightValidationError,
+    InsufficientBalanceError,
     APIError,
     NetworkError,
+    CircuitOpenError,
+    ConcurrencyLimitError,
+    LoadShedError,
+    DeadlineExceededError,
+)
+from .resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreakerRegistry,
+    HedgingPolicy,
+    Priority,
+    PriorityScheduler,
+    request_deadline,
+    request_priority,
 )
 
 __version__ = "0.1.0"
@@ -14,6 +33,24 @@ __all__ = [
     "KeshFlipError",
     "AuthenticationError",
     "ValidationError",
+    "PreflightValidationError",
+    "InsufficientBalanceError",
     "APIError",
     "NetworkError",
+    "CircuitOpenError",
+    "ConcurrencyLimitError",
+    "LoadShedError",
+    "DeadlineExceededError",
+    "CircuitBreakerRegistry",
+    "HedgingPolicy",
+    "AdaptiveConcurrencyLimiter",
+    "Priority",
+    "PriorityScheduler",
+    "request_priority",
+    "request_deadline",
+    "ResponseCache",
+    "CompressionPolicy",
+    "MetricsRegistry",
+    "serve_metrics",
+    "SlowRequestSampler",
 ]
@@ -2,18 +2,105 @@
 import hashlib
 import hmac
 import time
-from typing import Dict
+from email.utils import mktime_tz, parsedate_tz
+from typing import Dict, Optional, Union
+
+
+class ServerClock:
+    """
+    Local estimate of the API server's clock
+
+    Signed requests carry an ``X-Timestamp`` that the server only accepts
+    within a few minutes of its own time. The offset between the local and
+    the server clock is estimated from response ``Date`` headers: the server
+    time (rounded down to the second) is compared with the midpoint of the
+    request's round trip. The offset is only adjusted when the new estimate
+    falls outside the error bounds of the current one, so a correct clock
+    stays at an offset of zero.
+    """
+
+    def __init__(self, resolution: float = 1.0):
+        """
+        Initialize server clock
+
+        Args:
+            resolution: Resolution of the server's Date header in seconds
+        """
+        self.resolution = resolution
+        self.offset = 0.0
+        self._last_date: Optional[str] = None
+
+        # Counters
+        self.samples = 0
+        self.adjustments = 0
+        self.skew_rejections = 0
+
+    def now(self) -> float:
+        """Current server time estimate as a Unix timestamp"""
+        return time.time() + self.offset
+
+    def observe(self, date: Optional[str], sent_at: float, received_at: float) -> bool:
+        """
+        Update the offset from a response ``Date`` header
+
+        Args:
+            date: Value of the ``Date`` header (ignored if None or invalid)
+            sent_at: Local ``time.time()`` when the request was sent
+            received_at: Local ``time.time()`` when the response arrived
+
+        Returns:
+            Whether the offset was adjusted
+        """
+        if not date or date == self._last_date:
+            # Same second as the previous sample: nothing new to learn
+            return False
+        parsed = parsedate_tz(date)
+        if parsed is None:
+            return False
+        self._last_date = date
+        self.samples += 1
+
+        server_time = mktime_tz(parsed) + self.resolution / 2
+        round_trip = max(0.0, received_at - sent_at)
+        estimate = server_time - (sent_at + received_at) / 2
+        if abs(estimate - self.offset) <= (self.resolution + round_trip) / 2:
+            return False
+        self.offset = estimate
+        self.adjustments += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get clock metrics
+
+        Returns:
+            Dictionary of the offset in seconds and counters
+        """
+        return {
+            "offset_seconds": self.offset,
+            "samples": self.samples,
+            "adjustments": self.adjustments,
+            "skew_rejections": self.skew_rejections,
+        }
 
 
 class AuthManager:
     """Manages authentication for KeshPay API requests"""
 
-    def __init__(self, api_key: str, api_secret: str):
+    def __init__(
+        self, api_key: str, api_secret: str, clock: Optional[ServerClock] = None
+    ):
         self.api_key = api_key
         self.api_secret = api_secret
 
+        # Server clock estimate used for X-Timestamp
+        self.clock = clock if clock is not None else ServerClock()
+
+        # Keyed HMAC state; copied per signature instead of re-keying
+        self._hmac = hmac.new(api_secret.encode(), digestmod=hashlib.sha256)
+
     def generate_signature(
-        self, method: str, path: str, timestamp: str, body: str = ""
+        self, method: str, path: str, timestamp: str, body: Union[str, bytes] = ""
     ) -> str:
         """
         Generate HMAC signature for API request
@@ -22,23 +109,28 @@ class AuthManager:
             method: HTTP method (GET, POST, etc.)
             path: API path (e.g., /api/v1/crypto/deposits)
             timestamp: Unix timestamp as string
-            body: Request body as JSON string
+            body: Request body as JSON string or UTF-8 bytes
 
         Returns:
             HMAC-SHA256 signature as hex string
         """
-        # Create string to sign: METHOD|PATH|TIMESTAMP|BODY
-        string_to_sign = f"{method}|{path}|{timestamp}|{body}"
+        mac = self._hmac.copy()
+        if isinstance(body, bytes):
+            # Sign encoded bodies as-is instead of decoding them first
+            mac.update(f"{method}|{path}|{timestamp}|".encode())
+            mac.update(body)
+        else:
+            # Create string to sign: METHOD|PATH|TIMESTAMP|BODY
+            string_to_sign = f"{method}|{path}|{timestamp}|{body}"
+            mac.update(string_to_sign.encode())
 
         # Generate HMAC-SHA256 signature
-        signature = hmac.new(
-            self.api_secret.encode(), string_to_sign.encode(), hashlib.sha256
-        ).hexdigest()
+        signature = mac.hexdigest()
 
         return signature
 
     def get_auth_headers(
-        self, method: str, path: str, body: str = ""
+        self, method: str, path: str, body: Union[str, bytes] = ""
     ) -> Dict[str, str]:
         """
         Get authentication headers for API request
@@ -46,12 +138,12 @@ class AuthManager:
         Args:
             method: HTTP method
             path: API path
-            body: Request body as JSON string
+            body: Request body as JSON string or UTF-8 bytes
 
         Returns:
             Dictionary of authentication headers
         """
-        timestamp = str(int(time.time()))
+        timestamp = str(int(self.clock.now()))
 
         signature = self.generate_signature(method, path, timestamp, body)
 
@@ -0,0 +1,298 @@
+"""Client-side micro-batching of high-rate calls"""
+import asyncio
+import json
+from typing import TYPE_CHECKING, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .endpoints import Endpoint
+from .exceptions import (
+    APIError,
+    AuthenticationError,
+    DeadlineExceededError,
+    error_for_status,
+)
+from .resilience.deadline import check_deadline, wait_within, without_deadline
+from .sampling import without_sample
+
+if TYPE_CHECKING:
+    from .client import KeshFlipClient
+
+# (method, endpoint template) of the calls batched by default
+DEFAULT_BATCH_ENDPOINTS: FrozenSet[Tuple[str, str]] = frozenset(
+    {
+        ("POST", "/api/v1/crypto/deposits"),
+        ("POST", "/api/v1/fiat/deposits"),
+        ("GET", "/api/v1/crypto/balances/{partner_id}/{chain_id}/{asset}"),
+    }
+)
+
+# Batch endpoint answers meaning the API (or a gateway in front of it) has no
+# such route; batching is then turned off for the client
+NO_BATCH_ROUTE_STATUSES: FrozenSet[int] = frozenset({404, 405, 410, 501})
+
+# Batch endpoint answers refusing the credentials, which may be transient
+# (key rotation, clock skew); only the batch at hand is sent call by call
+BATCH_AUTH_STATUSES: FrozenSet[int] = frozenset({401, 403})
+
+# (endpoint, path, encoded body, future of the caller)
+_Item = Tuple[Endpoint, str, Optional[bytes], asyncio.Future]
+
+
+class MicroBatchPolicy:
+    """
+    Micro-batching configuration
+
+    Calls to the configured endpoints are collected for up to ``window``
+    seconds, or until ``max_batch`` calls are waiting, and then sent as one
+    signed request to ``batch_path``. Each call therefore waits up to
+    ``window`` seconds longer, in exchange for one HTTP exchange per batch
+    instead of one per call. The batch endpoint is opt-in: set
+    ``batch_path`` only if the API in front of you serves one.
+
+    Identical GETs that are waiting or in flight are collapsed into one read
+    whose result every caller receives. Batches are sent without any
+    caller's deadline; each caller stops waiting at its own, and a write
+    whose deadline passes before its batch leaves is taken out of it.
+
+    Without a ``batch_path``, or once the batch endpoint answers with a
+    status meaning it does not exist (``NO_BATCH_ROUTE_STATUSES``: 404, 405,
+    410 or 501), GETs are still collapsed and each distinct read is sent on
+    its own, while writes are sent right away. A batch refused with 401 or
+    403 is sent call by call, so each caller gets its own verdict, but later
+    batches still use the batch endpoint.
+
+    Example:
+        ```python
+        client = KeshFlipClient(
+            ..., micro_batching=MicroBatchPolicy(window=0.002, max_batch=50)
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        window: float = 0.002,
+        max_batch: int = 50,
+        batch_path: Optional[str] = None,
+        endpoints: Optional[FrozenSet[Tuple[str, str]]] = None,
+        coalesce_reads: bool = True,
+    ):
+        """
+        Initialize micro-batching policy
+
+        Args:
+            window: Longest time in seconds a call waits for others to join
+                its batch
+            max_batch: Calls per batch; a full batch is sent at once
+            batch_path: Batch endpoint path, e.g. "/api/v1/batch" (None to
+                only collapse reads)
+            endpoints: (method, endpoint template) pairs to batch
+                (DEFAULT_BATCH_ENDPOINTS if None)
+            coalesce_reads: Collapse identical GETs into one read
+        """
+        self.window = window
+        self.max_batch = max_batch
+        self.batch_path = batch_path
+        self.endpoints = (
+            DEFAULT_BATCH_ENDPOINTS if endpoints is None else frozenset(endpoints)
+        )
+        self.coalesce_reads = coalesce_reads
+
+    def applies_to(self, method: str, template: str) -> bool:
+        """Whether calls to an endpoint are batched"""
+        return (method, template) in self.endpoints
+
+
+class MicroBatcher:
+    """Collects one client's calls into batches and fans the results back out"""
+
+    def __init__(self, client: "KeshFlipClient", policy: MicroBatchPolicy):
+        """
+        Initialize micro-batcher
+
+        Args:
+            client: Client sending the batches
+            policy: Micro-batching configuration
+        """
+        self.client = client
+        self.policy = policy
+        self.batch_supported = policy.batch_path is not None
+        self._pending: List[_Item] = []
+        self._reads: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters
+        self.calls = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_calls = 0
+        self.single_calls = 0
+
+    async def submit(
+        self, endpoint: Endpoint, path: str, content: Optional[bytes]
+    ) -> dict:
+        """
+        Add a call to the current batch and wait for its result
+
+        Args:
+            endpoint: Resolved endpoint of the call
+            path: API path
+            content: Encoded JSON body (None for GETs)
+
+        Returns:
+            Response JSON of the call; collapsed reads share one dictionary
+
+        Raises:
+            KeshFlipError: The call, or the batch request carrying it, failed
+            DeadlineExceededError: The caller's deadline passed first
+        """
+        check_deadline("batching")
+        self.calls += 1
+        is_read = endpoint.method == "GET"
+        if is_read and self.policy.coalesce_reads:
+            future = self._reads.get(path)
+            if future is not None:
+                self.coalesced += 1
+                return await wait_within(asyncio.shield(future), "batching")
+        elif not self.batch_supported:
+            # Without a batch endpoint, writes gain nothing from waiting
+            self.single_calls += 1
+            return await self.client._request(endpoint, path, None, None, None, content)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((endpoint, path, content, future))
+        if is_read and self.policy.coalesce_reads:
+            self._reads[path] = future
+            future.add_done_callback(lambda _: self._forget_read(path, future))
+        if len(self._pending) >= self.policy.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(
+                self.policy.window, self.flush
+            )
+        try:
+            return await wait_within(asyncio.shield(future), "batching")
+        except DeadlineExceededError:
+            if not is_read:
+                self._withdraw(future)
+            raise
+
+    def flush(self):
+        """Send the waiting calls now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending = self._pending, []
+        if items:
+            task = asyncio.ensure_future(self._send(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def drain(self):
+        """Send the waiting calls and wait for every batch in flight"""
+        self.flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get micro-batching metrics
+
+        Returns:
+            Dictionary of calls, collapsed reads, batches sent, calls per
+            batch and calls sent on their own
+        """
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "batched_calls": self.batched_calls,
+            "avg_batch_size": (
+                self.batched_calls / self.batches if self.batches else 0.0
+            ),
+            "single_calls": self.single_calls,
+            "batch_supported": self.batch_supported,
+        }
+
+    def _withdraw(self, future: asyncio.Future):
+        """Take a call whose caller gave up out of the waiting batch"""
+        for index, item in enumerate(self._pending):
+            if item[3] is future:
+                del self._pending[index]
+                future.cancel()
+                return
+
+    def _forget_read(self, path: str, future: asyncio.Future):
+        if self._reads.get(path) is future:
+            del self._reads[path]
+
+    async def _send(self, items: List[_Item]):
+        with without_deadline(), without_sample():
+            await self._send_batch(items)
+
+    async def _send_batch(self, items: List[_Item]):
+        try:
+            if len(items) == 1 or not self.batch_supported:
+                await asyncio.gather(*(self._send_single(item) for item in items))
+                return
+            try:
+                response = await self.client.request(
+                    "POST", self.policy.batch_path, content=_batch_body(items)
+                )
+            except (APIError, AuthenticationError) as e:
+                if e.status_code in NO_BATCH_ROUTE_STATUSES:
+                    # The API has no batch endpoint: send calls on their own
+                    self.batch_supported = False
+                elif e.status_code not in BATCH_AUTH_STATUSES:
+                    raise
+                await asyncio.gather(*(self._send_single(item) for item in items))
+                return
+            self.batches += 1
+            self.batched_calls += len(items)
+            results = response.get("responses") or []
+            for index, (_, _, _, future) in enumerate(items):
+                if future.done():
+                    continue
+                if index >= len(results):
+                    future.set_exception(APIError("Batch response is missing a result"))
+                    continue
+                status = results[index].get("status", 500)
+                data = results[index].get("body") or {}
+                error = error_for_status(status, data)
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(data)
+        except Exception as e:
+            for _, _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            for _, _, _, future in items:
+                future.cancel()
+
+    async def _send_single(self, item: _Item):
+        endpoint, path, content, future = item
+        self.single_calls += 1
+        try:
+            result = await self.client._request(
+                endpoint, path, None, None, None, content
+            )
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+
+def _batch_body(items: List[_Item]) -> bytes:
+    """Batch request body; encoded call bodies are embedded without re-parsing"""
+    entries = []
+    for endpoint, path, content, _ in items:
+        entry = b'{"method": "' + endpoint.method.encode() + b'", "path": '
+        entry += json.dumps(path).encode()
+        if content:
+            entry += b', "body": ' + content
+        entries.append(entry + b"}")
+    return b'{"requests": [' + b", ".join(entries) + b"]}"
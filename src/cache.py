@@ -0,0 +1,233 @@
+"""Conditional GET response cache"""
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Mapping, Optional
+from urllib.parse import urlencode
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class CacheEntry:
+    """Cached response with its validators"""
+
+    __slots__ = ("data", "etag", "last_modified", "size", "group", "expires")
+
+    def __init__(
+        self,
+        data: dict,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        size: int,
+        group: str,
+        expires: float,
+    ):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+        self.group = group
+        self.expires = expires
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that revalidate this entry"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    HTTP-semantics cache for GET responses
+
+    Responses carrying an ``ETag`` or ``Last-Modified`` validator are stored
+    with their parsed JSON. Later GETs for the same path and query send
+    ``If-None-Match``/``If-Modified-Since``; on ``304 Not Modified`` the cached
+    parsed object is returned without decoding or validating anything.
+    Responses with ``Cache-Control: max-age`` are served without a request
+    until they expire; ``no-store`` responses are never cached.
+
+    Memory is bounded by ``max_bytes`` (measured as response body size) with
+    least-recently-used eviction.
+
+    Cached objects are shared between callers and must be treated as
+    read-only.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 16 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize response cache
+
+        Args:
+            max_bytes: Maximum total size of cached response bodies
+            clock: Monotonic time source
+        """
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.stores = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(path: str, params: Optional[Mapping] = None) -> str:
+        """
+        Build the cache key for a request
+
+        Args:
+            path: API path
+            params: Query parameters
+
+        Returns:
+            Path with query parameters in canonical order
+        """
+        if not params:
+            return path
+        return f"{path}?{urlencode(sorted(params.items()))}"
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """
+        Find an entry and mark it as recently used
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheEntry or None (counted as a miss)
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """
+        Whether an entry may be served without revalidation
+
+        Args:
+            entry: Cache entry
+
+        Returns:
+            True if the entry's max-age has not expired (counted as a hit)
+        """
+        if entry.expires > self._clock():
+            self.hits += 1
+            return True
+        return False
+
+    def revalidated(self, entry: CacheEntry) -> dict:
+        """
+        Record a 304 response for an entry
+
+        Args:
+            entry: Cache entry that was revalidated
+
+        Returns:
+            The entry's cached data
+        """
+        self.not_modified += 1
+        return entry.data
+
+    def store(
+        self,
+        key: str,
+        group: str,
+        data: dict,
+        headers: Mapping[str, str],
+        size: int,
+    ):
+        """
+        Store a 200 response if it is cacheable
+
+        Args:
+            key: Cache key
+            group: Endpoint group of the request
+            data: Parsed response body
+            headers: Response headers
+            size: Response body size in bytes
+        """
+        cache_control = headers.get("cache-control", "").lower()
+        if "no-store" in cache_control or size > self.max_bytes:
+            self.remove(key)
+            return
+
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        max_age = _MAX_AGE.search(cache_control)
+        expires = 0.0
+        if max_age and "no-cache" not in cache_control:
+            expires = self._clock() + int(max_age.group(1))
+        if not etag and not last_modified and not expires:
+            self.remove(key)
+            return
+
+        self.remove(key)
+        self._entries[key] = CacheEntry(data, etag, last_modified, size, group, expires)
+        self._bytes += size
+        self.stores += 1
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+            self.evictions += 1
+
+    def remove(self, key: str):
+        """
+        Drop an entry
+
+        Args:
+            key: Cache key
+        """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def expire_group(self, group: str):
+        """
+        Force revalidation of all entries of an endpoint group
+
+        Called after a write to the group so max-age entries are not served
+        stale. Validators are kept, so the next read is still conditional.
+
+        Args:
+            group: Endpoint group (e.g., "crypto.withdrawals")
+        """
+        for entry in self._entries.values():
+            if entry.group == group:
+                entry.expires = 0.0
+
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache metrics
+
+        Returns:
+            Dictionary of entry/byte usage and hit, miss and 304 counters
+        """
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
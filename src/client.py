@@ -1,16 +1,48 @@
 """Main KeshFlip client"""
+import asyncio
 import json
-from typing import Optional
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Dict, Optional, Union
 import httpx
 
-from .auth import AuthManager
-from .exceptions import APIError, AuthenticationError, NetworkError, ValidationError
+from .auth import AuthManager, ServerClock
+from .batching import MicroBatcher, MicroBatchPolicy
+from .cache import ResponseCache
+from .compression import CompressionPolicy
+from .endpoints import Endpoint, resolve_endpoint
+from .exceptions import (
+    DeadlineExceededError,
+    KeshFlipError,
+    NetworkError,
+    error_for_status,
+)
+from .metrics import MetricsRegistry, SDKMetrics
+from .models.warmup import warm_models
+from .resilience.circuit_breaker import CircuitBreakerRegistry
+from .resilience.concurrency import AdaptiveConcurrencyLimiter
+from .resilience.deadline import (
+    check_deadline,
+    request_deadline,
+    shrink_timeout,
+    time_remaining,
+    wait_within,
+)
+from .resilience.hedging import HedgingPolicy
+from .resilience.histogram import LatencyTracker
+from .resilience.priority import Priority, PriorityScheduler, request_priority
+from .sampling import SlowRequestSampler, active_sample
+from .streaming import ListStream
 from .crypto.deposits import CryptoDeposits
 from .crypto.withdrawals import CryptoWithdrawals
 from .crypto.balances import CryptoBalances
 from .fiat.deposits import FiatDeposits
 from .webhooks.handler import WebhookHandler
 
+if TYPE_CHECKING:
+    from .ledger import BalanceLedger
+
 
 class KeshFlipClient:
     """Main client for interacting with KeshPay API"""
@@ -22,6 +54,18 @@ class KeshFlipClient:
         base_url: str = "https://api.keshpay.com",
         timeout: float = 30.0,
         partner_id: Optional[str] = None,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        cache: Optional[ResponseCache] = None,
+        compression: Optional[CompressionPolicy] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        validate_requests: bool = True,
+        compensate_clock_skew: bool = True,
+        metrics: Optional[MetricsRegistry] = None,
+        micro_batching: Optional[MicroBatchPolicy] = None,
+        sampler: Optional[SlowRequestSampler] = None,
     ):
         """
         Initialize KeshFlip client
@@ -32,25 +76,77 @@ class KeshFlipClient:
             base_url: API base URL
             timeout: Request timeout in seconds
             partner_id: Partner ID (optional, can be set per request)
+            circuit_breakers: Circuit breakers applied per endpoint group
+                (optional, disabled by default)
+            hedging: Hedging policy for idempotent GETs (optional, disabled
+                by default)
+            http_client: Shared httpx client configured with ``base_url``
+                (optional; the client creates and owns one if not provided)
+            cache: Conditional GET response cache (optional, disabled by
+                default)
+            compression: Request/response compression policy (optional;
+                httpx's default Accept-Encoding is used if not provided)
+            concurrency_limiter: Adaptive limit on in-flight requests
+                (optional, unlimited by default)
+            scheduler: Priority scheduler admitting requests to the
+                connection pool (optional, first come first served by default)
+            validate_requests: Type-check create call arguments and apply
+                the pre-flight address and customer number rules before
+                encoding them; disable only for trusted callers
+            compensate_clock_skew: Track the server clock from response
+                ``Date`` headers, sign with it, and re-sign and retry once when
+                a request is rejected while the local clock was off
+            metrics: Registry recording request, retry, queue-wait, cache
+                and webhook metrics (optional, disabled by default)
+            micro_batching: Collect high-rate calls into batch requests and
+                collapse duplicate reads (optional, disabled by default)
+            sampler: Keeps per-phase timelines of slow calls (optional,
+                disabled by default)
         """
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
         self.partner_id = partner_id
+        self.circuit_breakers = circuit_breakers
+        self.hedging = hedging
+        self.cache = cache
+        self.compression = compression
+        self.concurrency_limiter = concurrency_limiter
+        self.scheduler = scheduler
+        self.validate_requests = validate_requests
+        self.compensate_clock_skew = compensate_clock_skew
+        self.metrics = metrics
+        self.sampler = sampler
+        self.batcher = (
+            MicroBatcher(self, micro_batching) if micro_batching is not None else None
+        )
+        # Set by a BalanceLedger created with guard=True
+        self.balance_ledger: Optional["BalanceLedger"] = None
+
+        # Metric families; the registry may be shared by several clients
+        self._metrics = SDKMetrics(metrics) if metrics is not None else None
+        if self._metrics is not None:
+            if scheduler is not None:
+                self._metrics.watch_scheduler(scheduler)
+            if concurrency_limiter is not None:
+                self._metrics.watch_limiter(concurrency_limiter)
+
+        # Response latency per endpoint template
+        self.latency = LatencyTracker()
 
         # Initialize auth manager
         self.auth = AuthManager(api_key, api_secret)
 
-        # Initialize HTTP client
-        self._http_client = httpx.AsyncClient(
-            base_url=self.base_url,
-            timeout=timeout,
-            headers={"Content-Type": "application/json"},
-        )
+        # Initialize HTTP client (replaced in forked child processes, which
+        # reuse the loaded CA certificates)
+        self._owns_http_client = http_client is None
+        self._ssl_context = httpx.create_ssl_context() if http_client is None else None
+        self._http_client = http_client or self._new_http_client()
+        self._pid = os.getpid()
 
         # Initialize service modules
         self.crypto = CryptoModule(self)
         self.fiat = FiatModule(self)
-        self.webhooks = WebhookHandler(api_secret)
+        self.webhooks = WebhookHandler(api_secret, metrics=metrics)
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -61,8 +157,113 @@ class KeshFlipClient:
         await self.close()
 
     async def close(self):
-        """Close HTTP client"""
-        await self._http_client.aclose()
+        """Close HTTP client (shared clients are left to their owner)"""
+        if self._pid != os.getpid():
+            # Closing would shut the parent's connections (TLS close_notify)
+            return
+        if self.batcher is not None:
+            await self.batcher.drain()
+        if self.sampler is not None:
+            self.sampler.stop()
+        if self._owns_http_client:
+            await self._http_client.aclose()
+
+    @property
+    def forked(self) -> bool:
+        """Whether the client was created in a parent of the current process"""
+        return self._pid != os.getpid()
+
+    async def warmup(self, connections: int = 10) -> Dict[str, float]:
+        """
+        Prepare the client for traffic before it serves real requests
+
+        Runs three timed stages:
+
+        - models: builds and exercises the validators and serializers of all
+          request and response models
+        - verify: one signed ``GET /api/v1/crypto/balances/{partner_id}``,
+          which opens the first connection (DNS, TCP, TLS), checks the
+          credentials and calibrates the server clock offset
+        - connections: ``connections`` concurrent signed calls, leaving that
+          many connections open in the pool (up to its keep-alive limit)
+
+        Args:
+            connections: Pooled connections to open
+
+        Returns:
+            Dictionary of seconds per stage, the total and connections opened
+
+        Raises:
+            ValueError: No partner_id is set on the client
+            AuthenticationError: Credentials were rejected
+        """
+        if not self.partner_id:
+            raise ValueError("partner_id must be set on client to warm up")
+        path = f"/api/v1/crypto/balances/{self.partner_id}"
+        timings = {}
+
+        start = time.perf_counter()
+        warm_models()
+        timings["models_seconds"] = time.perf_counter() - start
+
+        stage = time.perf_counter()
+        await self.request("GET", path, priority=Priority.CRITICAL)
+        timings["verify_seconds"] = time.perf_counter() - stage
+
+        stage = time.perf_counter()
+        if connections > 1:
+            await asyncio.gather(
+                *(
+                    self.request("GET", path, priority=Priority.CRITICAL)
+                    for _ in range(connections)
+                )
+            )
+        timings["connections_seconds"] = time.perf_counter() - stage
+
+        timings["total_seconds"] = time.perf_counter() - start
+        timings["connections"] = max(1, connections)
+        return timings
+
+    @property
+    def clock(self) -> ServerClock:
+        """Server clock estimate used to sign requests (see ``stats()``)"""
+        return self.auth.clock
+
+    def priority(self, priority: Union[Priority, str]):
+        """
+        Run the requests made inside a ``with`` block at the given priority
+
+        Args:
+            priority: "critical", "default" or "background"
+
+        Returns:
+            Context manager (see ``request_priority``)
+        """
+        return request_priority(priority)
+
+    def deadline(self, seconds: float):
+        """
+        Give the requests made inside a ``with`` block ``seconds`` to finish
+
+        Connection, read, write and pool timeouts shrink to the time left,
+        waits for the scheduler and concurrency limiter end at the deadline,
+        and a call whose deadline has passed fails before it is signed or
+        sent. Nested blocks can only shorten the deadline.
+
+        Args:
+            seconds: Time budget from now
+
+        Returns:
+            Context manager (see ``request_deadline``)
+
+        Example:
+            ```python
+            with client.deadline(2.0):
+                # Raises DeadlineExceededError rather than waiting longer
+                await client.crypto.withdrawals.create(...)
+            ```
+        """
+        return request_deadline(seconds)
 
     async def request(
         self,
@@ -70,6 +271,8 @@ class KeshFlipClient:
         path: str,
         json_data: Optional[dict] = None,
         params: Optional[dict] = None,
+        priority: Union[Priority, str, None] = None,
+        content: Optional[bytes] = None,
     ) -> dict:
         """
         Make authenticated API request
@@ -79,6 +282,8 @@ class KeshFlipClient:
             path: API path
             json_data: JSON request body
             params: Query parameters
+            priority: Priority class for the scheduler (optional)
+            content: Already encoded JSON body (used instead of json_data)
 
         Returns:
             Response JSON as dictionary
@@ -88,55 +293,569 @@ class KeshFlipClient:
             ValidationError: Request validation failed
             APIError: API returned an error
             NetworkError: Network communication failed
+            CircuitOpenError: Circuit breaker for the endpoint group is open
+            ConcurrencyLimitError: No concurrency permit could be obtained
+            LoadShedError: Request was shed by the priority scheduler
+            DeadlineExceededError: The deadline set with ``deadline()`` passed
         """
-        # Prepare request body
-        body = json.dumps(json_data) if json_data else ""
+        if self._pid != os.getpid():
+            self._after_fork()
+        endpoint = resolve_endpoint(method, path)
+
+        sampler = self.sampler
+        if sampler is None:
+            return await self._dispatch(
+                endpoint, path, json_data, params, priority, content
+            )
+        sample = sampler.begin(endpoint.method, endpoint.template)
+        try:
+            response_data = await self._dispatch(
+                endpoint, path, json_data, params, priority, content
+            )
+        except BaseException as e:
+            sampler.finish(sample, e)
+            raise
+        sampler.finish(sample)
+        return response_data
+
+    async def _dispatch(
+        self,
+        endpoint: Endpoint,
+        path: str,
+        json_data: Optional[dict],
+        params: Optional[dict],
+        priority: Union[Priority, str, None],
+        content: Optional[bytes],
+    ) -> dict:
+        """Hand a call to the micro-batcher or send it on its own"""
+        batcher = self.batcher
+        if (
+            batcher is not None
+            and params is None
+            and batcher.policy.applies_to(endpoint.method, endpoint.template)
+        ):
+            if content is None and json_data:
+                content = json.dumps(json_data).encode()
+            sample = active_sample()
+            if sample is None:
+                return await batcher.submit(endpoint, path, content)
+            start = time.perf_counter()
+            try:
+                return await batcher.submit(endpoint, path, content)
+            finally:
+                sample.add("batching", start, time.perf_counter())
+        return await self._request(endpoint, path, json_data, params, priority, content)
+
+    def _new_http_client(self) -> httpx.AsyncClient:
+        """Build the HTTP client the client owns"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            headers={"Content-Type": "application/json"},
+            verify=self._ssl_context,
+        )
+
+    def _after_fork(self):
+        """
+        Replace the state a forked child inherited from its parent
+
+        The parent's pooled connections, cached responses and pending
+        batches are dropped without closing them (they still belong to the
+        parent) and a new HTTP client is built on first use in the child.
+        Signing state, the server clock estimate and prepared models are
+        kept.
+
+        Raises:
+            RuntimeError: The HTTP client was passed in and cannot be rebuilt
+        """
+        self._http_client = self._fork_http_client()
+        self._pid = os.getpid()
+        if self.cache is not None:
+            self.cache.clear()
+        if self.batcher is not None:
+            self.batcher = MicroBatcher(self, self.batcher.policy)
+
+    def _fork_http_client(self) -> httpx.AsyncClient:
+        """HTTP client to use in a forked child"""
+        if not self._owns_http_client:
+            raise RuntimeError(
+                "KeshFlipClient was given an http_client and used after a fork; "
+                "create the client in the child process or let it build its own"
+            )
+        return self._new_http_client()
+
+    async def _request(
+        self,
+        endpoint: Endpoint,
+        path: str,
+        json_data: Optional[dict],
+        params: Optional[dict],
+        priority: Union[Priority, str, None],
+        content: Optional[bytes],
+    ) -> dict:
+        """Send a request through the circuit breaker, scheduler and limiter"""
+        check_deadline("request")
+        breaker = None
+        if self.circuit_breakers is not None:
+            breaker = self.circuit_breakers.get(endpoint.group)
+            permit = breaker.acquire()
+
+        scheduler = self.scheduler
+        limiter = self.concurrency_limiter
+        metrics = self._metrics
+        sample = active_sample()
+        try:
+            if scheduler is not None:
+                waited = time.perf_counter()
+                ticket = await wait_within(
+                    scheduler.acquire(scheduler.resolve(endpoint.template, priority)),
+                    "scheduler",
+                )
+                if metrics is not None:
+                    metrics.pool_wait.labels("scheduler").observe(
+                        time.perf_counter() - waited
+                    )
+                if sample is not None:
+                    sample.add("scheduler", waited, time.perf_counter())
+            if limiter is not None:
+                try:
+                    waited = time.perf_counter()
+                    slot = await wait_within(limiter.acquire(), "concurrency limiter")
+                    if metrics is not None:
+                        metrics.pool_wait.labels("concurrency_limiter").observe(
+                            time.perf_counter() - waited
+                        )
+                    if sample is not None:
+                        sample.add("limiter", waited, time.perf_counter())
+                except BaseException:
+                    if scheduler is not None:
+                        scheduler.release(ticket)
+                    raise
+        except BaseException:
+            if breaker is not None:
+                breaker.release(permit)
+            raise
+
+        start = time.monotonic()
+        try:
+            if self.hedging is not None and self.hedging.applies_to(
+                endpoint.method, endpoint.template
+            ):
+                response_data = await self._send_hedged(endpoint, path, params)
+            else:
+                response_data = await self._send(
+                    endpoint, path, json_data, params, content
+                )
+        except DeadlineExceededError:
+            # Cut short by the caller's budget: no verdict on the service
+            if limiter is not None:
+                limiter.release(slot)
+            if breaker is not None:
+                breaker.release(permit)
+            raise
+        except KeshFlipError as e:
+            if limiter is not None:
+                limiter.record(slot, dropped=_is_overload(e))
+            if breaker is not None:
+                breaker.record(permit, not _is_failure(e), time.monotonic() - start)
+            raise
+        except BaseException:
+            if limiter is not None:
+                limiter.release(slot)
+            if breaker is not None:
+                breaker.release(permit)
+            raise
+        finally:
+            if scheduler is not None:
+                scheduler.release(ticket)
+
+        if limiter is not None:
+            limiter.record(slot)
+        if breaker is not None:
+            breaker.record(permit, True, time.monotonic() - start)
+        return response_data
+
+    def stream(
+        self,
+        path: str,
+        params: Optional[dict] = None,
+        key: str = "data",
+        chunk_size: int = 64 * 1024,
+    ) -> ListStream:
+        """
+        Make an authenticated GET request and stream the items of its list
 
-        # Get authentication headers
-        auth_headers = self.auth.get_auth_headers(method, path, body)
+        The response body is parsed incrementally, so memory stays bounded by
+        one item plus one chunk regardless of how many items are returned.
+        Streamed requests bypass the response cache, hedging, micro-batching
+        and the adaptive concurrency limiter: a stream keeps its connection
+        for as long as the caller reads, which would distort the limiter's
+        latency samples. The circuit breaker applies and judges the stream by
+        its response status. The current deadline caps each connect, write,
+        pool wait and chunk read. With a scheduler, the stream holds its slot
+        until it is exhausted or closed (``aclose()``, or use the stream as an
+        async context manager when leaving the loop early).
 
+        Args:
+            path: API path
+            params: Query parameters
+            key: Field of the response holding the list
+            chunk_size: Bytes read from the response per chunk
+
+        Returns:
+            ListStream yielding the list items
+
+        Raises:
+            AuthenticationError: Authentication failed
+            ValidationError: Request validation failed
+            APIError: API returned an error
+            NetworkError: Network communication failed
+            CircuitOpenError: The circuit of the endpoint group is open
+        """
+        return ListStream(self._open_stream(path, params), key, chunk_size)
+
+    @asynccontextmanager
+    async def _open_stream(self, path: str, params: Optional[dict]):
+        """Send a streamed GET and yield the response once its status is checked"""
+        if self._pid != os.getpid():
+            self._after_fork()
+        endpoint = resolve_endpoint("GET", path)
+
+        check_deadline("request")
+        breaker = None
+        if self.circuit_breakers is not None:
+            breaker = self.circuit_breakers.get(endpoint.group)
+            permit = breaker.acquire()
+        scheduler = self.scheduler
+        if scheduler is not None:
+            # The slot is held until the stream is closed
+            try:
+                ticket = await wait_within(
+                    scheduler.acquire(scheduler.resolve(endpoint.template)),
+                    "scheduler",
+                )
+            except BaseException:
+                if breaker is not None:
+                    breaker.release(permit)
+                raise
         try:
-            # Make request
-            response = await self._http_client.request(
-                method=method,
-                url=path,
-                json=json_data,
-                params=params,
-                headers=auth_headers,
+            # Signed after every wait, so the timestamp is fresh when sent
+            headers = self.auth.get_auth_headers("GET", path, "")
+            if self.compression is not None:
+                headers["Accept-Encoding"] = self.compression.accept_encoding
+            remaining = time_remaining()
+            timeout = (
+                self._http_client.timeout
+                if remaining is None
+                else shrink_timeout(self._http_client.timeout, remaining)
             )
+            start = time.monotonic()
+            async with self._http_client.stream(
+                "GET", path, params=params, headers=headers, timeout=timeout
+            ) as response:
+                elapsed = time.monotonic() - start
+                self.latency.record(endpoint.template, elapsed)
+                if self._metrics is not None:
+                    self._metrics.record_request(
+                        endpoint.template, "GET", str(response.status_code), elapsed
+                    )
+                error = None
+                if response.status_code >= 400:
+                    await response.aread()
+                    try:
+                        response_data = response.json()
+                    except Exception:
+                        response_data = {"message": response.text}
+                    error = error_for_status(response.status_code, response_data)
+                if breaker is not None:
+                    # Judged by the response status; the body is read later
+                    healthy = error is None or not _is_failure(error)
+                    breaker.record(permit, healthy, elapsed)
+                    breaker = None
+                if error is not None:
+                    raise error
+                yield response
+        except httpx.HTTPError as e:
+            remaining = time_remaining()
+            if (
+                isinstance(e, httpx.TimeoutException)
+                and remaining is not None
+                and remaining <= 0
+            ):
+                # A phase timeout shrunk to the deadline
+                raise DeadlineExceededError(
+                    f"Deadline exceeded during {_timeout_phase(e)}",
+                    phase=_timeout_phase(e),
+                )
+            if breaker is not None:
+                breaker.record(permit, False, time.monotonic() - start)
+                breaker = None
+            raise NetworkError(f"Network error: {str(e)}")
+        finally:
+            if breaker is not None:
+                breaker.release(permit)
+            if scheduler is not None:
+                scheduler.release(ticket)
+
+    async def _send_hedged(
+        self,
+        endpoint: Endpoint,
+        path: str,
+        params: Optional[dict],
+    ) -> dict:
+        """
+        Send an idempotent request, hedging it if it is slower than usual
+
+        The first response wins and the other attempt is cancelled. Network
+        errors do not count as a response: if one attempt fails that way the
+        other one is still awaited.
+        """
+        delay = self.hedging.delay_for(self.latency.get(endpoint.template))
+        if delay is None:
+            return await self._send(endpoint, path, None, params)
+
+        primary = asyncio.ensure_future(self._send(endpoint, path, None, params))
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if not done and self.hedging.try_spend():
+                attempts.append(
+                    asyncio.ensure_future(self._send(endpoint, path, None, params))
+                )
+                if self._metrics is not None:
+                    self._metrics.retries.labels("hedge").inc()
+
+            pending = set(attempts)
+            network_error = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                winner = None
+                for task in done:
+                    error = task.exception()
+                    if error is None or not isinstance(error, NetworkError):
+                        winner = winner or task
+                    elif network_error is None:
+                        network_error = error
+                if winner is not None:
+                    if winner is not primary:
+                        self.hedging.hedges_won += 1
+                    return winner.result()
+            raise network_error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+    async def _send(
+        self,
+        endpoint: Endpoint,
+        path: str,
+        json_data: Optional[dict],
+        params: Optional[dict],
+        content: Optional[bytes] = None,
+    ) -> dict:
+        """Sign and send a single request, mapping error responses"""
+        method = endpoint.method
+        metrics = self._metrics
+        sample = active_sample()
+        extensions = None if sample is None else {"trace": sample.trace}
+
+        # Serve fresh cached responses without a request
+        cache_key = cache_entry = None
+        if self.cache is not None and method == "GET":
+            cache_key = self.cache.key(path, params)
+            cache_entry = self.cache.lookup(cache_key)
+            if cache_entry is not None and self.cache.is_fresh(cache_entry):
+                if metrics is not None:
+                    metrics.cache.labels("hit").inc()
+                return cache_entry.data
+
+        # Prepare request body
+        if content is None and json_data:
+            content = json.dumps(json_data).encode()
+
+        # The signature covers the uncompressed body; only the wire bytes
+        # are compressed
+        signed = content or ""
+        extra_headers = {}
+        if cache_entry is not None:
+            extra_headers.update(cache_entry.conditional_headers())
+        if self.compression is not None:
+            extra_headers["Accept-Encoding"] = self.compression.accept_encoding
+            if content is not None:
+                content, encoding_headers = self.compression.encode_request(content)
+                extra_headers.update(encoding_headers)
+
+        try:
+            for attempt in range(2):
+                # Nothing is signed or sent once the deadline has passed
+                check_deadline("signing")
+
+                # Get authentication headers
+                clock = self.auth.clock
+                signed_offset = clock.offset
+                signing = time.perf_counter()
+                auth_headers = self.auth.get_auth_headers(method, path, signed)
+                auth_headers.update(extra_headers)
+                if sample is not None:
+                    sample.add("signing", signing, time.perf_counter())
+                    sample.exchange_started()
+
+                # Make request
+                start = time.monotonic()
+                sent_at = time.time()
+                # Send exactly the bytes that were signed
+                remaining = time_remaining()
+                if remaining is None:
+                    response = await self._http_client.request(
+                        method=method,
+                        url=path,
+                        content=content,
+                        params=params,
+                        headers=auth_headers,
+                        extensions=extensions,
+                    )
+                else:
+                    response = await wait_within(
+                        self._http_client.request(
+                            method=method,
+                            url=path,
+                            content=content,
+                            params=params,
+                            headers=auth_headers,
+                            timeout=shrink_timeout(
+                                self._http_client.timeout, remaining
+                            ),
+                            extensions=extensions,
+                        ),
+                        "response",
+                    )
+                elapsed = time.monotonic() - start
+                if sample is not None:
+                    sample.exchange_done()
+                self.latency.record(endpoint.template, elapsed)
+                if metrics is not None:
+                    metrics.record_request(
+                        endpoint.template, method, str(response.status_code), elapsed
+                    )
+                if not self.compensate_clock_skew:
+                    break
+                clock.observe(response.headers.get("date"), sent_at, time.time())
+                if (
+                    attempt
+                    or response.status_code != 401
+                    or abs(clock.offset - signed_offset) <= clock.resolution
+                ):
+                    break
+                # Rejected while our clock was off: re-sign with the new offset
+                clock.skew_rejections += 1
+                if metrics is not None:
+                    metrics.retries.labels("clock_skew").inc()
+
+            if self.compression is not None:
+                self.compression.record_response(
+                    response.num_bytes_downloaded, len(response.content)
+                )
+
+            # Not modified: reuse the cached parsed response
+            if response.status_code == 304 and cache_entry is not None:
+                if metrics is not None:
+                    metrics.cache.labels("revalidated").inc()
+                return self.cache.revalidated(cache_entry)
 
             # Parse response
+            decoding = time.perf_counter()
             try:
                 response_data = response.json()
             except Exception:
                 response_data = {"message": response.text}
+            if sample is not None:
+                sample.add("decode", decoding, time.perf_counter())
 
             # Handle error responses
-            if response.status_code == 401:
-                raise AuthenticationError(
-                    "Authentication failed",
-                    status_code=response.status_code,
-                    response=response_data,
-                )
-            elif response.status_code == 400:
-                raise ValidationError(
-                    response_data.get("message", "Validation failed"),
-                    status_code=response.status_code,
-                    response=response_data,
-                )
-            elif response.status_code >= 400:
-                raise APIError(
-                    response_data.get("message", "API error"),
-                    status_code=response.status_code,
-                    response=response_data,
+            _raise_for_status(response.status_code, response_data)
+
+            if cache_key is not None:
+                if metrics is not None:
+                    metrics.cache.labels("miss").inc()
+                self.cache.store(
+                    cache_key,
+                    endpoint.group,
+                    response_data,
+                    response.headers,
+                    len(response.content),
                 )
+            elif self.cache is not None:
+                # A write may have changed resources of this group
+                self.cache.expire_group(endpoint.group)
 
             return response_data
 
+        except DeadlineExceededError:
+            if metrics is not None:
+                metrics.requests.labels(
+                    endpoint.template, method, "deadline_exceeded"
+                ).inc()
+            raise
         except httpx.HTTPError as e:
+            remaining = time_remaining()
+            if (
+                isinstance(e, httpx.TimeoutException)
+                and remaining is not None
+                and remaining <= 0
+            ):
+                # A phase timeout shrunk to the deadline
+                if metrics is not None:
+                    metrics.requests.labels(
+                        endpoint.template, method, "deadline_exceeded"
+                    ).inc()
+                raise DeadlineExceededError(
+                    f"Deadline exceeded during {_timeout_phase(e)}",
+                    phase=_timeout_phase(e),
+                )
+            if metrics is not None:
+                metrics.requests.labels(
+                    endpoint.template, method, "network_error"
+                ).inc()
             raise NetworkError(f"Network error: {str(e)}")
 
 
+def _raise_for_status(status_code: int, response_data: dict):
+    """Raise the SDK exception for an error response"""
+    error = error_for_status(status_code, response_data)
+    if error is not None:
+        raise error
+
+
+def _timeout_phase(error: httpx.TimeoutException) -> str:
+    """Request phase an httpx timeout occurred in"""
+    if isinstance(error, httpx.ConnectTimeout):
+        return "connect"
+    if isinstance(error, httpx.WriteTimeout):
+        return "write"
+    if isinstance(error, httpx.PoolTimeout):
+        return "pool"
+    return "response"
+
+
+def _is_failure(error: KeshFlipError) -> bool:
+    """Whether an error indicates an unhealthy service rather than a bad request"""
+    if isinstance(error, NetworkError):
+        return True
+    return error.status_code is not None and (
+        error.status_code >= 500 or error.status_code == 429
+    )
+
+
+def _is_overload(error: KeshFlipError) -> bool:
+    """Whether an error indicates the service is shedding load (429, 503, timeout)"""
+    if isinstance(error, NetworkError):
+        return True
+    return error.status_code in (429, 503)
+
+
 class CryptoModule:
     """Crypto operations module"""
 
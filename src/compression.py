@@ -0,0 +1,230 @@
+"""Request and response body compression"""
+import gzip
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+GZIP = "gzip"
+BROTLI = "br"
+ZSTD = "zstd"
+
+DEFAULT_LEVELS = {GZIP: 6, BROTLI: 5, ZSTD: 3}
+
+# httpx decodes zstd responses from 0.27 on
+_HTTPX_VERSION = tuple(int(part) for part in httpx.__version__.split(".")[:2])
+_HTTPX_DECODES_ZSTD = _HTTPX_VERSION >= (0, 27)
+
+
+def available_encodings() -> List[str]:
+    """
+    Content encodings usable in this environment, most preferred first
+
+    ``gzip`` is always available; ``zstd`` needs the ``zstandard`` package and
+    httpx 0.27 or later, and ``br`` needs ``brotli`` or ``brotlicffi``. These
+    are the same packages httpx uses to decode responses.
+
+    Returns:
+        List of content-coding names
+    """
+    encodings = []
+    if zstandard is not None and _HTTPX_DECODES_ZSTD:
+        encodings.append(ZSTD)
+    if brotli is not None:
+        encodings.append(BROTLI)
+    encodings.append(GZIP)
+    return encodings
+
+
+def compress(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress bytes with a content encoding
+
+    Args:
+        data: Raw bytes
+        encoding: "gzip", "br" or "zstd"
+        level: Compression level (encoding default if None)
+
+    Returns:
+        Compressed bytes
+    """
+    level = DEFAULT_LEVELS.get(encoding) if level is None else level
+    if encoding == GZIP:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == BROTLI and brotli is not None:
+        return brotli.compress(data, quality=level)
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def decompress(data: bytes, encoding: str) -> bytes:
+    """
+    Decompress bytes with a content encoding
+
+    Args:
+        data: Compressed bytes
+        encoding: "gzip", "br" or "zstd"
+
+    Returns:
+        Raw bytes
+    """
+    if encoding == GZIP:
+        return zlib.decompress(data, wbits=31)
+    if encoding == BROTLI and brotli is not None:
+        return brotli.decompress(data)
+    if encoding == ZSTD and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    raise ValueError(f"Unsupported content encoding '{encoding}'")
+
+
+def negotiate(
+    accept_encoding: str, supported: Optional[List[str]] = None
+) -> Optional[str]:
+    """
+    Pick a content encoding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Accept-Encoding header value
+        supported: Encodings to choose from, in preference order
+            (``available_encodings()`` if None)
+
+    Returns:
+        Chosen encoding, or None for identity
+    """
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in supported or available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class CompressionPolicy:
+    """
+    Client-side compression settings
+
+    Responses: the client advertises ``accept`` encodings (all installed ones
+    by default) and httpx decodes whatever the server picks.
+
+    Requests: bodies of at least ``min_size`` bytes are compressed with
+    ``request_encoding`` and sent with ``Content-Encoding``. The signature is
+    always computed over the uncompressed canonical JSON body, so it does not
+    depend on the compressor or level; the server verifies it after decoding.
+
+    Example:
+        ```python
+        compression = CompressionPolicy(request_encoding="gzip", min_size=2048)
+        client = KeshFlipClient(..., compression=compression)
+        ```
+    """
+
+    def __init__(
+        self,
+        request_encoding: Optional[str] = None,
+        min_size: int = 1024,
+        level: Optional[int] = None,
+        accept: Optional[List[str]] = None,
+    ):
+        """
+        Initialize compression policy
+
+        Args:
+            request_encoding: Encoding for large request bodies (None disables
+                request compression)
+            min_size: Smallest request body in bytes worth compressing
+            level: Compression level (encoding default if None)
+            accept: Encodings to accept for responses (all installed if None)
+        """
+        if (
+            request_encoding is not None
+            and request_encoding not in available_encodings()
+        ):
+            raise ValueError(f"Content encoding '{request_encoding}' is not available")
+        self.request_encoding = request_encoding
+        self.min_size = min_size
+        self.level = level
+        self.accept_encoding = ", ".join(accept or available_encodings())
+
+        # Counters
+        self.requests_compressed = 0
+        self.request_bytes_raw = 0
+        self.request_bytes_sent = 0
+        self.response_bytes_received = 0
+        self.response_bytes_decoded = 0
+
+    def encode_request(self, body: bytes) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Compress a request body if it is large enough
+
+        Args:
+            body: Uncompressed request body
+
+        Returns:
+            Tuple of (body to send, extra headers)
+        """
+        self.request_bytes_raw += len(body)
+        if self.request_encoding is None or len(body) < self.min_size:
+            self.request_bytes_sent += len(body)
+            return body, {}
+        compressed = compress(body, self.request_encoding, self.level)
+        self.requests_compressed += 1
+        self.request_bytes_sent += len(compressed)
+        return compressed, {"Content-Encoding": self.request_encoding}
+
+    def record_response(self, received: int, decoded: int):
+        """
+        Record response sizes on the wire and after decoding
+
+        Args:
+            received: Bytes downloaded
+            decoded: Bytes after content decoding
+        """
+        self.response_bytes_received += received
+        self.response_bytes_decoded += decoded
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get compression metrics
+
+        Returns:
+            Dictionary of byte counters and savings ratios
+        """
+        return {
+            "requests_compressed": self.requests_compressed,
+            "request_bytes_raw": self.request_bytes_raw,
+            "request_bytes_sent": self.request_bytes_sent,
+            "response_bytes_received": self.response_bytes_received,
+            "response_bytes_decoded": self.response_bytes_decoded,
+            "request_savings": _savings(
+                self.request_bytes_raw, self.request_bytes_sent
+            ),
+            "response_savings": _savings(
+                self.response_bytes_decoded, self.response_bytes_received
+            ),
+        }
+
+
+def _savings(raw: int, sent: int) -> float:
+    return 1.0 - sent / raw if raw else 0.0
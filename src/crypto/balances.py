@@ -1,6 +1,7 @@
 """Crypto balance operations"""
 from typing import TYPE_CHECKING, Optional, List
 from ..models.crypto import CryptoBalanceResponse
+from ..sampling import parse_response
 
 if TYPE_CHECKING:
     from ..client import KeshFlipClient
@@ -48,7 +49,7 @@ class CryptoBalances:
             path=f"/api/v1/crypto/balances/{pid}/{chain_id}/{asset}",
         )
 
-        return CryptoBalanceResponse(**response)
+        return parse_response(CryptoBalanceResponse, response)
 
     async def list(
         self,
@@ -81,5 +82,5 @@ class CryptoBalances:
 
         # Parse response into list of balance objects
         if isinstance(response, dict) and "data" in response:
-            return [CryptoBalanceResponse(**item) for item in response["data"]]
+            return parse_response(CryptoBalanceResponse, response["data"])
         return []
@@ -1,6 +1,9 @@
 """Crypto deposit operations"""
 from typing import TYPE_CHECKING, Optional
-from ..models.crypto import CryptoDepositRequest, CryptoDepositResponse
+from ..models.crypto import CryptoDepositResponse
+from ..models.encoders import CRYPTO_DEPOSIT_ENCODER
+from ..streaming import ListStream
+from ..sampling import parse_response
 
 if TYPE_CHECKING:
     from ..client import KeshFlipClient
@@ -53,23 +56,26 @@ class CryptoDeposits:
         if not pid:
             raise ValueError("partner_id must be provided or set on client")
 
-        request = CryptoDepositRequest(
-            partner_id=pid,
-            asset=asset,
-            chain_id=chain_id,
-            amount=amount,
-            idempotency_key=idempotency_key,
-            currency=currency,
-            reference=reference,
+        body = CRYPTO_DEPOSIT_ENCODER.encode(
+            {
+                "partner_id": pid,
+                "asset": asset,
+                "chain_id": chain_id,
+                "amount": amount,
+                "idempotency_key": idempotency_key,
+                "currency": currency,
+                "reference": reference,
+            },
+            validate=self.client.validate_requests,
         )
 
         response = await self.client.request(
             method="POST",
             path="/api/v1/crypto/deposits",
-            json_data=request.model_dump(by_alias=True, exclude_none=True),
+            content=body,
         )
 
-        return CryptoDepositResponse(**response)
+        return parse_response(CryptoDepositResponse, response)
 
     async def get(self, deposit_id: str) -> dict:
         """
@@ -133,3 +139,39 @@ class CryptoDeposits:
         )
 
         return response
+
+    def stream(
+        self,
+        partner_id: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+    ) -> ListStream:
+        """
+        Stream deposits for a partner without buffering the whole response
+
+        Args:
+            partner_id: Partner ID (uses client default if not provided)
+            status: Filter by status (PENDING, CONFIRMED, etc.)
+            limit: Maximum number of results
+
+        Returns:
+            ListStream yielding deposits as they are parsed
+
+        Example:
+            ```python
+            async for deposit in client.crypto.deposits.stream(limit=100000):
+                print(f"Deposit {deposit['id']}: {deposit['status']}")
+            ```
+        """
+        pid = partner_id or self.client.partner_id
+        if not pid:
+            raise ValueError("partner_id must be provided or set on client")
+
+        params = {"limit": limit}
+        if status:
+            params["status"] = status
+
+        return self.client.stream(
+            path=f"/api/v1/crypto/deposits/partner/{pid}",
+            params=params,
+        )
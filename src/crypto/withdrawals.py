@@ -1,6 +1,8 @@
 """Crypto withdrawal operations"""
 from typing import TYPE_CHECKING, Optional
-from ..models.crypto import CryptoWithdrawalRequest, CryptoWithdrawalResponse
+from ..models.crypto import CryptoWithdrawalResponse
+from ..models.encoders import CRYPTO_WITHDRAWAL_ENCODER
+from ..sampling import parse_response
 
 if TYPE_CHECKING:
     from ..client import KeshFlipClient
@@ -37,6 +39,10 @@ class CryptoWithdrawals:
         Returns:
             CryptoWithdrawalResponse with withdrawal details
 
+        Raises:
+            InsufficientBalanceError: A balance ledger guarding the client
+                cannot cover the amount (nothing is sent)
+
         Example:
             ```python
             withdrawal = await client.crypto.withdrawals.create(
@@ -54,23 +60,35 @@ class CryptoWithdrawals:
         if not pid:
             raise ValueError("partner_id must be provided or set on client")
 
-        request = CryptoWithdrawalRequest(
-            partner_id=pid,
-            asset=asset,
-            chain_id=chain_id,
-            amount=amount,
-            to_address=to_address,
-            idempotency_key=idempotency_key,
-            reference=reference,
-        )
-
-        response = await self.client.request(
-            method="POST",
-            path="/api/v1/crypto/withdrawals",
-            json_data=request.model_dump(by_alias=True, exclude_none=True),
+        body = CRYPTO_WITHDRAWAL_ENCODER.encode(
+            {
+                "partner_id": pid,
+                "asset": asset,
+                "chain_id": chain_id,
+                "amount": amount,
+                "to_address": to_address,
+                "idempotency_key": idempotency_key,
+                "reference": reference,
+            },
+            validate=self.client.validate_requests,
         )
 
-        return CryptoWithdrawalResponse(**response)
+        ledger = self.client.balance_ledger
+        if ledger is None:
+            response = await self.client.request(
+                method="POST",
+                path="/api/v1/crypto/withdrawals",
+                content=body,
+            )
+        else:
+            with ledger.reserve(chain_id, asset, amount, partner_id=pid):
+                response = await self.client.request(
+                    method="POST",
+                    path="/api/v1/crypto/withdrawals",
+                    content=body,
+                )
+
+        return parse_response(CryptoWithdrawalResponse, response)
 
     async def get(self, withdrawal_id: str) -> dict:
         """
@@ -0,0 +1,78 @@
+"""Endpoint templates and groups for KeshPay API paths"""
+
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Pattern, Tuple
+
+
+class Endpoint(NamedTuple):
+    """Resolved endpoint for a concrete request path"""
+
+    method: str
+    template: str
+    group: str
+
+
+# (method, path template, endpoint group). More specific templates must come
+# before templates that would also match them (e.g. ``/partner/{partner_id}``).
+ROUTES: List[Tuple[str, str, str]] = [
+    ("POST", "/api/v1/crypto/deposits", "crypto.deposits"),
+    ("GET", "/api/v1/crypto/deposits/partner/{partner_id}", "crypto.deposits"),
+    ("GET", "/api/v1/crypto/deposits/{deposit_id}", "crypto.deposits"),
+    ("POST", "/api/v1/crypto/withdrawals", "crypto.withdrawals"),
+    (
+        "POST",
+        "/api/v1/crypto/withdrawals/{withdrawal_id}/cancel",
+        "crypto.withdrawals",
+    ),
+    ("GET", "/api/v1/crypto/withdrawals/{withdrawal_id}", "crypto.withdrawals"),
+    (
+        "GET",
+        "/api/v1/crypto/balances/{partner_id}/{chain_id}/{asset}",
+        "crypto.balances",
+    ),
+    ("GET", "/api/v1/crypto/balances/{partner_id}", "crypto.balances"),
+    ("POST", "/api/v1/fiat/deposits", "fiat.deposits"),
+    ("GET", "/api/v1/fiat/deposits/partner/{partner_id}", "fiat.deposits"),
+    ("GET", "/api/v1/fiat/deposits/{deposit_id}", "fiat.deposits"),
+    ("POST", "/api/v1/batch", "batch"),
+]
+
+DEFAULT_GROUP = "default"
+
+_PARAM = re.compile(r"\{([a-z_]+)\}")
+
+
+def _compile(template: str) -> Pattern:
+    parts = _PARAM.split(template)
+    # Even indexes are literal text, odd indexes are parameter names
+    pattern = "".join(
+        re.escape(part) if i % 2 == 0 else f"(?P<{part}>[^/]+)"
+        for i, part in enumerate(parts)
+    )
+    return re.compile(f"^{pattern}$")
+
+
+_COMPILED = [
+    (method, _compile(template), template, group) for method, template, group in ROUTES
+]
+
+
+@lru_cache(maxsize=4096)
+def resolve_endpoint(method: str, path: str) -> Endpoint:
+    """
+    Resolve a concrete request path to its endpoint template and group
+
+    Args:
+        method: HTTP method
+        path: Concrete API path (e.g., /api/v1/crypto/deposits/123)
+
+    Returns:
+        Endpoint with the matching template and group. Unknown paths resolve
+        to themselves in the ``default`` group.
+    """
+    method = method.upper()
+    for route_method, pattern, template, group in _COMPILED:
+        if route_method == method and pattern.match(path):
+            return Endpoint(method, template, group)
+    return Endpoint(method, path, DEFAULT_GROUP)
@@ -0,0 +1,166 @@
+"""Event loop selection with optional uvloop"""
+import asyncio
+import sys
+from typing import Any, Awaitable, Callable, List, Optional
+
+try:
+    import uvloop
+except ImportError:  # pragma: no cover - optional dependency
+    uvloop = None
+
+AUTO = "auto"
+UVLOOP = "uvloop"
+ASYNCIO = "asyncio"
+
+LOOPS = (AUTO, UVLOOP, ASYNCIO)
+
+
+def available_loops() -> List[str]:
+    """
+    Event loop implementations usable in this environment, fastest first
+
+    ``asyncio`` is always available; ``uvloop`` needs the ``uvloop`` package,
+    which does not support Windows.
+
+    Returns:
+        List of implementation names
+    """
+    return [UVLOOP, ASYNCIO] if uvloop is not None else [ASYNCIO]
+
+
+def resolve_loop(loop: str = AUTO) -> str:
+    """
+    Implementation an event loop preference selects
+
+    Args:
+        loop: "auto" (uvloop if installed, else asyncio), "uvloop" or
+            "asyncio"
+
+    Returns:
+        "uvloop" or "asyncio"
+
+    Raises:
+        ValueError: Unknown preference
+        ImportError: "uvloop" was requested but is not installed
+    """
+    if loop not in LOOPS:
+        raise ValueError(f"Unknown event loop {loop!r}; expected one of {LOOPS}")
+    if loop == UVLOOP and uvloop is None:
+        raise ImportError("uvloop is not installed: pip install 'src[uvloop]'")
+    if loop == AUTO:
+        return available_loops()[0]
+    return loop
+
+
+def loop_factory(loop: str = AUTO) -> Callable[[], asyncio.AbstractEventLoop]:
+    """
+    Function creating new event loops of the selected implementation
+
+    Args:
+        loop: Event loop preference (see ``resolve_loop``)
+
+    Returns:
+        Callable returning a new, not yet running event loop
+    """
+    if resolve_loop(loop) == UVLOOP:
+        return uvloop.new_event_loop
+    return asyncio.new_event_loop
+
+
+def install(loop: str = AUTO) -> str:
+    """
+    Make the selected implementation the default for new event loops
+
+    For servers and frameworks that create their own loop (e.g. gunicorn
+    workers); call it before the loop is created.
+
+    Args:
+        loop: Event loop preference (see ``resolve_loop``)
+
+    Returns:
+        Name of the installed implementation
+    """
+    name = resolve_loop(loop)
+    if name == UVLOOP:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    else:
+        asyncio.set_event_loop_policy(asyncio.DefaultEventLoopPolicy())
+    return name
+
+
+def run(main: Awaitable, loop: str = AUTO, debug: Optional[bool] = None) -> Any:
+    """
+    Run a coroutine on a new event loop of the selected implementation
+
+    Drop-in replacement for ``asyncio.run`` that uses uvloop when it is
+    installed and falls back to the standard loop otherwise. The global
+    event loop policy is left unchanged.
+
+    Args:
+        main: Coroutine to run
+        loop: Event loop preference (see ``resolve_loop``)
+        debug: Event loop debug mode (loop default if None)
+
+    Returns:
+        Result of ``main``
+
+    Example:
+        ```python
+        from src.eventloop import run
+
+        async def main():
+            async with KeshFlipClient(...) as client:
+                await client.crypto.balances.list()
+
+        run(main())  # uvloop if installed
+        ```
+    """
+    try:
+        factory = loop_factory(loop)
+    except (ValueError, ImportError):
+        if asyncio.iscoroutine(main):
+            main.close()
+        raise
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(debug=debug, loop_factory=factory) as runner:
+            return runner.run(main)
+
+    event_loop = factory()
+    try:
+        asyncio.set_event_loop(event_loop)
+        if debug is not None:
+            event_loop.set_debug(debug)
+        return event_loop.run_until_complete(main)
+    finally:
+        try:
+            _cancel_all_tasks(event_loop)
+            event_loop.run_until_complete(event_loop.shutdown_asyncgens())
+            if hasattr(event_loop, "shutdown_default_executor"):
+                event_loop.run_until_complete(event_loop.shutdown_default_executor())
+        finally:
+            asyncio.set_event_loop(None)
+            event_loop.close()
+
+
+def loop_name(event_loop: Optional[asyncio.AbstractEventLoop] = None) -> str:
+    """
+    Implementation of an event loop
+
+    Args:
+        event_loop: Event loop (the running loop if None)
+
+    Returns:
+        "uvloop" or "asyncio"
+    """
+    if event_loop is None:
+        event_loop = asyncio.get_running_loop()
+    return UVLOOP if type(event_loop).__module__.startswith("uvloop") else ASYNCIO
+
+
+def _cancel_all_tasks(event_loop: asyncio.AbstractEventLoop):
+    tasks = asyncio.all_tasks(event_loop)
+    if not tasks:
+        return
+    for task in tasks:
+        task.cancel()
+    event_loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
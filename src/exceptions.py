@@ -1,5 +1,7 @@
 """KeshFlip SDK exceptions"""
 
+from typing import Optional
+
 
 class KeshFlipError(Exception):
     """Base exception for all KeshFlip SDK errors"""
@@ -23,6 +25,24 @@ class ValidationError(KeshFlipError):
     pass
 
 
+class PreflightValidationError(ValidationError):
+    """Raised when a request fails local validation before it is sent"""
+
+    def __init__(self, message: str, field: str = None, rule: str = None):
+        super().__init__(message)
+        self.field = field
+        self.rule = rule
+
+
+class InsufficientBalanceError(ValidationError):
+    """Raised when a withdrawal exceeds the balance tracked by a balance ledger"""
+
+    def __init__(self, message: str, requested: str = None, available: str = None):
+        super().__init__(message)
+        self.requested = requested
+        self.available = available
+
+
 class APIError(KeshFlipError):
     """Raised when API returns an error"""
 
@@ -35,7 +55,76 @@ class NetworkError(KeshFlipError):
     pass
 
 
+def error_for_status(status_code: int, response_data: dict) -> Optional[KeshFlipError]:
+    """
+    Build the SDK exception for an API response status
+
+    Args:
+        status_code: HTTP status code
+        response_data: Parsed response body
+
+    Returns:
+        AuthenticationError, ValidationError or APIError, or None for a
+        successful status
+    """
+    if status_code == 401:
+        return AuthenticationError(
+            "Authentication failed",
+            status_code=status_code,
+            response=response_data,
+        )
+    elif status_code == 400:
+        return ValidationError(
+            response_data.get("message", "Validation failed"),
+            status_code=status_code,
+            response=response_data,
+        )
+    elif status_code >= 400:
+        return APIError(
+            response_data.get("message", "API error"),
+            status_code=status_code,
+            response=response_data,
+        )
+    return None
+
+
 class WebhookValidationError(KeshFlipError):
     """Raised when webhook signature validation fails"""
 
     pass
+
+
+class CircuitOpenError(KeshFlipError):
+    """Raised when a call is rejected because its circuit breaker is open"""
+
+    def __init__(self, message: str, group: str = None, retry_after: float = None):
+        super().__init__(message)
+        self.group = group
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimitError(KeshFlipError):
+    """Raised when a call cannot get a permit from the concurrency limiter"""
+
+    def __init__(self, message: str, limit: int = None, queue_depth: int = None):
+        super().__init__(message)
+        self.limit = limit
+        self.queue_depth = queue_depth
+
+
+class LoadShedError(KeshFlipError):
+    """Raised when a request is shed by the priority scheduler"""
+
+    def __init__(self, message: str, priority: str = None, queue_depth: int = None):
+        super().__init__(message)
+        self.priority = priority
+        self.queue_depth = queue_depth
+
+
+class DeadlineExceededError(KeshFlipError):
+    """Raised when a call's deadline passes before it could complete"""
+
+    def __init__(self, message: str, phase: str = None, deadline: float = None):
+        super().__init__(message)
+        self.phase = phase
+        self.deadline = deadline
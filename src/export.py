@@ -0,0 +1,525 @@
+"""Streaming columnar export of deposits and withdrawals"""
+import csv
+import time
+from decimal import Decimal
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+from .mirror.store import (
+    CRYPTO_DEPOSITS,
+    CRYPTO_WITHDRAWALS,
+    FIAT_DEPOSITS,
+    to_timestamp,
+)
+from .models.common import DepositStatus, TransactionStatus
+
+if TYPE_CHECKING:
+    from .client import KeshFlipClient
+
+# Column types
+STRING = "string"
+DECIMAL = "decimal"
+TIMESTAMP = "timestamp"
+STATUS = "status"
+INTEGER = "integer"
+
+# Statuses seeded into every status dictionary, in a fixed order
+KNOWN_STATUSES: Tuple[str, ...] = tuple(
+    dict.fromkeys(
+        [s.value for s in DepositStatus] + [s.value for s in TransactionStatus]
+    )
+)
+
+
+class Column(NamedTuple):
+    """One exported column"""
+
+    name: str
+    field: str
+    type: str
+
+
+_TIMESTAMPS = (
+    Column("created_at", "createdAt", TIMESTAMP),
+    Column("updated_at", "updatedAt", TIMESTAMP),
+)
+
+# Columns exported per record kind, in output order
+COLUMNS: Dict[str, Tuple[Column, ...]] = {
+    CRYPTO_DEPOSITS: (
+        Column("id", "id", STRING),
+        Column("partner_id", "partnerId", STRING),
+        Column("asset", "asset", STRING),
+        Column("chain_id", "chainId", STRING),
+        Column("amount", "amount", DECIMAL),
+        Column("currency", "currency", STRING),
+        Column("status", "status", STATUS),
+        Column("address", "address", STRING),
+        Column("hash", "hash", STRING),
+        Column("confirmations", "confirmations", INTEGER),
+        Column("reference", "reference", STRING),
+        *_TIMESTAMPS,
+        Column("confirmed_at", "confirmedAt", TIMESTAMP),
+        Column("expires_at", "expiresAt", TIMESTAMP),
+    ),
+    FIAT_DEPOSITS: (
+        Column("id", "id", STRING),
+        Column("partner_id", "partnerId", STRING),
+        Column("provider", "provider", STRING),
+        Column("customer_number", "customerNumber", STRING),
+        Column("amount", "amount", DECIMAL),
+        Column("currency", "currency", STRING),
+        Column("status", "status", STATUS),
+        Column("reference", "reference", STRING),
+        *_TIMESTAMPS,
+        Column("confirmed_at", "confirmedAt", TIMESTAMP),
+        Column("expires_at", "expiresAt", TIMESTAMP),
+    ),
+    CRYPTO_WITHDRAWALS: (
+        Column("id", "id", STRING),
+        Column("partner_id", "partnerId", STRING),
+        Column("asset", "asset", STRING),
+        Column("chain_id", "chainId", STRING),
+        Column("amount", "amount", DECIMAL),
+        Column("to_address", "toAddress", STRING),
+        Column("status", "status", STATUS),
+        Column("transaction_id", "transactionId", STRING),
+        Column("hash", "hash", STRING),
+        Column("reference", "reference", STRING),
+        *_TIMESTAMPS,
+    ),
+}
+
+
+class ExportStats(NamedTuple):
+    """Outcome of one export"""
+
+    rows: int
+    batches: int
+    seconds: float
+    rows_per_second: float
+
+
+class ExportWriter:
+    """
+    Interface of export writers
+
+    ``open`` is called once with the columns, ``write`` once per batch with
+    one list of raw record values per column, and ``close`` at the end.
+    """
+
+    def open(self, columns: Sequence[Column]):
+        """Start the output for the given columns"""
+        raise NotImplementedError
+
+    def write(self, values: List[list]):
+        """Append one batch of rows, given column by column"""
+        raise NotImplementedError
+
+    def close(self):
+        """Finish and close the output"""
+        raise NotImplementedError
+
+
+class CSVExportWriter(ExportWriter):
+    """
+    CSV writer (no extra dependencies)
+
+    Amounts and timestamps are written exactly as the API returned them, so
+    decimal amounts keep every digit; missing values are empty.
+    """
+
+    def __init__(self, path: str, delimiter: str = ",", header: bool = True):
+        """
+        Initialize CSV export writer
+
+        Args:
+            path: Output file
+            delimiter: Field separator
+            header: Write a header row with the column names
+        """
+        self.path = path
+        self.delimiter = delimiter
+        self.header = header
+        self._file = None
+        self._writer = None
+
+    def open(self, columns: Sequence[Column]):
+        self._file = open(self.path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file, delimiter=self.delimiter)
+        if self.header:
+            self._writer.writerow([column.name for column in columns])
+
+    def write(self, values: List[list]):
+        self._writer.writerows(zip(*values))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class _ArrowBatches:
+    """Converts column batches into typed Arrow record batches"""
+
+    def __init__(self, columns: Sequence[Column], amount_scale: int):
+        self.columns = list(columns)
+        self.amount_scale = amount_scale
+        self._decimal = pyarrow.decimal128(38, amount_scale)
+        self._ids = next(
+            (i for i, c in enumerate(self.columns) if c.name == "id"), None
+        )
+        self._rows = 0
+        self.schema = pyarrow.schema(
+            [pyarrow.field(c.name, self._arrow_type(c.type)) for c in self.columns]
+        )
+        # Status dictionaries only grow, so later batches are deltas
+        self._dictionaries: Dict[str, Tuple[List[str], Dict[str, int]]] = {
+            c.name: (list(KNOWN_STATUSES), {s: i for i, s in enumerate(KNOWN_STATUSES)})
+            for c in self.columns
+            if c.type == STATUS
+        }
+
+    def _arrow_type(self, column_type: str):
+        if column_type == DECIMAL:
+            return self._decimal
+        if column_type == TIMESTAMP:
+            return pyarrow.timestamp("ms", tz="UTC")
+        if column_type == STATUS:
+            return pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        if column_type == INTEGER:
+            return pyarrow.int64()
+        return pyarrow.string()
+
+    def convert(self, values: List[list]):
+        arrays = []
+        for column, column_values in zip(self.columns, values):
+            kind = column.type
+            if kind == DECIMAL:
+                array = self._decimal_array(column.name, column_values, values)
+            elif kind == TIMESTAMP:
+                array = pyarrow.array(
+                    [_epoch_ms(v) for v in column_values],
+                    type=pyarrow.timestamp("ms", tz="UTC"),
+                )
+            elif kind == STATUS:
+                array = self._encode_status(column.name, column_values)
+            elif kind == INTEGER:
+                array = pyarrow.array(
+                    [None if v is None else int(v) for v in column_values],
+                    type=pyarrow.int64(),
+                )
+            else:
+                array = _string_array(column_values)
+            arrays.append(array)
+        self._rows += len(values[0]) if values else 0
+        return pyarrow.record_batch(arrays, schema=self.schema)
+
+    def _decimal_array(self, name: str, column_values: list, values: List[list]):
+        decimals = [None if v is None else Decimal(str(v)) for v in column_values]
+        try:
+            return pyarrow.array(decimals, type=self._decimal)
+        except pyarrow.ArrowInvalid:
+            row = next(i for i, d in enumerate(decimals) if not self._fits(d))
+        record = f"row {self._rows + row}"
+        if self._ids is not None:
+            record = f"record {values[self._ids][row]!r} ({record})"
+        raise ValueError(
+            f"Column {name!r} of {record}: {column_values[row]} does not fit "
+            f"{self._decimal} without rounding; raise amount_scale"
+        )
+
+    def _fits(self, value: Optional[Decimal]) -> bool:
+        try:
+            pyarrow.array([value], type=self._decimal)
+        except pyarrow.ArrowInvalid:
+            return False
+        return True
+
+    def _encode_status(self, name: str, column_values: list):
+        dictionary, index = self._dictionaries[name]
+        indices = []
+        for value in column_values:
+            if value is None:
+                indices.append(None)
+                continue
+            position = index.get(value)
+            if position is None:
+                position = index[value] = len(dictionary)
+                dictionary.append(str(value))
+            indices.append(position)
+        return pyarrow.DictionaryArray.from_arrays(
+            pyarrow.array(indices, type=pyarrow.int32()),
+            pyarrow.array(dictionary, type=pyarrow.string()),
+        )
+
+
+class ArrowExportWriter(ExportWriter):
+    """
+    Arrow IPC file writer (requires pyarrow)
+
+    Amounts are ``decimal128(38, amount_scale)``, timestamps are UTC
+    millisecond timestamps and statuses are dictionary-encoded strings.
+    Each batch is written as one record batch.
+
+    Amounts are never rounded: one with more decimal places than
+    ``amount_scale``, or too many digits in all, raises ValueError naming
+    the record and column before its batch is written. Batches written
+    before it stay in the file.
+    """
+
+    def __init__(self, path: str, amount_scale: int = 18):
+        """
+        Initialize Arrow export writer
+
+        Args:
+            path: Output file (e.g. "deposits.arrow")
+            amount_scale: Decimal places of amounts (amounts with more raise
+                ValueError)
+        """
+        _require_pyarrow()
+        self.path = path
+        self.amount_scale = amount_scale
+        self._batches: Optional[_ArrowBatches] = None
+        self._writer = None
+
+    def open(self, columns: Sequence[Column]):
+        self._batches = _ArrowBatches(columns, self.amount_scale)
+        self._writer = pyarrow.ipc.new_file(
+            self.path,
+            self._batches.schema,
+            options=pyarrow.ipc.IpcWriteOptions(emit_dictionary_deltas=True),
+        )
+
+    def write(self, values: List[list]):
+        self._writer.write_batch(self._batches.convert(values))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class ParquetExportWriter(ExportWriter):
+    """
+    Parquet writer (requires pyarrow)
+
+    Column types, and the ValueError for amounts that do not fit, are those
+    of ArrowExportWriter; each batch becomes one row group.
+    """
+
+    def __init__(self, path: str, compression: str = "zstd", amount_scale: int = 18):
+        """
+        Initialize Parquet export writer
+
+        Args:
+            path: Output file (e.g. "deposits.parquet")
+            compression: Parquet codec ("zstd", "snappy", "gzip" or "none")
+            amount_scale: Decimal places of amounts (amounts with more raise
+                ValueError)
+        """
+        _require_pyarrow()
+        self.path = path
+        self.compression = compression
+        self.amount_scale = amount_scale
+        self._batches: Optional[_ArrowBatches] = None
+        self._writer = None
+
+    def open(self, columns: Sequence[Column]):
+        self._batches = _ArrowBatches(columns, self.amount_scale)
+        self._writer = pyarrow.parquet.ParquetWriter(
+            self.path, self._batches.schema, compression=self.compression
+        )
+
+    def write(self, values: List[list]):
+        batch = self._batches.convert(values)
+        self._writer.write_table(pyarrow.Table.from_batches([batch]))
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def writer_for(path: str, **options) -> ExportWriter:
+    """
+    Export writer for a file, chosen by its extension
+
+    Args:
+        path: Output file ending in .csv, .parquet, .arrow, .feather or .ipc
+        **options: Writer keyword arguments
+
+    Returns:
+        CSVExportWriter, ParquetExportWriter or ArrowExportWriter
+
+    Raises:
+        ValueError: Unknown extension
+    """
+    lowered = path.lower()
+    if lowered.endswith(".csv"):
+        return CSVExportWriter(path, **options)
+    if lowered.endswith(".parquet"):
+        return ParquetExportWriter(path, **options)
+    if lowered.endswith((".arrow", ".feather", ".ipc")):
+        return ArrowExportWriter(path, **options)
+    raise ValueError(f"Cannot infer export format of {path!r}")
+
+
+async def export_records(
+    records: Union[Iterable[dict], AsyncIterable[dict]],
+    kind: str,
+    destination: Union[str, ExportWriter],
+    batch_size: int = 10_000,
+    columns: Optional[Sequence[Column]] = None,
+) -> ExportStats:
+    """
+    Write records to a file batch by batch
+
+    Only one batch of column values is held at a time, so memory does not
+    grow with the number of records.
+
+    Args:
+        records: Deposits or withdrawals as returned by the API (iterable or
+            async iterable, e.g. a ListStream or ``store.query(...)``)
+        kind: "crypto.deposits", "fiat.deposits" or "crypto.withdrawals"
+        destination: Output path (format chosen by extension) or writer
+        batch_size: Rows per written batch (record batch or row group)
+        columns: Columns to write (COLUMNS[kind] if None)
+
+    Returns:
+        ExportStats
+    """
+    if columns is None:
+        if kind not in COLUMNS:
+            raise ValueError(f"Unknown record kind {kind!r}")
+        columns = COLUMNS[kind]
+    writer = writer_for(destination) if isinstance(destination, str) else destination
+    fields = [column.field for column in columns]
+    rows = batches = 0
+    start = time.perf_counter()
+
+    writer.open(columns)
+    try:
+        buffers: List[list] = [[] for _ in fields]
+        pending = 0
+        async for record in _iterate(records):
+            for buffer, field in zip(buffers, fields):
+                buffer.append(record.get(field))
+            pending += 1
+            if pending >= batch_size:
+                writer.write(buffers)
+                rows += pending
+                batches += 1
+                buffers, pending = [[] for _ in fields], 0
+        if pending:
+            writer.write(buffers)
+            rows += pending
+            batches += 1
+    finally:
+        writer.close()
+
+    seconds = time.perf_counter() - start
+    return ExportStats(rows, batches, seconds, rows / seconds if seconds else 0.0)
+
+
+async def export_listing(
+    client: "KeshFlipClient",
+    kind: str,
+    destination: Union[str, ExportWriter],
+    status: Optional[str] = None,
+    provider: Optional[str] = None,
+    limit: int = 1_000_000,
+    batch_size: int = 10_000,
+    partner_id: Optional[str] = None,
+) -> ExportStats:
+    """
+    Export a deposit listing straight from the API to a file
+
+    The listing is streamed and parsed incrementally, and rows are written
+    every ``batch_size`` records, so memory stays flat however long the
+    history is. Withdrawals have no listing endpoint; export them with
+    ``export_records`` (e.g. from a DepositMirror store).
+
+    Args:
+        client: KeshFlip client
+        kind: "crypto.deposits" or "fiat.deposits"
+        destination: Output path (format chosen by extension) or writer
+        status: Filter by status
+        provider: Filter fiat deposits by provider (EVC, SALAAM_BANK)
+        limit: Maximum number of records
+        batch_size: Rows per written batch
+        partner_id: Partner ID (uses client default if not provided)
+
+    Returns:
+        ExportStats
+
+    Example:
+        ```python
+        stats = await export_listing(
+            client, "crypto.deposits", "deposits.parquet", status="CONFIRMED"
+        )
+        print(f"{stats.rows} rows at {stats.rows_per_second:.0f} rows/s")
+        ```
+    """
+    if kind == CRYPTO_DEPOSITS:
+        records = client.crypto.deposits.stream(
+            partner_id=partner_id, status=status, limit=limit
+        )
+    elif kind == FIAT_DEPOSITS:
+        records = client.fiat.deposits.stream(
+            partner_id=partner_id, provider=provider, status=status, limit=limit
+        )
+    else:
+        raise ValueError(
+            f"{kind!r} has no listing endpoint; use export_records instead"
+        )
+    # Closes the listing if writing fails part-way
+    async with records:
+        return await export_records(records, kind, destination, batch_size=batch_size)
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ImportError("Arrow and Parquet export need pip install 'src[export]'")
+
+
+async def _iterate(records: Union[Iterable[dict], AsyncIterable[dict]]):
+    if hasattr(records, "__aiter__"):
+        async for record in records:
+            yield record
+    else:
+        for record in records:
+            yield record
+
+
+def _epoch_ms(value: Any) -> Optional[int]:
+    seconds = to_timestamp(value)
+    return None if seconds is None else round(seconds * 1000)
+
+
+def _string_array(values: list):
+    try:
+        return pyarrow.array(values, type=pyarrow.string())
+    except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+        # Non-string values (e.g. numeric chain IDs)
+        return pyarrow.array(
+            [None if v is None else str(v) for v in values], type=pyarrow.string()
+        )
@@ -1,6 +1,9 @@
 """Fiat deposit operations (EVC/Salaam Bank)"""
 from typing import TYPE_CHECKING, Optional
-from ..models.fiat import FiatDepositRequest, FiatDepositResponse
+from ..models.fiat import FiatDepositResponse
+from ..models.encoders import FIAT_DEPOSIT_ENCODER
+from ..streaming import ListStream
+from ..sampling import parse_response
 
 if TYPE_CHECKING:
     from ..client import KeshFlipClient
@@ -62,23 +65,26 @@ class FiatDeposits:
         if not pid:
             raise ValueError("partner_id must be provided or set on client")
 
-        request = FiatDepositRequest(
-            partner_id=pid,
-            provider=provider,
-            customer_number=customer_number,
-            amount=amount,
-            idempotency_key=idempotency_key,
-            currency=currency,
-            reference=reference,
+        body = FIAT_DEPOSIT_ENCODER.encode(
+            {
+                "partner_id": pid,
+                "provider": provider,
+                "customer_number": customer_number,
+                "amount": amount,
+                "idempotency_key": idempotency_key,
+                "currency": currency,
+                "reference": reference,
+            },
+            validate=self.client.validate_requests,
         )
 
         response = await self.client.request(
             method="POST",
             path="/api/v1/fiat/deposits",
-            json_data=request.model_dump(by_alias=True, exclude_none=True),
+            content=body,
         )
 
-        return FiatDepositResponse(**response)
+        return parse_response(FiatDepositResponse, response)
 
     async def get(self, deposit_id: str) -> dict:
         """
@@ -149,3 +155,43 @@ class FiatDeposits:
         )
 
         return response
+
+    def stream(
+        self,
+        partner_id: Optional[str] = None,
+        provider: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+    ) -> ListStream:
+        """
+        Stream fiat deposits for a partner without buffering the whole response
+
+        Args:
+            partner_id: Partner ID (uses client default if not provided)
+            provider: Filter by provider (EVC, SALAAM_BANK)
+            status: Filter by status (PENDING, CONFIRMED, etc.)
+            limit: Maximum number of results
+
+        Returns:
+            ListStream yielding deposits as they are parsed
+
+        Example:
+            ```python
+            async for deposit in client.fiat.deposits.stream(provider="EVC"):
+                print(f"Deposit {deposit['id']}: {deposit['amount']}")
+            ```
+        """
+        pid = partner_id or self.client.partner_id
+        if not pid:
+            raise ValueError("partner_id must be provided or set on client")
+
+        params = {"limit": limit}
+        if provider:
+            params["provider"] = provider
+        if status:
+            params["status"] = status
+
+        return self.client.stream(
+            path=f"/api/v1/fiat/deposits/partner/{pid}",
+            params=params,
+        )
@@ -0,0 +1,21 @@
+"""Local balance reservation ledger for withdrawals"""
+from .ledger import BalanceLedger, Reservation
+from .store import (
+    BalanceState,
+    BalanceStore,
+    LockStats,
+    MemoryBalanceStore,
+    SQLiteBalanceStore,
+    balance_key,
+)
+
+__all__ = [
+    "BalanceLedger",
+    "Reservation",
+    "BalanceState",
+    "BalanceStore",
+    "LockStats",
+    "MemoryBalanceStore",
+    "SQLiteBalanceStore",
+    "balance_key",
+]
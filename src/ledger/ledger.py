@@ -0,0 +1,427 @@
+"""Local reservation ledger of crypto balances"""
+import asyncio
+import time
+import uuid
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+from ..exceptions import (
+    CircuitOpenError,
+    ConcurrencyLimitError,
+    DeadlineExceededError,
+    InsufficientBalanceError,
+    KeshFlipError,
+    LoadShedError,
+    NetworkError,
+)
+from ..models.common import DepositStatus, WebhookEvent
+from .store import BalanceState, BalanceStore, MemoryBalanceStore, balance_key
+
+if TYPE_CHECKING:
+    from ..client import KeshFlipClient
+    from ..webhooks.handler import WebhookHandler
+
+# Withdrawal statuses after which the amount is back on the balance
+_REFUNDED_STATUSES = ("FAILED", "CANCELLED")
+
+# Deadline phases that end a call before anything is sent
+_UNSENT_PHASES = (
+    "request",
+    "scheduler",
+    "concurrency limiter",
+    "rate limiter",
+    "signing",
+    "connect",
+    "pool",
+)
+
+
+class Reservation:
+    """
+    An amount held on a tracked balance while its withdrawal is created
+
+    Used as a context manager around the create call: leaving the block
+    normally keeps the amount debited, and an error that shows the request
+    was not applied (a 4xx response or a local rejection) makes it available
+    again. After network errors, 5xx responses and cancellation the outcome
+    is unknown, so the amount stays debited until the next refresh.
+    """
+
+    def __init__(
+        self,
+        ledger: "BalanceLedger",
+        token: Optional[str],
+        key: str,
+        amount: Decimal,
+    ):
+        """
+        Initialize reservation
+
+        Args:
+            ledger: Ledger holding the reservation
+            token: Reservation ID (None when the balance is not tracked)
+            key: Balance key
+            amount: Reserved amount
+        """
+        self.ledger = ledger
+        self.token = token
+        self.key = key
+        self.amount = amount
+
+    @property
+    def held(self) -> bool:
+        """Whether an amount is actually reserved"""
+        return self.token is not None
+
+    def commit(self):
+        """Keep the amount debited (the withdrawal was created)"""
+        self._settle(applied=True)
+
+    def release(self):
+        """Make the amount available again (the withdrawal was not created)"""
+        self._settle(applied=False)
+
+    def finish(self, error: Optional[BaseException] = None):
+        """
+        Commit or release according to how the create call ended
+
+        Args:
+            error: Exception the call raised (None if it succeeded)
+        """
+        if error is None or not _rejected(error):
+            self.commit()
+        else:
+            self.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.finish(exc_val)
+
+    def _settle(self, applied: bool):
+        if self.token is None:
+            return
+        token, self.token = self.token, None
+        self.ledger.store.settle(token, applied, self.ledger._clock())
+        if not applied:
+            self.ledger.released += 1
+
+
+class BalanceLedger:
+    """
+    Local view of crypto balances that refuses withdrawals it cannot cover
+
+    Balances are seeded from ``client.crypto.balances``. Each withdrawal
+    reserves its amount atomically before the create call, so concurrent
+    payout workers cannot together exceed the balance, and a withdrawal the
+    balance cannot cover raises ``InsufficientBalanceError`` without a round
+    trip. With a SQLiteBalanceStore the reservations are shared by every
+    process using the same database file.
+
+    Balances are corrected from the API every ``refresh_interval`` seconds
+    while the ledger is started. Between refreshes, deposit and withdrawal
+    webhooks received through an attached WebhookHandler credit confirmed
+    deposits and failed withdrawals right away. The API sends no balance
+    webhooks. Withdrawals of balances that were never seeded are not checked
+    unless ``require_seeded`` is set.
+
+    Example:
+        ```python
+        ledger = BalanceLedger(client, SQLiteBalanceStore("balances.db"))
+        ledger.attach(client.webhooks)
+        async with ledger:  # seeds, then refreshes in the background
+            try:
+                await client.crypto.withdrawals.create(...)
+            except InsufficientBalanceError as e:
+                print(f"Skipped: only {e.available} available")
+        ```
+    """
+
+    def __init__(
+        self,
+        client: "KeshFlipClient",
+        store: Optional[BalanceStore] = None,
+        refresh_interval: float = 30.0,
+        stale_after: float = 300.0,
+        require_seeded: bool = False,
+        guard: bool = True,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize balance ledger
+
+        Args:
+            client: KeshFlip client used to read balances
+            store: Balance store (MemoryBalanceStore if not provided)
+            refresh_interval: Seconds between background refreshes
+            stale_after: Age in seconds after which an unfinished
+                reservation (e.g. of a crashed process) is dropped on refresh
+            require_seeded: Refuse withdrawals of balances that are not
+                tracked instead of letting them through
+            guard: Check ``client.crypto.withdrawals.create`` calls against
+                this ledger
+            clock: Wall-clock time source (epoch seconds), shared by the
+                processes of a SQLite store
+        """
+        self.client = client
+        self.store = store if store is not None else MemoryBalanceStore()
+        self.refresh_interval = refresh_interval
+        self.stale_after = stale_after
+        self.require_seeded = require_seeded
+        self._clock = clock
+        self._task: Optional[asyncio.Task] = None
+        if guard:
+            client.balance_ledger = self
+
+        # Counters
+        self.reserved = 0
+        self.refused = 0
+        self.released = 0
+        self.untracked = 0
+        self.credits = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the background refresh is running"""
+        return self._task is not None and not self._task.done()
+
+    async def refresh(
+        self,
+        chain_id: Optional[str] = None,
+        asset: Optional[str] = None,
+        partner_id: Optional[str] = None,
+    ) -> Dict[str, Decimal]:
+        """
+        Read balances from the API and reset the tracked ones
+
+        Args:
+            chain_id: Chain of a single balance to refresh (all if None)
+            asset: Asset of a single balance to refresh (all if None)
+            partner_id: Partner ID (uses client default if not provided)
+
+        Returns:
+            Dictionary of balance keys and their new available balance
+        """
+        pid = self._partner(partner_id)
+        requested_at = self._clock()
+        if chain_id is not None and asset is not None:
+            balances = [
+                await self.client.crypto.balances.get(chain_id, asset, partner_id=pid)
+            ]
+        else:
+            balances = await self.client.crypto.balances.list(partner_id=pid)
+
+        now = self._clock()
+        available = {}
+        for balance in balances:
+            key = balance_key(pid, balance.chain_id, balance.asset)
+            available[key] = self.store.seed(
+                key, Decimal(balance.balance), requested_at, now, self.stale_after
+            )
+        self.refreshes += 1
+        return available
+
+    def reserve(
+        self,
+        chain_id: str,
+        asset: str,
+        amount: str,
+        partner_id: Optional[str] = None,
+    ) -> Reservation:
+        """
+        Hold an amount for a withdrawal
+
+        Args:
+            chain_id: Chain ID
+            asset: Asset symbol
+            amount: Withdrawal amount as decimal string
+            partner_id: Partner ID (uses client default if not provided)
+
+        Returns:
+            Reservation to commit or release once the create call ends
+            (or to use as a context manager around it)
+
+        Raises:
+            InsufficientBalanceError: The tracked available balance is lower
+                than ``amount`` (or the balance is not tracked and
+                ``require_seeded`` is set)
+        """
+        key = balance_key(self._partner(partner_id), chain_id, asset)
+        try:
+            value = Decimal(amount)
+        except (InvalidOperation, TypeError):
+            # Malformed amounts are left for the API to reject
+            return Reservation(self, None, key, Decimal(0))
+
+        token = uuid.uuid4().hex
+        reserved, available = self.store.reserve(key, token, value, self._clock())
+        if reserved:
+            self.reserved += 1
+            return Reservation(self, token, key, value)
+        if available is None and not self.require_seeded:
+            self.untracked += 1
+            return Reservation(self, None, key, value)
+
+        self.refused += 1
+        if available is None:
+            message = f"Balance of {asset} on chain {chain_id} is not tracked"
+        else:
+            message = (
+                f"Insufficient {asset} balance on chain {chain_id}: "
+                f"{amount} requested, {available} available"
+            )
+        raise InsufficientBalanceError(
+            message,
+            requested=amount,
+            available=None if available is None else str(available),
+        )
+
+    def available(
+        self, chain_id: str, asset: str, partner_id: Optional[str] = None
+    ) -> Optional[Decimal]:
+        """
+        Balance left for new withdrawals
+
+        Args:
+            chain_id: Chain ID
+            asset: Asset symbol
+            partner_id: Partner ID (uses client default if not provided)
+
+        Returns:
+            Available balance, or None if the balance is not tracked
+        """
+        state = self.get(chain_id, asset, partner_id)
+        return None if state is None else state.available
+
+    def get(
+        self, chain_id: str, asset: str, partner_id: Optional[str] = None
+    ) -> Optional[BalanceState]:
+        """
+        Tracked state of a balance
+
+        Args:
+            chain_id: Chain ID
+            asset: Asset symbol
+            partner_id: Partner ID (uses client default if not provided)
+
+        Returns:
+            BalanceState, or None if the balance is not tracked
+        """
+        return self.store.get(balance_key(self._partner(partner_id), chain_id, asset))
+
+    def attach(self, webhook_handler: "WebhookHandler"):
+        """
+        Apply deposit and withdrawal webhooks received by a handler
+
+        Args:
+            webhook_handler: WebhookHandler receiving KeshPay webhooks
+        """
+        webhook_handler.add_listener(self.on_webhook)
+
+    def on_webhook(self, event: WebhookEvent):
+        """
+        Credit a confirmed deposit or a failed withdrawal
+
+        Args:
+            event: Webhook event (unrelated events are ignored)
+        """
+        data = event.data
+        if event.event == "crypto.deposit.updated":
+            if data.get("status") != DepositStatus.CONFIRMED.value:
+                return
+            credit_id = f"deposit:{data.get('depositId') or data.get('id')}"
+        elif event.event == "crypto.withdrawal.completed":
+            if data.get("status") not in _REFUNDED_STATUSES:
+                return
+            credit_id = f"withdrawal:{data.get('withdrawalId') or data.get('id')}"
+        else:
+            return
+        try:
+            amount = Decimal(data["amount"])
+            key = balance_key(
+                data.get("partnerId") or self._partner(None),
+                data["chainId"],
+                data["asset"],
+            )
+        except (KeyError, InvalidOperation, TypeError, ValueError):
+            return
+        if self.store.credit(key, amount, credit_id, self._clock()):
+            self.credits += 1
+
+    async def start(self):
+        """Seed the balances, then refresh them in the background"""
+        if self.running:
+            return
+        await self.refresh()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the background refresh"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def __aenter__(self):
+        """Async context manager entry: seed and start refreshing"""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit: stop refreshing"""
+        await self.stop()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get ledger metrics
+
+        Returns:
+            Dictionary of counters, lock contention of the store and the
+            tracked balances
+        """
+        return {
+            "reserved": self.reserved,
+            "refused": self.refused,
+            "released": self.released,
+            "untracked": self.untracked,
+            "credits": self.credits,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "lock": self.store.lock_stats.as_dict(),
+            "balances": {
+                key: state.as_dict() for key, state in self.store.states().items()
+            },
+        }
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except KeshFlipError:
+                self.refresh_errors += 1
+
+    def _partner(self, partner_id: Optional[str]) -> str:
+        pid = partner_id or self.client.partner_id
+        if not pid:
+            raise ValueError("partner_id must be provided or set on client")
+        return pid
+
+
+def _rejected(error: BaseException) -> bool:
+    """Whether a failed create call certainly left the balance untouched"""
+    if isinstance(error, (CircuitOpenError, ConcurrencyLimitError, LoadShedError)):
+        return True
+    if isinstance(error, DeadlineExceededError):
+        return error.phase in _UNSENT_PHASES
+    if isinstance(error, NetworkError) or not isinstance(error, KeshFlipError):
+        return False
+    status = error.status_code
+    # Local rejections carry no status; 4xx responses were not applied
+    return status is None or 400 <= status < 500
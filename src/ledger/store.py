@@ -0,0 +1,529 @@
+"""Balance and reservation stores for the balance ledger"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+
+class BalanceState(NamedTuple):
+    """Tracked balance of one partner, chain and asset"""
+
+    # Last balance reported by the API, plus webhook credits
+    balance: Decimal
+    # Balance left for new withdrawals
+    available: Decimal
+    # Sum of reservations whose create call is in flight
+    in_flight: Decimal
+    # Time of the last refresh from the API (epoch seconds)
+    refreshed_at: float
+
+    def as_dict(self) -> Dict[str, object]:
+        """State as a dictionary of decimal strings"""
+        return {
+            "balance": str(self.balance),
+            "available": str(self.available),
+            "in_flight": str(self.in_flight),
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+class _Reservation(NamedTuple):
+    key: str
+    amount: Decimal
+    created_at: float
+    settled_at: Optional[float]
+
+
+def balance_key(partner_id: str, chain_id: str, asset: str) -> str:
+    """Store key of a partner's balance of an asset on a chain"""
+    return f"{partner_id}:{chain_id}:{asset}"
+
+
+class LockStats:
+    """Contention counters of a store's lock"""
+
+    def __init__(self):
+        # Counters
+        self.acquisitions = 0
+        self.contended = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, wait: float, contended: bool):
+        """Count one acquisition and the time spent waiting for it"""
+        self.acquisitions += 1
+        if contended:
+            self.contended += 1
+            self.wait_seconds += wait
+            if wait > self.max_wait_seconds:
+                self.max_wait_seconds = wait
+
+    def as_dict(self) -> Dict[str, float]:
+        """Counters as a dictionary"""
+        return {
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "contention_rate": (
+                self.contended / self.acquisitions if self.acquisitions else 0.0
+            ),
+            "wait_seconds": self.wait_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+
+class BalanceStore:
+    """
+    Interface of balance stores
+
+    Each key holds the last known balance and the balance still available
+    for withdrawals. Reservations are kept one by one until a refresh no
+    longer needs them: in flight until their create call ends, then settled.
+    Every method is atomic; ``lock_stats`` counts how often callers had to
+    wait for each other.
+    """
+
+    lock_stats: LockStats
+
+    def seed(
+        self,
+        key: str,
+        balance: Decimal,
+        requested_at: float,
+        now: float,
+        stale_after: float,
+    ) -> Decimal:
+        """
+        Replace a balance with one reported by the API
+
+        The available balance becomes the reported one minus reservations
+        still in flight and reservations settled after the report was
+        requested, which it may not include yet. Reservations settled before
+        the request and in-flight ones older than ``stale_after`` (e.g. left
+        by a crashed process) are dropped.
+
+        Args:
+            key: Balance key
+            balance: Balance reported by the API
+            requested_at: Time the balance was requested (epoch seconds)
+            now: Current time (epoch seconds)
+            stale_after: Age in seconds after which an in-flight
+                reservation is dropped
+
+        Returns:
+            The new available balance
+        """
+        raise NotImplementedError
+
+    def reserve(
+        self, key: str, token: str, amount: Decimal, now: float
+    ) -> Tuple[bool, Optional[Decimal]]:
+        """
+        Reserve an amount if it is available
+
+        Args:
+            key: Balance key
+            token: Unique reservation ID
+            amount: Amount to reserve
+            now: Current time (epoch seconds)
+
+        Returns:
+            (reserved, available balance afterwards or, if refused, at the
+            time), or (False, None) for a key that is not tracked
+        """
+        raise NotImplementedError
+
+    def settle(self, token: str, applied: bool, now: float):
+        """
+        End a reservation once its create call has finished
+
+        Args:
+            token: Reservation ID
+            applied: Whether the withdrawal may have been debited; if False
+                the amount is made available again
+            now: Current time (epoch seconds)
+        """
+        raise NotImplementedError
+
+    def credit(self, key: str, amount: Decimal, credit_id: str, now: float) -> bool:
+        """
+        Add an amount to a tracked balance, once per credit ID
+
+        Args:
+            key: Balance key
+            amount: Amount credited
+            credit_id: ID of the credit (e.g. the deposit ID), so redelivered
+                webhooks are applied once
+            now: Current time (epoch seconds)
+
+        Returns:
+            True if the credit was applied
+        """
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[BalanceState]:
+        """
+        Get a tracked balance
+
+        Args:
+            key: Balance key
+
+        Returns:
+            BalanceState, or None if the key is not tracked
+        """
+        raise NotImplementedError
+
+    def states(self) -> Dict[str, BalanceState]:
+        """All tracked balances by key"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the store's resources"""
+
+
+class MemoryBalanceStore(BalanceStore):
+    """
+    Balance store for the threads and tasks of one process
+
+    A single lock makes every operation atomic across threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._balances: Dict[str, BalanceState] = {}
+        self._reservations: Dict[str, _Reservation] = {}
+        # credit ID -> (key, time applied)
+        self._credits: Dict[str, Tuple[str, float]] = {}
+        self.lock_stats = LockStats()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        start = time.perf_counter()
+        contended = not self._lock.acquire(blocking=False)
+        if contended:
+            self._lock.acquire()
+        self.lock_stats.record(time.perf_counter() - start, contended)
+        try:
+            yield
+        finally:
+            self._lock.release()
+
+    def seed(
+        self,
+        key: str,
+        balance: Decimal,
+        requested_at: float,
+        now: float,
+        stale_after: float,
+    ) -> Decimal:
+        with self._locked():
+            in_flight = held = Decimal(0)
+            for token, reservation in list(self._reservations.items()):
+                if reservation.key != key:
+                    continue
+                if reservation.settled_at is None:
+                    if reservation.created_at < now - stale_after:
+                        del self._reservations[token]
+                        continue
+                    in_flight += reservation.amount
+                elif reservation.settled_at < requested_at:
+                    del self._reservations[token]
+                    continue
+                held += reservation.amount
+            for credit_id, (credit_key, applied_at) in list(self._credits.items()):
+                if credit_key == key and applied_at < requested_at:
+                    del self._credits[credit_id]
+            available = balance - held
+            self._balances[key] = BalanceState(balance, available, in_flight, now)
+            return available
+
+    def reserve(
+        self, key: str, token: str, amount: Decimal, now: float
+    ) -> Tuple[bool, Optional[Decimal]]:
+        with self._locked():
+            state = self._balances.get(key)
+            if state is None:
+                return False, None
+            if state.available < amount:
+                return False, state.available
+            available = state.available - amount
+            self._balances[key] = state._replace(
+                available=available, in_flight=state.in_flight + amount
+            )
+            self._reservations[token] = _Reservation(key, amount, now, None)
+            return True, available
+
+    def settle(self, token: str, applied: bool, now: float):
+        with self._locked():
+            reservation = self._reservations.pop(token, None)
+            if reservation is None or reservation.settled_at is not None:
+                return
+            state = self._balances.get(reservation.key)
+            if state is not None:
+                self._balances[reservation.key] = state._replace(
+                    in_flight=state.in_flight - reservation.amount,
+                    available=(
+                        state.available
+                        if applied
+                        else state.available + reservation.amount
+                    ),
+                )
+            if applied:
+                self._reservations[token] = reservation._replace(settled_at=now)
+
+    def credit(self, key: str, amount: Decimal, credit_id: str, now: float) -> bool:
+        with self._locked():
+            state = self._balances.get(key)
+            if state is None or credit_id in self._credits:
+                return False
+            self._credits[credit_id] = (key, now)
+            self._balances[key] = state._replace(
+                balance=state.balance + amount, available=state.available + amount
+            )
+            return True
+
+    def get(self, key: str) -> Optional[BalanceState]:
+        with self._locked():
+            return self._balances.get(key)
+
+    def states(self) -> Dict[str, BalanceState]:
+        with self._locked():
+            return dict(self._balances)
+
+
+class SQLiteBalanceStore(BalanceStore):
+    """
+    Balance store shared by the processes of one machine through SQLite
+
+    Every operation runs in a ``BEGIN IMMEDIATE`` transaction, which holds
+    the database's write lock, so reservations from different processes are
+    serialized. The lock is first tried without waiting; only callers that
+    find it taken wait (up to ``lock_timeout``) and are counted as
+    contended. Amounts are stored as decimal strings. File databases use WAL
+    journaling.
+
+    Example:
+        ```python
+        # In every payout worker process
+        store = SQLiteBalanceStore("balances.db")
+        ledger = BalanceLedger(client, store)
+        ```
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS balances (
+            key TEXT PRIMARY KEY,
+            balance TEXT NOT NULL,
+            available TEXT NOT NULL,
+            refreshed_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS reservations (
+            token TEXT PRIMARY KEY,
+            key TEXT NOT NULL,
+            amount TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            settled_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS reservations_key ON reservations (key);
+        CREATE TABLE IF NOT EXISTS credits (
+            credit_id TEXT PRIMARY KEY,
+            key TEXT NOT NULL,
+            applied_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = ":memory:", lock_timeout: float = 5.0):
+        """
+        Initialize SQLite balance store
+
+        Args:
+            path: Database file shared by the processes (":memory:" for a
+                private in-memory database)
+            lock_timeout: Longest wait for the database lock in seconds
+        """
+        self.path = path
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self.lock_stats = LockStats()
+        self._db = sqlite3.connect(
+            path, timeout=0, isolation_level=None, check_same_thread=False
+        )
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA busy_timeout = 0")
+        with self._transaction():
+            for statement in self._SCHEMA.split(";"):
+                if statement.strip():
+                    self._db.execute(statement)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        start = time.perf_counter()
+        contended = not self._lock.acquire(blocking=False)
+        if contended:
+            self._lock.acquire()
+        try:
+            try:
+                self._db.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                # Another process holds the write lock: wait for it
+                contended = True
+                self._db.execute(
+                    f"PRAGMA busy_timeout = {int(self.lock_timeout * 1000)}"
+                )
+                try:
+                    self._db.execute("BEGIN IMMEDIATE")
+                finally:
+                    self._db.execute("PRAGMA busy_timeout = 0")
+            self.lock_stats.record(time.perf_counter() - start, contended)
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        finally:
+            self._lock.release()
+
+    def seed(
+        self,
+        key: str,
+        balance: Decimal,
+        requested_at: float,
+        now: float,
+        stale_after: float,
+    ) -> Decimal:
+        with self._transaction() as db:
+            db.execute(
+                "DELETE FROM reservations WHERE key = ? AND "
+                "((settled_at IS NULL AND created_at < ?) OR settled_at < ?)",
+                (key, now - stale_after, requested_at),
+            )
+            db.execute(
+                "DELETE FROM credits WHERE key = ? AND applied_at < ?",
+                (key, requested_at),
+            )
+            held = sum(
+                (
+                    Decimal(amount)
+                    for (amount,) in db.execute(
+                        "SELECT amount FROM reservations WHERE key = ?", (key,)
+                    )
+                ),
+                Decimal(0),
+            )
+            available = balance - held
+            db.execute(
+                "INSERT OR REPLACE INTO balances VALUES (?, ?, ?, ?)",
+                (key, str(balance), str(available), now),
+            )
+            return available
+
+    def reserve(
+        self, key: str, token: str, amount: Decimal, now: float
+    ) -> Tuple[bool, Optional[Decimal]]:
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT available FROM balances WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            available = Decimal(row[0])
+            if available < amount:
+                return False, available
+            available -= amount
+            db.execute(
+                "UPDATE balances SET available = ? WHERE key = ?",
+                (str(available), key),
+            )
+            db.execute(
+                "INSERT INTO reservations (token, key, amount, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (token, key, str(amount), now),
+            )
+            return True, available
+
+    def settle(self, token: str, applied: bool, now: float):
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT key, amount FROM reservations "
+                "WHERE token = ? AND settled_at IS NULL",
+                (token,),
+            ).fetchone()
+            if row is None:
+                return
+            key, amount = row
+            if applied:
+                db.execute(
+                    "UPDATE reservations SET settled_at = ? WHERE token = ?",
+                    (now, token),
+                )
+                return
+            db.execute("DELETE FROM reservations WHERE token = ?", (token,))
+            self._add(db, key, Decimal(amount), balance=False)
+
+    def credit(self, key: str, amount: Decimal, credit_id: str, now: float) -> bool:
+        with self._transaction() as db:
+            if db.execute("SELECT 1 FROM balances WHERE key = ?", (key,)).fetchone():
+                cursor = db.execute(
+                    "INSERT OR IGNORE INTO credits VALUES (?, ?, ?)",
+                    (credit_id, key, now),
+                )
+                if cursor.rowcount:
+                    self._add(db, key, amount, balance=True)
+                    return True
+            return False
+
+    def get(self, key: str) -> Optional[BalanceState]:
+        return self._states(key).get(key)
+
+    def states(self) -> Dict[str, BalanceState]:
+        return self._states()
+
+    def close(self):
+        """Close the database connection"""
+        self._db.close()
+
+    def _states(self, key: Optional[str] = None) -> Dict[str, BalanceState]:
+        where, args = ("WHERE key = ?", (key,)) if key is not None else ("", ())
+        with self._transaction() as db:
+            rows = db.execute(
+                f"SELECT key, balance, available, refreshed_at FROM balances {where}",
+                args,
+            ).fetchall()
+            in_flight: Dict[str, List[Decimal]] = {}
+            for row_key, amount in db.execute(
+                "SELECT key, amount FROM reservations "
+                f"WHERE settled_at IS NULL {'AND key = ?' if key else ''}",
+                args,
+            ):
+                in_flight.setdefault(row_key, []).append(Decimal(amount))
+        return {
+            row_key: BalanceState(
+                Decimal(balance),
+                Decimal(available),
+                sum(in_flight.get(row_key, ()), Decimal(0)),
+                refreshed_at,
+            )
+            for row_key, balance, available, refreshed_at in rows
+        }
+
+    @staticmethod
+    def _add(db: sqlite3.Connection, key: str, amount: Decimal, balance: bool):
+        row = db.execute(
+            "SELECT balance, available FROM balances WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return
+        db.execute(
+            "UPDATE balances SET balance = ?, available = ? WHERE key = ?",
+            (
+                str(Decimal(row[0]) + amount) if balance else row[0],
+                str(Decimal(row[1]) + amount),
+                key,
+            ),
+        )
@@ -0,0 +1,484 @@
+"""Prometheus metrics for SDK internals"""
+import asyncio
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request latency buckets in seconds
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        """Add ``amount`` (default 1) to the counter"""
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        """Set the gauge"""
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        """Raise the gauge by ``amount``"""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        """Lower the gauge by ``amount``"""
+        self.value -= amount
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Read the gauge from ``function`` at exposition time instead"""
+        self.function = function
+
+    def get(self) -> float:
+        return self.function() if self.function is not None else self.value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket plus the +Inf bucket; cumulated on exposition
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        """Record one observation"""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class _Metric:
+    """Metric family with optional labels"""
+
+    kind = ""
+    # Suffix of the family name in HELP/TYPE lines
+    family_suffix = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, object] = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def labels(self, *values: str):
+        """
+        Get the child metric for a set of label values
+
+        Args:
+            *values: One value per label name, in order
+
+        Returns:
+            Child metric (created on first use)
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {values}"
+                )
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> Iterator[Tuple[str, LabelValues, Tuple, float]]:
+        raise NotImplementedError
+
+    def _expose(self, lines: List[str]):
+        family = self.name + self.family_suffix
+        lines.append(f"# HELP {family} {_escape_help(self.documentation)}")
+        lines.append(f"# TYPE {family} {self.kind}")
+        for suffix, values, extra, value in self._samples():
+            names = self.labelnames + tuple(name for name, _ in extra)
+            values = values + tuple(label for _, label in extra)
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(names, values)} "
+                f"{_format_value(value)}"
+            )
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+
+    kind = "counter"
+    family_suffix = "_total"
+
+    def inc(self, amount: float = 1.0):
+        """Add ``amount`` to an unlabelled counter"""
+        self._default.value += amount
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield "_total", values, (), child.value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be read from a function"""
+
+    kind = "gauge"
+
+    def set(self, value: float):
+        """Set an unlabelled gauge"""
+        self._default.value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Read an unlabelled gauge from ``function`` at exposition time"""
+        self._default.function = function
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            yield "", values, (), child.get()
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float):
+        """Record one observation on an unlabelled histogram"""
+        self._default.observe(value)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _samples(self):
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), list(child.counts)):
+                cumulative += count
+                yield "_bucket", values, (("le", _format_value(bound)),), cumulative
+            yield "_count", values, (), cumulative
+            yield "_sum", values, (), child.sum
+
+
+class MetricsRegistry:
+    """
+    Collection of metric families with Prometheus text exposition
+
+    Recording is a dictionary lookup plus an attribute update, without
+    locks. This is safe within one event loop thread, the way the SDK
+    runs. Registering a name that already exists returns the existing
+    family, so several clients can share one registry.
+
+    Example:
+        ```python
+        metrics = MetricsRegistry()
+        client = KeshFlipClient(..., metrics=metrics)
+
+        # In a web framework route, or with serve_metrics()
+        body = metrics.expose()
+        ```
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], None]] = {}
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        """
+        Get or create a counter
+
+        Args:
+            name: Metric name without the ``_total`` suffix
+            documentation: Help text
+            labelnames: Label names
+
+        Returns:
+            Counter family
+        """
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        """
+        Get or create a gauge
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+
+        Returns:
+            Gauge family
+        """
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """
+        Get or create a histogram
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            buckets: Upper bucket bounds (``+Inf`` is implied)
+
+        Returns:
+            Histogram family
+        """
+        return self._register(
+            Histogram, name, documentation, labelnames, buckets=buckets
+        )
+
+    def add_collector(self, key: str, collector: Callable[[], None]):
+        """
+        Run ``collector`` before every exposition (e.g. to copy stats() values)
+
+        Args:
+            key: Collector name; adding a collector under an existing key
+                replaces it
+            collector: Callable updating gauges
+        """
+        self._collectors[key] = collector
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Get a registered metric family by name"""
+        return self._metrics.get(name)
+
+    def expose(self) -> str:
+        """
+        Render all metrics in the Prometheus text format (version 0.0.4)
+
+        Returns:
+            Exposition text; serve it with ``CONTENT_TYPE``
+        """
+        for collector in list(self._collectors.values()):
+            collector()
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            metric._expose(lines)
+        lines.append("")
+        return "\n".join(lines)
+
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is not None:
+            if type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered differently")
+            return metric
+        metric = cls(name, documentation, labelnames, **kwargs)
+        self._metrics[name] = metric
+        return metric
+
+
+class SDKMetrics:
+    """Metric families recorded by the client and the webhook handler"""
+
+    def __init__(self, registry: MetricsRegistry):
+        """
+        Initialize SDK metric families
+
+        Args:
+            registry: Registry holding the families
+        """
+        self.registry = registry
+        self.requests = registry.counter(
+            "keshflip_requests",
+            "API requests by endpoint template, method and response status",
+            ("template", "method", "status"),
+        )
+        self.request_duration = registry.histogram(
+            "keshflip_request_duration_seconds",
+            "API request latency by endpoint template",
+            ("template",),
+        )
+        self.retries = registry.counter(
+            "keshflip_retries",
+            "Extra request attempts by reason (clock_skew, hedge)",
+            ("reason",),
+        )
+        self.pool_wait = registry.histogram(
+            "keshflip_pool_wait_seconds",
+            "Time spent waiting for a scheduler slot or concurrency permit",
+            ("gate",),
+        )
+        self.cache = registry.counter(
+            "keshflip_cache_requests",
+            "Cacheable GETs by result (hit, revalidated, miss)",
+            ("result",),
+        )
+        self.webhook_failures = registry.counter(
+            "keshflip_webhook_validation_failures",
+            "Rejected webhooks by reason (signature, payload)",
+            ("reason",),
+        )
+        self.webhook_duration = registry.histogram(
+            "keshflip_webhook_handler_duration_seconds",
+            "Time spent in webhook listeners and handlers by event type",
+            ("event",),
+        )
+        self.queue_depth = registry.gauge(
+            "keshflip_queue_depth",
+            "Callers waiting in SDK queues",
+            ("queue",),
+        )
+        self.in_flight = registry.gauge(
+            "keshflip_in_flight",
+            "Requests holding a scheduler slot or concurrency permit",
+            ("gate",),
+        )
+        self.concurrency_limit = registry.gauge(
+            "keshflip_concurrency_limit",
+            "Current limit of the adaptive concurrency limiter",
+        )
+
+    def record_request(self, template: str, method: str, status: str, seconds: float):
+        """
+        Record one HTTP exchange
+
+        Args:
+            template: Endpoint template
+            method: HTTP method
+            status: Response status code, or ``"network_error"``
+            seconds: Time until the response headers arrived
+        """
+        self.requests.labels(template, method, status).inc()
+        self.request_duration.labels(template).observe(seconds)
+
+    def watch_scheduler(self, scheduler):
+        """Expose the queue depths and in-flight count of a PriorityScheduler"""
+        for priority in ("critical", "default", "background"):
+            self.queue_depth.labels(f"scheduler_{priority}").set_function(
+                lambda priority=priority: scheduler.queue_depth(priority)
+            )
+        self.in_flight.labels("scheduler").set_function(lambda: scheduler.in_flight)
+
+    def watch_limiter(self, limiter):
+        """Expose the queue depth, in-flight count and limit of a limiter"""
+        self.queue_depth.labels("concurrency_limiter").set_function(
+            lambda: limiter.queue_depth
+        )
+        self.in_flight.labels("concurrency_limiter").set_function(
+            lambda: limiter.in_flight
+        )
+        self.concurrency_limit.set_function(lambda: limiter.limit)
+
+
+async def serve_metrics(
+    registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 9464
+) -> asyncio.AbstractServer:
+    """
+    Serve ``registry.expose()`` over HTTP for Prometheus to scrape
+
+    Every request path gets the metrics; the connection is closed after each
+    response.
+
+    Args:
+        registry: Registry to expose
+        host: Interface to listen on
+        port: Port to listen on
+
+    Returns:
+        The running asyncio server (close it to stop serving)
+    """
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            # Request line and headers; the body (if any) is ignored
+            while (await reader.readline()).strip():
+                pass
+            body = registry.expose().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                + f"Content-Type: {CONTENT_TYPE}\r\n".encode()
+                + f"Content-Length: {len(body)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape_label(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
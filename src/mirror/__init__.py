@@ -0,0 +1,5 @@
+"""Local mirror of deposits and withdrawals for indexed queries"""
+from .store import MemoryMirrorStore, MirrorStore, SQLiteMirrorStore
+from .sync import DepositMirror
+
+__all__ = ["DepositMirror", "MirrorStore", "MemoryMirrorStore", "SQLiteMirrorStore"]
@@ -0,0 +1,579 @@
+"""Indexed local stores for mirrored records"""
+import bisect
+import json
+import sqlite3
+from datetime import datetime
+from typing import (
+    Callable,
+    Collection,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from dateutil.parser import isoparse
+
+CRYPTO_DEPOSITS = "crypto.deposits"
+CRYPTO_WITHDRAWALS = "crypto.withdrawals"
+FIAT_DEPOSITS = "fiat.deposits"
+
+KINDS = (CRYPTO_DEPOSITS, CRYPTO_WITHDRAWALS, FIAT_DEPOSITS)
+
+# Fields with a secondary index, as (column, record key)
+INDEXED_FIELDS = (
+    ("status", "status"),
+    ("asset", "asset"),
+    ("chain_id", "chainId"),
+    ("provider", "provider"),
+)
+
+Timestamp = Union[str, float, datetime]
+
+
+class IndexedRecord(NamedTuple):
+    """Indexed columns of a mirrored record"""
+
+    id: str
+    status: Optional[str]
+    asset: Optional[str]
+    chain_id: Optional[str]
+    provider: Optional[str]
+    amount: Optional[float]
+    created_at: Optional[float]
+
+
+def record_id(record: dict) -> Optional[str]:
+    """ID of a deposit or withdrawal record"""
+    return (
+        record.get("id")
+        or record.get("depositId")
+        or record.get("withdrawalId")
+        or record.get("_id")
+    )
+
+
+def index_record(record: dict) -> IndexedRecord:
+    """
+    Extract the indexed columns of a record
+
+    Args:
+        record: Deposit or withdrawal as returned by the API
+
+    Returns:
+        IndexedRecord
+    """
+    return IndexedRecord(
+        id=record_id(record),
+        status=_str(record.get("status")),
+        asset=_str(record.get("asset")),
+        chain_id=_str(record.get("chainId")),
+        provider=_str(record.get("provider")),
+        amount=_amount(record.get("amount")),
+        created_at=to_timestamp(record.get("createdAt")),
+    )
+
+
+def to_timestamp(value: Optional[Timestamp]) -> Optional[float]:
+    """Convert an ISO-8601 string, datetime or epoch seconds to epoch seconds"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        # Fast path for the API's "2025-10-04T12:00:00.000Z" format
+        if value.endswith("Z"):
+            return datetime.fromisoformat(value[:-1] + "+00:00").timestamp()
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        pass
+    try:
+        return isoparse(value).timestamp()
+    except ValueError:
+        return None
+
+
+class MirrorStore:
+    """
+    Interface of mirror stores
+
+    Records are kept per kind (``"crypto.deposits"``, ``"fiat.deposits"``,
+    ``"crypto.withdrawals"``) together with one sync watermark per kind.
+    Queries filter on the indexed columns; results are ordered newest first.
+    """
+
+    def upsert(self, kind: str, records: Iterable[dict]) -> int:
+        """
+        Insert or replace full records
+
+        Args:
+            kind: Record kind
+            records: Records as returned by the API
+
+        Returns:
+            Number of records written
+        """
+        raise NotImplementedError
+
+    def merge(self, kind: str, record: dict) -> dict:
+        """
+        Update an existing record with the fields of a partial one
+
+        A record that is not mirrored yet is inserted as given.
+
+        Args:
+            kind: Record kind
+            record: Partial record carrying at least its ID
+
+        Returns:
+            The merged record
+        """
+        current = self.get(kind, record_id(record)) or {}
+        merged = dict(current, **record)
+        self.upsert(kind, [merged])
+        return merged
+
+    def get(self, kind: str, record_id: str) -> Optional[dict]:
+        """
+        Get one record
+
+        Args:
+            kind: Record kind
+            record_id: Record ID
+
+        Returns:
+            The record, or None if it is not mirrored
+        """
+        raise NotImplementedError
+
+    def query(
+        self,
+        kind: str,
+        status: Optional[str] = None,
+        asset: Optional[str] = None,
+        chain_id: Optional[str] = None,
+        provider: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        created_after: Optional[Timestamp] = None,
+        created_before: Optional[Timestamp] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Find records, newest first
+
+        Args:
+            kind: Record kind
+            status: Status to match
+            asset: Asset to match
+            chain_id: Chain ID to match
+            provider: Fiat provider to match
+            min_amount: Smallest amount (inclusive)
+            max_amount: Largest amount (inclusive)
+            created_after: Earliest creation time (inclusive)
+            created_before: Latest creation time (exclusive)
+            limit: Maximum number of records
+
+        Returns:
+            Matching records
+        """
+        raise NotImplementedError
+
+    def count(self, kind: str, **filters) -> int:
+        """
+        Count records matching the ``query`` filters
+
+        Args:
+            kind: Record kind
+            **filters: Filters of ``query`` (except ``limit``)
+
+        Returns:
+            Number of matching records
+        """
+        raise NotImplementedError
+
+    def get_watermark(self, kind: str) -> Optional[str]:
+        """Sync watermark of a kind (None before the first sync)"""
+        raise NotImplementedError
+
+    def set_watermark(self, kind: str, value: str):
+        """Store the sync watermark of a kind"""
+        raise NotImplementedError
+
+    def size(self, kind: str) -> int:
+        """Number of mirrored records of a kind"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the store's resources"""
+
+
+class MemoryMirrorStore(MirrorStore):
+    """
+    In-memory mirror store
+
+    Each indexed column has a hash index from value to record IDs and
+    creation times are kept in a sorted list, so queries touch only the
+    records of the most selective filter. Writes append to the creation
+    index and the first query after them sorts it once, so a newest-first
+    backfill costs O(n log n) rather than a list insert per record.
+    """
+
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Tuple[IndexedRecord, dict]]] = {
+            kind: {} for kind in KINDS
+        }
+        self._indexes: Dict[str, Dict[str, Dict[str, Set[str]]]] = {
+            kind: {column: {} for column, _ in INDEXED_FIELDS} for kind in KINDS
+        }
+        self._created: Dict[str, List[Tuple[float, str]]] = {kind: [] for kind in KINDS}
+        # Kinds whose creation index has unsorted appends or stale entries
+        self._unsorted: Set[str] = set()
+        self._stale: Set[str] = set()
+        self._watermarks: Dict[str, str] = {}
+
+    def upsert(self, kind: str, records: Iterable[dict]) -> int:
+        table = self._table(kind)
+        indexes = self._indexes[kind]
+        created = self._created[kind]
+        written = 0
+        for record in records:
+            row = index_record(record)
+            if row.id is None:
+                continue
+            previous = table.get(row.id)
+            if previous is not None:
+                self._unindex(kind, previous[0], row.created_at)
+            table[row.id] = (row, record)
+            for column, _ in INDEXED_FIELDS:
+                value = getattr(row, column)
+                if value is not None:
+                    indexes[column].setdefault(value, set()).add(row.id)
+            if row.created_at is not None and (
+                previous is None or previous[0].created_at != row.created_at
+            ):
+                created.append((row.created_at, row.id))
+                self._unsorted.add(kind)
+            written += 1
+        return written
+
+    def get(self, kind: str, record_id: str) -> Optional[dict]:
+        entry = self._table(kind).get(record_id)
+        return entry[1] if entry is not None else None
+
+    def query(self, kind: str, limit: Optional[int] = None, **filters) -> List[dict]:
+        table = self._table(kind)
+        candidates, accept = self._plan(kind, **filters)
+        if limit is not None and len(candidates) * 8 > len(table):
+            # Broad filter: walk newest first and stop at the limit
+            results = []
+            for _, rid in reversed(self._created_index(kind)):
+                if rid in candidates and (accept is None or accept(table[rid][0])):
+                    results.append(table[rid][1])
+                    if len(results) >= limit:
+                        break
+            return results
+
+        rows = [
+            table[rid] for rid in candidates if accept is None or accept(table[rid][0])
+        ]
+        rows.sort(key=lambda entry: entry[0].created_at or 0.0, reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
+        return [record for _, record in rows]
+
+    def count(self, kind: str, **filters) -> int:
+        table = self._table(kind)
+        candidates, accept = self._plan(kind, **filters)
+        if accept is None:
+            return len(candidates)
+        return sum(1 for rid in candidates if accept(table[rid][0]))
+
+    def get_watermark(self, kind: str) -> Optional[str]:
+        return self._watermarks.get(kind)
+
+    def set_watermark(self, kind: str, value: str):
+        self._watermarks[kind] = value
+
+    def size(self, kind: str) -> int:
+        return len(self._table(kind))
+
+    def _table(self, kind: str) -> Dict[str, Tuple[IndexedRecord, dict]]:
+        table = self._records.get(kind)
+        if table is None:
+            raise ValueError(f"Unknown record kind '{kind}'")
+        return table
+
+    def _created_index(self, kind: str) -> List[Tuple[float, str]]:
+        """The creation index of a kind, sorted and without stale entries"""
+        created = self._created[kind]
+        if kind in self._unsorted:
+            # Timsort merges the sorted prefix with the appended runs
+            created.sort()
+            self._unsorted.discard(kind)
+        if kind in self._stale:
+            table = self._records[kind]
+            current = []
+            for entry in created:
+                record = table.get(entry[1])
+                if (
+                    record is not None
+                    and record[0].created_at == entry[0]
+                    and (not current or current[-1] != entry)
+                ):
+                    current.append(entry)
+            created[:] = current
+            self._stale.discard(kind)
+        return created
+
+    def _unindex(
+        self, kind: str, row: IndexedRecord, created_at: Optional[float] = None
+    ):
+        """Drop a row from the indexes ahead of its replacement
+
+        The creation index entry is left in place when the replacement keeps
+        the same timestamp and otherwise pruned on the next query.
+        """
+        indexes = self._indexes[kind]
+        for column, _ in INDEXED_FIELDS:
+            value = getattr(row, column)
+            if value is not None:
+                ids = indexes[column].get(value)
+                if ids is not None:
+                    ids.discard(row.id)
+                    if not ids:
+                        del indexes[column][value]
+        if row.created_at is not None and row.created_at != created_at:
+            self._stale.add(kind)
+
+    def _plan(
+        self,
+        kind: str,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        created_after: Optional[Timestamp] = None,
+        created_before: Optional[Timestamp] = None,
+        **equals,
+    ) -> Tuple[Collection[str], Optional[Callable[[IndexedRecord], bool]]]:
+        """Candidate IDs from the indexes plus a filter for the remaining checks"""
+        table = self._table(kind)
+        indexes = self._indexes[kind]
+        after = to_timestamp(created_after)
+        before = to_timestamp(created_before)
+
+        # Equality filters: intersect index sets, smallest first
+        sets = []
+        for column, value in equals.items():
+            if column not in indexes:
+                raise TypeError(f"Unknown filter '{column}'")
+            if value is not None:
+                sets.append(indexes[column].get(str(value), set()))
+        sets.sort(key=len)
+
+        candidates: Collection[str] = table.keys()
+        if sets:
+            candidates = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+        if after is not None or before is not None:
+            created = self._created_index(kind)
+            lo = 0 if after is None else bisect.bisect_left(created, (after,))
+            hi = (
+                len(created)
+                if before is None
+                else bisect.bisect_left(created, (before,))
+            )
+            if hi - lo < len(candidates):
+                in_range = {rid for _, rid in created[lo:hi]}
+                candidates = in_range if not sets else in_range & set(candidates)
+
+        def accept(row: IndexedRecord) -> bool:
+            if min_amount is not None and (
+                row.amount is None or row.amount < min_amount
+            ):
+                return False
+            if max_amount is not None and (
+                row.amount is None or row.amount > max_amount
+            ):
+                return False
+            if after is not None and (row.created_at is None or row.created_at < after):
+                return False
+            if before is not None and (
+                row.created_at is None or row.created_at >= before
+            ):
+                return False
+            return True
+
+        if (
+            min_amount is None
+            and max_amount is None
+            and after is None
+            and before is None
+        ):
+            return candidates, None
+        return candidates, accept
+
+
+class SQLiteMirrorStore(MirrorStore):
+    """
+    SQLite mirror store
+
+    Records live in one table with composite indexes on
+    ``(kind, status, created_at)``, ``(kind, asset, created_at)``,
+    ``(kind, chain_id, created_at)``, ``(kind, provider, status, created_at)``
+    and ``(kind, created_at)``. File databases use WAL journaling so readers
+    in other processes are not blocked by sync writes.
+
+    Example:
+        ```python
+        store = SQLiteMirrorStore("deposits.db")
+        pending = store.count("fiat.deposits", status="PENDING", provider="EVC")
+        ```
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS records (
+            kind TEXT NOT NULL,
+            id TEXT NOT NULL,
+            status TEXT,
+            asset TEXT,
+            chain_id TEXT,
+            provider TEXT,
+            amount REAL,
+            created_at REAL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (kind, id)
+        );
+        CREATE INDEX IF NOT EXISTS records_status
+            ON records (kind, status, created_at);
+        CREATE INDEX IF NOT EXISTS records_asset
+            ON records (kind, asset, created_at);
+        CREATE INDEX IF NOT EXISTS records_chain
+            ON records (kind, chain_id, created_at);
+        CREATE INDEX IF NOT EXISTS records_provider
+            ON records (kind, provider, status, created_at);
+        CREATE INDEX IF NOT EXISTS records_created
+            ON records (kind, created_at);
+        CREATE TABLE IF NOT EXISTS watermarks (
+            kind TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Initialize SQLite store
+
+        Args:
+            path: Database file (":memory:" for a private in-memory database)
+        """
+        self.path = path
+        self._db = sqlite3.connect(path)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self._SCHEMA)
+
+    def upsert(self, kind: str, records: Iterable[dict]) -> int:
+        _check_kind(kind)
+        rows = []
+        for record in records:
+            row = index_record(record)
+            if row.id is not None:
+                rows.append((kind, *row, json.dumps(record)))
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def get(self, kind: str, record_id: str) -> Optional[dict]:
+        row = self._db.execute(
+            "SELECT data FROM records WHERE kind = ? AND id = ?", (kind, record_id)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def query(self, kind: str, limit: Optional[int] = None, **filters) -> List[dict]:
+        where, args = self._where(kind, **filters)
+        sql = f"SELECT data FROM records WHERE {where} ORDER BY created_at DESC"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+        return [json.loads(data) for data, in self._db.execute(sql, args)]
+
+    def count(self, kind: str, **filters) -> int:
+        where, args = self._where(kind, **filters)
+        return self._db.execute(
+            f"SELECT COUNT(*) FROM records WHERE {where}", args
+        ).fetchone()[0]
+
+    def get_watermark(self, kind: str) -> Optional[str]:
+        row = self._db.execute(
+            "SELECT value FROM watermarks WHERE kind = ?", (kind,)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def set_watermark(self, kind: str, value: str):
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO watermarks VALUES (?, ?)", (kind, value)
+            )
+
+    def size(self, kind: str) -> int:
+        return self.count(kind)
+
+    def close(self):
+        self._db.close()
+
+    @staticmethod
+    def _where(
+        kind: str,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        created_after: Optional[Timestamp] = None,
+        created_before: Optional[Timestamp] = None,
+        **equals,
+    ) -> Tuple[str, list]:
+        _check_kind(kind)
+        clauses, args = ["kind = ?"], [kind]
+        columns = {column for column, _ in INDEXED_FIELDS}
+        for column, value in equals.items():
+            if column not in columns:
+                raise TypeError(f"Unknown filter '{column}'")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(str(value))
+        for clause, value in (
+            ("amount >= ?", min_amount),
+            ("amount <= ?", max_amount),
+            ("created_at >= ?", to_timestamp(created_after)),
+            ("created_at < ?", to_timestamp(created_before)),
+        ):
+            if value is not None:
+                clauses.append(clause)
+                args.append(value)
+        return " AND ".join(clauses), args
+
+
+def _check_kind(kind: str):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown record kind '{kind}'")
+
+
+def _str(value) -> Optional[str]:
+    if value is None:
+        return None
+    # Enums (e.g. DepositStatus) are stored by value
+    return str(getattr(value, "value", value))
+
+
+def _amount(value) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,293 @@
+"""Incremental sync of deposits and withdrawals into a local store"""
+import time
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+
+from ..models.common import DepositStatus, WebhookEvent
+from .store import (
+    CRYPTO_DEPOSITS,
+    CRYPTO_WITHDRAWALS,
+    FIAT_DEPOSITS,
+    MemoryMirrorStore,
+    MirrorStore,
+    record_id,
+    to_timestamp,
+)
+
+if TYPE_CHECKING:
+    from ..client import KeshFlipClient
+    from ..webhooks.handler import WebhookHandler
+
+# Webhook event -> (record kind, ID field)
+_WEBHOOK_KINDS = {
+    "crypto.deposit.updated": (CRYPTO_DEPOSITS, "depositId"),
+    "fiat.deposit.updated": (FIAT_DEPOSITS, "depositId"),
+    "crypto.withdrawal.completed": (CRYPTO_WITHDRAWALS, "withdrawalId"),
+}
+
+SYNCED_KINDS = (CRYPTO_DEPOSITS, FIAT_DEPOSITS)
+
+
+class DepositMirror:
+    """
+    Local, indexed copy of a partner's deposits and withdrawals
+
+    ``sync()`` pulls new deposits from the listing endpoints. The watermark
+    is the newest ``createdAt`` already mirrored. Listings are newest first,
+    so each sync reads ``page_size`` items and doubles the limit until it
+    reaches the watermark. Listings are streamed, so large pages are never
+    buffered, and the first sync backfills up to ``max_records``.
+
+    An incremental sync that stops at ``max_records`` before reaching the
+    watermark mirrors what it read but keeps the old watermark, since the
+    deposits between the two were never seen; ``stats()["gaps"]`` counts
+    such syncs. Raise ``max_records`` (or sync more often) to close the gap.
+
+    With ``reconcile=True``, mirrored deposits that are still pending but
+    missing from the pending listing are re-fetched.
+
+    Webhooks received through an attached WebhookHandler update records in
+    place. Withdrawals have no listing endpoint and are mirrored from
+    ``add()`` and from withdrawal webhooks.
+
+    Queries are answered from the store without API calls.
+
+    Example:
+        ```python
+        mirror = DepositMirror(client, SQLiteMirrorStore("mirror.db"))
+        mirror.attach(client.webhooks)
+        await mirror.sync()
+
+        pending_evc = mirror.count(
+            "fiat.deposits", status="PENDING", provider="EVC", min_amount=100
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        client: "KeshFlipClient",
+        store: Optional[MirrorStore] = None,
+        page_size: int = 500,
+        max_records: int = 100000,
+    ):
+        """
+        Initialize deposit mirror
+
+        Args:
+            client: KeshFlip client used for syncing
+            store: Record store (MemoryMirrorStore if not provided)
+            page_size: ``limit`` of the first listing call of a sync
+            max_records: Largest ``limit`` a sync will request
+        """
+        self.client = client
+        self.store = store if store is not None else MemoryMirrorStore()
+        self.page_size = page_size
+        self.max_records = max_records
+
+        # Counters
+        self.syncs = 0
+        self.fetched = 0
+        self.reconciled = 0
+        self.gaps = 0
+        self.webhook_updates = 0
+        self.last_sync_seconds = 0.0
+
+    async def sync(
+        self, kinds: Iterable[str] = SYNCED_KINDS, reconcile: bool = False
+    ) -> Dict[str, int]:
+        """
+        Pull deposits created since the last sync
+
+        Args:
+            kinds: Kinds to sync ("crypto.deposits", "fiat.deposits")
+            reconcile: Also refresh mirrored deposits that left PENDING
+                without a webhook
+
+        Returns:
+            Dictionary of kinds and the number of records written
+        """
+        start = time.monotonic()
+        written = {}
+        for kind in kinds:
+            if kind not in SYNCED_KINDS:
+                raise ValueError(f"Kind '{kind}' has no listing endpoint to sync")
+            written[kind] = await self._sync_kind(kind)
+            if reconcile:
+                written[kind] += await self._reconcile(kind)
+        self.syncs += 1
+        self.last_sync_seconds = time.monotonic() - start
+        return written
+
+    def add(self, kind: str, records: Iterable[dict]) -> int:
+        """
+        Mirror records obtained elsewhere (e.g., create or get responses)
+
+        Args:
+            kind: Record kind
+            records: Full records
+
+        Returns:
+            Number of records written
+        """
+        return self.store.upsert(kind, records)
+
+    def attach(self, webhook_handler: "WebhookHandler"):
+        """
+        Apply deposit and withdrawal webhooks received by a handler
+
+        Args:
+            webhook_handler: WebhookHandler receiving KeshPay webhooks
+        """
+        webhook_handler.add_listener(self.on_webhook)
+
+    def on_webhook(self, event: WebhookEvent):
+        """
+        Apply a webhook event to the mirrored record
+
+        Args:
+            event: Webhook event (unrelated events are ignored)
+        """
+        mapping = _WEBHOOK_KINDS.get(event.event)
+        if mapping is None:
+            return
+        kind, id_field = mapping
+        rid = event.data.get(id_field) or record_id(event.data)
+        if not rid:
+            return
+        self.store.merge(kind, dict(event.data, id=rid))
+        self.webhook_updates += 1
+
+    def get(self, kind: str, record_id: str) -> Optional[dict]:
+        """
+        Get a mirrored record
+
+        Args:
+            kind: Record kind
+            record_id: Record ID
+
+        Returns:
+            The record, or None if it is not mirrored
+        """
+        return self.store.get(kind, record_id)
+
+    def query(self, kind: str, **filters) -> List[dict]:
+        """
+        Find mirrored records, newest first
+
+        Args:
+            kind: Record kind
+            **filters: status, asset, chain_id, provider, min_amount,
+                max_amount, created_after, created_before and limit
+
+        Returns:
+            Matching records
+        """
+        return self.store.query(kind, **filters)
+
+    def count(self, kind: str, **filters) -> int:
+        """
+        Count mirrored records
+
+        Args:
+            kind: Record kind
+            **filters: Filters of ``query`` (except ``limit``)
+
+        Returns:
+            Number of matching records
+        """
+        return self.store.count(kind, **filters)
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get mirror metrics
+
+        Returns:
+            Dictionary of record counts, watermarks and sync counters
+        """
+        return {
+            "records": {
+                kind: self.store.size(kind)
+                for kind in (CRYPTO_DEPOSITS, FIAT_DEPOSITS, CRYPTO_WITHDRAWALS)
+            },
+            "watermarks": {
+                kind: self.store.get_watermark(kind) for kind in SYNCED_KINDS
+            },
+            "syncs": self.syncs,
+            "fetched": self.fetched,
+            "reconciled": self.reconciled,
+            "gaps": self.gaps,
+            "webhook_updates": self.webhook_updates,
+            "last_sync_seconds": self.last_sync_seconds,
+        }
+
+    async def _sync_kind(self, kind: str) -> int:
+        resource = self._resource(kind)
+        watermark = self.store.get_watermark(kind)
+        since = to_timestamp(watermark)
+
+        # Grow the listing until it reaches the watermark (or the end)
+        limit = self.page_size
+        while True:
+            fresh: List[dict] = []
+            seen = 0
+            reached = False
+            async for item in resource.stream(limit=limit):
+                seen += 1
+                created = to_timestamp(item.get("createdAt"))
+                if since is not None and created is not None and created < since:
+                    reached = True
+                    continue
+                fresh.append(item)
+            # A short listing holds everything there is
+            reached = reached or seen < limit
+            if reached or limit >= self.max_records:
+                break
+            limit = min(limit * 2, self.max_records)
+
+        self.fetched += seen
+        written = self.store.upsert(kind, fresh)
+        newest = _newest(fresh)
+        if since is not None and not reached:
+            # Deposits between the listing and the watermark were not read;
+            # moving the watermark past them would skip them for good
+            self.gaps += 1
+        elif newest is not None:
+            self.store.set_watermark(kind, newest)
+        return written
+
+    async def _reconcile(self, kind: str) -> int:
+        pending = DepositStatus.PENDING.value
+        mirrored = {
+            record_id(record) for record in self.store.query(kind, status=pending)
+        }
+        if not mirrored:
+            return 0
+
+        resource = self._resource(kind)
+        listed = set()
+        async for item in resource.stream(status=pending, limit=self.max_records):
+            listed.add(record_id(item))
+
+        refreshed = []
+        for rid in mirrored - listed:
+            response = await resource.get(rid)
+            data = response.get("data") if isinstance(response, dict) else None
+            if isinstance(data, dict):
+                refreshed.append(data)
+        self.reconciled += len(refreshed)
+        return self.store.upsert(kind, refreshed)
+
+    def _resource(self, kind: str):
+        if kind == FIAT_DEPOSITS:
+            return self.client.fiat.deposits
+        return self.client.crypto.deposits
+
+
+def _newest(records: List[dict]) -> Optional[str]:
+    newest = None
+    newest_at = None
+    for record in records:
+        created_at = to_timestamp(record.get("createdAt"))
+        if created_at is not None and (newest_at is None or created_at > newest_at):
+            newest, newest_at = record["createdAt"], created_at
+    return newest
@@ -10,6 +10,23 @@ from .fiat import (
     FiatDepositRequest,
     FiatDepositResponse,
 )
+from .encoders import (
+    RequestEncoder,
+    CRYPTO_DEPOSIT_ENCODER,
+    CRYPTO_WITHDRAWAL_ENCODER,
+    FIAT_DEPOSIT_ENCODER,
+)
+from .rules import (
+    FieldRule,
+    PreflightValidator,
+    DEFAULT_VALIDATOR,
+    EVM_ADDRESS,
+    E164_NUMBER,
+    EVC_NUMBER,
+    SOMALI_MOBILE_NUMBER,
+    keccak256,
+    to_checksum_address,
+)
 from .common import (
     WebhookEvent,
     DepositStatus,
@@ -24,6 +41,19 @@ __all__ = [
     "CryptoBalanceResponse",
     "FiatDepositRequest",
     "FiatDepositResponse",
+    "RequestEncoder",
+    "CRYPTO_DEPOSIT_ENCODER",
+    "CRYPTO_WITHDRAWAL_ENCODER",
+    "FIAT_DEPOSIT_ENCODER",
+    "FieldRule",
+    "PreflightValidator",
+    "DEFAULT_VALIDATOR",
+    "EVM_ADDRESS",
+    "E164_NUMBER",
+    "EVC_NUMBER",
+    "SOMALI_MOBILE_NUMBER",
+    "keccak256",
+    "to_checksum_address",
     "WebhookEvent",
     "DepositStatus",
     "TransactionStatus",
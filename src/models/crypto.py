@@ -1,7 +1,8 @@
 """Crypto payment data models"""
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from .common import DepositStatus
+from .rules import DEFAULT_VALIDATOR
 
 
 class CryptoDepositRequest(BaseModel):
@@ -66,6 +67,13 @@ class CryptoWithdrawalRequest(BaseModel):
     reference: Optional[str] = Field(
         default=None, description="Internal reference")
 
+    @model_validator(mode="after")
+    def _check_address(self):
+        DEFAULT_VALIDATOR.check_withdrawal(
+            {"chain_id": self.chain_id, "to_address": self.to_address}
+        )
+        return self
+
     class Config:
         populate_by_name = True
 
@@ -0,0 +1,124 @@
+"""Precompiled JSON encoders for request models"""
+import json
+from json.encoder import encode_basestring_ascii
+from typing import (
+    Any,
+    Callable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+    get_args,
+    get_origin,
+)
+
+from pydantic import BaseModel
+
+from .crypto import CryptoDepositRequest, CryptoWithdrawalRequest
+from .fiat import FiatDepositRequest
+from .rules import DEFAULT_VALIDATOR
+
+# (field name, '"alias": ' prefix, None allowed, default)
+_Field = Tuple[str, str, bool, Any]
+
+
+class RequestEncoder:
+    """
+    Encodes a flat request model straight to aliased JSON bytes
+
+    The model's fields, aliases, defaults and Optional flags are read once,
+    so encoding a request is a single pass over plain values instead of
+    building the pydantic model, dumping it to a dict and JSON-encoding the
+    dict. The output is byte-identical to
+    ``json.dumps(model.model_dump(by_alias=True, exclude_none=True))``.
+
+    Only plain ``str`` values take the fast path. Any other value, or a
+    missing required field, is handed to the pydantic model, so invalid input
+    raises the same ``pydantic.ValidationError`` as before. Values that pass
+    are then run through the pre-flight ``check``, which raises
+    ``PreflightValidationError`` (e.g. for a bad withdrawal address).
+
+    Example:
+        ```python
+        body = CRYPTO_WITHDRAWAL_ENCODER.encode(
+            {"partner_id": "p1", "asset": "USDC", "chain_id": "1", ...}
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        model: Type[BaseModel],
+        check: Optional[Callable[[Mapping[str, Any]], None]] = None,
+    ):
+        """
+        Initialize request encoder
+
+        Args:
+            model: Pydantic model whose fields are all ``str`` or
+                ``Optional[str]``
+            check: Pre-flight check of the values by field name, raising on
+                invalid input (should match the model's own validators)
+        """
+        self.model = model
+        self.check = check
+        fields: List[_Field] = []
+        for name, info in model.model_fields.items():
+            alias = info.alias or name
+            prefix = encode_basestring_ascii(alias) + ": "
+            default = None if info.is_required() else info.default
+            fields.append((name, prefix, _allows_none(info.annotation), default))
+        self._fields = tuple(fields)
+
+    def encode(self, values: Mapping[str, Any], validate: bool = True) -> bytes:
+        """
+        Encode request values as JSON bytes
+
+        Args:
+            values: Field values by field name; None values are omitted
+            validate: Check value types, required fields and pre-flight
+                rules; pass False only for trusted callers that always supply
+                valid ``str`` values
+
+        Returns:
+            UTF-8 JSON body
+
+        Raises:
+            pydantic.ValidationError: Values are invalid for the model
+            PreflightValidationError: Values break a pre-flight rule
+        """
+        parts = []
+        for name, prefix, nullable, default in self._fields:
+            value = values.get(name, default)
+            if value is None:
+                if validate and not nullable:
+                    # Missing required field, or None for a non-Optional one
+                    return self._encode_model(values)
+                continue
+            if validate and type(value) is not str:
+                return self._encode_model(values)
+            parts.append(prefix + encode_basestring_ascii(value))
+        if validate and self.check is not None:
+            self.check(values)
+        return ("{" + ", ".join(parts) + "}").encode()
+
+    def _encode_model(self, values: Mapping[str, Any]) -> bytes:
+        # Raises the model's ValidationError; coercible values are encoded
+        # the way the model dumps them
+        request = self.model(**values)
+        return json.dumps(request.model_dump(by_alias=True, exclude_none=True)).encode()
+
+
+def _allows_none(annotation: Any) -> bool:
+    return get_origin(annotation) is Union and type(None) in get_args(annotation)
+
+
+CRYPTO_DEPOSIT_ENCODER = RequestEncoder(CryptoDepositRequest)
+CRYPTO_WITHDRAWAL_ENCODER = RequestEncoder(
+    CryptoWithdrawalRequest, check=DEFAULT_VALIDATOR.check_withdrawal
+)
+FIAT_DEPOSIT_ENCODER = RequestEncoder(
+    FiatDepositRequest, check=DEFAULT_VALIDATOR.check_fiat_deposit
+)
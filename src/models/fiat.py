@@ -1,7 +1,8 @@
 """Fiat payment data models"""
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from .common import DepositStatus
+from .rules import DEFAULT_VALIDATOR
 
 
 class FiatDepositRequest(BaseModel):
@@ -23,6 +24,13 @@ class FiatDepositRequest(BaseModel):
         default=None, description="Partner's internal reference"
     )
 
+    @model_validator(mode="after")
+    def _check_customer_number(self):
+        DEFAULT_VALIDATOR.check_fiat_deposit(
+            {"provider": self.provider, "customer_number": self.customer_number}
+        )
+        return self
+
     class Config:
         populate_by_name = True
         json_schema_extra = {
@@ -0,0 +1,318 @@
+"""Pre-flight validation rules for withdrawal addresses and customer numbers"""
+import re
+from functools import lru_cache
+from typing import Callable, Dict, Mapping, Optional
+
+from ..exceptions import PreflightValidationError
+
+# Keccak-f[1600] round constants
+_ROUND_CONSTANTS = (
+    0x0000000000000001,
+    0x0000000000008082,
+    0x800000000000808A,
+    0x8000000080008000,
+    0x000000000000808B,
+    0x0000000080000001,
+    0x8000000080008081,
+    0x8000000000008009,
+    0x000000000000008A,
+    0x0000000000000088,
+    0x0000000080008009,
+    0x000000008000000A,
+    0x000000008000808B,
+    0x800000000000008B,
+    0x8000000000008089,
+    0x8000000000008003,
+    0x8000000000008002,
+    0x8000000000000080,
+    0x000000000000800A,
+    0x800000008000000A,
+    0x8000000080008081,
+    0x8000000000008080,
+    0x0000000080000001,
+    0x8000000080008008,
+)
+
+# Rotation offsets by lane index x + 5 * y
+_ROTATIONS = (
+    0, 1, 62, 28, 27,
+    36, 44, 6, 55, 20,
+    3, 10, 43, 25, 39,
+    41, 45, 15, 21, 8,
+    18, 2, 61, 56, 14,
+)  # fmt: skip
+
+# (source lane, destination lane, rotation) of the combined rho and pi steps
+_RHO_PI = tuple(
+    (x + 5 * y, y + 5 * ((2 * x + 3 * y) % 5), _ROTATIONS[x + 5 * y])
+    for x in range(5)
+    for y in range(5)
+)
+
+_MASK = (1 << 64) - 1
+_RATE = 136  # bytes absorbed per permutation for a 256-bit output
+
+
+def _keccak_f(lanes: list) -> list:
+    a = lanes
+    b = [0] * 25
+    for constant in _ROUND_CONSTANTS:
+        # Theta
+        c0 = a[0] ^ a[5] ^ a[10] ^ a[15] ^ a[20]
+        c1 = a[1] ^ a[6] ^ a[11] ^ a[16] ^ a[21]
+        c2 = a[2] ^ a[7] ^ a[12] ^ a[17] ^ a[22]
+        c3 = a[3] ^ a[8] ^ a[13] ^ a[18] ^ a[23]
+        c4 = a[4] ^ a[9] ^ a[14] ^ a[19] ^ a[24]
+        d = (
+            c4 ^ (((c1 << 1) | (c1 >> 63)) & _MASK),
+            c0 ^ (((c2 << 1) | (c2 >> 63)) & _MASK),
+            c1 ^ (((c3 << 1) | (c3 >> 63)) & _MASK),
+            c2 ^ (((c4 << 1) | (c4 >> 63)) & _MASK),
+            c3 ^ (((c0 << 1) | (c0 >> 63)) & _MASK),
+        )
+        # Rho and pi
+        for source, destination, rotation in _RHO_PI:
+            lane = a[source] ^ d[source % 5]
+            b[destination] = ((lane << rotation) | (lane >> (64 - rotation))) & _MASK
+        # Chi and iota
+        a = []
+        for row in (0, 5, 10, 15, 20):
+            b0, b1, b2, b3, b4 = b[row : row + 5]
+            a += (
+                b0 ^ (~b1 & b2),
+                b1 ^ (~b2 & b3),
+                b2 ^ (~b3 & b4),
+                b3 ^ (~b4 & b0),
+                b4 ^ (~b0 & b1),
+            )
+        a[0] ^= constant
+    return a
+
+
+def keccak256(data: bytes) -> bytes:
+    """
+    Keccak-256 digest as used by Ethereum
+
+    This is the original Keccak padding, not NIST SHA3-256 (which
+    ``hashlib.sha3_256`` implements), so the standard library cannot be used.
+
+    Args:
+        data: Message bytes
+
+    Returns:
+        32-byte digest
+    """
+    padded = bytearray(data)
+    padded.append(0x01)
+    padded.extend(b"\x00" * (-len(padded) % _RATE))
+    padded[-1] |= 0x80
+
+    lanes = [0] * 25
+    for offset in range(0, len(padded), _RATE):
+        for i in range(_RATE // 8):
+            start = offset + 8 * i
+            lanes[i] ^= int.from_bytes(padded[start : start + 8], "little")
+        lanes = _keccak_f(lanes)
+    return b"".join(lane.to_bytes(8, "little") for lane in lanes[:4])
+
+
+@lru_cache(maxsize=4096)
+def to_checksum_address(address: str) -> str:
+    """
+    EIP-55 mixed-case checksum form of an EVM address
+
+    Results are cached, so payout runs that reuse addresses hash each one
+    once.
+
+    Args:
+        address: "0x" followed by 40 hex digits, in any case
+
+    Returns:
+        Checksummed address
+    """
+    body = address[2:].lower()
+    digest = keccak256(body.encode("ascii")).hex()
+    return "0x" + "".join(
+        char.upper() if int(nibble, 16) >= 8 else char
+        for char, nibble in zip(body, digest)
+    )
+
+
+def _eip55(address: str) -> Optional[str]:
+    body = address[2:]
+    if body.islower() or body.isupper() or body.isdigit():
+        # Single-case addresses carry no checksum
+        return None
+    if to_checksum_address(address) != address:
+        return "EIP-55 checksum mismatch"
+    return None
+
+
+class FieldRule:
+    """
+    Compiled check of one request field
+
+    The pattern is compiled once when the rule is created; the optional
+    check runs only on values matching it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pattern: str,
+        description: str,
+        check: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        """
+        Initialize field rule
+
+        Args:
+            name: Rule name used in error messages (e.g. "EVM address")
+            pattern: Regular expression the whole value must match
+            description: Expected format, shown when the pattern fails
+            check: Further check returning a failure reason, or None when the
+                value is valid
+        """
+        self.name = name
+        self.pattern = pattern
+        self.description = description
+        self.check = check
+        self._match = re.compile(pattern).fullmatch
+
+    def __call__(self, value: str) -> Optional[str]:
+        """
+        Check a value
+
+        Args:
+            value: Field value
+
+        Returns:
+            Failure reason, or None when the value is valid
+        """
+        if self._match(value) is None:
+            return f"expected {self.description}"
+        if self.check is not None:
+            return self.check(value)
+        return None
+
+
+EVM_ADDRESS = FieldRule(
+    "EVM address", r"0x[0-9a-fA-F]{40}", "0x and 40 hex digits", check=_eip55
+)
+E164_NUMBER = FieldRule("E.164 number", r"\+[1-9][0-9]{6,14}", "+ and 7-15 digits")
+# Hormuud (EVC Plus) mobile numbers: +252 61 or 77 and seven digits
+EVC_NUMBER = FieldRule(
+    "EVC number", r"\+252(?:61|77)[0-9]{7}", "+25261 or +25277 and 7 digits"
+)
+# Somali mobile numbers of any operator: +252 6x, 7x or 9x and seven digits
+SOMALI_MOBILE_NUMBER = FieldRule(
+    "Somali mobile number", r"\+252[679][0-9]{8}", "+252 and a 9-digit mobile number"
+)
+
+
+class PreflightValidator:
+    """
+    Local checks of create requests, run before anything is signed or sent
+
+    Withdrawal addresses are checked by chain ID and customer numbers by
+    provider, so a malformed value is rejected in microseconds instead of
+    after a round trip ending in a 400. Chains without a rule are not
+    checked; providers without a rule get the generic E.164 check.
+
+    Example:
+        ```python
+        from src.models.rules import DEFAULT_VALIDATOR, FieldRule
+
+        # Also check Solana addresses
+        DEFAULT_VALIDATOR.add_chain(
+            "solana", FieldRule("Solana address", r"[1-9A-HJ-NP-Za-km-z]{32,44}",
+                                "a base58 address")
+        )
+        ```
+    """
+
+    def __init__(
+        self,
+        addresses: Optional[Mapping[str, FieldRule]] = None,
+        customer_numbers: Optional[Mapping[str, FieldRule]] = None,
+        default_customer_number: Optional[FieldRule] = E164_NUMBER,
+    ):
+        """
+        Initialize pre-flight validator
+
+        Args:
+            addresses: Address rule by chain ID (Ethereum, Polygon and Base
+                EVM rules if None)
+            customer_numbers: Customer number rule by provider (EVC and
+                SALAAM_BANK rules if None)
+            default_customer_number: Rule for providers without their own
+                (None to skip them)
+        """
+        if addresses is None:
+            addresses = {"1": EVM_ADDRESS, "137": EVM_ADDRESS, "8453": EVM_ADDRESS}
+        if customer_numbers is None:
+            customer_numbers = {
+                "EVC": EVC_NUMBER,
+                "SALAAM_BANK": SOMALI_MOBILE_NUMBER,
+            }
+        self.addresses: Dict[str, FieldRule] = dict(addresses)
+        self.customer_numbers: Dict[str, FieldRule] = dict(customer_numbers)
+        self.default_customer_number = default_customer_number
+
+    def add_chain(self, chain_id: str, rule: FieldRule):
+        """Check withdrawal addresses on a chain with ``rule``"""
+        self.addresses[chain_id] = rule
+
+    def add_provider(self, provider: str, rule: FieldRule):
+        """Check customer numbers of a provider with ``rule``"""
+        self.customer_numbers[provider] = rule
+
+    def check_withdrawal(self, values: Mapping[str, str]):
+        """
+        Check a withdrawal's destination address for its chain
+
+        Args:
+            values: Request values by field name ("chain_id", "to_address")
+
+        Raises:
+            PreflightValidationError: The address is invalid for the chain
+        """
+        chain_id = values.get("chain_id")
+        rule = self.addresses.get(chain_id)
+        address = values.get("to_address")
+        if rule is None or type(address) is not str:
+            return
+        reason = rule(address)
+        if reason is not None:
+            raise PreflightValidationError(
+                f"Invalid toAddress for chain {chain_id}: {reason}",
+                field="toAddress",
+                rule=rule.name,
+            )
+
+    def check_fiat_deposit(self, values: Mapping[str, str]):
+        """
+        Check a fiat deposit's customer number for its provider
+
+        Args:
+            values: Request values by field name ("provider",
+                "customer_number")
+
+        Raises:
+            PreflightValidationError: The number is invalid for the provider
+        """
+        provider = values.get("provider")
+        rule = self.customer_numbers.get(provider, self.default_customer_number)
+        number = values.get("customer_number")
+        if rule is None or type(number) is not str:
+            return
+        reason = rule(number)
+        if reason is not None:
+            raise PreflightValidationError(
+                f"Invalid customerNumber for {provider}: {reason}",
+                field="customerNumber",
+                rule=rule.name,
+            )
+
+
+DEFAULT_VALIDATOR = PreflightValidator()
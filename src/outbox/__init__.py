@@ -0,0 +1,5 @@
+"""Durable outbox for create calls"""
+from .outbox import KINDS, Outbox
+from .store import OutboxEntry, SQLiteOutboxStore
+
+__all__ = ["KINDS", "Outbox", "OutboxEntry", "SQLiteOutboxStore"]
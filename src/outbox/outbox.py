@@ -0,0 +1,428 @@
+"""Durable outbox for create calls with a background flusher"""
+import asyncio
+import json
+import random
+import time
+import uuid
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+
+from ..exceptions import (
+    CircuitOpenError,
+    ConcurrencyLimitError,
+    KeshFlipError,
+    LoadShedError,
+    NetworkError,
+)
+from ..models.encoders import (
+    CRYPTO_DEPOSIT_ENCODER,
+    CRYPTO_WITHDRAWAL_ENCODER,
+    FIAT_DEPOSIT_ENCODER,
+    RequestEncoder,
+)
+from .store import DONE, FAILED, PENDING, Outcome, OutboxEntry, SQLiteOutboxStore
+
+if TYPE_CHECKING:
+    from ..client import KeshFlipClient
+    from ..ledger.ledger import Reservation
+
+# Intent kind -> (create endpoint, body encoder)
+KINDS: Dict[str, Tuple[str, RequestEncoder]] = {
+    "crypto.deposits": ("/api/v1/crypto/deposits", CRYPTO_DEPOSIT_ENCODER),
+    "crypto.withdrawals": ("/api/v1/crypto/withdrawals", CRYPTO_WITHDRAWAL_ENCODER),
+    "fiat.deposits": ("/api/v1/fiat/deposits", FIAT_DEPOSIT_ENCODER),
+}
+
+
+class Outbox:
+    """
+    Queues create calls durably and sends them in the background
+
+    ``enqueue`` validates and encodes a create call, commits it to the store
+    under an idempotency key (generated if not given) and returns the key
+    without waiting for the API. A crash after ``enqueue`` returns does not
+    lose the intent.
+
+    The flusher started by ``start`` claims due intents in batches of
+    ``batch_size`` and sends them with ``concurrency`` workers. Outcomes are
+    written back in batches. Network errors, 429/5xx responses and
+    client-side load shedding are retried with exponential backoff up to
+    ``max_attempts`` attempts. Other errors fail the intent. Responses and
+    errors are kept in the store for lookup with ``get`` or ``wait``.
+
+    When a BalanceLedger guards the client, a withdrawal intent reserves its
+    amount before its first attempt and holds it across retries, like
+    ``client.crypto.withdrawals.create``. An intent the ledger cannot cover
+    fails with the InsufficientBalanceError message, without being sent.
+
+    Each store should be flushed by one Outbox at a time.
+
+    Example:
+        ```python
+        outbox = Outbox(client, SQLiteOutboxStore("outbox.db"))
+        await outbox.start()
+
+        key = outbox.enqueue(
+            "crypto.withdrawals",
+            asset="USDC",
+            chain_id="1",
+            amount="50.00",
+            to_address="0x1234...",
+        )
+
+        entry = await outbox.wait(key, timeout=30)
+        print(entry.status, entry.result)
+
+        await outbox.stop()
+        ```
+    """
+
+    def __init__(
+        self,
+        client: "KeshFlipClient",
+        store: Optional[SQLiteOutboxStore] = None,
+        concurrency: int = 16,
+        batch_size: int = 100,
+        max_attempts: int = 8,
+        backoff: float = 0.5,
+        max_backoff: float = 60.0,
+        poll_interval: float = 0.1,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize outbox
+
+        Args:
+            client: KeshFlip client used to send the create calls
+            store: Intent store (an in-memory SQLiteOutboxStore if not
+                provided, which is not durable)
+            concurrency: Create calls in flight at once
+            batch_size: Intents claimed, and outcomes written, per transaction
+            max_attempts: Attempts before a retryable error fails the intent
+            backoff: Delay before the first retry in seconds; doubles per
+                attempt, with jitter
+            max_backoff: Longest delay between attempts in seconds
+            poll_interval: Longest idle wait between checks for due intents
+            clock: Wall-clock time source (epoch seconds)
+        """
+        self.client = client
+        self.store = store if store is not None else SQLiteOutboxStore()
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self._clock = clock
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._outcomes: List[Outcome] = []
+        self._claimed = 0
+        self._waiters: Dict[str, List[asyncio.Future]] = {}
+        # Ledger reservations of withdrawal intents, by idempotency key
+        self._reservations: Dict[str, "Reservation"] = {}
+
+        # Counters
+        self.enqueued = 0
+        self.delivered = 0
+        self.retries = 0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the background flusher is running"""
+        return self._task is not None and not self._task.done()
+
+    def enqueue(
+        self,
+        kind: str,
+        idempotency_key: Optional[str] = None,
+        partner_id: Optional[str] = None,
+        **fields,
+    ) -> str:
+        """
+        Queue a create call
+
+        Args:
+            kind: "crypto.deposits", "crypto.withdrawals" or "fiat.deposits"
+            idempotency_key: Idempotency key (generated if not provided)
+            partner_id: Partner ID (uses client default if not provided)
+            **fields: Arguments of the matching ``create`` method
+
+        Returns:
+            Idempotency key identifying the intent
+
+        Raises:
+            ValueError: Unknown kind or no partner ID
+            pydantic.ValidationError: Fields are invalid for the request model
+        """
+        return self.enqueue_many(
+            kind, [dict(fields, idempotency_key=idempotency_key)], partner_id
+        )[0]
+
+    def enqueue_many(
+        self, kind: str, items: Iterable[dict], partner_id: Optional[str] = None
+    ) -> List[str]:
+        """
+        Queue several create calls of one kind in one transaction
+
+        Args:
+            kind: "crypto.deposits", "crypto.withdrawals" or "fiat.deposits"
+            items: Arguments of the ``create`` method per call; an
+                ``idempotency_key`` is generated for items without one
+            partner_id: Partner ID (uses client default if not provided)
+
+        Returns:
+            Idempotency keys, in item order
+
+        Raises:
+            ValueError: Unknown kind or no partner ID
+            pydantic.ValidationError: An item is invalid for the request model
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown outbox kind {kind!r}")
+        pid = partner_id or self.client.partner_id
+        if not pid:
+            raise ValueError("partner_id must be provided or set on client")
+
+        encoder = KINDS[kind][1]
+        validate = self.client.validate_requests
+        entries = []
+        for item in items:
+            key = item.get("idempotency_key") or f"outbox_{uuid.uuid4().hex}"
+            values = dict(item, partner_id=pid, idempotency_key=key)
+            entries.append((key, kind, encoder.encode(values, validate=validate)))
+
+        self.store.add(entries, self._clock())
+        self.enqueued += len(entries)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return [key for key, _, _ in entries]
+
+    def get(self, key: str) -> Optional[OutboxEntry]:
+        """
+        Get a queued intent and, once sent, its response or error
+
+        Args:
+            key: Idempotency key returned by ``enqueue``
+
+        Returns:
+            OutboxEntry, or None if the key is unknown
+        """
+        return self.store.get(key)
+
+    async def wait(self, key: str, timeout: Optional[float] = None) -> OutboxEntry:
+        """
+        Wait until an intent is sent or has failed
+
+        Args:
+            key: Idempotency key returned by ``enqueue``
+            timeout: Longest wait in seconds (optional)
+
+        Returns:
+            OutboxEntry with status "done" or "failed"
+
+        Raises:
+            KeyError: Unknown key
+            asyncio.TimeoutError: Timeout elapsed first
+        """
+        entry = self.store.get(key)
+        if entry is None:
+            raise KeyError(key)
+        if entry.status in (DONE, FAILED):
+            return entry
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(key, []).append(waiter)
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            waiters = self._waiters.get(key)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del self._waiters[key]
+
+    async def start(self):
+        """Start the background flusher"""
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self, drain: bool = False, timeout: Optional[float] = None):
+        """
+        Stop the background flusher
+
+        Intents still in flight are queued again and resent on the next start.
+
+        Args:
+            drain: Send every pending intent first, including ones waiting
+                for a retry
+            timeout: Longest wait for the drain in seconds (optional)
+        """
+        if drain and self.running:
+            await self.drain(timeout)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._commit()
+        self.store.requeue()
+        self._claimed = 0
+
+    async def drain(self, timeout: Optional[float] = None):
+        """
+        Wait until no intent is pending or in flight
+
+        Args:
+            timeout: Longest wait in seconds (optional)
+
+        Raises:
+            RuntimeError: The flusher is not running
+            asyncio.TimeoutError: Timeout elapsed first
+        """
+        if not self.running:
+            raise RuntimeError("Outbox flusher is not running")
+
+        async def idle():
+            while self._claimed or self.store.next_attempt_at() is not None:
+                if not self.running:
+                    # Surface the flusher's error instead of waiting forever
+                    self._task.result()
+                await asyncio.sleep(self.poll_interval / 2)
+
+        await asyncio.wait_for(idle(), timeout)
+
+    async def __aenter__(self):
+        """Async context manager entry: start the flusher"""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit: stop the flusher"""
+        await self.stop()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get outbox metrics
+
+        Returns:
+            Dictionary of counters and intents per status in the store
+        """
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "retries": self.retries,
+            "failures": self.failures,
+            "in_flight": self._claimed,
+            **self.store.counts(),
+        }
+
+    async def _run(self):
+        workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+        try:
+            while True:
+                self._commit()
+                claimed = []
+                # Keep at most two batches between the store and the workers
+                if self._claimed <= self.batch_size:
+                    claimed = self.store.claim(self.batch_size, self._clock())
+                    self._claimed += len(claimed)
+                    for entry in claimed:
+                        self._queue.put_nowait(entry)
+                if len(claimed) == self.batch_size:
+                    continue
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _work(self):
+        while True:
+            entry = await self._queue.get()
+            outcome = await self._send(entry)
+            self._outcomes.append(outcome)
+            if len(self._outcomes) >= self.batch_size or self._queue.empty():
+                self._wakeup.set()
+
+    async def _send(self, entry: OutboxEntry) -> Outcome:
+        path = KINDS[entry.kind][0]
+        try:
+            self._reserve(entry)
+            response = await self.client.request("POST", path, content=entry.body)
+        except KeshFlipError as e:
+            if _is_retryable(e) and entry.attempts < self.max_attempts:
+                # Any reservation stays held for the next attempt
+                delay = min(self.max_backoff, self.backoff * 2 ** (entry.attempts - 1))
+                delay *= random.uniform(0.5, 1.0)
+                return (entry.key, PENDING, None, str(e), self._clock() + delay)
+            self._settle(entry, e)
+            return (entry.key, FAILED, None, str(e), None)
+        except Exception as e:
+            self._settle(entry, e)
+            return (entry.key, FAILED, None, repr(e), None)
+        self._settle(entry)
+        return (entry.key, DONE, response, None, None)
+
+    def _reserve(self, entry: OutboxEntry):
+        """Hold a withdrawal's amount on the client's ledger, once per intent"""
+        ledger = self.client.balance_ledger
+        if (
+            ledger is None
+            or entry.kind != "crypto.withdrawals"
+            or entry.key in self._reservations
+        ):
+            return
+        body = json.loads(entry.body)
+        self._reservations[entry.key] = ledger.reserve(
+            body["chainId"], body["asset"], body["amount"], partner_id=body["partnerId"]
+        )
+
+    def _settle(self, entry: OutboxEntry, error: Optional[BaseException] = None):
+        """Commit or release an intent's reservation once it has finished"""
+        reservation = self._reservations.pop(entry.key, None)
+        if reservation is not None:
+            reservation.finish(error)
+
+    def _commit(self):
+        """Write finished sends to the store, then wake their waiters"""
+        outcomes, self._outcomes = self._outcomes, []
+        if not outcomes:
+            return
+        self.store.complete(outcomes, self._clock())
+        self._claimed -= len(outcomes)
+        for key, status, _, _, _ in outcomes:
+            if status == PENDING:
+                self.retries += 1
+                continue
+            if status == DONE:
+                self.delivered += 1
+            else:
+                self.failures += 1
+            waiters = self._waiters.pop(key, None)
+            if waiters:
+                entry = self.store.get(key)
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(entry)
+
+
+def _is_retryable(error: KeshFlipError) -> bool:
+    """Whether a failed create call may succeed when sent again"""
+    if isinstance(
+        error, (NetworkError, CircuitOpenError, ConcurrencyLimitError, LoadShedError)
+    ):
+        return True
+    return error.status_code is not None and (
+        error.status_code >= 500 or error.status_code == 429
+    )
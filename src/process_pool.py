@@ -0,0 +1,226 @@
+"""Process pool whose workers each keep one warm client"""
+import asyncio
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from .client import KeshFlipClient
+from .eventloop import AUTO, loop_factory
+from .models.warmup import warm_models
+
+ClientFactory = Callable[[], KeshFlipClient]
+ClientTask = Callable[..., Awaitable[Any]]
+
+
+class _Worker:
+    """Event loop and client of the current worker process"""
+
+    loop: Optional[asyncio.AbstractEventLoop] = None
+    client: Optional[KeshFlipClient] = None
+    warmup: Dict[str, float] = {}
+
+
+def _start_worker(factory: ClientFactory, connections: int, loop: str):
+    """Pool initializer: build, warm and keep the worker's client"""
+    _Worker.loop = loop_factory(loop)()
+    asyncio.set_event_loop(_Worker.loop)
+    client = factory()
+    if connections > 0 and client.partner_id:
+        _Worker.warmup = _Worker.loop.run_until_complete(client.warmup(connections))
+    else:
+        warm_models()
+    _Worker.client = client
+    # Runs when the worker exits normally, before its loop is gone
+    multiprocessing.util.Finalize(None, _stop_worker, exitpriority=10)
+
+
+def _stop_worker():
+    if _Worker.client is not None:
+        _Worker.loop.run_until_complete(_Worker.client.close())
+        _Worker.client = None
+    _Worker.loop.close()
+
+
+def _run_task(task: ClientTask, args: tuple, kwargs: dict) -> Any:
+    """Run one task on the worker's loop with its client"""
+    return _Worker.loop.run_until_complete(task(_Worker.client, *args, **kwargs))
+
+
+def _warmup_timings() -> Dict[str, float]:
+    return dict(_Worker.warmup)
+
+
+class ClientProcessPool:
+    """
+    Process pool for client work, with one warm client per worker
+
+    Each worker process builds a client with ``client_factory`` when it
+    starts, warms it up (models, credentials and ``warmup_connections``
+    pooled connections) and keeps it, together with one event loop, for
+    every task it runs. Tasks are async functions receiving the worker's
+    client as first argument, so they share its connections instead of
+    building a client and opening connections per task.
+
+    With the "spawn" and "forkserver" start methods the factory and tasks are
+    pickled into the workers and must be module-level functions (or
+    ``functools.partial`` objects of them). With "fork" the factory may
+    return a client created in the parent: a client used in a forked child
+    replaces the parent's connections with its own on first use.
+
+    Example:
+        ```python
+        # payouts.py
+        def make_client():
+            return KeshFlipClient(api_key, api_secret, partner_id="partner_123")
+
+        async def pay(client, item):
+            return await client.crypto.withdrawals.create(**item)
+
+        # main.py
+        if __name__ == "__main__":
+            with ClientProcessPool(payouts.make_client, processes=4) as pool:
+                results = pool.map(payouts.pay, items)
+        ```
+    """
+
+    def __init__(
+        self,
+        client_factory: ClientFactory,
+        processes: Optional[int] = None,
+        warmup_connections: int = 4,
+        loop: str = AUTO,
+        start_method: str = "spawn",
+        max_tasks_per_child: Optional[int] = None,
+    ):
+        """
+        Initialize client process pool
+
+        Args:
+            client_factory: Function returning the client of a worker
+            processes: Worker processes (CPU count if None)
+            warmup_connections: Connections each worker opens while warming
+                up (0 only prepares the models; the network warm-up also
+                needs a ``partner_id`` on the client)
+            loop: Workers' event loop: "auto" (uvloop if installed),
+                "uvloop" or "asyncio"
+            start_method: "spawn", "forkserver" or "fork"
+            max_tasks_per_child: Tasks after which a worker is replaced
+                (never if None; Python 3.11+)
+        """
+        options = {}
+        if max_tasks_per_child is not None:
+            options["max_tasks_per_child"] = max_tasks_per_child
+        self.processes = processes or multiprocessing.cpu_count()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_start_worker,
+            initargs=(client_factory, warmup_connections, loop),
+            **options,
+        )
+
+        # Counters
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, task: ClientTask, *args, **kwargs) -> Future:
+        """
+        Run ``task(client, *args, **kwargs)`` in a worker
+
+        Args:
+            task: Async function receiving the worker's client first
+            *args: Further positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            concurrent.futures.Future of the task's result
+        """
+        future = self._executor.submit(_run_task, task, args, kwargs)
+        self.submitted += 1
+        future.add_done_callback(self._count)
+        return future
+
+    async def run(self, task: ClientTask, *args, **kwargs) -> Any:
+        """
+        Run a task in a worker and await its result from an event loop
+
+        Args:
+            task: Async function receiving the worker's client first
+            *args: Further positional arguments
+            **kwargs: Keyword arguments
+
+        Returns:
+            Result of the task
+        """
+        return await asyncio.wrap_future(self.submit(task, *args, **kwargs))
+
+    def map(self, task: ClientTask, items: Iterable[Any]) -> List[Any]:
+        """
+        Run ``task(client, item)`` for each item, spread over the workers
+
+        Args:
+            task: Async function receiving the worker's client and an item
+            items: Task arguments
+
+        Returns:
+            Results in item order
+
+        Raises:
+            Exception: The first failed task's exception
+        """
+        futures = [self.submit(task, item) for item in items]
+        return [future.result() for future in futures]
+
+    def warmup_timings(self) -> List[Dict[str, float]]:
+        """
+        Warm-up timings of the workers reached by one probe per process
+
+        Starts any worker not started yet. Workers are picked by the pool, so
+        a busy worker may answer twice and another not at all.
+
+        Returns:
+            List of ``KeshFlipClient.warmup`` results (empty dictionaries for
+            workers that only prepared the models)
+        """
+        futures = [
+            self._executor.submit(_warmup_timings) for _ in range(self.processes)
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the workers, closing their clients
+
+        Args:
+            wait: Wait for running and queued tasks to finish
+        """
+        self._executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get pool metrics
+
+        Returns:
+            Dictionary of worker count and submitted, completed and failed
+            task counters
+        """
+        return {
+            "processes": self.processes,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+    def _count(self, future: Future):
+        if future.cancelled() or future.exception() is not None:
+            self.failed += 1
+        else:
+            self.completed += 1
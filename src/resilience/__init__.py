@@ -0,0 +1,40 @@
+"""Resilience utilities for the request path"""
+from .circuit_breaker import (
+    CircuitBreaker,
+    CircuitBreakerRegistry,
+    CircuitState,
+    CircuitStateChange,
+)
+from .concurrency import AdaptiveConcurrencyLimiter, AIMDLimit, GradientLimit
+from .deadline import (
+    current_deadline,
+    request_deadline,
+    time_remaining,
+    without_deadline,
+)
+from .hedging import HedgingPolicy
+from .histogram import LatencyHistogram, LatencyTracker
+from .priority import Priority, PriorityScheduler, current_priority, request_priority
+from .rate_limit import RateLimiter
+
+__all__ = [
+    "AdaptiveConcurrencyLimiter",
+    "AIMDLimit",
+    "GradientLimit",
+    "CircuitBreaker",
+    "CircuitBreakerRegistry",
+    "CircuitState",
+    "CircuitStateChange",
+    "current_deadline",
+    "request_deadline",
+    "time_remaining",
+    "without_deadline",
+    "HedgingPolicy",
+    "LatencyHistogram",
+    "LatencyTracker",
+    "Priority",
+    "PriorityScheduler",
+    "current_priority",
+    "request_priority",
+    "RateLimiter",
+]
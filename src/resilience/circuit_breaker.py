@@ -0,0 +1,339 @@
+"""Circuit breakers for endpoint groups"""
+import time
+from collections import deque
+from enum import Enum
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from ..exceptions import CircuitOpenError
+
+
+class CircuitState(str, Enum):
+    """Circuit breaker state enumeration"""
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class CircuitStateChange(NamedTuple):
+    """Event emitted when a circuit breaker changes state"""
+
+    name: str
+    previous: CircuitState
+    current: CircuitState
+    timestamp: float
+    reason: str
+
+
+StateListener = Callable[[CircuitStateChange], None]
+
+
+class CircuitBreaker:
+    """
+    Error-rate and latency circuit breaker for one endpoint group
+
+    Outcomes of the last ``window_size`` calls are kept in a sliding window.
+    Once at least ``minimum_calls`` outcomes are recorded, the circuit opens
+    when the failure rate reaches ``failure_rate_threshold`` or the share of
+    calls slower than ``slow_call_duration`` reaches
+    ``slow_call_rate_threshold``. While open every call fails fast with
+    ``CircuitOpenError``. After ``open_timeout`` seconds the circuit goes
+    half-open and lets ``half_open_max_calls`` probe calls through; the
+    circuit closes when they all succeed and reopens on the first failure.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: float = 0.5,
+        slow_call_duration: float = 10.0,
+        slow_call_rate_threshold: float = 0.8,
+        window_size: int = 20,
+        minimum_calls: int = 10,
+        open_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize circuit breaker
+
+        Args:
+            name: Breaker name (the endpoint group it protects)
+            failure_rate_threshold: Failure ratio (0-1) that opens the circuit
+            slow_call_duration: Calls taking at least this many seconds are slow
+            slow_call_rate_threshold: Slow call ratio (0-1) that opens the circuit
+            window_size: Number of recent calls considered
+            minimum_calls: Calls required in the window before evaluating rates
+            open_timeout: Seconds to stay open before probing
+            half_open_max_calls: Probe calls allowed while half-open
+            clock: Monotonic time source
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.window_size = window_size
+        self.minimum_calls = minimum_calls
+        self.open_timeout = open_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+
+        self._state = CircuitState.CLOSED
+        self._generation = 0
+        self._opened_at = 0.0
+        self._window: Deque[Tuple[bool, bool]] = deque()
+        self._failures = 0
+        self._slow = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self._listeners: List[StateListener] = []
+
+        # Counters
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.slow_calls = 0
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {state.value: 0 for state in CircuitState}
+
+    @property
+    def state(self) -> CircuitState:
+        """Current state, moving from OPEN to HALF_OPEN once the timeout passes"""
+        if (
+            self._state == CircuitState.OPEN
+            and self._clock() - self._opened_at >= self.open_timeout
+        ):
+            self._transition(CircuitState.HALF_OPEN, "open timeout elapsed")
+        return self._state
+
+    def add_listener(self, listener: StateListener):
+        """
+        Register a callback invoked on every state change
+
+        Args:
+            listener: Callable receiving a CircuitStateChange
+        """
+        self._listeners.append(listener)
+
+    def acquire(self) -> int:
+        """
+        Ask permission to make a call
+
+        Returns:
+            Permit to pass back to ``record`` or ``release``
+
+        Raises:
+            CircuitOpenError: Circuit is open or half-open probes are exhausted
+        """
+        state = self.state
+        if state == CircuitState.OPEN:
+            self.rejected += 1
+            retry_after = max(
+                0.0, self.open_timeout - (self._clock() - self._opened_at)
+            )
+            raise CircuitOpenError(
+                f"Circuit for '{self.name}' is open",
+                group=self.name,
+                retry_after=retry_after,
+            )
+        if state == CircuitState.HALF_OPEN:
+            if self._probes_in_flight >= self.half_open_max_calls:
+                self.rejected += 1
+                raise CircuitOpenError(
+                    f"Circuit for '{self.name}' is half-open, probe in progress",
+                    group=self.name,
+                    retry_after=0.0,
+                )
+            self._probes_in_flight += 1
+        return self._generation
+
+    def release(self, permit: int):
+        """
+        Give back a permit without recording an outcome (e.g. on cancellation)
+
+        Args:
+            permit: Permit returned by ``acquire``
+        """
+        if permit == self._generation and self._state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+
+    def record(self, permit: int, success: bool, duration: float):
+        """
+        Record the outcome of a call
+
+        Outcomes of calls admitted before the last state change are counted
+        but do not influence the new state.
+
+        Args:
+            permit: Permit returned by ``acquire``
+            success: Whether the call succeeded
+            duration: Call duration in seconds
+        """
+        slow = duration >= self.slow_call_duration
+        self.calls += 1
+        if success:
+            self.successes += 1
+        else:
+            self.failures += 1
+        if slow:
+            self.slow_calls += 1
+
+        if permit != self._generation:
+            return
+
+        if self._state == CircuitState.HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if not success:
+                self._open("probe call failed")
+            elif slow:
+                self._open("probe call was slow")
+            else:
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_max_calls:
+                    self._transition(CircuitState.CLOSED, "probe calls succeeded")
+            return
+
+        if self._state != CircuitState.CLOSED:
+            return
+
+        self._window.append((not success, slow))
+        self._failures += not success
+        self._slow += slow
+        if len(self._window) > self.window_size:
+            old_failed, old_slow = self._window.popleft()
+            self._failures -= old_failed
+            self._slow -= old_slow
+
+        total = len(self._window)
+        if total < self.minimum_calls:
+            return
+        if self._failures / total >= self.failure_rate_threshold:
+            self._open(f"failure rate {self._failures / total:.0%}")
+        elif self._slow / total >= self.slow_call_rate_threshold:
+            self._open(f"slow call rate {self._slow / total:.0%}")
+
+    def reset(self):
+        """Force the circuit closed and clear the sliding window"""
+        self._transition(CircuitState.CLOSED, "manual reset")
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get breaker metrics
+
+        Returns:
+            Dictionary with state, counters and current window rates
+        """
+        total = len(self._window)
+        return {
+            "name": self.name,
+            "state": self.state.value,
+            "calls": self.calls,
+            "successes": self.successes,
+            "failures": self.failures,
+            "slow_calls": self.slow_calls,
+            "rejected": self.rejected,
+            "transitions": dict(self.transitions),
+            "window_calls": total,
+            "window_failure_rate": self._failures / total if total else 0.0,
+            "window_slow_rate": self._slow / total if total else 0.0,
+        }
+
+    def _open(self, reason: str):
+        self._opened_at = self._clock()
+        self._transition(CircuitState.OPEN, reason)
+
+    def _transition(self, new_state: CircuitState, reason: str):
+        previous = self._state
+        self._state = new_state
+        self._generation += 1
+        self._window.clear()
+        self._failures = 0
+        self._slow = 0
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        if previous == new_state:
+            return
+
+        self.transitions[new_state.value] += 1
+        event = CircuitStateChange(self.name, previous, new_state, time.time(), reason)
+        for listener in self._listeners:
+            listener(event)
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers keyed by endpoint group
+
+    Breakers are created lazily with the registry's settings. Groups listed in
+    ``overrides`` get their own settings, e.g. a tighter slow-call duration for
+    ``crypto.withdrawals``.
+
+    Example:
+        ```python
+        breakers = CircuitBreakerRegistry(
+            failure_rate_threshold=0.5,
+            open_timeout=15.0,
+            overrides={"crypto.withdrawals": {"slow_call_duration": 5.0}},
+        )
+        breakers.add_listener(lambda e: print(e.name, e.previous, e.current))
+
+        client = KeshFlipClient(..., circuit_breakers=breakers)
+        ```
+    """
+
+    def __init__(
+        self,
+        overrides: Optional[Dict[str, Dict[str, object]]] = None,
+        **settings,
+    ):
+        """
+        Initialize circuit breaker registry
+
+        Args:
+            overrides: Per-group keyword arguments for CircuitBreaker
+            **settings: Default keyword arguments for CircuitBreaker
+        """
+        self._settings = settings
+        self._overrides = overrides or {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._listeners: List[StateListener] = []
+
+    def get(self, group: str) -> CircuitBreaker:
+        """
+        Get (or create) the breaker for an endpoint group
+
+        Args:
+            group: Endpoint group (e.g., "crypto.withdrawals")
+
+        Returns:
+            CircuitBreaker for the group
+        """
+        breaker = self._breakers.get(group)
+        if breaker is None:
+            settings = {**self._settings, **self._overrides.get(group, {})}
+            breaker = CircuitBreaker(group, **settings)
+            breaker.add_listener(self._dispatch)
+            self._breakers[group] = breaker
+        return breaker
+
+    def add_listener(self, listener: StateListener):
+        """
+        Register a callback invoked on state changes of any breaker
+
+        Args:
+            listener: Callable receiving a CircuitStateChange
+        """
+        self._listeners.append(listener)
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Get metrics for all breakers
+
+        Returns:
+            Dictionary of group names and their breaker stats
+        """
+        return {group: breaker.stats() for group, breaker in self._breakers.items()}
+
+    def _dispatch(self, event: CircuitStateChange):
+        for listener in self._listeners:
+            listener(event)
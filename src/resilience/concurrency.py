@@ -0,0 +1,363 @@
+"""Adaptive concurrency limiting"""
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from ..exceptions import ConcurrencyLimitError
+
+# (start time, calls in flight when started)
+Permit = Tuple[float, int]
+
+
+class _WindowedMin:
+    """Lowest latency of the previous and the current window of samples"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.value: Optional[float] = None
+        self._next: Optional[float] = None
+        self._samples = 0
+
+    def update(self, rtt: float) -> float:
+        # Rolling over windows lets the baseline follow the service when its
+        # unloaded latency shifts
+        self._samples += 1
+        if self._next is None or rtt < self._next:
+            self._next = rtt
+        if self.value is None or rtt < self.value:
+            self.value = rtt
+        if self._samples >= self.window:
+            self.value = self._next
+            self._next = None
+            self._samples = 0
+        return self.value
+
+
+class AIMDLimit:
+    """
+    Additive-increase/multiplicative-decrease limit algorithm
+
+    The limit grows by about one per window of ``limit`` successful calls
+    while latency stays within ``tolerance`` times the baseline (the lowest
+    latency seen recently) and shrinks by ``backoff_ratio`` when a call is
+    dropped or its latency is inflated beyond that.
+    """
+
+    # Decreases are multiplicative, so apply at most one per congestion event
+    decrease_once = True
+
+    def __init__(
+        self,
+        backoff_ratio: float = 0.9,
+        tolerance: float = 2.0,
+        baseline_window: int = 1000,
+    ):
+        """
+        Initialize AIMD algorithm
+
+        Args:
+            backoff_ratio: Factor applied to the limit on congestion
+            tolerance: Latency/baseline ratio treated as congestion
+            baseline_window: Samples after which the baseline is re-measured
+        """
+        self.backoff_ratio = backoff_ratio
+        self.tolerance = tolerance
+        self._baseline = _WindowedMin(baseline_window)
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """Lowest recent latency in seconds"""
+        return self._baseline.value
+
+    def update(self, limit: float, rtt: float, in_flight: int, dropped: bool) -> float:
+        """
+        Compute the next limit from one call
+
+        Args:
+            limit: Current limit
+            rtt: Call latency in seconds
+            in_flight: Calls in flight when this call was started
+            dropped: Whether the call hit a 429, 503 or timeout
+
+        Returns:
+            New limit
+        """
+        baseline = self._baseline.update(rtt)
+        if dropped or rtt > self.tolerance * baseline:
+            return limit * self.backoff_ratio
+        if in_flight * 2 >= limit:
+            # Only grow when the current limit is actually being used
+            return limit + 1.0 / limit
+        return limit
+
+
+class GradientLimit:
+    """
+    Gradient limit algorithm
+
+    Compares a short-term exponential average of latency with the baseline
+    (the lowest latency seen recently). Their ratio (the gradient, scaled by
+    ``tolerance`` and clamped to 0.5-1.0) scales the limit down smoothly as
+    queueing inflates latency. A headroom of ``sqrt(limit)`` lets the limit
+    keep probing upwards while latency is flat. Dropped calls shrink the
+    limit by ``backoff_ratio``.
+    """
+
+    # Latency-driven decreases are smoothed and apply on every call
+    decrease_once = False
+
+    def __init__(
+        self,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        short_window: int = 10,
+        baseline_window: int = 1000,
+        backoff_ratio: float = 0.9,
+    ):
+        """
+        Initialize gradient algorithm
+
+        Args:
+            tolerance: Latency/baseline ratio tolerated before backing off
+            smoothing: Weight (0-1) of each new limit estimate
+            short_window: Samples averaged by the short-term latency
+            baseline_window: Samples after which the baseline is re-measured
+            backoff_ratio: Factor applied to the limit on dropped calls
+        """
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.backoff_ratio = backoff_ratio
+        self._alpha = 2.0 / (short_window + 1)
+        self._baseline = _WindowedMin(baseline_window)
+        self.short_rtt: Optional[float] = None
+
+    @property
+    def baseline(self) -> Optional[float]:
+        """Lowest recent latency in seconds"""
+        return self._baseline.value
+
+    def update(self, limit: float, rtt: float, in_flight: int, dropped: bool) -> float:
+        """
+        Compute the next limit from one call
+
+        Args:
+            limit: Current limit
+            rtt: Call latency in seconds
+            in_flight: Calls in flight when this call was started
+            dropped: Whether the call hit a 429, 503 or timeout
+
+        Returns:
+            New limit
+        """
+        if dropped:
+            return limit * self.backoff_ratio
+        baseline = self._baseline.update(rtt)
+        if self.short_rtt is None:
+            self.short_rtt = rtt
+        self.short_rtt += self._alpha * (rtt - self.short_rtt)
+
+        if in_flight * 2 < limit:
+            # Application-limited; latency says nothing about a higher limit
+            return limit
+
+        gradient = max(0.5, min(1.0, self.tolerance * baseline / self.short_rtt))
+        estimate = limit * gradient + math.sqrt(limit)
+        return limit * (1 - self.smoothing) + estimate * self.smoothing
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limit that adapts to observed latency and overload
+
+    Calls beyond the current limit wait in a FIFO queue and are admitted in
+    arrival order as permits free up or the limit grows. The limit is driven
+    by an algorithm (``GradientLimit`` by default, or ``AIMDLimit``) fed with
+    the latency of every completed call. Calls that hit a 429, a 503 or a
+    timeout count as dropped and shrink the limit. Multiplicative decreases
+    apply once per congestion event: calls started before the last decrease
+    cannot shrink the limit again.
+
+    Example:
+        ```python
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=20, max_limit=200)
+        client = KeshFlipClient(..., concurrency_limiter=limiter)
+        print(limiter.stats())  # limit, in_flight, queue_depth, rejected, ...
+        ```
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        algorithm=None,
+        max_queue: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize adaptive concurrency limiter
+
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            algorithm: Limit algorithm (GradientLimit if None)
+            max_queue: Maximum waiting callers (unbounded if None); further
+                callers are rejected
+            queue_timeout: Longest wait for a permit in seconds (optional);
+                callers waiting longer are rejected
+            clock: Monotonic time source
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.algorithm = algorithm if algorithm is not None else GradientLimit()
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._clock = clock
+        self._limit = float(max(min_limit, min(max_limit, initial_limit)))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._pid = os.getpid()
+        self._last_decrease = float("-inf")
+
+        # Counters
+        self.acquired = 0
+        self.queued = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Calls currently holding a permit"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Callers waiting for a permit"""
+        return len(self._waiters)
+
+    async def acquire(self) -> Permit:
+        """
+        Wait for a permit
+
+        Returns:
+            Permit to pass back to ``record`` or ``release``
+
+        Raises:
+            ConcurrencyLimitError: Queue is full or ``queue_timeout`` elapsed
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        if not self._waiters and self._in_flight < self.limit:
+            return self._grant()
+
+        if self.max_queue is not None and len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise ConcurrencyLimitError(
+                "Concurrency limit reached and queue is full",
+                limit=self.limit,
+                queue_depth=len(self._waiters),
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            return await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ConcurrencyLimitError(
+                f"No concurrency permit within {self.queue_timeout}s",
+                limit=self.limit,
+                queue_depth=len(self._waiters),
+            )
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled: hand the permit on
+                self.release(waiter.result())
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _after_fork(self):
+        """Forget the permits and waiters of the parent process"""
+        self._pid = os.getpid()
+        self._in_flight = 0
+        self._waiters.clear()
+
+    def release(self, permit: Permit):
+        """
+        Give back a permit without feeding the algorithm (e.g. on cancellation)
+
+        Args:
+            permit: Permit returned by ``acquire``
+        """
+        self._in_flight -= 1
+        self._admit()
+
+    def record(self, permit: Permit, dropped: bool = False):
+        """
+        Give back a permit and feed the call's latency to the algorithm
+
+        Args:
+            permit: Permit returned by ``acquire``
+            dropped: Whether the call hit a 429, 503 or timeout
+        """
+        started, in_flight = permit
+        now = self._clock()
+        if dropped:
+            self.dropped += 1
+        limit = self.algorithm.update(self._limit, now - started, in_flight, dropped)
+        if limit < self._limit:
+            if (dropped or self.algorithm.decrease_once) and (
+                started < self._last_decrease
+            ):
+                # Already backed off for this congestion event
+                limit = self._limit
+            else:
+                self._last_decrease = now
+                self.decreases += 1
+                self._limit = max(float(self.min_limit), limit)
+        else:
+            self._limit = min(float(self.max_limit), limit)
+        self.release(permit)
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get limiter metrics
+
+        Returns:
+            Dictionary of limit, in-flight, queue depth and counters
+        """
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "acquired": self.acquired,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "decreases": self.decreases,
+        }
+
+    def _grant(self) -> Permit:
+        self._in_flight += 1
+        self.acquired += 1
+        return (self._clock(), self._in_flight)
+
+    def _admit(self):
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(self._grant())
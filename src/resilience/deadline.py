@@ -0,0 +1,151 @@
+"""Context-scoped request deadlines"""
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+import httpx
+
+from ..exceptions import DeadlineExceededError
+
+T = TypeVar("T")
+
+# Absolute time.monotonic() deadline of the current context, if any
+_current_deadline: ContextVar[Optional[float]] = ContextVar(
+    "keshflip_deadline", default=None
+)
+
+
+@contextmanager
+def request_deadline(seconds: float) -> Iterator[float]:
+    """
+    Give the requests made inside the block at most ``seconds`` to finish
+
+    The deadline follows the current task and tasks created inside the
+    block. A nested block can only shorten the deadline of the enclosing
+    one, never extend it.
+
+    Args:
+        seconds: Time budget from now
+
+    Yields:
+        The deadline as a ``time.monotonic()`` value
+    """
+    deadline = time.monotonic() + seconds
+    outer = _current_deadline.get()
+    if outer is not None and outer < deadline:
+        deadline = outer
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+@contextmanager
+def without_deadline() -> Iterator[None]:
+    """Run the block without a deadline (for work shared by several callers)"""
+    token = _current_deadline.set(None)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Deadline set by the innermost ``request_deadline`` block, if any"""
+    return _current_deadline.get()
+
+
+def time_remaining() -> Optional[float]:
+    """
+    Seconds left before the current deadline
+
+    Returns:
+        Remaining seconds (zero or negative once passed), or None without a
+        deadline
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(phase: str):
+    """
+    Fail if the current deadline has passed
+
+    Args:
+        phase: Step about to start, reported in the error
+
+    Raises:
+        DeadlineExceededError: The deadline has passed
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceededError(
+            f"Deadline exceeded before {phase}", phase=phase, deadline=deadline
+        )
+
+
+async def wait_within(awaitable: Awaitable[T], phase: str) -> T:
+    """
+    Await something, giving up when the current deadline passes
+
+    Without a deadline the awaitable is awaited as is.
+
+    Args:
+        awaitable: Coroutine or future to wait for
+        phase: Step being waited for, reported in the error
+
+    Returns:
+        Result of the awaitable
+
+    Raises:
+        DeadlineExceededError: The deadline passed first (the awaitable is
+            cancelled)
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return await awaitable
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif asyncio.isfuture(awaitable):
+            # Nobody will await it; a later exception must not go unretrieved
+            awaitable.cancel()
+        raise DeadlineExceededError(
+            f"Deadline exceeded before {phase}", phase=phase, deadline=deadline
+        )
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except asyncio.TimeoutError:
+        raise DeadlineExceededError(
+            f"Deadline exceeded during {phase}", phase=phase, deadline=deadline
+        ) from None
+
+
+def shrink_timeout(timeout: httpx.Timeout, remaining: float) -> httpx.Timeout:
+    """
+    Cap every phase of an httpx timeout at the time left
+
+    Args:
+        timeout: Configured timeout
+        remaining: Seconds left before the deadline
+
+    Returns:
+        Timeout whose connect, read, write and pool limits are at most
+        ``remaining``
+    """
+
+    def cap(value: Optional[float]) -> float:
+        return remaining if value is None else min(value, remaining)
+
+    return httpx.Timeout(
+        connect=cap(timeout.connect),
+        read=cap(timeout.read),
+        write=cap(timeout.write),
+        pool=cap(timeout.pool),
+    )
@@ -0,0 +1,131 @@
+"""Hedged requests for latency-sensitive idempotent reads"""
+from typing import Collection, Dict, Optional
+
+from .histogram import LatencyHistogram
+
+
+class HedgingPolicy:
+    """
+    Decides when to send a second (hedge) attempt for an idempotent GET
+
+    A hedge is sent when the first attempt has not answered within the
+    ``percentile`` latency observed for the same endpoint template. Hedges are
+    paid for from a global budget: every eligible request adds ``budget``
+    tokens (capped at ``max_tokens``) and every hedge spends one, so hedges
+    add at most ``budget`` extra load over time (5% by default).
+
+    Example:
+        ```python
+        hedging = HedgingPolicy(
+            percentile=0.95,
+            budget=0.05,
+            templates={
+                "/api/v1/crypto/balances/{partner_id}/{chain_id}/{asset}",
+                "/api/v1/crypto/deposits/{deposit_id}",
+            },
+        )
+        client = KeshFlipClient(..., hedging=hedging)
+        ```
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.05,
+        max_tokens: float = 10.0,
+        min_samples: int = 20,
+        min_delay: float = 0.005,
+        max_delay: Optional[float] = None,
+        templates: Optional[Collection[str]] = None,
+    ):
+        """
+        Initialize hedging policy
+
+        Args:
+            percentile: Latency quantile (0-1) after which a hedge is sent
+            budget: Maximum ratio of hedges to eligible requests
+            max_tokens: Cap on accumulated hedge budget (limits hedge bursts)
+            min_samples: Samples required for a template before hedging it
+            min_delay: Lower bound for the hedge delay in seconds
+            max_delay: Upper bound for the hedge delay in seconds (optional)
+            templates: Endpoint templates to hedge (all GET endpoints if None)
+        """
+        self.percentile = percentile
+        self.budget = budget
+        self.max_tokens = max_tokens
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.templates = frozenset(templates) if templates is not None else None
+        self._tokens = 0.0
+
+        # Counters
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.budget_exhausted = 0
+
+    def applies_to(self, method: str, template: str) -> bool:
+        """
+        Whether requests to an endpoint may be hedged
+
+        Args:
+            method: HTTP method
+            template: Endpoint template
+
+        Returns:
+            True for idempotent GETs covered by the policy
+        """
+        if method != "GET":
+            return False
+        return self.templates is None or template in self.templates
+
+    def delay_for(self, histogram: LatencyHistogram) -> Optional[float]:
+        """
+        Register an eligible request and compute its hedge delay
+
+        Args:
+            histogram: Latency histogram of the request's endpoint template
+
+        Returns:
+            Seconds to wait before hedging, or None if there are not enough
+            samples yet
+        """
+        self.requests += 1
+        self._tokens = min(self.max_tokens, self._tokens + self.budget)
+        if histogram.count < self.min_samples:
+            return None
+        delay = max(self.min_delay, histogram.percentile(self.percentile))
+        if self.max_delay is not None:
+            delay = min(delay, self.max_delay)
+        return delay
+
+    def try_spend(self) -> bool:
+        """
+        Spend budget for one hedge
+
+        Returns:
+            True if the hedge may be sent
+        """
+        if self._tokens < 1.0:
+            self.budget_exhausted += 1
+            return False
+        self._tokens -= 1.0
+        self.hedges_sent += 1
+        return True
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get hedging metrics
+
+        Returns:
+            Dictionary of request, hedge and budget counters
+        """
+        return {
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedges_won": self.hedges_won,
+            "budget_exhausted": self.budget_exhausted,
+            "budget_tokens": self._tokens,
+            "hedge_ratio": self.hedges_sent / self.requests if self.requests else 0.0,
+        }
@@ -0,0 +1,159 @@
+"""Streaming latency histograms"""
+import math
+from typing import Dict, List, Optional
+
+
+class LatencyHistogram:
+    """
+    Streaming histogram of call latencies with logarithmic buckets
+
+    Bucket boundaries grow geometrically by ``growth`` from ``min_value`` to
+    ``max_value`` seconds, so percentiles carry a bounded relative error
+    (about 5% with the default growth of 1.1) at constant memory. When
+    ``decay_after`` samples have been recorded all counts are halved, which
+    lets percentiles follow shifts in latency instead of averaging over the
+    whole process lifetime.
+    """
+
+    def __init__(
+        self,
+        min_value: float = 0.0005,
+        max_value: float = 120.0,
+        growth: float = 1.1,
+        decay_after: int = 10000,
+    ):
+        """
+        Initialize latency histogram
+
+        Args:
+            min_value: Smallest distinguishable latency in seconds
+            max_value: Largest tracked latency in seconds (larger values are
+                clamped into the last bucket)
+            growth: Ratio between consecutive bucket boundaries
+            decay_after: Halve all counts after this many samples (0 disables)
+        """
+        self.min_value = min_value
+        self.growth = growth
+        self.decay_after = decay_after
+        self._log_growth = math.log(growth)
+        self._size = (
+            int(math.ceil(math.log(max_value / min_value) / self._log_growth)) + 1
+        )
+        self._counts: List[int] = [0] * self._size
+        self._total = 0
+        self._since_decay = 0
+
+    @property
+    def count(self) -> int:
+        """Number of samples currently weighted in the histogram"""
+        return self._total
+
+    def record(self, value: float):
+        """
+        Record one latency sample
+
+        Args:
+            value: Latency in seconds
+        """
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(
+                self._size - 1,
+                int(math.log(value / self.min_value) / self._log_growth) + 1,
+            )
+        self._counts[index] += 1
+        self._total += 1
+        self._since_decay += 1
+        if self.decay_after and self._since_decay >= self.decay_after:
+            self._decay()
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """
+        Estimate a latency percentile
+
+        Args:
+            quantile: Quantile between 0 and 1 (e.g., 0.99 for p99)
+
+        Returns:
+            Upper bound of the bucket holding the quantile in seconds, or
+            None if no samples were recorded
+        """
+        if self._total == 0:
+            return None
+        rank = quantile * self._total
+        seen = 0
+        for index, bucket in enumerate(self._counts):
+            seen += bucket
+            if seen >= rank and bucket:
+                return self.min_value * self.growth**index
+        return self.min_value * self.growth ** (self._size - 1)
+
+    def reset(self):
+        """Drop all samples"""
+        self._counts = [0] * self._size
+        self._total = 0
+        self._since_decay = 0
+
+    def _decay(self):
+        self._counts = [bucket // 2 for bucket in self._counts]
+        self._total = sum(self._counts)
+        self._since_decay = 0
+
+
+class LatencyTracker:
+    """Latency histograms keyed by endpoint template"""
+
+    def __init__(self, **histogram_settings):
+        """
+        Initialize latency tracker
+
+        Args:
+            **histogram_settings: Keyword arguments for each LatencyHistogram
+        """
+        self._settings = histogram_settings
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def get(self, template: str) -> LatencyHistogram:
+        """
+        Get (or create) the histogram for an endpoint template
+
+        Args:
+            template: Endpoint template (e.g., /api/v1/crypto/deposits/{deposit_id})
+
+        Returns:
+            LatencyHistogram for the template
+        """
+        histogram = self._histograms.get(template)
+        if histogram is None:
+            histogram = self._histograms[template] = LatencyHistogram(**self._settings)
+        return histogram
+
+    def record(self, template: str, value: float):
+        """
+        Record a latency sample for an endpoint template
+
+        Args:
+            template: Endpoint template
+            value: Latency in seconds
+        """
+        self.get(template).record(value)
+
+    def percentiles(
+        self, quantiles: tuple = (0.5, 0.9, 0.99)
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """
+        Get latency percentiles for every endpoint template
+
+        Args:
+            quantiles: Quantiles to report
+
+        Returns:
+            Dictionary of templates and their ``p50``/``p90``/... values
+        """
+        return {
+            template: {
+                f"p{round(q * 100, 1):g}": histogram.percentile(q) for q in quantiles
+            }
+            for template, histogram in self._histograms.items()
+        }
@@ -0,0 +1,340 @@
+"""Priority classes and a priority-aware request scheduler"""
+import asyncio
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import Enum
+from typing import Callable, Deque, Dict, Iterator, Optional, Tuple, Union
+
+from ..exceptions import LoadShedError
+from .histogram import LatencyHistogram
+
+
+class Priority(str, Enum):
+    """Request priority class enumeration, most urgent first"""
+
+    CRITICAL = "critical"
+    DEFAULT = "default"
+    BACKGROUND = "background"
+
+
+PRIORITIES = (Priority.CRITICAL, Priority.DEFAULT, Priority.BACKGROUND)
+
+# Endpoint template -> priority used when the caller sets none
+DEFAULT_ENDPOINT_PRIORITIES: Dict[str, Priority] = {
+    "/api/v1/crypto/deposits": Priority.CRITICAL,
+    "/api/v1/crypto/withdrawals": Priority.CRITICAL,
+    "/api/v1/fiat/deposits": Priority.CRITICAL,
+    "/api/v1/crypto/deposits/partner/{partner_id}": Priority.BACKGROUND,
+    "/api/v1/fiat/deposits/partner/{partner_id}": Priority.BACKGROUND,
+}
+
+# (priority, time the request was queued)
+Permit = Tuple[Priority, float]
+
+_current_priority: ContextVar[Optional[Priority]] = ContextVar(
+    "keshflip_priority", default=None
+)
+
+
+@contextmanager
+def request_priority(priority: Union[Priority, str]) -> Iterator[Priority]:
+    """
+    Run the requests made inside the block at the given priority
+
+    The priority follows the current task and tasks created inside the block.
+
+    Args:
+        priority: Priority class
+
+    Yields:
+        The priority class
+    """
+    priority = Priority(priority)
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> Optional[Priority]:
+    """Priority set by the innermost ``request_priority`` block, if any"""
+    return _current_priority.get()
+
+
+class _ClassQueue:
+    """Waiters and metrics of one priority class"""
+
+    def __init__(self, max_queue: Optional[int], queue_timeout: Optional[float]):
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+        self.wait_times = LatencyHistogram(min_value=0.0001)
+
+        # Counters
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.promoted = 0
+        self.wait_seconds = 0.0
+
+
+class PriorityScheduler:
+    """
+    Admits requests to the connection pool by priority class
+
+    At most ``max_concurrency`` requests run at once. When all slots are
+    taken, requests wait in one FIFO queue per class, and a freed slot goes
+    to the most urgent class with waiters. Starvation protection promotes
+    the oldest waiter of any class once it has waited ``starvation_after``
+    seconds. Requests are shed with LoadShedError when their class queue is
+    full (background requests are bounded by default) or when they wait
+    longer than their class ``queue_timeout``.
+
+    The priority of a request is, in order: the ``priority`` argument of
+    ``KeshFlipClient.request``, the innermost ``request_priority`` block,
+    ``endpoint_priorities`` for its template, and ``Priority.DEFAULT``.
+
+    Example:
+        ```python
+        scheduler = PriorityScheduler(max_concurrency=100)
+        client = KeshFlipClient(..., scheduler=scheduler)
+
+        with request_priority("background"):
+            await mirror.sync()
+
+        print(scheduler.stats()["classes"]["critical"]["wait_p99_ms"])
+        ```
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 100,
+        starvation_after: float = 1.0,
+        max_queue: Optional[Dict[str, int]] = None,
+        queue_timeout: Optional[Dict[str, float]] = None,
+        endpoint_priorities: Optional[Dict[str, Union[Priority, str]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize priority scheduler
+
+        Args:
+            max_concurrency: Requests running at once; match the connection
+                pool's ``max_connections``
+            starvation_after: Seconds after which a waiter of any class is
+                served ahead of more urgent classes
+            max_queue: Maximum waiters per class name (default: 1000
+                background waiters, other classes unbounded)
+            queue_timeout: Longest wait per class name in seconds (optional)
+            endpoint_priorities: Priority per endpoint template
+                (DEFAULT_ENDPOINT_PRIORITIES if None)
+            clock: Monotonic time source
+        """
+        if max_queue is None:
+            max_queue = {Priority.BACKGROUND.value: 1000}
+        queue_timeout = queue_timeout or {}
+        if endpoint_priorities is None:
+            endpoint_priorities = DEFAULT_ENDPOINT_PRIORITIES
+
+        self.max_concurrency = max_concurrency
+        self.starvation_after = starvation_after
+        self.endpoint_priorities = {
+            template: Priority(priority)
+            for template, priority in endpoint_priorities.items()
+        }
+        self._clock = clock
+        self._classes: Dict[Priority, _ClassQueue] = {
+            priority: _ClassQueue(
+                max_queue.get(priority.value), queue_timeout.get(priority.value)
+            )
+            for priority in PRIORITIES
+        }
+        self._in_flight = 0
+        self._pid = os.getpid()
+
+    @property
+    def in_flight(self) -> int:
+        """Requests currently holding a slot"""
+        return self._in_flight
+
+    def queue_depth(self, priority: Union[Priority, str, None] = None) -> int:
+        """
+        Get the number of waiting requests
+
+        Args:
+            priority: Priority class (all classes if None)
+
+        Returns:
+            Number of waiters
+        """
+        if priority is None:
+            return sum(len(queue.waiters) for queue in self._classes.values())
+        return len(self._classes[Priority(priority)].waiters)
+
+    def resolve(
+        self, template: str, priority: Union[Priority, str, None] = None
+    ) -> Priority:
+        """
+        Get the priority of a request
+
+        Args:
+            template: Endpoint template
+            priority: Priority requested for the call (optional)
+
+        Returns:
+            Priority class
+        """
+        if priority is not None:
+            return Priority(priority)
+        priority = _current_priority.get()
+        if priority is not None:
+            return priority
+        return self.endpoint_priorities.get(template, Priority.DEFAULT)
+
+    async def acquire(self, priority: Union[Priority, str]) -> Permit:
+        """
+        Wait for a slot
+
+        Args:
+            priority: Priority class of the request
+
+        Returns:
+            Permit to pass back to ``release``
+
+        Raises:
+            LoadShedError: Class queue is full or its queue timeout elapsed
+        """
+        if self._pid != os.getpid():
+            self._after_fork()
+        priority = Priority(priority)
+        queue = self._classes[priority]
+        now = self._clock()
+        if self._in_flight < self.max_concurrency and not self.queue_depth():
+            return self._grant(priority, queue, now, now)
+
+        if queue.max_queue is not None and len(queue.waiters) >= queue.max_queue:
+            queue.shed += 1
+            raise LoadShedError(
+                f"Shed {priority.value} request: queue is full",
+                priority=priority.value,
+                queue_depth=len(queue.waiters),
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (now, waiter)
+        queue.waiters.append(entry)
+        queue.queued += 1
+        try:
+            return await asyncio.wait_for(waiter, queue.queue_timeout)
+        except asyncio.TimeoutError:
+            queue.shed += 1
+            raise LoadShedError(
+                f"Shed {priority.value} request after waiting "
+                f"{queue.queue_timeout}s",
+                priority=priority.value,
+                queue_depth=len(queue.waiters),
+            )
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled: hand the slot on
+                self.release(waiter.result())
+            raise
+        finally:
+            if entry in queue.waiters:
+                queue.waiters.remove(entry)
+
+    def _after_fork(self):
+        """Forget the slots and waiters of the parent process"""
+        self._pid = os.getpid()
+        self._in_flight = 0
+        for queue in self._classes.values():
+            queue.waiters.clear()
+
+    def release(self, permit: Permit):
+        """
+        Give back a slot
+
+        Args:
+            permit: Permit returned by ``acquire``
+        """
+        self._in_flight -= 1
+        while self._in_flight < self.max_concurrency:
+            picked = self._next_waiter()
+            if picked is None:
+                return
+            priority, queue, (queued_at, waiter) = picked
+            if not waiter.done():
+                waiter.set_result(
+                    self._grant(priority, queue, queued_at, self._clock())
+                )
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get scheduler metrics
+
+        Returns:
+            Dictionary of in-flight requests and per-class queue depth,
+            counters and queue-wait percentiles
+        """
+        classes = {}
+        for priority, queue in self._classes.items():
+            p50 = queue.wait_times.percentile(0.5)
+            p99 = queue.wait_times.percentile(0.99)
+            classes[priority.value] = {
+                "queue_depth": len(queue.waiters),
+                "admitted": queue.admitted,
+                "queued": queue.queued,
+                "shed": queue.shed,
+                "promoted": queue.promoted,
+                "wait_seconds": queue.wait_seconds,
+                "wait_p50_ms": p50 * 1000 if p50 is not None else None,
+                "wait_p99_ms": p99 * 1000 if p99 is not None else None,
+            }
+        return {
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "classes": classes,
+        }
+
+    def _grant(
+        self, priority: Priority, queue: _ClassQueue, queued_at: float, now: float
+    ) -> Permit:
+        waited = now - queued_at
+        self._in_flight += 1
+        queue.admitted += 1
+        queue.wait_seconds += waited
+        queue.wait_times.record(waited)
+        return (priority, queued_at)
+
+    def _next_waiter(self):
+        # Starvation protection: the oldest overdue waiter of any class first
+        deadline = self._clock() - self.starvation_after
+        oldest = None
+        for priority in PRIORITIES:
+            queue = self._classes[priority]
+            if queue.waiters:
+                queued_at = queue.waiters[0][0]
+                if queued_at <= deadline and (oldest is None or queued_at < oldest[0]):
+                    oldest = (queued_at, priority)
+        if oldest is not None:
+            priority = oldest[1]
+            queue = self._classes[priority]
+            if priority is not self._most_urgent():
+                queue.promoted += 1
+            return priority, queue, queue.waiters.popleft()
+
+        for priority in PRIORITIES:
+            queue = self._classes[priority]
+            if queue.waiters:
+                return priority, queue, queue.waiters.popleft()
+        return None
+
+    def _most_urgent(self) -> Optional[Priority]:
+        for priority in PRIORITIES:
+            if self._classes[priority].waiters:
+                return priority
+        return None
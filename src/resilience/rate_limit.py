@@ -0,0 +1,95 @@
+"""Token bucket rate limiting"""
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Optional
+
+
+class RateLimiter:
+    """
+    Async token bucket
+
+    Tokens refill at ``rate`` per second up to ``burst``. Each call takes one
+    token; callers wait in arrival order when the bucket is empty.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize rate limiter
+
+        Args:
+            rate: Sustained calls per second
+            burst: Bucket size (defaults to ``rate``, at least 1)
+            clock: Monotonic time source
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1.0, burst if burst is not None else rate)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock: Optional[asyncio.Lock] = None
+        self._pid = os.getpid()
+
+        # Counters
+        self.acquired = 0
+        self.delayed = 0
+        self.wait_seconds = 0.0
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token without waiting
+
+        Returns:
+            True if a token was available
+        """
+        self._refill()
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            self.acquired += 1
+            return True
+        return False
+
+    async def acquire(self):
+        """Take a token, waiting for one to become available"""
+        if self._lock is None or self._pid != os.getpid():
+            # A forked child must not wait on the parent's lock
+            self._lock = asyncio.Lock()
+            self._pid = os.getpid()
+        if not self._lock.locked() and self.try_acquire():
+            return
+
+        start = self._clock()
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+        self.delayed += 1
+        self.wait_seconds += self._clock() - start
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Get rate limiter metrics
+
+        Returns:
+            Dictionary of acquired/delayed counters and total wait time
+        """
+        self._refill()
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": self._tokens,
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "wait_seconds": self.wait_seconds,
+        }
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
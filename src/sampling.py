@@ -0,0 +1,427 @@
+"""Per-phase timelines of slow requests"""
+import asyncio
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from .resilience.histogram import LatencyTracker
+
+# Phase of each httpcore trace step (the part after "http11." etc.)
+_TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "connect_unix_socket": "connect",
+    "start_tls": "tls",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "server",
+    "receive_response_body": "download",
+}
+
+# Sample of the request made last in the current context
+_current_sample: ContextVar[Optional["RequestSample"]] = ContextVar(
+    "keshflip_sample", default=None
+)
+
+
+class RequestSample:
+    """
+    Timeline of one sampled call
+
+    Phases are recorded as (name, start, end) with ``time.perf_counter()``
+    times. A phase can occur several times, e.g. once per attempt.
+    """
+
+    __slots__ = (
+        "method",
+        "template",
+        "started_at",
+        "start",
+        "total",
+        "error",
+        "loop_lag",
+        "events",
+        "_exchange",
+        "_open",
+    )
+
+    def __init__(self, method: str, template: str):
+        """
+        Initialize request sample
+
+        Args:
+            method: HTTP method
+            template: Endpoint template
+        """
+        self.method = method
+        self.template = template
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.total: Optional[float] = None
+        self.error: Optional[str] = None
+        self.loop_lag = 0.0
+        self.events: List[Tuple[str, float, float]] = []
+        self._exchange: Optional[float] = None
+        self._open: Dict[str, float] = {}
+
+    def add(self, phase: str, start: float, end: float):
+        """
+        Record a phase
+
+        Args:
+            phase: Phase name
+            start: ``time.perf_counter()`` at its start
+            end: ``time.perf_counter()`` at its end
+        """
+        self.events.append((phase, start, end))
+
+    def exchange_started(self):
+        """Mark the hand-over of the request to the HTTP client"""
+        self._exchange = time.perf_counter()
+        self._open.clear()
+
+    def exchange_done(self):
+        """Mark the return of the HTTP client"""
+        if self._exchange is not None:
+            # The transport reported no steps (e.g. an in-process transport)
+            self.add("exchange", self._exchange, time.perf_counter())
+            self._exchange = None
+
+    async def trace(self, event: str, info: dict):
+        """httpcore ``trace`` extension recording the transport steps"""
+        now = time.perf_counter()
+        step, _, stage = event.rpartition(".")
+        if stage == "started":
+            if self._exchange is not None:
+                # Until the first step: request building and pool wait
+                self.add("pool", self._exchange, now)
+                self._exchange = None
+            self._open[step] = now
+        else:
+            started = self._open.pop(step, None)
+            phase = _TRACE_PHASES.get(step.partition(".")[2])
+            if started is not None and phase is not None:
+                self.add(phase, started, now)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Serializable form of the sample
+
+        Returns:
+            Dictionary of call details, total and per-phase milliseconds and
+            the timeline with offsets from the start of the call
+        """
+        phases: Dict[str, float] = {}
+        timeline = []
+        for phase, start, end in self.events:
+            duration = (end - start) * 1000
+            phases[phase] = phases.get(phase, 0.0) + duration
+            timeline.append(
+                {
+                    "phase": phase,
+                    "offset_ms": round((start - self.start) * 1000, 3),
+                    "duration_ms": round(duration, 3),
+                }
+            )
+        return {
+            "method": self.method,
+            "endpoint": self.template,
+            "started_at": self.started_at,
+            "total_ms": round((self.total or 0.0) * 1000, 3),
+            "error": self.error,
+            "loop_lag_ms": round(self.loop_lag * 1000, 3),
+            "phases_ms": {phase: round(ms, 3) for phase, ms in phases.items()},
+            "timeline": timeline,
+        }
+
+
+class LoopLagMonitor:
+    """
+    Event loop lag measured with a periodic timer
+
+    A callback is scheduled every ``interval`` seconds; the time it runs
+    past its due time is how long the loop was busy with other work. Lags of
+    at least ``min_lag`` are kept, with the time they were observed, for
+    ``window`` entries. The timer runs until ``stop`` is called.
+    """
+
+    def __init__(
+        self, interval: float = 0.01, min_lag: float = 0.001, window: int = 4096
+    ):
+        """
+        Initialize loop lag monitor
+
+        Args:
+            interval: Seconds between timer callbacks
+            min_lag: Smallest lag kept
+            window: Lags kept
+        """
+        self.interval = interval
+        self.min_lag = min_lag
+        self._lags: Deque[Tuple[float, float]] = deque(maxlen=window)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._due = 0.0
+
+    def ensure_running(self):
+        """Start the timer on the running loop unless it already runs there"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self.stop()
+            self._loop = loop
+            self._due = time.perf_counter() + self.interval
+            self._timer = loop.call_later(self.interval, self._tick, loop)
+
+    def stop(self):
+        """Cancel the timer; the next ``ensure_running`` starts it again"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._loop = None
+
+    def max_lag(self, since: float) -> float:
+        """
+        Longest lag observed since a time, including a timer now overdue
+
+        Args:
+            since: ``time.perf_counter()`` value
+
+        Returns:
+            Lag in seconds
+        """
+        worst = max(0.0, time.perf_counter() - self._due) if self._loop else 0.0
+        for observed, lag in reversed(self._lags):
+            if observed < since:
+                break
+            if lag > worst:
+                worst = lag
+        return worst
+
+    def _tick(self, loop: asyncio.AbstractEventLoop):
+        if loop is not self._loop:
+            return  # Superseded by a timer on a newer loop
+        now = time.perf_counter()
+        lag = now - self._due
+        if lag >= self.min_lag:
+            self._lags.append((now, lag))
+        self._due = now + self.interval
+        self._timer = loop.call_later(self.interval, self._tick, loop)
+
+
+class SlowRequestSampler:
+    """
+    Keeps per-phase breakdowns of slow client calls
+
+    Every call made through ``KeshFlipClient.request`` records a timeline:
+    micro-batching, scheduler and concurrency limiter waits, signing, the
+    HTTP exchange (request building and pool wait, connect, TLS, sending,
+    server time until the response headers, download), JSON decoding and
+    response model validation. Only calls slower than ``threshold`` seconds,
+    or than the ``percentile`` of their endpoint, are kept, in a ring buffer
+    of the last ``capacity`` slow calls. The longest event loop lag observed
+    during the call is included.
+
+    Transports that report no steps (in-process transports) show the whole
+    exchange as one "exchange" phase. Model validation runs after the call
+    returns, so it is added to kept samples but does not decide whether a
+    call is kept. Streamed requests are not sampled.
+
+    Example:
+        ```python
+        sampler = SlowRequestSampler(threshold=1.0, percentile=0.99)
+        client = KeshFlipClient(..., sampler=sampler)
+        ...
+        print(sampler.dump())  # JSON list of the kept calls, oldest first
+        ```
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = 1.0,
+        percentile: Optional[float] = None,
+        capacity: int = 100,
+        min_calls: int = 100,
+        loop_lag_interval: Optional[float] = 0.01,
+    ):
+        """
+        Initialize slow-request sampler
+
+        Args:
+            threshold: Keep calls taking at least this many seconds (None to
+                use only the percentile)
+            percentile: Also keep calls at or above this latency quantile of
+                their endpoint, e.g. 0.99 (optional)
+            capacity: Slow calls kept; older ones are dropped
+            min_calls: Calls of an endpoint before its percentile is used
+            loop_lag_interval: Seconds between event loop lag probes (None
+                disables lag measurement)
+        """
+        if threshold is None and percentile is None:
+            raise ValueError("threshold or percentile must be set")
+        self.threshold = threshold
+        self.percentile = percentile
+        self.capacity = capacity
+        self.min_calls = min_calls
+        self.loop_lag = (
+            LoopLagMonitor(loop_lag_interval) if loop_lag_interval is not None else None
+        )
+        self.latency = LatencyTracker()
+        self._samples: Deque[RequestSample] = deque(maxlen=capacity)
+        # Calls and percentile cutoff per endpoint; the cutoff is set after
+        # min_calls calls and recomputed every 100
+        self._cutoffs: Dict[str, Tuple[int, Optional[float]]] = {}
+
+        # Counters
+        self.calls = 0
+        self.kept = 0
+
+    def begin(self, method: str, template: str) -> RequestSample:
+        """
+        Start the timeline of a call made in the current context
+
+        Args:
+            method: HTTP method
+            template: Endpoint template
+
+        Returns:
+            RequestSample to pass to ``finish``
+        """
+        if self.loop_lag is not None:
+            self.loop_lag.ensure_running()
+        sample = RequestSample(method, template)
+        _current_sample.set(sample)
+        return sample
+
+    def finish(self, sample: RequestSample, error: Optional[BaseException] = None):
+        """
+        End a call's timeline and keep it if the call was slow
+
+        Args:
+            sample: Sample returned by ``begin``
+            error: Exception the call raised, if any
+        """
+        total = sample.total = time.perf_counter() - sample.start
+        if error is not None:
+            status = getattr(error, "status_code", None)
+            sample.error = type(error).__name__ + (f" {status}" if status else "")
+        self.calls += 1
+
+        template = sample.template
+        slow = self.threshold is not None and total >= self.threshold
+        if self.percentile is not None:
+            histogram = self.latency.get(template)
+            calls, cutoff = self._cutoffs.get(template, (0, None))
+            if not slow and cutoff is not None:
+                slow = total >= cutoff
+            histogram.record(total)
+            if calls >= self.min_calls and (cutoff is None or calls % 100 == 0):
+                cutoff = histogram.percentile(self.percentile)
+            self._cutoffs[template] = (calls + 1, cutoff)
+
+        if slow:
+            if self.loop_lag is not None:
+                sample.loop_lag = self.loop_lag.max_lag(sample.start)
+            self._samples.append(sample)
+            self.kept += 1
+
+    def samples(self) -> List[Dict[str, Any]]:
+        """
+        Kept slow calls, oldest first
+
+        Returns:
+            List of ``RequestSample.as_dict()`` results
+        """
+        return [sample.as_dict() for sample in self._samples]
+
+    def dump(self, path: Optional[str] = None) -> str:
+        """
+        Kept slow calls as JSON
+
+        Args:
+            path: File to write the JSON to as well (optional)
+
+        Returns:
+            JSON array of the samples
+        """
+        data = json.dumps(self.samples(), indent=2)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(data)
+        return data
+
+    def clear(self):
+        """Drop the kept samples"""
+        self._samples.clear()
+
+    def stop(self):
+        """Stop the event loop lag timer (a later call starts it again)"""
+        if self.loop_lag is not None:
+            self.loop_lag.stop()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get sampler metrics
+
+        Returns:
+            Dictionary of calls seen, calls kept, samples held and the
+            percentile cutoff per endpoint in seconds
+        """
+        return {
+            "calls": self.calls,
+            "kept": self.kept,
+            "held": len(self._samples),
+            "capacity": self.capacity,
+            "cutoffs": {
+                template: cutoff for template, (_, cutoff) in self._cutoffs.items()
+            },
+        }
+
+
+def active_sample() -> Optional[RequestSample]:
+    """Sample of the call running in the current context, if it is sampled"""
+    sample = _current_sample.get()
+    if sample is None or sample.total is not None:
+        return None
+    return sample
+
+
+@contextmanager
+def without_sample() -> Iterator[None]:
+    """Run the block outside the caller's sample (for work shared by callers)"""
+    token = _current_sample.set(None)
+    try:
+        yield
+    finally:
+        _current_sample.reset(token)
+
+
+def parse_response(model: Type[Any], data: Union[dict, list]) -> Any:
+    """
+    Validate a response into a model, timed as the call's "validate" phase
+
+    Args:
+        model: Pydantic response model
+        data: Response JSON object, or a list of them
+
+    Returns:
+        Model instance, or a list of instances for a list
+    """
+    sample = _current_sample.get()
+    if sample is None:
+        if type(data) is list:
+            return [model(**item) for item in data]
+        return model(**data)
+
+    _current_sample.set(None)
+    start = time.perf_counter()
+    try:
+        if type(data) is list:
+            return [model(**item) for item in data]
+        return model(**data)
+    finally:
+        end = time.perf_counter()
+        sample.add("validate", start, end)
+        if sample.total is not None:
+            sample.total += end - start
@@ -0,0 +1,260 @@
+"""Incremental parsing of large list responses"""
+import codecs
+import json
+import re
+from typing import Any, AsyncContextManager, AsyncGenerator, Dict, List, Optional
+
+import httpx
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+# Parser states
+_START, _KEY, _COLON, _VALUE, _NEXT_KEY, _FIRST_ITEM, _ITEM, _ITEM_SEP, _DONE = range(9)
+
+_MORE = object()
+
+
+class JSONArrayParser:
+    """
+    Push parser yielding the items of one array inside a JSON object
+
+    Bytes are fed as they arrive; every item of the ``key`` array is returned
+    as soon as it is complete, and other top-level fields are collected in
+    ``meta``. Only the unparsed tail of the input is buffered, so memory is
+    bounded by one item plus one chunk rather than by the document size.
+
+    Example:
+        ```python
+        parser = JSONArrayParser("data")
+        for chunk in chunks:
+            for item in parser.feed(chunk):
+                handle(item)
+        parser.close()
+        print(parser.meta)  # e.g. {"success": True, "total": 12000}
+        ```
+    """
+
+    def __init__(self, key: str = "data", max_item_size: int = 16 * 1024 * 1024):
+        """
+        Initialize parser
+
+        Args:
+            key: Top-level field holding the array to stream
+            max_item_size: Largest item (or top-level field) in characters
+                that may be buffered before the document is rejected
+        """
+        self.key = key
+        self.max_item_size = max_item_size
+        self.meta: Dict[str, Any] = {}
+        self.items = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._raw_decode = json.JSONDecoder().raw_decode
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._field = None
+        self._eof = False
+
+    def feed(self, data: bytes) -> List[Any]:
+        """
+        Parse the next chunk of the document
+
+        Args:
+            data: Raw bytes (may split tokens or UTF-8 sequences anywhere)
+
+        Returns:
+            Items completed by this chunk, in document order
+
+        Raises:
+            ValueError: The document is not a JSON object or an item is too
+                large
+        """
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(data)
+        self._pos = 0
+        items = self._parse()
+        if len(self._buffer) - self._pos > self.max_item_size:
+            raise ValueError(
+                f"JSON value exceeds max_item_size ({self.max_item_size} characters)"
+            )
+        return items
+
+    def close(self) -> List[Any]:
+        """
+        Finish parsing at the end of the document
+
+        Returns:
+            Items completed by the remaining input
+
+        Raises:
+            ValueError: The document is truncated or malformed
+        """
+        self._buffer = self._buffer[self._pos :] + self._decoder.decode(b"", True)
+        self._pos = 0
+        self._eof = True
+        items = self._parse()
+        if self._state != _DONE:
+            raise ValueError("Truncated JSON document")
+        return items
+
+    def _parse(self) -> List[Any]:
+        items = []
+        buffer = self._buffer
+        end = len(buffer)
+        while True:
+            pos = _WHITESPACE.match(buffer, self._pos).end()
+            self._pos = pos
+            if pos >= end:
+                return items
+            state = self._state
+            char = buffer[pos]
+
+            if state in (_ITEM, _FIRST_ITEM):
+                if state == _FIRST_ITEM and char == "]":
+                    self._advance(pos + 1, _NEXT_KEY)
+                    continue
+                item = self._decode(buffer, pos)
+                if item is _MORE:
+                    return items
+                items.append(item)
+                self.items += 1
+                self._state = _ITEM_SEP
+            elif state == _ITEM_SEP:
+                self._advance(pos + 1, self._expect(char, {",": _ITEM, "]": _NEXT_KEY}))
+            elif state == _KEY:
+                if char == "}":
+                    self._advance(pos + 1, _DONE)
+                    continue
+                key = self._decode(buffer, pos)
+                if key is _MORE:
+                    return items
+                if not isinstance(key, str):
+                    raise ValueError(f"Expected object key at position {pos}")
+                self._field = key
+                self._state = _COLON
+            elif state == _VALUE:
+                if self._field == self.key and char == "[":
+                    self._advance(pos + 1, _FIRST_ITEM)
+                    continue
+                value = self._decode(buffer, pos)
+                if value is _MORE:
+                    return items
+                self.meta[self._field] = value
+                self._state = _NEXT_KEY
+            elif state == _COLON:
+                self._advance(pos + 1, self._expect(char, {":": _VALUE}))
+            elif state == _NEXT_KEY:
+                self._advance(pos + 1, self._expect(char, {",": _KEY, "}": _DONE}))
+            elif state == _START:
+                self._advance(pos + 1, self._expect(char, {"{": _KEY}))
+            else:
+                raise ValueError(f"Unexpected data after JSON document: {char!r}")
+
+    def _decode(self, buffer: str, pos: int) -> Any:
+        """Decode one value at ``pos``, or return _MORE if it may be incomplete"""
+        try:
+            value, end = self._raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            return _MORE
+        # A number cut by the end of the chunk may continue in the next one
+        if (
+            not self._eof
+            and isinstance(value, (int, float))
+            and (end == len(buffer) or buffer[end] in _NUMBER_CHARS)
+        ):
+            return _MORE
+        self._pos = end
+        return value
+
+    def _advance(self, pos: int, state: int):
+        self._pos = pos
+        self._state = state
+
+    def _expect(self, char: str, transitions: Dict[str, int]) -> int:
+        state = transitions.get(char)
+        if state is None:
+            expected = " or ".join(repr(c) for c in transitions)
+            raise ValueError(
+                f"Expected {expected} at position {self._pos}, got {char!r}"
+            )
+        return state
+
+
+class ListStream:
+    """
+    Async iterator over the items of a streamed list response
+
+    Returned by the ``stream()`` methods of list endpoints. The response body
+    is read in chunks and items are yielded as soon as they are parsed; the
+    other fields of the response (``success``, ``total``, ...) are available
+    in ``meta`` once iteration has finished.
+
+    The response stays open until the items are exhausted. To stop early,
+    use the stream as an async context manager or call ``aclose()``; that
+    closes the response and frees its connection and scheduler slot.
+
+    Example:
+        ```python
+        stream = client.crypto.deposits.stream(limit=100000)
+        async for deposit in stream:
+            print(deposit["id"], deposit["status"])
+        print(stream.meta.get("total"))
+
+        async with client.crypto.deposits.stream(status="PENDING") as stream:
+            async for deposit in stream:
+                if deposit["id"] == wanted:
+                    break
+        ```
+    """
+
+    def __init__(
+        self,
+        opener: AsyncContextManager[httpx.Response],
+        key: str = "data",
+        chunk_size: int = 64 * 1024,
+    ):
+        """
+        Initialize list stream
+
+        Args:
+            opener: Async context manager yielding the checked httpx response
+            key: Field of the response holding the list
+            chunk_size: Bytes read from the response per chunk
+        """
+        self._opener = opener
+        self._parser = JSONArrayParser(key)
+        self.chunk_size = chunk_size
+        self._items: Optional[AsyncGenerator[Any, None]] = None
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        """Top-level response fields other than the streamed list"""
+        return self._parser.meta
+
+    def __aiter__(self) -> AsyncGenerator[Any, None]:
+        if self._items is None:
+            self._items = self._iterate()
+        return self._items
+
+    async def aclose(self):
+        """Stop iterating and close the response"""
+        if self._items is None:
+            self._items = self._iterate()
+        await self._items.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    async def _iterate(self) -> AsyncGenerator[Any, None]:
+        parser = self._parser
+        async with self._opener as response:
+            async for chunk in response.aiter_bytes(self.chunk_size):
+                for item in parser.feed(chunk):
+                    yield item
+            for item in parser.close():
+                yield item
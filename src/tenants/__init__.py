@@ -0,0 +1,11 @@
+"""Multi-partner clients sharing one connection pool"""
+from .pool import KeshFlipClientPool, TenantClient
+from .registry import CredentialRegistry, TenantCredentials, TenantMetrics
+
+__all__ = [
+    "KeshFlipClientPool",
+    "TenantClient",
+    "CredentialRegistry",
+    "TenantCredentials",
+    "TenantMetrics",
+]
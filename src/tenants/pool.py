@@ -0,0 +1,251 @@
+"""Multi-partner client pool sharing one connection pool"""
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from ..client import KeshFlipClient
+from ..compression import CompressionPolicy
+from ..metrics import MetricsRegistry
+from ..resilience.circuit_breaker import CircuitBreakerRegistry
+from ..resilience.concurrency import AdaptiveConcurrencyLimiter
+from ..resilience.deadline import wait_within
+from ..resilience.hedging import HedgingPolicy
+from ..resilience.priority import PriorityScheduler
+from .registry import CredentialRegistry, TenantCredentials
+
+
+class TenantClient(KeshFlipClient):
+    """KeshFlip client bound to one partner of a KeshFlipClientPool"""
+
+    def __init__(
+        self,
+        tenant: TenantCredentials,
+        http_client: httpx.AsyncClient,
+        base_url: str,
+        timeout: float,
+        pool: Optional["KeshFlipClientPool"] = None,
+        **options,
+    ):
+        self.pool = pool
+        super().__init__(
+            api_key=tenant.auth.api_key,
+            api_secret=tenant.api_secret,
+            base_url=base_url,
+            timeout=timeout,
+            partner_id=tenant.partner_id,
+            http_client=http_client,
+            **options,
+        )
+        # Reuse the registry's precomputed signing state
+        self.auth = tenant.auth
+        self.tenant = tenant
+
+    async def request(self, *args, **kwargs) -> dict:
+        """Make an authenticated request within the partner's rate limit"""
+        tenant = self.tenant
+        if tenant.rate_limiter is not None:
+            await wait_within(tenant.rate_limiter.acquire(), "rate limiter")
+
+        metrics = tenant.metrics
+        metrics.in_flight += 1
+        start = time.monotonic()
+        try:
+            return await super().request(*args, **kwargs)
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            metrics.in_flight -= 1
+            metrics.requests += 1
+            metrics.latency.record(time.monotonic() - start)
+
+    def _fork_http_client(self) -> httpx.AsyncClient:
+        """The pool's connection pool of the forked child"""
+        if self.pool is None:
+            return super()._fork_http_client()
+        return self.pool._fork_http_client()
+
+
+class KeshFlipClientPool:
+    """
+    Clients for many partners over one shared HTTP connection pool
+
+    Each partner gets a lightweight client with its own credentials, default
+    ``partner_id``, rate limit and metrics, while all of them send through a
+    single ``httpx.AsyncClient``. Circuit breakers and hedging, when given,
+    are shared as well since they describe the health of the API rather than
+    of a partner.
+
+    Example:
+        ```python
+        registry = CredentialRegistry(default_rate_limit=20)
+        registry.register("partner_a", "key_a", "secret_a")
+        registry.register("partner_b", "key_b", "secret_b")
+
+        async with KeshFlipClientPool(registry, max_connections=100) as pool:
+            deposit = await pool.client("partner_a").crypto.deposits.create(...)
+            balance = await pool.client("partner_b").crypto.balances.get("1", "USDC")
+            print(pool.stats())
+        ```
+    """
+
+    def __init__(
+        self,
+        registry: CredentialRegistry,
+        base_url: str = "https://api.keshpay.com",
+        timeout: float = 30.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        circuit_breakers: Optional[CircuitBreakerRegistry] = None,
+        hedging: Optional[HedgingPolicy] = None,
+        compression: Optional[CompressionPolicy] = None,
+        concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        scheduler: Optional[PriorityScheduler] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+    ):
+        """
+        Initialize client pool
+
+        Args:
+            registry: Partner credential registry
+            base_url: API base URL
+            timeout: Request timeout in seconds
+            max_connections: Connection limit of the shared pool
+            max_keepalive_connections: Idle connections kept in the shared pool
+            circuit_breakers: Circuit breakers shared by all partners (optional)
+            hedging: Hedging policy shared by all partners (optional)
+            compression: Compression policy shared by all partners (optional)
+            concurrency_limiter: Concurrency limiter shared by all partners
+                (optional)
+            scheduler: Priority scheduler in front of the shared pool
+                (optional)
+            metrics: Metrics registry shared by all partners (optional)
+            http_client: Preconfigured shared httpx client (optional)
+        """
+        self.registry = registry
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._options = {
+            "circuit_breakers": circuit_breakers,
+            "hedging": hedging,
+            "compression": compression,
+            "concurrency_limiter": concurrency_limiter,
+            "scheduler": scheduler,
+            "metrics": metrics,
+        }
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+        )
+        self._owns_http_client = http_client is None
+        self._ssl_context = httpx.create_ssl_context() if http_client is None else None
+        self._http_client = http_client or self._new_http_client()
+        self._clients: Dict[str, TenantClient] = {}
+        self._pid = os.getpid()
+
+    async def __aenter__(self):
+        """Async context manager entry"""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit"""
+        await self.close()
+
+    def client(self, partner_id: str) -> TenantClient:
+        """
+        Get the client for a partner
+
+        Args:
+            partner_id: Partner ID registered in (or loadable by) the registry
+
+        Returns:
+            TenantClient sharing the pool's connections
+
+        Raises:
+            KeyError: Partner has no credentials
+        """
+        tenant = self.registry.get(partner_id)
+        client = self._clients.get(partner_id)
+        if client is None or client.tenant is not tenant:
+            # New partner, or credentials were re-registered
+            client = TenantClient(
+                tenant,
+                self._http_client,
+                self.base_url,
+                self.timeout,
+                pool=self,
+                **self._options,
+            )
+            self._clients[partner_id] = client
+        return client
+
+    async def request(
+        self,
+        partner_id: str,
+        method: str,
+        path: str,
+        json_data: Optional[dict] = None,
+        params: Optional[dict] = None,
+        content: Optional[bytes] = None,
+    ) -> dict:
+        """
+        Make an authenticated request on behalf of a partner
+
+        Args:
+            partner_id: Partner whose credentials sign the request
+            method: HTTP method
+            path: API path
+            json_data: JSON request body
+            params: Query parameters
+            content: Already encoded JSON body (used instead of json_data)
+
+        Returns:
+            Response JSON as dictionary
+        """
+        return await self.client(partner_id).request(
+            method, path, json_data=json_data, params=params, content=content
+        )
+
+    def stats(self) -> Dict[str, Dict[str, object]]:
+        """
+        Get per-partner metrics
+
+        Returns:
+            Dictionary of partner IDs and their request/rate limit stats
+        """
+        return {
+            partner_id: self.registry.get(partner_id).stats()
+            for partner_id in self.registry
+        }
+
+    async def close(self):
+        """Close the shared HTTP client"""
+        self._clients.clear()
+        if self._owns_http_client and self._pid == os.getpid():
+            await self._http_client.aclose()
+
+    def _fork_http_client(self) -> httpx.AsyncClient:
+        """Shared HTTP client of a forked child, built once per process"""
+        if self._pid != os.getpid():
+            if not self._owns_http_client:
+                raise RuntimeError(
+                    "KeshFlipClientPool was given an http_client and used after "
+                    "a fork; create the pool in the child process or let it "
+                    "build its own"
+                )
+            self._http_client = self._new_http_client()
+            self._pid = os.getpid()
+        return self._http_client
+
+    def _new_http_client(self) -> httpx.AsyncClient:
+        """Build the shared HTTP client the pool owns"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            headers={"Content-Type": "application/json"},
+            limits=self._limits,
+            verify=self._ssl_context,
+        )
@@ -0,0 +1,186 @@
+"""Credential registry for multi-partner clients"""
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from ..auth import AuthManager, ServerClock
+from ..resilience.histogram import LatencyHistogram
+from ..resilience.rate_limit import RateLimiter
+
+CredentialLoader = Callable[[str], Optional[Tuple[str, str]]]
+
+
+class TenantMetrics:
+    """Request metrics for one partner"""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.latency = LatencyHistogram()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get tenant metrics
+
+        Returns:
+            Dictionary of request counters and latency percentiles
+        """
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "p50": self.latency.percentile(0.5),
+            "p99": self.latency.percentile(0.99),
+        }
+
+
+class TenantCredentials:
+    """Credentials, signing state, rate limit and metrics of one partner"""
+
+    def __init__(
+        self,
+        partner_id: str,
+        api_key: str,
+        api_secret: str,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+        clock: Optional[ServerClock] = None,
+    ):
+        """
+        Initialize tenant credentials
+
+        Args:
+            partner_id: Partner ID
+            api_key: Partner API key
+            api_secret: Partner API secret
+            rate_limit: Maximum requests per second (optional, unlimited)
+            burst: Rate limit bucket size (defaults to ``rate_limit``)
+            clock: Server clock estimate (optional, private if None)
+        """
+        self.partner_id = partner_id
+        self.api_secret = api_secret
+        # AuthManager keeps the keyed HMAC state, so signing never re-keys
+        self.auth = AuthManager(api_key, api_secret, clock)
+        self.rate_limiter = RateLimiter(rate_limit, burst) if rate_limit else None
+        self.metrics = TenantMetrics()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get tenant metrics including rate limiting
+
+        Returns:
+            Dictionary of request counters, latency and rate limit stats
+        """
+        stats = self.metrics.stats()
+        if self.rate_limiter is not None:
+            stats["rate_limit"] = self.rate_limiter.stats()
+        return stats
+
+
+class CredentialRegistry:
+    """
+    Registry of partner credentials
+
+    Credentials are registered up front or resolved on first use through an
+    optional ``loader`` (e.g. a secrets manager lookup) returning
+    ``(api_key, api_secret)`` for a partner ID.
+
+    Example:
+        ```python
+        registry = CredentialRegistry(default_rate_limit=50)
+        registry.register("partner_a", "key_a", "secret_a")
+        registry.register("partner_b", "key_b", "secret_b", rate_limit=5)
+        ```
+    """
+
+    def __init__(
+        self,
+        loader: Optional[CredentialLoader] = None,
+        default_rate_limit: Optional[float] = None,
+        default_burst: Optional[float] = None,
+    ):
+        """
+        Initialize credential registry
+
+        Args:
+            loader: Callable resolving unknown partner IDs to (api_key, api_secret)
+            default_rate_limit: Requests per second for tenants without their own
+                limit (optional, unlimited)
+            default_burst: Bucket size for the default rate limit
+        """
+        self._loader = loader
+        self.default_rate_limit = default_rate_limit
+        self.default_burst = default_burst
+        # One server, one clock offset for every partner
+        self.clock = ServerClock()
+        self._tenants: Dict[str, TenantCredentials] = {}
+
+    def register(
+        self,
+        partner_id: str,
+        api_key: str,
+        api_secret: str,
+        rate_limit: Optional[float] = None,
+        burst: Optional[float] = None,
+    ) -> TenantCredentials:
+        """
+        Register (or replace) a partner's credentials
+
+        Args:
+            partner_id: Partner ID
+            api_key: Partner API key
+            api_secret: Partner API secret
+            rate_limit: Requests per second (defaults to the registry default)
+            burst: Rate limit bucket size (defaults to the registry default
+                with the default rate limit, else to ``rate_limit``)
+
+        Returns:
+            TenantCredentials for the partner
+        """
+        if rate_limit is None:
+            rate_limit = self.default_rate_limit
+            burst = burst if burst is not None else self.default_burst
+        tenant = TenantCredentials(
+            partner_id, api_key, api_secret, rate_limit, burst, self.clock
+        )
+        self._tenants[partner_id] = tenant
+        return tenant
+
+    def get(self, partner_id: str) -> TenantCredentials:
+        """
+        Get a partner's credentials
+
+        Args:
+            partner_id: Partner ID
+
+        Returns:
+            TenantCredentials for the partner
+
+        Raises:
+            KeyError: Partner is unknown and the loader cannot resolve it
+        """
+        tenant = self._tenants.get(partner_id)
+        if tenant is not None:
+            return tenant
+        loaded = self._loader(partner_id) if self._loader else None
+        if loaded is None:
+            raise KeyError(f"No credentials registered for partner '{partner_id}'")
+        api_key, api_secret = loaded
+        return self.register(partner_id, api_key, api_secret)
+
+    def remove(self, partner_id: str):
+        """
+        Remove a partner's credentials
+
+        Args:
+            partner_id: Partner ID
+        """
+        self._tenants.pop(partner_id, None)
+
+    def __contains__(self, partner_id: str) -> bool:
+        return partner_id in self._tenants
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._tenants))
+
+    def __len__(self) -> int:
+        return len(self._tenants)
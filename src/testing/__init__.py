@@ -0,0 +1,4 @@
+"""Offline testing utilities"""
+from .server import FaultRule, MockKeshPayServer
+
+__all__ = ["MockKeshPayServer", "FaultRule"]
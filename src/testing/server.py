@@ -0,0 +1,989 @@
+"""Local stand-in for the KeshPay API"""
+import asyncio
+import hashlib
+import hmac
+import json
+import random
+import secrets
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal, InvalidOperation
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, urlsplit
+
+import httpx
+
+from ..compression import compress, decompress, negotiate
+from ..endpoints import resolve_endpoint
+from ..exceptions import PreflightValidationError
+from ..models.rules import DEFAULT_VALIDATOR
+from ..webhooks.handler import WebhookHandler
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+# Sub-requests accepted per call to the emulated batch endpoint
+MAX_BATCH_SIZE = 100
+
+WebhookTarget = Union[str, WebhookHandler, Callable[[bytes, str], Any]]
+
+
+class FaultRule:
+    """Latency and error injection for matching requests"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        target: Optional[str] = None,
+    ):
+        """
+        Initialize fault rule
+
+        Args:
+            latency: Added delay per request in seconds
+            jitter: Extra uniformly distributed delay up to this many seconds
+            error_rate: Share of requests (0-1) answered with ``error_status``
+            error_status: HTTP status returned for injected errors
+            target: Endpoint group (e.g., "crypto.withdrawals") or template the
+                rule applies to (all endpoints if None)
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.target = target
+
+    def matches(self, group: str, template: str) -> bool:
+        return self.target is None or self.target in (group, template)
+
+
+class _WireStream(httpx.AsyncByteStream):
+    """Response body read by httpx as if it came off a socket"""
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+
+    async def __aiter__(self):
+        yield self._payload
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class MockKeshPayServer:
+    """
+    Offline stand-in for the KeshPay API
+
+    Implements every endpoint the SDK calls with in-memory state, verifies the
+    ``X-API-Key``/``X-Signature``/``X-Timestamp`` scheme of AuthManager, and
+    can inject latency and errors per endpoint group. The server is reachable
+    over real sockets (``start()``) or in-process through an httpx transport
+    (``transport()``), and it can deliver signed webhooks for status changes.
+    ``POST /api/v1/batch`` emulates a batch endpoint that runs up to
+    MAX_BATCH_SIZE sub-requests in one call.
+
+    Example:
+        ```python
+        server = MockKeshPayServer()
+        server.add_partner("partner_1", "key_1", "secret_1")
+        server.set_balance("partner_1", "1", "USDC", "1000.00")
+        server.inject(latency=0.05, error_rate=0.1, target="crypto.withdrawals")
+
+        async with server:
+            client = KeshFlipClient(
+                "key_1", "secret_1", partner_id="partner_1", base_url=server.url
+            )
+            deposit = await client.crypto.deposits.create(...)
+            await server.update_deposit(deposit.deposit_id, "CONFIRMED")
+        ```
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        timestamp_tolerance: float = 300.0,
+        deposit_ttl: float = 3600.0,
+        seed: Optional[int] = None,
+        validators: bool = True,
+        compress_min_size: Optional[int] = 1024,
+        capacity: Optional[int] = None,
+        clock_offset: float = 0.0,
+    ):
+        """
+        Initialize mock server
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            timestamp_tolerance: Allowed X-Timestamp skew in seconds
+            deposit_ttl: Seconds until created deposits expire
+            seed: Random seed for fault injection (optional)
+            validators: Send ETag/Last-Modified on GET responses and answer
+                matching conditional requests with 304
+            compress_min_size: Smallest response body compressed per the
+                request's Accept-Encoding (None disables response compression)
+            capacity: Requests served at once (unlimited if None); excess
+                requests wait, so injected latency grows with load
+            clock_offset: Seconds the server clock runs ahead of the local
+                clock (negative: behind), for ``Date`` and X-Timestamp checks
+        """
+        self.host = host
+        self.port = port
+        self.timestamp_tolerance = timestamp_tolerance
+        self.deposit_ttl = deposit_ttl
+        self.validators = validators
+        self.compress_min_size = compress_min_size
+        self.capacity = capacity
+        self.clock_offset = clock_offset
+        self._capacity_slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+        self._credentials: Dict[str, Tuple[str, str]] = {}
+        self._webhook_targets: Dict[str, WebhookTarget] = {}
+        self.faults: List[FaultRule] = []
+
+        self.crypto_deposits: Dict[str, dict] = {}
+        self.crypto_withdrawals: Dict[str, dict] = {}
+        self.fiat_deposits: Dict[str, dict] = {}
+        self.balances: Dict[Tuple[str, str, str], dict] = {}
+        self._idempotency: Dict[Tuple[str, str, str], str] = {}
+
+        # Counters
+        self.requests = 0
+        self.requests_by_template: Dict[str, int] = {}
+        self.auth_failures = 0
+        self.injected_errors = 0
+        self.not_modified = 0
+        self.webhooks_sent = 0
+        self.compressed_requests = 0
+        self.compressed_responses = 0
+        self.peak_in_flight = 0
+        self.batched_requests = 0
+
+        self._routes: Dict[Tuple[str, str], Callable] = {
+            ("POST", "/api/v1/crypto/deposits"): self._create_crypto_deposit,
+            (
+                "GET",
+                "/api/v1/crypto/deposits/partner/{partner_id}",
+            ): self._list_crypto_deposits,
+            ("GET", "/api/v1/crypto/deposits/{deposit_id}"): self._get_crypto_deposit,
+            ("POST", "/api/v1/crypto/withdrawals"): self._create_withdrawal,
+            (
+                "POST",
+                "/api/v1/crypto/withdrawals/{withdrawal_id}/cancel",
+            ): self._cancel_withdrawal,
+            ("GET", "/api/v1/crypto/withdrawals/{withdrawal_id}"): self._get_withdrawal,
+            (
+                "GET",
+                "/api/v1/crypto/balances/{partner_id}/{chain_id}/{asset}",
+            ): self._get_balance,
+            ("GET", "/api/v1/crypto/balances/{partner_id}"): self._list_balances,
+            ("POST", "/api/v1/fiat/deposits"): self._create_fiat_deposit,
+            (
+                "GET",
+                "/api/v1/fiat/deposits/partner/{partner_id}",
+            ): self._list_fiat_deposits,
+            ("GET", "/api/v1/fiat/deposits/{deposit_id}"): self._get_fiat_deposit,
+            ("POST", "/api/v1/batch"): self._batch,
+        }
+
+    # ------------------------------------------------------------------
+    # Configuration
+
+    def add_partner(
+        self,
+        partner_id: str,
+        api_key: str,
+        api_secret: str,
+        webhook_target: Optional[WebhookTarget] = None,
+    ):
+        """
+        Register partner credentials
+
+        Args:
+            partner_id: Partner ID
+            api_key: API key the partner signs with
+            api_secret: API secret (also used to sign webhooks)
+            webhook_target: Where status-change webhooks are delivered: a URL,
+                a WebhookHandler, or a callable receiving (payload, signature)
+        """
+        self._credentials[api_key] = (partner_id, api_secret)
+        if webhook_target is not None:
+            self._webhook_targets[partner_id] = webhook_target
+
+    def set_balance(
+        self,
+        partner_id: str,
+        chain_id: str,
+        asset: str,
+        balance: str,
+    ):
+        """
+        Set a partner's balance for a chain and asset
+
+        Args:
+            partner_id: Partner ID
+            chain_id: Chain ID
+            asset: Asset symbol
+            balance: Balance as decimal string
+        """
+        key = (partner_id, chain_id, asset)
+        record = self.balances.get(key) or {
+            "partnerId": partner_id,
+            "chainId": chain_id,
+            "asset": asset,
+            "totalDeposits": "0",
+            "totalWithdrawals": "0",
+        }
+        record["balance"] = balance
+        record["lastUpdatedAt"] = _now_iso()
+        self.balances[key] = record
+
+    def inject(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        target: Optional[str] = None,
+    ) -> FaultRule:
+        """
+        Add a latency/error injection rule
+
+        Args:
+            latency: Added delay per request in seconds
+            jitter: Extra uniformly distributed delay up to this many seconds
+            error_rate: Share of requests (0-1) failed with ``error_status``
+            error_status: HTTP status for injected errors
+            target: Endpoint group or template (all endpoints if None)
+
+        Returns:
+            The FaultRule, which can be mutated or passed to ``clear_faults``
+        """
+        rule = FaultRule(latency, jitter, error_rate, error_status, target)
+        self.faults.append(rule)
+        return rule
+
+    def clear_faults(self, rule: Optional[FaultRule] = None):
+        """
+        Remove one injection rule, or all of them
+
+        Args:
+            rule: Rule returned by ``inject`` (all rules if None)
+        """
+        if rule is None:
+            self.faults.clear()
+        elif rule in self.faults:
+            self.faults.remove(rule)
+
+    # ------------------------------------------------------------------
+    # Serving
+
+    @property
+    def url(self) -> str:
+        """Base URL of the listening server"""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        """Start listening for HTTP connections"""
+        self._server = await asyncio.start_server(
+            self._serve_connection, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop listening and close the server"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        """
+        In-process transport for ``httpx.AsyncClient`` (no sockets)
+
+        Returns:
+            httpx transport routing requests to this server
+        """
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            body = await request.aread()
+            status, headers, payload = await self.handle(
+                request.method,
+                request.url.raw_path.decode(),
+                dict(request.headers),
+                body,
+            )
+            # Streamed so httpx decodes and counts the body like a network one
+            return httpx.Response(status, headers=headers, stream=_WireStream(payload))
+
+        return httpx.MockTransport(handler)
+
+    async def handle(
+        self, method: str, target: str, headers: Dict[str, str], body: bytes
+    ) -> Response:
+        """
+        Handle one API request
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query string)
+            headers: Request headers
+            body: Raw request body
+
+        Returns:
+            Tuple of (status, headers, body)
+        """
+        self.requests += 1
+        split = urlsplit(target)
+        path, query = split.path, dict(parse_qsl(split.query))
+        headers = {name.lower(): value for name, value in headers.items()}
+        endpoint = resolve_endpoint(method, path)
+        template = endpoint.template
+        self.requests_by_template[template] = (
+            self.requests_by_template.get(template, 0) + 1
+        )
+
+        self._in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self._in_flight)
+        try:
+            if self.capacity is not None:
+                if self._capacity_slots is None:
+                    self._capacity_slots = asyncio.Semaphore(self.capacity)
+                async with self._capacity_slots:
+                    await self._apply_faults(endpoint.group, template)
+            else:
+                await self._apply_faults(endpoint.group, template)
+            body = self._decode_body(headers, body)
+            partner_id = self._authenticate(method, path, headers, body)
+            handler = self._routes.get((endpoint.method, template))
+            if handler is None:
+                raise _HTTPError(404, f"Route {method} {path} not found")
+            params = _path_params(template, path)
+            payload = json.loads(body) if body else {}
+            status, data = await handler(partner_id, params, query, payload)
+        except _HTTPError as e:
+            status, data = e.status, {"success": False, "message": e.message}
+        except json.JSONDecodeError:
+            status, data = 400, {"success": False, "message": "Invalid JSON body"}
+        finally:
+            self._in_flight -= 1
+        if self.validators and endpoint.method == "GET" and status == 200:
+            response = self._respond_conditional(data, headers)
+        else:
+            response = self._respond(status, data)
+        return self._encode_response(response, headers)
+
+    def _decode_body(self, headers: Dict[str, str], body: bytes) -> bytes:
+        encoding = headers.get("content-encoding", "identity").strip().lower()
+        if encoding == "identity" or not body:
+            return body
+        try:
+            body = decompress(body, encoding)
+        except ValueError:
+            raise _HTTPError(415, f"Unsupported Content-Encoding {encoding}")
+        except Exception:
+            raise _HTTPError(400, f"Invalid {encoding} request body")
+        self.compressed_requests += 1
+        return body
+
+    def _encode_response(self, response: Response, headers: Dict[str, str]) -> Response:
+        status, response_headers, payload = response
+        accept_encoding = headers.get("accept-encoding")
+        if (
+            self.compress_min_size is None
+            or accept_encoding is None
+            or len(payload) < self.compress_min_size
+        ):
+            return response
+        encoding = negotiate(accept_encoding)
+        if encoding is None:
+            return response
+        payload = compress(payload, encoding)
+        response_headers["Content-Encoding"] = encoding
+        response_headers["Content-Length"] = str(len(payload))
+        response_headers["Vary"] = "Accept-Encoding"
+        self.compressed_responses += 1
+        return status, response_headers, payload
+
+    def _respond(self, status: int, data: dict) -> Response:
+        payload = json.dumps(data).encode()
+        headers = {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(payload)),
+            "Date": formatdate(time.time() + self.clock_offset, usegmt=True),
+        }
+        return status, headers, payload
+
+    def _respond_conditional(self, data: dict, headers: Dict[str, str]) -> Response:
+        status, response_headers, payload = self._respond(200, data)
+        etag = '"' + hashlib.sha1(payload).hexdigest()[:20] + '"'
+        response_headers["ETag"] = etag
+        modified = _last_modified(data)
+        if modified is not None:
+            response_headers["Last-Modified"] = formatdate(modified, usegmt=True)
+
+        if_none_match = headers.get("if-none-match")
+        if_modified_since = headers.get("if-modified-since")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            not_modified = etag in tags or "*" in tags
+        elif if_modified_since is not None and modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+                not_modified = int(modified) <= since
+            except (TypeError, ValueError):
+                not_modified = False
+        else:
+            not_modified = False
+
+        if not_modified:
+            self.not_modified += 1
+            response_headers["Content-Length"] = "0"
+            return 304, response_headers, b""
+        return status, response_headers, payload
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                body = await reader.readexactly(length) if length else b""
+
+                status, response_headers, payload = await self.handle(
+                    method, target, headers, body
+                )
+                keep_alive = headers.get("connection", "").lower() != "close"
+                response_headers["Connection"] = "keep-alive" if keep_alive else "close"
+                head = f"HTTP/1.1 {status} {_reason(status)}\r\n" + "".join(
+                    f"{name}: {value}\r\n" for name, value in response_headers.items()
+                )
+                writer.write(head.encode("latin-1") + b"\r\n" + payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # Authentication and faults
+
+    def _authenticate(
+        self, method: str, path: str, headers: Dict[str, str], body: bytes
+    ) -> str:
+        api_key = headers.get("x-api-key")
+        signature = headers.get("x-signature")
+        timestamp = headers.get("x-timestamp")
+        credentials = self._credentials.get(api_key)
+        if not credentials or not signature or not timestamp:
+            self.auth_failures += 1
+            raise _HTTPError(401, "Missing or unknown API credentials")
+
+        partner_id, api_secret = credentials
+        try:
+            skew = abs(time.time() + self.clock_offset - int(timestamp))
+        except ValueError:
+            skew = float("inf")
+        if skew > self.timestamp_tolerance:
+            self.auth_failures += 1
+            raise _HTTPError(401, "Request timestamp outside allowed window")
+
+        string_to_sign = f"{method}|{path}|{timestamp}|{body.decode()}"
+        expected = hmac.new(
+            api_secret.encode(), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            self.auth_failures += 1
+            raise _HTTPError(401, "Invalid signature")
+        return partner_id
+
+    async def _apply_faults(self, group: str, template: str):
+        delay = 0.0
+        for rule in self.faults:
+            if not rule.matches(group, template):
+                continue
+            delay += rule.latency + self._random.uniform(0, rule.jitter)
+            if rule.error_rate and self._random.random() < rule.error_rate:
+                if delay:
+                    await asyncio.sleep(delay)
+                self.injected_errors += 1
+                raise _HTTPError(rule.error_status, "Injected failure")
+        if delay:
+            await asyncio.sleep(delay)
+
+    # ------------------------------------------------------------------
+    # State changes and webhooks
+
+    async def update_deposit(self, deposit_id: str, status: str, **fields) -> dict:
+        """
+        Change a crypto or fiat deposit's status and send its webhook
+
+        Args:
+            deposit_id: Deposit ID
+            status: New status (e.g., CONFIRMED, EXPIRED)
+            **fields: Additional fields to set on the deposit record
+
+        Returns:
+            Updated deposit record
+        """
+        if deposit_id in self.crypto_deposits:
+            record, event = self.crypto_deposits[deposit_id], "crypto.deposit.updated"
+        elif deposit_id in self.fiat_deposits:
+            record, event = self.fiat_deposits[deposit_id], "fiat.deposit.updated"
+        else:
+            raise KeyError(deposit_id)
+
+        record.update(fields, status=status, updatedAt=_now_iso())
+        if status == "CONFIRMED":
+            record["confirmedAt"] = record["updatedAt"]
+            if event.startswith("crypto"):
+                self._credit(record)
+        await self.emit_webhook(record["partnerId"], event, _webhook_data(record))
+        return record
+
+    async def complete_withdrawal(
+        self, withdrawal_id: str, tx_hash: str = None
+    ) -> dict:
+        """
+        Mark a withdrawal completed and send its webhook
+
+        Args:
+            withdrawal_id: Withdrawal ID
+            tx_hash: Blockchain transaction hash (random if not provided)
+
+        Returns:
+            Updated withdrawal record
+        """
+        record = self.crypto_withdrawals[withdrawal_id]
+        record.update(
+            status="CONFIRMED",
+            hash=tx_hash or "0x" + secrets.token_hex(32),
+            updatedAt=_now_iso(),
+        )
+        await self.emit_webhook(
+            record["partnerId"],
+            "crypto.withdrawal.completed",
+            {
+                "withdrawalId": withdrawal_id,
+                "status": record["status"],
+                "hash": record["hash"],
+                "amount": record["amount"],
+                "asset": record["asset"],
+                "chainId": record["chainId"],
+            },
+        )
+        return record
+
+    async def emit_webhook(self, partner_id: str, event: str, data: dict) -> bool:
+        """
+        Send a signed webhook to a partner's webhook target
+
+        Args:
+            partner_id: Partner ID
+            event: Event type (e.g., "crypto.deposit.updated")
+            data: Event data
+
+        Returns:
+            True if the partner has a webhook target and delivery was attempted
+        """
+        target = self._webhook_targets.get(partner_id)
+        secret = next(
+            (s for pid, s in self._credentials.values() if pid == partner_id), None
+        )
+        if target is None or secret is None:
+            return False
+
+        payload = json.dumps(
+            {"event": event, "timestamp": _now_iso(), "data": data}
+        ).encode()
+        signature = hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+        self.webhooks_sent += 1
+
+        if isinstance(target, str):
+            async with httpx.AsyncClient() as http:
+                await http.post(
+                    target,
+                    content=payload,
+                    headers={
+                        "Content-Type": "application/json",
+                        "X-Signature": signature,
+                    },
+                )
+        elif isinstance(target, WebhookHandler):
+            await target.handle(payload, signature=signature)
+        else:
+            result = target(payload, signature)
+            if asyncio.iscoroutine(result):
+                await result
+        return True
+
+    def _credit(self, deposit: dict):
+        key = (deposit["partnerId"], deposit["chainId"], deposit["asset"])
+        if key not in self.balances:
+            self.set_balance(*key, "0")
+        record = self.balances[key]
+        record["balance"] = _add(record["balance"], deposit["amount"])
+        record["totalDeposits"] = _add(record["totalDeposits"], deposit["amount"])
+        record["lastUpdatedAt"] = _now_iso()
+
+    # ------------------------------------------------------------------
+    # Endpoints
+
+    async def _create_crypto_deposit(self, partner_id, params, query, body):
+        _require(body, "partnerId", "asset", "chainId", "amount", "idempotencyKey")
+        _check_partner(partner_id, body["partnerId"])
+        _check_amount(body["amount"])
+        existing = self._idempotent("crypto.deposit", partner_id, body)
+        record = existing and self.crypto_deposits[existing]
+        if record is None:
+            deposit_id = _object_id()
+            record = {
+                "id": deposit_id,
+                "depositId": deposit_id,
+                "partnerId": partner_id,
+                "asset": body["asset"],
+                "chainId": body["chainId"],
+                "amount": body["amount"],
+                "currency": body.get("currency", "USD"),
+                "reference": body.get("reference"),
+                "address": "0x" + secrets.token_hex(20),
+                "status": "PENDING",
+                "createdAt": _now_iso(),
+                "expiresAt": _now_iso(self.deposit_ttl),
+            }
+            self.crypto_deposits[deposit_id] = record
+            self._remember("crypto.deposit", partner_id, body, deposit_id)
+        return 201, {
+            "success": True,
+            "depositId": record["id"],
+            "status": record["status"],
+            "address": record["address"],
+            "asset": record["asset"],
+            "chainId": record["chainId"],
+            "amount": record["amount"],
+            "expiresAt": record["expiresAt"],
+            "message": "Deposit created",
+        }
+
+    async def _get_crypto_deposit(self, partner_id, params, query, body):
+        record = _owned(self.crypto_deposits, params["deposit_id"], partner_id)
+        return 200, {"success": True, "data": record}
+
+    async def _list_crypto_deposits(self, partner_id, params, query, body):
+        _check_partner(partner_id, params["partner_id"])
+        return 200, _listing(self.crypto_deposits, partner_id, query, ("status",))
+
+    async def _create_withdrawal(self, partner_id, params, query, body):
+        _require(
+            body,
+            "partnerId",
+            "asset",
+            "chainId",
+            "amount",
+            "toAddress",
+            "idempotencyKey",
+        )
+        _check_partner(partner_id, body["partnerId"])
+        _check_amount(body["amount"])
+        _check_rules(
+            DEFAULT_VALIDATOR.check_withdrawal,
+            {"chain_id": body["chainId"], "to_address": body["toAddress"]},
+        )
+        existing = self._idempotent("crypto.withdrawal", partner_id, body)
+        record = existing and self.crypto_withdrawals[existing]
+        if record is None:
+            key = (partner_id, body["chainId"], body["asset"])
+            balance = self.balances.get(key)
+            if balance is None or Decimal(balance["balance"]) < Decimal(body["amount"]):
+                raise _HTTPError(400, "Insufficient balance")
+            balance["balance"] = _add(balance["balance"], "-" + body["amount"])
+            balance["totalWithdrawals"] = _add(
+                balance["totalWithdrawals"], body["amount"]
+            )
+            balance["lastUpdatedAt"] = _now_iso()
+
+            withdrawal_id = _object_id()
+            record = {
+                "id": withdrawal_id,
+                "withdrawalId": withdrawal_id,
+                "partnerId": partner_id,
+                "asset": body["asset"],
+                "chainId": body["chainId"],
+                "amount": body["amount"],
+                "toAddress": body["toAddress"],
+                "reference": body.get("reference"),
+                "status": "PENDING",
+                "transactionId": _object_id(),
+                "hash": None,
+                "createdAt": _now_iso(),
+            }
+            self.crypto_withdrawals[withdrawal_id] = record
+            self._remember("crypto.withdrawal", partner_id, body, withdrawal_id)
+        return 201, {
+            "success": True,
+            "withdrawalId": record["id"],
+            "status": record["status"],
+            "transactionId": record["transactionId"],
+            "hash": record["hash"],
+            "message": "Withdrawal created",
+        }
+
+    async def _get_withdrawal(self, partner_id, params, query, body):
+        record = _owned(self.crypto_withdrawals, params["withdrawal_id"], partner_id)
+        return 200, {"success": True, "data": record}
+
+    async def _cancel_withdrawal(self, partner_id, params, query, body):
+        record = _owned(self.crypto_withdrawals, params["withdrawal_id"], partner_id)
+        if record["status"] != "PENDING":
+            raise _HTTPError(400, f"Cannot cancel withdrawal in {record['status']}")
+        record.update(status="CANCELLED", updatedAt=_now_iso())
+        key = (partner_id, record["chainId"], record["asset"])
+        balance = self.balances[key]
+        balance["balance"] = _add(balance["balance"], record["amount"])
+        balance["totalWithdrawals"] = _add(
+            balance["totalWithdrawals"], "-" + record["amount"]
+        )
+        return 200, {"success": True, "data": record}
+
+    async def _get_balance(self, partner_id, params, query, body):
+        _check_partner(partner_id, params["partner_id"])
+        record = self.balances.get((partner_id, params["chain_id"], params["asset"]))
+        if record is None:
+            raise _HTTPError(404, "Balance not found")
+        return 200, {"success": True, **record}
+
+    async def _list_balances(self, partner_id, params, query, body):
+        _check_partner(partner_id, params["partner_id"])
+        data = [
+            {"success": True, **record}
+            for (pid, _, _), record in self.balances.items()
+            if pid == partner_id
+        ]
+        return 200, {"success": True, "data": data}
+
+    async def _create_fiat_deposit(self, partner_id, params, query, body):
+        _require(
+            body, "partnerId", "provider", "customerNumber", "amount", "idempotencyKey"
+        )
+        _check_partner(partner_id, body["partnerId"])
+        _check_amount(body["amount"])
+        if body["provider"] not in ("EVC", "SALAAM_BANK"):
+            raise _HTTPError(400, f"Unsupported provider {body['provider']}")
+        _check_rules(
+            DEFAULT_VALIDATOR.check_fiat_deposit,
+            {"provider": body["provider"], "customer_number": body["customerNumber"]},
+        )
+        existing = self._idempotent("fiat.deposit", partner_id, body)
+        record = existing and self.fiat_deposits[existing]
+        if record is None:
+            deposit_id = _object_id()
+            record = {
+                "id": deposit_id,
+                "depositId": deposit_id,
+                "partnerId": partner_id,
+                "provider": body["provider"],
+                "customerNumber": body["customerNumber"],
+                "amount": body["amount"],
+                "currency": body.get("currency", "USD"),
+                "reference": body.get("reference"),
+                "status": "PENDING",
+                "createdAt": _now_iso(),
+                "expiresAt": _now_iso(self.deposit_ttl),
+            }
+            self.fiat_deposits[deposit_id] = record
+            self._remember("fiat.deposit", partner_id, body, deposit_id)
+        return 201, {
+            "success": True,
+            "depositId": record["id"],
+            "status": record["status"],
+            "provider": record["provider"],
+            "customerNumber": record["customerNumber"],
+            "amount": record["amount"],
+            "currency": record["currency"],
+            "expiresAt": record["expiresAt"],
+            "instructions": (
+                f"Approve the payment request on {record['customerNumber']}"
+            ),
+            "message": "Deposit created",
+        }
+
+    async def _get_fiat_deposit(self, partner_id, params, query, body):
+        record = _owned(self.fiat_deposits, params["deposit_id"], partner_id)
+        return 200, {"success": True, "data": record}
+
+    async def _list_fiat_deposits(self, partner_id, params, query, body):
+        _check_partner(partner_id, params["partner_id"])
+        return 200, _listing(
+            self.fiat_deposits, partner_id, query, ("status", "provider")
+        )
+
+    async def _batch(self, partner_id, params, query, body):
+        # Emulated batch endpoint: each sub-request runs like a separate call
+        # by the authenticated partner, without its own signature or faults
+        requests = body.get("requests")
+        if not isinstance(requests, list) or not requests:
+            raise _HTTPError(400, "requests must be a non-empty list")
+        if len(requests) > MAX_BATCH_SIZE:
+            raise _HTTPError(400, f"At most {MAX_BATCH_SIZE} requests per batch")
+        responses = []
+        for request in requests:
+            endpoint = resolve_endpoint(
+                request.get("method", "GET"), request.get("path", "")
+            )
+            handler = self._routes.get((endpoint.method, endpoint.template))
+            self.batched_requests += 1
+            try:
+                if handler is None or handler == self._batch:
+                    raise _HTTPError(
+                        404, f"Route {endpoint.method} {request.get('path')} not found"
+                    )
+                status, data = await handler(
+                    partner_id,
+                    _path_params(endpoint.template, request["path"]),
+                    {},
+                    request.get("body") or {},
+                )
+            except _HTTPError as e:
+                status, data = e.status, {"success": False, "message": e.message}
+            responses.append({"status": status, "body": data})
+        return 200, {"success": True, "responses": responses}
+
+    def _idempotent(self, kind: str, partner_id: str, body: dict) -> Optional[str]:
+        return self._idempotency.get((kind, partner_id, body["idempotencyKey"]))
+
+    def _remember(self, kind: str, partner_id: str, body: dict, record_id: str):
+        self._idempotency[(kind, partner_id, body["idempotencyKey"])] = record_id
+
+
+def _path_params(template: str, path: str) -> Dict[str, str]:
+    params = {}
+    for name, value in zip(template.split("/"), path.split("/")):
+        if name.startswith("{"):
+            params[name[1:-1]] = value
+    return params
+
+
+def _listing(
+    records: Dict[str, dict], partner_id: str, query: Dict[str, str], filters: tuple
+) -> dict:
+    limit = int(query.get("limit", 50))
+    data = [
+        record
+        for record in reversed(list(records.values()))
+        if record["partnerId"] == partner_id
+        and all(query.get(f) in (None, record.get(f)) for f in filters)
+    ]
+    return {"success": True, "data": data[:limit], "total": len(data)}
+
+
+def _owned(records: Dict[str, dict], record_id: str, partner_id: str) -> dict:
+    record = records.get(record_id)
+    if record is None or record["partnerId"] != partner_id:
+        raise _HTTPError(404, "Not found")
+    return record
+
+
+def _require(body: dict, *fields: str):
+    missing = [field for field in fields if not body.get(field)]
+    if missing:
+        raise _HTTPError(400, f"Missing required fields: {', '.join(missing)}")
+
+
+def _check_partner(partner_id: str, requested: str):
+    if partner_id != requested:
+        raise _HTTPError(403, "API key does not belong to this partner")
+
+
+def _check_amount(amount: str):
+    try:
+        valid = Decimal(amount) > 0
+    except (InvalidOperation, TypeError):
+        valid = False
+    if not valid:
+        raise _HTTPError(400, f"Invalid amount '{amount}'")
+
+
+def _check_rules(check, values: dict):
+    try:
+        check(values)
+    except PreflightValidationError as exc:
+        raise _HTTPError(400, exc.message) from None
+
+
+def _add(a: str, b: str) -> str:
+    return str(Decimal(a) + Decimal(b))
+
+
+def _last_modified(data: dict) -> Optional[float]:
+    record = data.get("data") if isinstance(data.get("data"), dict) else data
+    stamp = record.get("updatedAt") or record.get("lastUpdatedAt")
+    stamp = stamp or record.get("createdAt")
+    if not isinstance(stamp, str):
+        return None
+    return (
+        datetime.strptime(stamp, "%Y-%m-%dT%H:%M:%S.%fZ")
+        .replace(tzinfo=timezone.utc)
+        .timestamp()
+    )
+
+
+def _webhook_data(record: dict) -> dict:
+    data = {key: value for key, value in record.items() if value is not None}
+    data["depositId"] = record["id"]
+    return data
+
+
+def _object_id() -> str:
+    return secrets.token_hex(12)
+
+
+def _now_iso(offset: float = 0.0) -> str:
+    moment = datetime.now(timezone.utc) + timedelta(seconds=offset)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _reason(status: int) -> str:
+    return {
+        200: "OK",
+        201: "Created",
+        304: "Not Modified",
+        400: "Bad Request",
+        401: "Unauthorized",
+        403: "Forbidden",
+        404: "Not Found",
+        415: "Unsupported Media Type",
+        429: "Too Many Requests",
+        500: "Internal Server Error",
+        503: "Service Unavailable",
+    }.get(status, "Unknown")
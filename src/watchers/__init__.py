@@ -0,0 +1,4 @@
+"""Watchers that track resources until they settle"""
+from .deposits import DepositTransition, DepositWatcher
+
+__all__ = ["DepositWatcher", "DepositTransition"]
@@ -0,0 +1,440 @@
+"""Deposit status watcher"""
+import asyncio
+import heapq
+import time
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from dateutil.parser import isoparse
+
+from ..exceptions import KeshFlipError
+from ..models.common import DepositStatus, WebhookEvent
+
+if TYPE_CHECKING:
+    from ..client import KeshFlipClient
+    from ..webhooks.handler import WebhookHandler
+
+CRYPTO = "crypto"
+FIAT = "fiat"
+
+TERMINAL_STATUSES = frozenset(
+    {
+        DepositStatus.CONFIRMED.value,
+        DepositStatus.EXPIRED.value,
+        DepositStatus.FAILED.value,
+    }
+)
+
+_WEBHOOK_KINDS = {
+    "crypto.deposit.updated": CRYPTO,
+    "fiat.deposit.updated": FIAT,
+}
+
+
+class DepositTransition(NamedTuple):
+    """A change in a watched deposit's status"""
+
+    deposit_id: str
+    kind: str
+    previous_status: str
+    status: str
+    source: str
+    data: dict
+
+
+class _Watched:
+    """Scheduling state of one watched deposit"""
+
+    __slots__ = ("kind", "status", "expires_at", "interval", "token", "webhook")
+
+    def __init__(self, kind: str, status: str, expires_at: Optional[float]):
+        self.kind = kind
+        self.status = status
+        self.expires_at = expires_at
+        self.interval = 0.0
+        self.token = 0
+        self.webhook = False
+
+
+class DepositWatcher:
+    """
+    Tracks many pending deposits until they reach a terminal status
+
+    All watched deposits share one timer heap. Poll intervals adapt to each
+    deposit's ``expires_at``: a deposit is polled at ``expiry_fraction`` of its
+    remaining lifetime (clamped to ``min_interval``/``max_interval``) and once
+    more right after it expires. Deposits without an expiry back off
+    geometrically. When at least ``sweep_threshold`` deposits of one kind are
+    due together they are resolved with a single ``list(status="PENDING")``
+    call instead of one ``get`` per deposit; only deposits missing from the
+    listing are fetched individually. When the listing is truncated at
+    ``sweep_limit``, deposits beyond it are missing too and are fetched the
+    same way, at most ``max_concurrency`` at a time.
+
+    Webhooks delivered through an attached WebhookHandler update deposits
+    immediately and drop them from the poll schedule.
+
+    Example:
+        ```python
+        watcher = DepositWatcher(client)
+        watcher.attach(client.webhooks)
+
+        deposit = await client.crypto.deposits.create(...)
+        watcher.watch(deposit.deposit_id, kind="crypto", expires_at=deposit.expires_at)
+
+        async for transition in watcher.stream():
+            print(f"{transition.deposit_id}: {transition.status}")
+        ```
+    """
+
+    def __init__(
+        self,
+        client: "KeshFlipClient",
+        min_interval: float = 2.0,
+        max_interval: float = 60.0,
+        expiry_fraction: float = 0.1,
+        backoff: float = 1.5,
+        expiry_grace: float = 5.0,
+        sweep_threshold: int = 5,
+        sweep_limit: int = 500,
+        coalesce_window: float = 0.5,
+        max_concurrency: int = 10,
+    ):
+        """
+        Initialize deposit watcher
+
+        Args:
+            client: KeshFlip client used for polling
+            min_interval: Shortest delay between polls of a deposit in seconds
+            max_interval: Longest delay between polls of a deposit in seconds
+            expiry_fraction: Share of the remaining lifetime to wait between polls
+            backoff: Interval growth factor for deposits without expiry
+            expiry_grace: Seconds after ``expires_at`` for the final poll
+            sweep_threshold: Due deposits of one kind that trigger a listing sweep
+            sweep_limit: ``limit`` passed to the listing call of a sweep
+            coalesce_window: Polls due within this many seconds run together
+                (capped at half of ``min_interval``)
+            max_concurrency: Maximum concurrent individual ``get`` calls
+        """
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.expiry_fraction = expiry_fraction
+        self.backoff = backoff
+        self.expiry_grace = expiry_grace
+        self.sweep_threshold = sweep_threshold
+        self.sweep_limit = sweep_limit
+        # Coalescing must not pull a deposit's next poll in before it is due
+        self.coalesce_window = min(coalesce_window, min_interval / 2)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self._watched: Dict[str, _Watched] = {}
+        self._heap: List[Tuple[float, int, str, int]] = []
+        self._seq = 0
+        self._transitions: "asyncio.Queue[DepositTransition]" = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task] = None
+        self._inflight: Set[asyncio.Task] = set()
+
+        # Counters
+        self.polls = 0
+        self.sweeps = 0
+        self.poll_errors = 0
+        self.webhook_updates = 0
+
+    def __len__(self) -> int:
+        return len(self._watched)
+
+    def watch(
+        self,
+        deposit_id: str,
+        kind: str = CRYPTO,
+        expires_at: Optional[str] = None,
+        status: str = DepositStatus.PENDING.value,
+    ):
+        """
+        Start watching a deposit
+
+        Args:
+            deposit_id: Deposit ID
+            kind: "crypto" or "fiat"
+            expires_at: Deposit expiry as ISO-8601 string (from the create response)
+            status: Last known status
+        """
+        if kind not in (CRYPTO, FIAT):
+            raise ValueError(f"kind must be '{CRYPTO}' or '{FIAT}'")
+        expiry = isoparse(expires_at).timestamp() if expires_at else None
+        self._watched[deposit_id] = _Watched(kind, _status_value(status), expiry)
+        self._idle.clear()
+        self._schedule(deposit_id, time.time())
+
+    def unwatch(self, deposit_id: str):
+        """
+        Stop watching a deposit
+
+        Args:
+            deposit_id: Deposit ID
+        """
+        self._watched.pop(deposit_id, None)
+        if not self._watched:
+            self._idle.set()
+
+    def attach(self, webhook_handler: "WebhookHandler"):
+        """
+        Apply deposit webhooks received by a handler to watched deposits
+
+        Args:
+            webhook_handler: WebhookHandler receiving KeshPay webhooks
+        """
+        webhook_handler.add_listener(self.on_webhook)
+
+    def on_webhook(self, event: WebhookEvent):
+        """
+        Apply a deposit webhook event
+
+        A deposit that receives a webhook is dropped from the poll schedule;
+        further updates for it are expected through webhooks.
+
+        Args:
+            event: Webhook event (non-deposit events are ignored)
+        """
+        kind = _WEBHOOK_KINDS.get(event.event)
+        deposit_id = event.data.get("depositId")
+        watched = self._watched.get(deposit_id)
+        if kind is None or watched is None or watched.kind != kind:
+            return
+        self.webhook_updates += 1
+        status = event.data.get("status")
+        if status:
+            self._apply(deposit_id, status, "webhook", event.data)
+        if deposit_id in self._watched:
+            # Invalidate the scheduled poll and stop rescheduling
+            watched.webhook = True
+            watched.token += 1
+
+    async def stream(
+        self, stop_when_idle: bool = True
+    ) -> AsyncIterator[DepositTransition]:
+        """
+        Yield status transitions of watched deposits
+
+        Args:
+            stop_when_idle: End the stream once no deposits are watched and all
+                transitions were yielded
+
+        Yields:
+            DepositTransition for every observed status change
+        """
+        self.start()
+        while True:
+            if not self._transitions.empty():
+                yield self._transitions.get_nowait()
+                continue
+            if stop_when_idle and not self._watched:
+                return
+
+            getter = asyncio.ensure_future(self._transitions.get())
+            waiters = {getter, self._task}
+            if stop_when_idle:
+                waiters.add(asyncio.ensure_future(self._idle.wait()))
+            try:
+                done, _ = await asyncio.wait(
+                    waiters, return_when=asyncio.FIRST_COMPLETED
+                )
+            finally:
+                for waiter in waiters:
+                    if waiter is not self._task and not waiter.done():
+                        waiter.cancel()
+
+            if getter in done:
+                yield getter.result()
+            elif self._task in done:
+                # Re-raise scheduler failures
+                self._task.result()
+
+    def start(self):
+        """Start the poll scheduler in the background if it is not running"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop the poll scheduler and cancel polls in progress"""
+        tasks = list(self._inflight)
+        if self._task is not None and not self._task.done():
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get watcher metrics
+
+        Returns:
+            Dictionary of watched deposits and poll counters
+        """
+        return {
+            "watched": len(self._watched),
+            "scheduled": len(self._heap),
+            "polls": self.polls,
+            "sweeps": self.sweeps,
+            "poll_errors": self.poll_errors,
+            "webhook_updates": self.webhook_updates,
+        }
+
+    async def _run(self):
+        while True:
+            due = self._pop_due()
+            if not due:
+                delay = self._heap[0][0] - time.time() if self._heap else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            by_kind: Dict[str, List[str]] = {}
+            for deposit_id in due:
+                by_kind.setdefault(self._watched[deposit_id].kind, []).append(
+                    deposit_id
+                )
+
+            # Polls run in the background so a slow call does not hold up the
+            # rest of the schedule; a deposit is rescheduled once its poll ends
+            for kind, deposit_ids in by_kind.items():
+                if len(deposit_ids) >= self.sweep_threshold:
+                    self._spawn(self._sweep(kind, deposit_ids))
+                else:
+                    for deposit_id in deposit_ids:
+                        self._spawn(self._poll(deposit_id))
+
+    def _spawn(self, coro):
+        task = asyncio.ensure_future(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    def _pop_due(self) -> List[str]:
+        horizon = time.time() + self.coalesce_window
+        due = []
+        while self._heap and self._heap[0][0] <= horizon:
+            _, _, deposit_id, token = heapq.heappop(self._heap)
+            watched = self._watched.get(deposit_id)
+            if watched is not None and watched.token == token:
+                due.append(deposit_id)
+        return due
+
+    def _schedule(self, deposit_id: str, now: float):
+        watched = self._watched[deposit_id]
+        if watched.webhook:
+            return
+        remaining = None
+        if watched.expires_at is not None:
+            remaining = watched.expires_at - now
+        if remaining is not None and remaining > 0:
+            # Poll more often as expiry approaches
+            interval = remaining * self.expiry_fraction
+        elif remaining is not None and remaining > -self.expiry_grace:
+            # Just expired: give the server a moment to mark it EXPIRED
+            interval = self.expiry_grace
+        elif not watched.interval:
+            interval = self.min_interval
+        else:
+            interval = watched.interval * self.backoff
+        interval = max(self.min_interval, min(self.max_interval, interval))
+
+        watched.interval = interval
+        watched.token += 1
+        self._seq += 1
+        heapq.heappush(
+            self._heap, (now + interval, self._seq, deposit_id, watched.token)
+        )
+        self._wakeup.set()
+
+    async def _poll(self, deposit_id: str):
+        watched = self._watched.get(deposit_id)
+        if watched is None:
+            return
+        resource = self._resource(watched.kind)
+        async with self._semaphore:
+            self.polls += 1
+            try:
+                response = await resource.get(deposit_id)
+            except KeshFlipError:
+                self.poll_errors += 1
+                response = None
+        if deposit_id not in self._watched:
+            return
+
+        data = response.get("data") if isinstance(response, dict) else None
+        if isinstance(data, dict) and data.get("status"):
+            self._apply(deposit_id, data["status"], "poll", data)
+        if deposit_id in self._watched:
+            self._schedule(deposit_id, time.time())
+
+    async def _sweep(self, kind: str, deposit_ids: List[str]):
+        self.sweeps += 1
+        try:
+            response = await self._resource(kind).list(
+                status=DepositStatus.PENDING.value, limit=self.sweep_limit
+            )
+        except KeshFlipError:
+            self.poll_errors += 1
+            await asyncio.gather(
+                *(self._poll(deposit_id) for deposit_id in deposit_ids)
+            )
+            return
+
+        items = response.get("data", []) if isinstance(response, dict) else []
+        pending: Set[str] = {_item_id(item) for item in items}
+
+        changed = []
+        now = time.time()
+        for deposit_id in deposit_ids:
+            if deposit_id not in self._watched:
+                continue
+            if deposit_id in pending:
+                self._schedule(deposit_id, now)
+            else:
+                # No longer pending (or beyond a truncated listing): fetch it;
+                # _poll bounds the gets in flight with the semaphore
+                changed.append(deposit_id)
+        await asyncio.gather(*(self._poll(deposit_id) for deposit_id in changed))
+
+    def _apply(self, deposit_id: str, status: str, source: str, data: dict):
+        watched = self._watched[deposit_id]
+        status = _status_value(status)
+        if status != watched.status:
+            self._transitions.put_nowait(
+                DepositTransition(
+                    deposit_id, watched.kind, watched.status, status, source, data
+                )
+            )
+            watched.status = status
+        if status in TERMINAL_STATUSES:
+            del self._watched[deposit_id]
+            if not self._watched:
+                self._idle.set()
+
+    def _resource(self, kind: str):
+        if kind == FIAT:
+            return self.client.fiat.deposits
+        return self.client.crypto.deposits
+
+
+def _item_id(item: dict) -> Optional[str]:
+    return item.get("id") or item.get("depositId") or item.get("_id")
+
+
+def _status_value(status) -> str:
+    return status.value if isinstance(status, DepositStatus) else str(status)
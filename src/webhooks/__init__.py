@@ -1,5 +1,14 @@
 """Webhook handling utilities"""
 from .handler import WebhookHandler
+from .server import KeyedSequencer, WebhookServer, entity_key
 from .validator import WebhookValidator
+from .workers import WebhookWorkerPool
 
-__all__ = ["WebhookHandler", "WebhookValidator"]
+__all__ = [
+    "KeyedSequencer",
+    "WebhookHandler",
+    "WebhookServer",
+    "WebhookValidator",
+    "WebhookWorkerPool",
+    "entity_key",
+]
@@ -1,6 +1,10 @@
 """Webhook event handler"""
+import asyncio
 import json
-from typing import Callable, Dict, Union
+import time
+from typing import Callable, Dict, List, Optional, Union
+from ..exceptions import WebhookValidationError
+from ..metrics import MetricsRegistry, SDKMetrics
 from ..models.common import WebhookEvent
 from .validator import WebhookValidator
 
@@ -8,15 +12,19 @@ from .validator import WebhookValidator
 class WebhookHandler:
     """Handles webhook events with routing and validation"""
 
-    def __init__(self, webhook_secret: str):
+    def __init__(self, webhook_secret: str, metrics: Optional[MetricsRegistry] = None):
         """
         Initialize webhook handler
 
         Args:
             webhook_secret: Partner's webhook secret for signature validation
+            metrics: Registry recording validation failures and handler
+                durations (optional)
         """
         self.validator = WebhookValidator(webhook_secret)
+        self._metrics = SDKMetrics(metrics) if metrics is not None else None
         self._handlers: Dict[str, Callable] = {}
+        self._listeners: List[Callable] = []
 
     def handler(self, event_type: str):
         """
@@ -58,6 +66,19 @@ class WebhookHandler:
         """
         self._handlers[event_type] = handler_func
 
+    def add_listener(self, listener_func: Callable):
+        """
+        Register a listener called for every handled event
+
+        Listeners run before the event's registered handler and do not replace
+        it, so SDK components (e.g. DepositWatcher) can observe webhooks
+        alongside application handlers.
+
+        Args:
+            listener_func: Function receiving the WebhookEvent (sync or async)
+        """
+        self._listeners.append(listener_func)
+
     async def handle(
         self,
         payload: Union[str, bytes, dict],
@@ -91,36 +112,87 @@ class WebhookHandler:
                 return {"success": True}
             ```
         """
+        event = self.parse(payload, signature=signature, validate=validate)
+        await self.dispatch(event)
+        return event
+
+    def parse(
+        self,
+        payload: Union[str, bytes, dict],
+        signature: str = None,
+        validate: bool = True,
+    ) -> WebhookEvent:
+        """
+        Validate and parse a webhook payload without running handlers
+
+        Args:
+            payload: Webhook payload (string, bytes, or dict)
+            signature: Webhook signature for validation
+            validate: Whether to validate signature
+
+        Returns:
+            WebhookEvent object
+
+        Raises:
+            WebhookValidationError: If signature validation fails
+        """
+        metrics = self._metrics
+
         # Validate signature if requested
         if validate and signature:
             if isinstance(payload, dict):
                 payload_str = json.dumps(payload)
             else:
                 payload_str = payload
-            self.validator.validate_signature(payload_str, signature)
+            try:
+                self.validator.validate_signature(payload_str, signature)
+            except WebhookValidationError:
+                if metrics is not None:
+                    metrics.webhook_failures.labels("signature").inc()
+                raise
+
+        # Parse payload and create event object
+        try:
+            if isinstance(payload, (str, bytes)):
+                event_data = json.loads(payload)
+            else:
+                event_data = payload
+            return WebhookEvent(**event_data)
+        except Exception:
+            if metrics is not None:
+                metrics.webhook_failures.labels("payload").inc()
+            raise
+
+    async def dispatch(self, event: WebhookEvent):
+        """
+        Run listeners and the registered handler for a parsed event
 
-        # Parse payload
-        if isinstance(payload, (str, bytes)):
-            event_data = json.loads(payload)
-        else:
-            event_data = payload
+        Args:
+            event: Event returned by ``parse``
+        """
+        start = time.perf_counter()
 
-        # Create event object
-        event = WebhookEvent(**event_data)
+        # Notify listeners
+        for listener in self._listeners:
+            if asyncio.iscoroutinefunction(listener):
+                await listener(event)
+            else:
+                listener(event)
 
         # Route to handler if registered
         if event.event in self._handlers:
             handler = self._handlers[event.event]
             if callable(handler):
                 # Call handler (supports both sync and async)
-                import asyncio
-
                 if asyncio.iscoroutinefunction(handler):
                     await handler(event)
                 else:
                     handler(event)
 
-        return event
+        if self._metrics is not None:
+            self._metrics.webhook_duration.labels(event.event).observe(
+                time.perf_counter() - start
+            )
 
     def get_handlers(self) -> Dict[str, Callable]:
         """
@@ -130,3 +202,12 @@ class WebhookHandler:
             Dictionary of event types and their handlers
         """
         return self._handlers.copy()
+
+    def get_listeners(self) -> List[Callable]:
+        """
+        Get all registered listeners
+
+        Returns:
+            Listeners in registration order
+        """
+        return list(self._listeners)
@@ -0,0 +1,321 @@
+"""HTTP receiver delivering webhook requests to a WebhookHandler"""
+import asyncio
+import json
+import zlib
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from ..exceptions import WebhookValidationError
+from ..models.common import WebhookEvent
+from .handler import WebhookHandler
+
+# Event data fields naming the entity an event belongs to, in lookup order
+ENTITY_FIELDS = ("depositId", "withdrawalId", "id")
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def entity_key(event: WebhookEvent) -> Optional[str]:
+    """
+    Entity an event belongs to
+
+    Args:
+        event: Parsed webhook event
+
+    Returns:
+        The deposit or withdrawal ID in the event data, or None
+    """
+    for field in ENTITY_FIELDS:
+        value = event.data.get(field)
+        if value is not None:
+            return str(value)
+    return None
+
+
+def shard_for(key: str, shards: int) -> int:
+    """
+    Shard owning an entity key
+
+    Uses CRC-32 rather than ``hash()``, which is salted per process, so every
+    worker process maps a key to the same shard.
+
+    Args:
+        key: Entity key
+        shards: Number of shards
+
+    Returns:
+        Shard index in ``range(shards)``
+    """
+    return zlib.crc32(key.encode()) % shards
+
+
+class KeyedSequencer:
+    """
+    Runs calls one at a time per key, in the order they were submitted
+
+    Calls with different keys (or no key) run concurrently.
+    """
+
+    def __init__(self):
+        """Initialize keyed sequencer"""
+        self._tails: Dict[str, asyncio.Future] = {}
+
+    async def run(self, key: Optional[str], func: Callable[..., Awaitable], *args):
+        """
+        Run ``func(*args)`` after every earlier call with the same key
+
+        Args:
+            key: Ordering key (None runs the call right away)
+            func: Coroutine function
+            *args: Arguments for ``func``
+
+        Returns:
+            Result of ``func``
+        """
+        if key is None:
+            return await func(*args)
+        previous = self._tails.get(key)
+        done = asyncio.get_running_loop().create_future()
+        self._tails[key] = done
+        try:
+            if previous is not None:
+                await asyncio.shield(previous)
+            return await func(*args)
+        finally:
+            if previous is None or previous.done():
+                done.set_result(None)
+            else:
+                # Cancelled while waiting: keep later calls behind ``previous``
+                previous.add_done_callback(lambda _: done.set_result(None))
+            done.add_done_callback(lambda _: self._release(key, done))
+
+    def pending(self) -> int:
+        """Number of keys with a call running or waiting"""
+        return len(self._tails)
+
+    def _release(self, key: str, done: asyncio.Future):
+        if self._tails.get(key) is done:
+            del self._tails[key]
+
+
+class WebhookServer:
+    """
+    Minimal HTTP/1.1 receiver for webhook POSTs
+
+    Each request is verified and parsed by the handler, then dispatched with
+    events for the same entity (see ``key``) running one at a time in arrival
+    order. Responses are 200 once the handler has finished, 401 for a missing
+    or invalid signature, 400 for an unparsable payload and 500 if the
+    handler raised, so the sender retries events that were not processed.
+
+    Example:
+        ```python
+        handler = WebhookHandler(webhook_secret)
+
+        @handler.handler("crypto.deposit.updated")
+        async def on_deposit(event):
+            ...
+
+        async with WebhookServer(handler, path="/webhooks/keshpay") as server:
+            await server.start(host="0.0.0.0", port=8080)
+            await asyncio.Event().wait()
+        ```
+    """
+
+    def __init__(
+        self,
+        handler: WebhookHandler,
+        path: str = "/webhooks",
+        key: Optional[Callable[[WebhookEvent], Optional[str]]] = entity_key,
+        max_body: int = 1024 * 1024,
+    ):
+        """
+        Initialize webhook server
+
+        Args:
+            handler: Handler verifying and dispatching events
+            path: Request path webhooks are POSTed to
+            key: Function returning the ordering key of an event (None
+                dispatches every event concurrently)
+            max_body: Largest accepted request body in bytes
+        """
+        self.handler = handler
+        self.path = path
+        self.key = key
+        self.max_body = max_body
+        self.host: Optional[str] = None
+        self.port: Optional[int] = None
+        self._sequencer = KeyedSequencer()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+        # Counters
+        self.requests = 0
+        self.handled = 0
+        self.rejected = 0
+        self.failed = 0
+
+    async def start(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        sock=None,
+        reuse_port: bool = False,
+    ):
+        """
+        Start accepting connections
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            sock: Already bound socket to serve instead of ``host``/``port``
+            reuse_port: Bind with SO_REUSEPORT so several processes can
+                listen on the same port
+        """
+        if sock is not None:
+            self._server = await asyncio.start_server(self._serve_connection, sock=sock)
+        else:
+            self._server = await asyncio.start_server(
+                self._serve_connection, host, port, reuse_port=reuse_port or None
+            )
+        self.host, self.port = self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        """Stop accepting connections and close open ones"""
+        if self._server is None:
+            return
+        self._server.close()
+        # Closing the transport ends each connection's read loop
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*self._connections.values(), return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def deliver(
+        self, payload: bytes, signature: Optional[str]
+    ) -> Tuple[int, dict]:
+        """
+        Verify, parse and dispatch one webhook request body
+
+        Args:
+            payload: Raw request body
+            signature: Value of the X-Signature header
+
+        Returns:
+            Tuple of (HTTP status, response JSON)
+        """
+        if not signature:
+            self.rejected += 1
+            return 401, {"error": "Missing X-Signature header"}
+        try:
+            event = self.handler.parse(payload, signature=signature)
+        except WebhookValidationError:
+            self.rejected += 1
+            return 401, {"error": "Invalid webhook signature"}
+        except Exception:
+            self.rejected += 1
+            return 400, {"error": "Invalid webhook payload"}
+        key = self.key(event) if self.key is not None else None
+        status = await self._route(key, event, payload)
+        if status != 200:
+            return status, {"error": _REASONS.get(status, "Error")}
+        return 200, {"success": True}
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get receiver metrics
+
+        Returns:
+            Dictionary of requests, events handled, requests rejected (bad
+            signature or payload), handler failures and keys in progress
+        """
+        return {
+            "requests": self.requests,
+            "handled": self.handled,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "keys_in_progress": self._sequencer.pending(),
+        }
+
+    async def _route(self, key: Optional[str], event: WebhookEvent, payload: bytes):
+        return await self._sequencer.run(key, self._dispatch, event)
+
+    async def _dispatch(self, event: WebhookEvent) -> int:
+        try:
+            await self.handler.dispatch(event)
+        except Exception:
+            self.failed += 1
+            return 500
+        self.handled += 1
+        return 200
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                if length > self.max_body:
+                    self._write(writer, 413, {"error": _REASONS[413]}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                self.requests += 1
+                if target.split("?", 1)[0] != self.path:
+                    status, data = 404, {"error": _REASONS[404]}
+                elif method != "POST":
+                    status, data = 405, {"error": _REASONS[405]}
+                else:
+                    status, data = await self.deliver(body, headers.get("x-signature"))
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._write(writer, status, data, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, data: dict, keep_alive: bool):
+        body = json.dumps(data).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n".encode()
+            + b"Content-Type: application/json\r\n"
+            + f"Content-Length: {len(body)}\r\n".encode()
+            + (
+                b"Connection: keep-alive\r\n\r\n"
+                if keep_alive
+                else b"Connection: close\r\n\r\n"
+            )
+            + body
+        )
@@ -0,0 +1,461 @@
+"""Supervised multi-process webhook receiver"""
+import asyncio
+import multiprocessing
+import os
+import pickle
+import queue
+import shutil
+import signal
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from ..eventloop import AUTO, resolve_loop, run
+from ..models.common import WebhookEvent
+from .handler import WebhookHandler
+from .server import WebhookServer, entity_key, shard_for
+
+_FRAME = struct.Struct("!I")
+_STATUS = struct.Struct("!H")
+
+
+class _WorkerSpec(NamedTuple):
+    """Everything a worker process needs to build its receiver"""
+
+    webhook_secret: str
+    handlers: Dict[str, Callable]
+    listeners: List[Callable]
+    setup: Optional[Callable[[WebhookHandler], None]]
+    path: str
+    key: Optional[Callable[[WebhookEvent], Optional[str]]]
+    shards: int
+    socket_dir: Optional[str]
+    host: str
+    port: int
+    reuse_port: bool
+    loop: str
+
+
+class WebhookWorkerPool:
+    """
+    Webhook receiver running in several supervised worker processes
+
+    Signature verification, JSON parsing and event construction are CPU work,
+    so one process serves at most one core's worth of webhooks. The pool
+    starts ``workers`` processes that accept connections on one port, either
+    each binding it with SO_REUSEPORT (Linux, the default where available)
+    or all sharing one listening socket created by the parent. Every worker
+    builds its own WebhookHandler from the secret and the registrations
+    passed to the pool, which are pickled into the worker; handlers and
+    listeners must therefore be module-level functions (or ``setup``, a
+    module-level function or ``functools.partial`` registering them).
+
+    The kernel spreads connections over workers without regard to their
+    content. With ``key`` set, every entity key (by default the deposit or
+    withdrawal ID) is owned by one worker: a worker receiving another
+    worker's event verifies it, passes it to the owner over a Unix socket
+    and answers the sender once the owner has handled it. Events for one
+    entity are therefore handled in one process, one at a time, in the order
+    they arrived. Workers that exit are restarted by a supervisor thread;
+    while an owner restarts, its events are answered with 503 so the sender
+    retries them.
+
+    Example:
+        ```python
+        # handlers.py
+        async def on_deposit(event):
+            ...
+
+        # main.py (workers import it again, hence the __main__ guard)
+        if __name__ == "__main__":
+            pool = WebhookWorkerPool(
+                webhook_secret,
+                handlers={"crypto.deposit.updated": handlers.on_deposit},
+                workers=4,
+                host="0.0.0.0",
+                port=8080,
+            )
+            pool.run()  # until SIGINT or SIGTERM
+        ```
+    """
+
+    def __init__(
+        self,
+        webhook_secret: str,
+        handlers: Optional[Dict[str, Callable]] = None,
+        listeners: Optional[List[Callable]] = None,
+        setup: Optional[Callable[[WebhookHandler], None]] = None,
+        workers: Optional[int] = None,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        path: str = "/webhooks",
+        key: Optional[Callable[[WebhookEvent], Optional[str]]] = entity_key,
+        reuse_port: Optional[bool] = None,
+        loop: str = AUTO,
+        start_method: str = "spawn",
+        restart_delay: float = 0.5,
+        ready_timeout: float = 30.0,
+    ):
+        """
+        Initialize webhook worker pool
+
+        Args:
+            webhook_secret: Partner's webhook secret for signature validation
+            handlers: Event type to module-level handler function
+            listeners: Module-level functions called for every event
+            setup: Module-level function called with each worker's
+                WebhookHandler to register handlers (optional)
+            workers: Worker processes (CPU count if None)
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port)
+            path: Request path webhooks are POSTed to
+            key: Module-level function returning the entity key of an event
+                (None disables routing and per-entity ordering)
+            reuse_port: Bind each worker with SO_REUSEPORT (default: if the
+                platform supports it); otherwise workers share one socket
+            loop: Workers' event loop: "auto" (uvloop if installed),
+                "uvloop" or "asyncio"
+            start_method: multiprocessing start method for workers
+            restart_delay: Seconds to wait before restarting a dead worker
+            ready_timeout: Seconds ``start`` waits for workers to listen
+        """
+        self.webhook_secret = webhook_secret
+        self.handlers = dict(handlers or {})
+        self.listeners = list(listeners or [])
+        self.setup = setup
+        self.workers = workers or os.cpu_count() or 1
+        self.host = host
+        self.port = port
+        self.path = path
+        self.key = key
+        self.reuse_port = (
+            hasattr(socket, "SO_REUSEPORT") if reuse_port is None else reuse_port
+        )
+        self.loop = loop
+        self.restart_delay = restart_delay
+        self.ready_timeout = ready_timeout
+        self._context = multiprocessing.get_context(start_method)
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = []
+        self._socket: Optional[socket.socket] = None
+        self._socket_dir: Optional[str] = None
+        self._ready = None
+        self._stopping = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+        # Counters
+        self.restarts = 0
+
+    @classmethod
+    def from_handler(cls, handler: WebhookHandler, **kwargs) -> "WebhookWorkerPool":
+        """
+        Create a pool serving the registrations of an existing handler
+
+        Args:
+            handler: Handler whose secret, handlers and listeners to ship
+            **kwargs: Other WebhookWorkerPool arguments
+
+        Returns:
+            WebhookWorkerPool (not started)
+        """
+        return cls(
+            handler.validator.webhook_secret,
+            handlers=handler.get_handlers(),
+            listeners=handler.get_listeners(),
+            **kwargs,
+        )
+
+    def start(self):
+        """
+        Bind the port and start the workers
+
+        Raises:
+            ValueError: A handler, listener, ``setup`` or ``key`` cannot be
+                shipped to worker processes
+            ImportError: ``loop="uvloop"`` but uvloop is not installed
+            RuntimeError: Workers did not start listening in time
+        """
+        resolve_loop(self.loop)
+        spec = self._spec()
+        try:
+            pickle.dumps(spec)
+        except Exception as e:
+            raise ValueError(
+                "Webhook handlers, listeners, setup and key must be picklable "
+                "module-level functions to run in worker processes"
+            ) from e
+
+        self._socket = socket.socket(
+            socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        )
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reuse_port:
+            # Holds the port; only the workers' sockets listen
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._socket.bind((self.host, self.port))
+        if not self.reuse_port:
+            self._socket.listen(1024)
+        self.port = self._socket.getsockname()[1]
+        if spec.shards > 1:
+            self._socket_dir = tempfile.mkdtemp(prefix="keshflip-webhooks-")
+        spec = self._spec()
+
+        self._ready = self._context.Queue()
+        self._stopping.clear()
+        self._processes = [self._spawn(index, spec) for index in range(self.workers)]
+        deadline = time.monotonic() + self.ready_timeout
+        started = 0
+        while started < self.workers:
+            try:
+                self._ready.get(timeout=0.1)
+                started += 1
+            except queue.Empty:
+                exited = any(not p.is_alive() for p in self._processes)
+                if exited or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(
+                        f"{self.workers - started} webhook workers did not start"
+                    ) from None
+
+        self._supervisor = threading.Thread(
+            target=self._supervise, args=(spec,), daemon=True
+        )
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        Stop the workers and release the port
+
+        Workers stop accepting connections and finish the requests they are
+        handling; workers still running after ``timeout`` are killed.
+
+        Args:
+            timeout: Seconds to wait for workers to exit
+        """
+        self._stopping.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+            self._supervisor = None
+        processes = [p for p in self._processes if p is not None]
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+        self._processes = []
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if self._socket_dir is not None:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+            self._socket_dir = None
+
+    def run(self):
+        """Start the workers and serve until SIGINT or SIGTERM"""
+        stop = threading.Event()
+        previous = signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        self.start()
+        try:
+            while not stop.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+            self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Get worker pool metrics
+
+        Returns:
+            Dictionary of configured and live workers, restarts, the port,
+            whether workers bind with SO_REUSEPORT and their event loop
+        """
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self._processes if p is not None and p.is_alive()),
+            "restarts": self.restarts,
+            "port": self.port,
+            "reuse_port": self.reuse_port,
+            "loop": resolve_loop(self.loop),
+        }
+
+    def _spec(self) -> _WorkerSpec:
+        return _WorkerSpec(
+            webhook_secret=self.webhook_secret,
+            handlers=self.handlers,
+            listeners=self.listeners,
+            setup=self.setup,
+            path=self.path,
+            key=self.key,
+            shards=self.workers if self.key is not None else 1,
+            socket_dir=self._socket_dir,
+            host=self.host,
+            port=self.port,
+            reuse_port=self.reuse_port,
+            loop=self.loop,
+        )
+
+    def _spawn(self, index: int, spec: _WorkerSpec):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, spec, None if self.reuse_port else self._socket, self._ready),
+            name=f"keshflip-webhooks-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _supervise(self, spec: _WorkerSpec):
+        died_at: Dict[int, float] = {}
+        while not self._stopping.wait(0.1):
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                now = time.monotonic()
+                if died_at.setdefault(index, now) + self.restart_delay > now:
+                    continue
+                del died_at[index]
+                process.join()
+                self.restarts += 1
+                self._processes[index] = self._spawn(index, spec)
+
+
+def _worker_main(index: int, spec: _WorkerSpec, sock, ready):
+    # Interrupts go to the parent, which stops workers with SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    run(_serve_worker(index, spec, sock, ready), loop=spec.loop)
+
+
+async def _serve_worker(index: int, spec: _WorkerSpec, sock, ready):
+    handler = WebhookHandler(spec.webhook_secret)
+    for event_type, handler_func in spec.handlers.items():
+        handler.register_handler(event_type, handler_func)
+    for listener in spec.listeners:
+        handler.add_listener(listener)
+    if spec.setup is not None:
+        spec.setup(handler)
+
+    if spec.shards > 1:
+        server = _ShardServer(handler, spec, index)
+        await server.start_peer_listener()
+    else:
+        server = WebhookServer(handler, spec.path, key=spec.key)
+    if sock is not None:
+        await server.start(sock=sock)
+    else:
+        await server.start(spec.host, spec.port, reuse_port=True)
+
+    stop = asyncio.Event()
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+    ready.put(index)
+    await stop.wait()
+    await server.stop()
+
+
+class _ShardServer(WebhookServer):
+    """Worker receiver passing events it does not own to the owning worker"""
+
+    def __init__(self, handler: WebhookHandler, spec: _WorkerSpec, index: int):
+        super().__init__(handler, spec.path, key=spec.key)
+        self.index = index
+        self.shards = spec.shards
+        self.socket_dir = spec.socket_dir
+        self._peer_server: Optional[asyncio.AbstractServer] = None
+        self._peers: Dict[int, List[Tuple]] = {}
+
+        # Counters
+        self.forwarded = 0
+        self.received = 0
+
+    async def start_peer_listener(self):
+        """Listen for events forwarded by other workers"""
+        path = self._peer_path(self.index)
+        if os.path.exists(path):
+            os.unlink(path)
+        self._peer_server = await asyncio.start_unix_server(self._serve_peer, path)
+
+    async def stop(self):
+        if self._peer_server is not None:
+            self._peer_server.close()
+            self._peer_server = None
+        # Also ends connections from other workers, which answer their
+        # senders with 503
+        await super().stop()
+        for connections in self._peers.values():
+            for _, writer in connections:
+                writer.close()
+        self._peers.clear()
+
+    async def _route(self, key: Optional[str], event: WebhookEvent, payload: bytes):
+        if key is None:
+            return await super()._route(key, event, payload)
+        owner = shard_for(key, self.shards)
+        if owner == self.index:
+            return await super()._route(key, event, payload)
+        self.forwarded += 1
+        return await self._forward(owner, payload)
+
+    async def _forward(self, owner: int, payload: bytes) -> int:
+        connections = self._peers.setdefault(owner, [])
+        while True:
+            pooled = bool(connections)
+            try:
+                if pooled:
+                    reader, writer = connections.pop()
+                else:
+                    reader, writer = await asyncio.open_unix_connection(
+                        self._peer_path(owner)
+                    )
+                writer.write(_FRAME.pack(len(payload)) + payload)
+                await writer.drain()
+                (status,) = _STATUS.unpack(await reader.readexactly(_STATUS.size))
+            except (OSError, asyncio.IncompleteReadError):
+                if pooled:
+                    # The owner restarted since this connection was opened
+                    writer.close()
+                    continue
+                # The owner is restarting: the sender retries later
+                return 503
+            connections.append((reader, writer))
+            return status
+
+    async def _serve_peer(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                (length,) = _FRAME.unpack(await reader.readexactly(_FRAME.size))
+                payload = await reader.readexactly(length)
+                self.received += 1
+                try:
+                    # Verified by the worker that received the request
+                    event = self.handler.parse(payload, validate=False)
+                except Exception:
+                    status = 400
+                else:
+                    status = await super()._route(self.key(event), event, payload)
+                writer.write(_STATUS.pack(status))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._connections.pop(writer, None)
+            writer.close()
+
+    def _peer_path(self, index: int) -> str:
+        return os.path.join(self.socket_dir, f"worker-{index}.sock")
@@ -0,0 +1,61 @@
+"""Shared fixtures: a mock KeshPay server and clients wired to it"""
+import httpx
+import pytest
+
+from src import KeshFlipClient
+from src.testing import MockKeshPayServer
+
+PARTNER_ID = "test_partner"
+API_KEY = "test_key"
+API_SECRET = "test_secret"
+BASE_URL = "http://mock.keshpay.local"
+
+
+@pytest.fixture
+def server() -> MockKeshPayServer:
+    server = MockKeshPayServer()
+    server.add_partner(PARTNER_ID, API_KEY, API_SECRET)
+    server.set_balance(PARTNER_ID, "1", "USDC", "1000")
+    return server
+
+
+@pytest.fixture
+async def make_client(server):
+    """Factory of clients talking to ``server`` in-process"""
+    http_clients = []
+
+    def make(**options) -> KeshFlipClient:
+        http_client = httpx.AsyncClient(
+            base_url=BASE_URL,
+            transport=server.transport(),
+            headers={"Content-Type": "application/json"},
+        )
+        http_clients.append(http_client)
+        return KeshFlipClient(
+            API_KEY,
+            API_SECRET,
+            base_url=BASE_URL,
+            partner_id=PARTNER_ID,
+            http_client=http_client,
+            **options,
+        )
+
+    yield make
+    for http_client in http_clients:
+        await http_client.aclose()
+
+
+@pytest.fixture
+def client(make_client) -> KeshFlipClient:
+    return make_client()
+
+
+@pytest.fixture
+async def tcp_client(server):
+    """Client talking to ``server`` over local TCP (timeouts apply)"""
+    async with server:
+        client = KeshFlipClient(
+            API_KEY, API_SECRET, base_url=server.url, partner_id=PARTNER_ID
+        )
+        yield client
+        await client.close()
@@ -0,0 +1,130 @@
+"""Micro-batching, its fallback to single calls and abandoned futures"""
+import asyncio
+import gc
+
+import pytest
+
+from src.batching import MicroBatchPolicy
+from src.exceptions import APIError, DeadlineExceededError
+from src.resilience.deadline import request_deadline, wait_within
+
+BATCH_PATH = "/api/v1/batch"
+
+
+@pytest.fixture
+async def loop_errors():
+    """Messages the event loop would log, e.g. unretrieved exceptions"""
+    errors = []
+    loop = asyncio.get_running_loop()
+    loop.set_exception_handler(lambda _, context: errors.append(context["message"]))
+    yield errors
+    gc.collect()
+    loop.set_exception_handler(None)
+
+
+async def create_deposits(client, count: int, prefix: str = "b"):
+    return await asyncio.gather(
+        *(
+            client.crypto.deposits.create(
+                asset="USDC",
+                chain_id="1",
+                amount="1.00",
+                idempotency_key=f"{prefix}-{i}",
+            )
+            for i in range(count)
+        )
+    )
+
+
+async def test_batch_endpoint_is_opt_in(make_client, server):
+    client = make_client(micro_batching=MicroBatchPolicy(window=0.01))
+    assert len(await create_deposits(client, 5)) == 5
+    assert server.batched_requests == 0
+    assert client.batcher.stats()["single_calls"] == 5
+
+
+async def test_writes_are_batched(make_client, server):
+    policy = MicroBatchPolicy(window=0.01, batch_path=BATCH_PATH)
+    client = make_client(micro_batching=policy)
+    assert len(await create_deposits(client, 5)) == 5
+    assert server.batched_requests == 5
+    assert client.batcher.stats()["batches"] == 1
+
+
+@pytest.mark.parametrize("status", [404, 405, 410, 501])
+async def test_missing_batch_route_falls_back(make_client, server, status):
+    server.inject(error_rate=1.0, error_status=status, target=BATCH_PATH)
+    policy = MicroBatchPolicy(window=0.01, batch_path=BATCH_PATH)
+    client = make_client(micro_batching=policy)
+    deposits = await create_deposits(client, 5)
+    assert all(deposit.deposit_id for deposit in deposits)
+    assert client.batcher.batch_supported is False
+    assert client.batcher.stats()["single_calls"] == 5
+
+    # Later writes skip the batch endpoint
+    requests = server.requests
+    await create_deposits(client, 1, prefix="later")
+    assert server.requests == requests + 1
+
+
+@pytest.mark.parametrize("status", [401, 403])
+async def test_refused_batch_falls_back_once(make_client, server, status):
+    rule = server.inject(error_rate=1.0, error_status=status, target=BATCH_PATH)
+    policy = MicroBatchPolicy(window=0.01, batch_path=BATCH_PATH)
+    client = make_client(micro_batching=policy)
+    deposits = await create_deposits(client, 5)
+    assert all(deposit.deposit_id for deposit in deposits)
+    assert client.batcher.stats()["single_calls"] == 5
+    assert client.batcher.batch_supported is True
+
+    # Once the credentials are accepted again, calls are batched again
+    server.clear_faults(rule)
+    await create_deposits(client, 5, prefix="later")
+    assert client.batcher.stats()["batches"] == 1
+    assert server.batched_requests == 5
+
+
+async def test_batch_failure_reaches_every_caller(make_client, server, loop_errors):
+    server.inject(error_rate=1.0, error_status=500, target=BATCH_PATH)
+    policy = MicroBatchPolicy(window=0.01, batch_path=BATCH_PATH)
+    client = make_client(micro_batching=policy)
+    with pytest.raises(APIError):
+        await create_deposits(client, 3)
+    await client.batcher.drain()
+    assert client.batcher.batch_supported is True
+    assert loop_errors == []
+
+
+async def test_abandoned_reads_leave_no_unretrieved_exception(
+    make_client, server, loop_errors
+):
+    server.inject(
+        latency=0.02, error_rate=1.0, error_status=503, target="crypto.balances"
+    )
+    client = make_client(micro_batching=MicroBatchPolicy(window=0.001))
+
+    async def read():
+        with request_deadline(0.01):
+            await client.crypto.balances.get("1", "USDC")
+
+    results = await asyncio.gather(*(read() for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, DeadlineExceededError) for r in results)
+    await client.batcher.drain()
+    gc.collect()
+    assert loop_errors == []
+
+
+async def test_expired_deadline_cancels_future(loop_errors):
+    inner = asyncio.get_running_loop().create_future()
+    outer = asyncio.shield(inner)
+    with request_deadline(0):
+        with pytest.raises(DeadlineExceededError):
+            await wait_within(outer, "batching")
+    assert outer.cancelled()
+
+    # The shared call fails after every caller gave up
+    inner.set_exception(APIError("Batch failed"))
+    await asyncio.sleep(0)
+    del inner, outer
+    gc.collect()
+    assert loop_errors == []
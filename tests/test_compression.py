@@ -0,0 +1,18 @@
+"""Content encoding negotiation"""
+from src import compression
+
+
+def test_zstd_needs_httpx_support(monkeypatch):
+    monkeypatch.setattr(compression, "zstandard", object())
+    monkeypatch.setattr(compression, "_HTTPX_DECODES_ZSTD", False)
+    assert compression.ZSTD not in compression.available_encodings()
+    assert "zstd" not in compression.CompressionPolicy().accept_encoding
+
+    monkeypatch.setattr(compression, "_HTTPX_DECODES_ZSTD", True)
+    assert compression.available_encodings()[0] == compression.ZSTD
+
+
+def test_gzip_round_trip():
+    data = b'{"data": []}' * 100
+    packed = compression.compress(data, compression.GZIP)
+    assert compression.decompress(packed, compression.GZIP) == data
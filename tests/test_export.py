@@ -0,0 +1,34 @@
+"""File export"""
+import pytest
+
+from src.export import ArrowExportWriter, export_records
+
+pyarrow = pytest.importorskip("pyarrow")
+ipc = pytest.importorskip("pyarrow.ipc")
+
+KIND = "crypto.deposits"
+
+
+def deposit(i: int, amount: str) -> dict:
+    return {"id": f"d{i}", "amount": amount, "status": "PENDING"}
+
+
+async def test_amount_beyond_scale_names_record(tmp_path):
+    path = str(tmp_path / "deposits.arrow")
+    records = [deposit(0, "1.5"), deposit(1, "2"), deposit(2, "0.1234567890123456789")]
+    with pytest.raises(ValueError, match=r"'amount' of record 'd2' \(row 2\)"):
+        await export_records(records, KIND, path, batch_size=2)
+    # The first batch was written and the file is still readable
+    table = ipc.open_file(path).read_all()
+    assert [str(a) for a in table.column("amount").to_pylist()] == [
+        "1.500000000000000000",
+        "2.000000000000000000",
+    ]
+
+
+async def test_amount_scale_keeps_every_digit(tmp_path):
+    path = str(tmp_path / "deposits.arrow")
+    writer = ArrowExportWriter(path, amount_scale=19)
+    await export_records([deposit(0, "0.1234567890123456789")], KIND, writer)
+    table = ipc.open_file(path).read_all()
+    assert str(table.column("amount")[0]) == "0.1234567890123456789"
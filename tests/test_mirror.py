@@ -0,0 +1,80 @@
+"""Deposit mirror sync"""
+from src.mirror import DepositMirror, MemoryMirrorStore
+
+KIND = "crypto.deposits"
+
+
+async def create_deposits(client, server, count: int, start: int):
+    # One second apart so createdAt orders them unambiguously
+    for i in range(start, start + count):
+        response = await client.crypto.deposits.create(
+            asset="USDC", chain_id="1", amount="1.00", idempotency_key=f"dep-{i}"
+        )
+        record = server.crypto_deposits[response.deposit_id]
+        record["createdAt"] = f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}.000Z"
+        record["expiresAt"] = "2099-01-01T00:00:00.000Z"
+
+
+async def test_sync_advances_watermark(client, server):
+    mirror = DepositMirror(client, page_size=2, max_records=10)
+    await create_deposits(client, server, 3, start=0)
+    await mirror.sync([KIND])
+    assert mirror.store.get_watermark(KIND) == "2024-01-01T00:00:02.000Z"
+
+    await create_deposits(client, server, 4, start=3)
+    await mirror.sync([KIND])
+    assert mirror.store.get_watermark(KIND) == "2024-01-01T00:00:06.000Z"
+    assert mirror.store.size(KIND) == 7
+    assert mirror.stats()["gaps"] == 0
+
+
+async def test_truncated_sync_keeps_watermark(client, server):
+    mirror = DepositMirror(client, page_size=2, max_records=4)
+    await create_deposits(client, server, 2, start=0)
+    await mirror.sync([KIND])
+    watermark = mirror.store.get_watermark(KIND)
+
+    # More new deposits than one sync may read
+    await create_deposits(client, server, 6, start=2)
+    written = await mirror.sync([KIND])
+    assert written == {KIND: 4}
+    assert mirror.store.get_watermark(KIND) == watermark
+    assert mirror.stats()["gaps"] == 1
+
+    # A sync that reaches the watermark again closes the gap
+    mirror.max_records = 10
+    await mirror.sync([KIND])
+    assert mirror.store.get_watermark(KIND) == "2024-01-01T00:00:07.000Z"
+    assert mirror.store.size(KIND) == 8
+
+
+def deposit(i: int, second: int) -> dict:
+    return {
+        "depositId": f"d{i}",
+        "status": "PENDING",
+        "createdAt": f"2024-01-01T00:{second // 60:02d}:{second % 60:02d}.000Z",
+    }
+
+
+def test_memory_store_created_index():
+    store = MemoryMirrorStore()
+    # Backfill arrives newest first, one page at a time
+    store.upsert(KIND, [deposit(i, i) for i in range(9, 4, -1)])
+    store.upsert(KIND, [deposit(i, i) for i in range(4, -1, -1)])
+    ids = [r["depositId"] for r in store.query(KIND, limit=3)]
+    assert ids == ["d9", "d8", "d7"]
+
+    # Moving a record keeps one index entry at its new time
+    store.upsert(KIND, [deposit(0, 30), deposit(9, 9)])
+    store.upsert(KIND, [deposit(1, 1), deposit(1, 40), deposit(1, 1)])
+    ids = [r["depositId"] for r in store.query(KIND, limit=3)]
+    assert ids == ["d0", "d9", "d8"]
+    window = store.query(
+        KIND,
+        limit=20,
+        created_after="2024-01-01T00:00:01.000Z",
+        created_before="2024-01-01T00:00:04.000Z",
+    )
+    assert [r["depositId"] for r in window] == ["d3", "d2", "d1"]
+    assert store._created_index(KIND) == sorted(store._created_index(KIND))
+    assert len(store._created_index(KIND)) == 10
@@ -0,0 +1,63 @@
+"""Outbox delivery and its balance ledger reservations"""
+from decimal import Decimal
+
+import pytest
+
+from src.ledger import BalanceLedger
+from src.outbox import Outbox
+from src.outbox.store import DONE, FAILED
+
+ADDRESS = "0x742D35CC6634c0532925A3b844BC9E7595F0BEb0"
+
+
+@pytest.fixture
+async def ledger(client):
+    ledger = BalanceLedger(client)
+    await ledger.refresh()
+    return ledger
+
+
+async def withdraw(client, amount: str, **options) -> str:
+    async with Outbox(client, backoff=0.001, **options) as outbox:
+        key = outbox.enqueue(
+            "crypto.withdrawals",
+            asset="USDC",
+            chain_id="1",
+            amount=amount,
+            to_address=ADDRESS,
+        )
+        return await outbox.wait(key, timeout=5)
+
+
+async def test_withdrawal_is_reserved_on_ledger(client, server, ledger):
+    entry = await withdraw(client, "300")
+    assert entry.status == DONE
+    assert ledger.available("1", "USDC") == Decimal("700")
+    assert ledger.reserved == 1
+
+
+async def test_uncovered_withdrawal_is_not_sent(client, server, ledger):
+    requests = server.requests
+    entry = await withdraw(client, "5000")
+    assert entry.status == FAILED
+    assert "Insufficient USDC balance" in entry.error
+    assert server.requests == requests
+    assert ledger.available("1", "USDC") == Decimal("1000")
+
+
+async def test_rejected_withdrawal_is_released(client, server, ledger):
+    server.inject(error_rate=1.0, error_status=422, target="crypto.withdrawals")
+    entry = await withdraw(client, "300")
+    assert entry.status == FAILED
+    assert ledger.available("1", "USDC") == Decimal("1000")
+    assert ledger.released == 1
+
+
+async def test_retries_hold_one_reservation(client, server, ledger):
+    server.inject(error_rate=1.0, error_status=503, target="crypto.withdrawals")
+    entry = await withdraw(client, "300", max_attempts=3)
+    assert entry.status == FAILED
+    assert entry.attempts == 3
+    # The outcome is unknown after a 5xx: debited once, not once per attempt
+    assert ledger.reserved == 1
+    assert ledger.available("1", "USDC") == Decimal("700")
@@ -0,0 +1,20 @@
+"""Slow-request sampling"""
+from src import SlowRequestSampler
+
+
+async def test_close_stops_loop_lag_timer(make_client):
+    sampler = SlowRequestSampler(threshold=0.0)
+    client = make_client(sampler=sampler)
+    await client.crypto.balances.get("1", "USDC")
+    timer = sampler.loop_lag._timer
+    assert timer is not None and not timer.cancelled()
+
+    await client.close()
+    assert timer.cancelled()
+    assert sampler.loop_lag._timer is None
+
+    # A later sampled call starts the timer again
+    await client.crypto.balances.get("1", "USDC")
+    assert sampler.loop_lag._timer is not None
+    assert sampler.samples()[-1]["loop_lag_ms"] >= 0
+    sampler.stop()
@@ -0,0 +1,94 @@
+"""Streamed list responses"""
+import asyncio
+import time
+
+import pytest
+
+from src.exceptions import APIError, CircuitOpenError, DeadlineExceededError
+from src.resilience.circuit_breaker import CircuitBreakerRegistry
+from src.resilience.deadline import request_deadline
+from src.resilience.priority import PriorityScheduler
+
+
+async def create_deposits(client, count: int):
+    for i in range(count):
+        await client.crypto.deposits.create(
+            asset="USDC", chain_id="1", amount="1.00", idempotency_key=f"s-{i}"
+        )
+
+
+async def test_stream_yields_items_and_meta(client):
+    await create_deposits(client, 3)
+    stream = client.crypto.deposits.stream()
+    items = [item async for item in stream]
+    assert len(items) == 3
+    assert stream.meta["total"] == 3
+
+
+async def test_early_exit_releases_scheduler_slot(make_client):
+    scheduler = PriorityScheduler(max_concurrency=1)
+    client = make_client(scheduler=scheduler)
+    await create_deposits(client, 3)
+
+    async with client.crypto.deposits.stream() as stream:
+        async for _ in stream:
+            assert scheduler.stats()["in_flight"] == 1
+            break
+    assert scheduler.stats()["in_flight"] == 0
+
+    stream = client.crypto.deposits.stream()
+    async for _ in stream:
+        break
+    await stream.aclose()
+    assert scheduler.stats()["in_flight"] == 0
+
+
+async def test_stream_timeouts_follow_deadline(tcp_client, server):
+    server.inject(latency=1.0, target="crypto.deposits")
+    start = time.monotonic()
+    with request_deadline(0.1):
+        with pytest.raises(DeadlineExceededError):
+            async for _ in tcp_client.crypto.deposits.stream():
+                pass
+    assert time.monotonic() - start < 0.5
+
+
+async def test_stream_is_signed_after_scheduler_wait(make_client):
+    scheduler = PriorityScheduler(max_concurrency=1)
+    client = make_client(scheduler=scheduler)
+    await create_deposits(client, 2)
+    signed = []
+    sign = client.auth.get_auth_headers
+
+    def record_signing(*args):
+        signed.append(args)
+        return sign(*args)
+
+    client.auth.get_auth_headers = record_signing
+
+    async with client.crypto.deposits.stream() as first:
+        async for _ in first:
+            break
+        second = asyncio.ensure_future(consume(client.crypto.deposits.stream()))
+        await asyncio.sleep(0.05)
+        # Queued behind the open stream, and not signed yet
+        assert len(signed) == 1
+    assert await second == 2
+    assert len(signed) == 2
+
+
+async def test_stream_goes_through_circuit_breaker(make_client, server):
+    breakers = CircuitBreakerRegistry(minimum_calls=2, window_size=2)
+    client = make_client(circuit_breakers=breakers)
+    server.inject(error_rate=1.0, error_status=503, target="crypto.deposits")
+    for _ in range(2):
+        with pytest.raises(APIError):
+            await consume(client.crypto.deposits.stream())
+    requests = server.requests
+    with pytest.raises(CircuitOpenError):
+        await consume(client.crypto.deposits.stream())
+    assert server.requests == requests
+
+
+async def consume(stream) -> int:
+    return len([item async for item in stream])
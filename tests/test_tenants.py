@@ -0,0 +1,12 @@
+"""Multi-tenant credential registry"""
+from src.tenants import CredentialRegistry
+
+
+def test_register_burst_defaults():
+    registry = CredentialRegistry(default_rate_limit=10, default_burst=20)
+    assert registry.register("a", "key", "secret").rate_limiter.burst == 20
+    # An explicit burst is kept with the default rate limit
+    tenant = registry.register("b", "key", "secret", burst=5)
+    assert (tenant.rate_limiter.rate, tenant.rate_limiter.burst) == (10, 5)
+    # A tenant's own rate limit sizes its own bucket
+    assert registry.register("c", "key", "secret", rate_limit=3).rate_limiter.burst == 3
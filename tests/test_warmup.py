@@ -0,0 +1,20 @@
+"""Warm-up of models and clients"""
+import pytest
+
+from src.models.warmup import MODELS, _sample, warm_models
+
+
+def test_warm_models_prepares_every_model():
+    assert warm_models() == len(MODELS)
+
+
+@pytest.mark.parametrize("model", MODELS, ids=lambda model: model.__name__)
+def test_sample_passes_preflight_rules(model):
+    # Request models run the pre-flight address and customer number rules
+    model.model_validate(_sample(model))
+
+
+async def test_client_warmup(client):
+    timings = await client.warmup(connections=2)
+    assert timings["connections"] == 2
+    assert timings["total_seconds"] > 0
@@ -0,0 +1,33 @@
+"""Deposit watcher polling and sweeps"""
+import asyncio
+
+from src.watchers import DepositWatcher
+
+
+async def test_sweep_fetches_deposits_beyond_truncated_listing(client, server):
+    deposit_ids = []
+    for i in range(12):
+        response = await client.crypto.deposits.create(
+            asset="USDC", chain_id="1", amount="1.00", idempotency_key=f"w-{i}"
+        )
+        deposit_ids.append(response.deposit_id)
+
+    watcher = DepositWatcher(
+        client, min_interval=0.05, max_interval=0.2, sweep_threshold=5, sweep_limit=5
+    )
+    for deposit_id in deposit_ids:
+        watcher.watch(deposit_id)
+    # The oldest deposit is outside the newest-first listing of 5
+    await server.update_deposit(deposit_ids[0], "CONFIRMED")
+
+    async def first_transition():
+        async for transition in watcher.stream(stop_when_idle=False):
+            return transition
+
+    try:
+        transition = await asyncio.wait_for(first_transition(), timeout=2)
+    finally:
+        await watcher.stop()
+    assert transition.deposit_id == deposit_ids[0]
+    assert transition.status == "CONFIRMED"
+    assert watcher.stats()["sweeps"] >= 1